@@ -0,0 +1,39 @@
+"""Replace the reviews ivfflat embedding index with HNSW.
+
+The ivfflat index from 009 was built on an empty table, so its lists were
+never trained on real data; HNSW needs no training and keeps recall as rows
+are added.
+
+Revision ID: 022
+Revises: 021
+Create Date: 2024-12-02
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+revision: str = "022"
+down_revision: Union[str, None] = "021"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.execute(text("SET maintenance_work_mem = '512MB'"))
+        op.execute(text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reviews_embedding_hnsw ON reviews "
+            "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+        ))
+        op.execute(text("DROP INDEX CONCURRENTLY IF EXISTS idx_reviews_embedding"))
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reviews_embedding ON reviews "
+            "USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)"
+        ))
+        op.execute(text("DROP INDEX CONCURRENTLY IF EXISTS idx_reviews_embedding_hnsw"))
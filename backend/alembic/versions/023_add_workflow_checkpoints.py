@@ -0,0 +1,67 @@
+"""Add durable LangGraph checkpoint tables for the multi-agent workflow.
+
+Revision ID: 023
+Revises: 022
+Create Date: 2024-12-03
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "023"
+down_revision: Union[str, None] = "022"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "workflow_checkpoints",
+        sa.Column("thread_id", sa.String(), nullable=False),
+        sa.Column("checkpoint_ns", sa.String(), nullable=False, server_default=""),
+        sa.Column("checkpoint_id", sa.String(), nullable=False),
+        sa.Column("parent_checkpoint_id", sa.String(), nullable=True),
+        sa.Column("type", sa.String(32), nullable=False),
+        sa.Column("checkpoint", sa.LargeBinary(), nullable=False),
+        sa.Column("metadata_type", sa.String(32), nullable=False),
+        sa.Column("metadata", sa.LargeBinary(), nullable=False),
+        sa.Column("channel_versions", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("thread_id", "checkpoint_ns", "checkpoint_id"),
+    )
+    op.create_index("idx_workflow_checkpoints_created_at", "workflow_checkpoints", ["created_at"])
+
+    op.create_table(
+        "workflow_checkpoint_blobs",
+        sa.Column("thread_id", sa.String(), nullable=False),
+        sa.Column("checkpoint_ns", sa.String(), nullable=False, server_default=""),
+        sa.Column("channel", sa.String(), nullable=False),
+        sa.Column("version", sa.String(), nullable=False),
+        sa.Column("type", sa.String(32), nullable=False),
+        sa.Column("blob", sa.LargeBinary(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("thread_id", "checkpoint_ns", "channel", "version"),
+    )
+
+    op.create_table(
+        "workflow_checkpoint_writes",
+        sa.Column("thread_id", sa.String(), nullable=False),
+        sa.Column("checkpoint_ns", sa.String(), nullable=False, server_default=""),
+        sa.Column("checkpoint_id", sa.String(), nullable=False),
+        sa.Column("task_id", sa.String(), nullable=False),
+        sa.Column("idx", sa.Integer(), nullable=False),
+        sa.Column("channel", sa.String(), nullable=False),
+        sa.Column("type", sa.String(32), nullable=False),
+        sa.Column("blob", sa.LargeBinary(), nullable=True),
+        sa.Column("task_path", sa.String(), nullable=False, server_default=""),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("workflow_checkpoint_writes")
+    op.drop_table("workflow_checkpoint_blobs")
+    op.drop_index("idx_workflow_checkpoints_created_at")
+    op.drop_table("workflow_checkpoints")
@@ -0,0 +1,62 @@
+"""Add hourly LLM call rollups and the raw call archive.
+
+Revision ID: 024
+Revises: 023
+Create Date: 2024-12-05
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "024"
+down_revision: Union[str, None] = "023"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_call_hourly_rollups",
+        sa.Column("hour", sa.DateTime(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False, server_default=""),
+        sa.Column("provider", sa.String(50), nullable=False),
+        sa.Column("model", sa.String(100), nullable=False),
+        sa.Column("call_type", sa.String(50), nullable=False),
+        sa.Column("status", sa.String(50), nullable=False),
+        sa.Column("call_count", sa.Integer(), nullable=False),
+        sa.Column("prompt_tokens", sa.BigInteger(), nullable=False),
+        sa.Column("completion_tokens", sa.BigInteger(), nullable=False),
+        sa.Column("total_tokens", sa.BigInteger(), nullable=False),
+        sa.Column("estimated_cost", sa.Float(), nullable=False),
+        sa.Column("latency_count", sa.Integer(), nullable=False),
+        sa.Column("latency_sum_ms", sa.BigInteger(), nullable=False),
+        sa.Column("latency_min_ms", sa.Integer(), nullable=True),
+        sa.Column("latency_max_ms", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("hour", "user_id", "provider", "model", "call_type", "status"),
+    )
+    op.create_index("idx_llm_rollup_user_hour", "llm_call_hourly_rollups", ["user_id", "hour"])
+
+    op.create_table(
+        "llm_call_archive",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=True),
+        sa.Column("provider", sa.String(50), nullable=False),
+        sa.Column("model", sa.String(100), nullable=False),
+        sa.Column("call_type", sa.String(50), nullable=False),
+        sa.Column("status", sa.String(50), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_llm_call_archive_created_at", "llm_call_archive", ["created_at"])
+    op.create_index("ix_llm_call_archive_user_id", "llm_call_archive", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_llm_call_archive_user_id", table_name="llm_call_archive")
+    op.drop_index("ix_llm_call_archive_created_at", table_name="llm_call_archive")
+    op.drop_table("llm_call_archive")
+    op.drop_index("idx_llm_rollup_user_hour", table_name="llm_call_hourly_rollups")
+    op.drop_table("llm_call_hourly_rollups")
@@ -0,0 +1,38 @@
+"""Add a content hash to reviews for deduplicating bulk ingestion.
+
+Scraped reviews are inserted with ON CONFLICT (company_id, content_hash)
+DO NOTHING, so re-scraping a company skips reviews it already has. Rows
+from before this revision keep a NULL hash and are never treated as
+duplicates.
+
+Revision ID: 025
+Revises: 024
+Create Date: 2024-12-08
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import text
+
+revision: str = "025"
+down_revision: Union[str, None] = "024"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("reviews", sa.Column("content_hash", sa.String(64), nullable=True))
+
+    # CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.execute(text(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_reviews_company_content_hash "
+            "ON reviews (company_id, content_hash)"
+        ))
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(text("DROP INDEX CONCURRENTLY IF EXISTS uq_reviews_company_content_hash"))
+    op.drop_column("reviews", "content_hash")
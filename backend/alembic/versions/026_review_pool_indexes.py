@@ -0,0 +1,38 @@
+"""Index the global review pool by normalized company name and platform.
+
+Scraping jobs first reuse fresh reviews other users already scraped for a
+company of the same name on the same platform; the lookup joins companies
+on lower(trim(name)) to reviews on (company_id, platform, scraped_at).
+
+Revision ID: 026
+Revises: 025
+Create Date: 2024-12-09
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+revision: str = "026"
+down_revision: Union[str, None] = "025"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.execute(text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_companies_normalized_name "
+            "ON companies (lower(trim(name)))"
+        ))
+        op.execute(text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reviews_company_platform_scraped "
+            "ON reviews (company_id, platform, scraped_at)"
+        ))
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(text("DROP INDEX CONCURRENTLY IF EXISTS idx_reviews_company_platform_scraped"))
+        op.execute(text("DROP INDEX CONCURRENTLY IF EXISTS idx_companies_normalized_name"))
@@ -0,0 +1,28 @@
+"""Add run state to scraping jobs.
+
+Apify-backed jobs no longer wait for their actor run inside the Celery
+task: the run's id, dataset id and how far its dataset has been read are
+stored on the job and picked up by the polling continuation task (or the
+run's webhook).
+
+Revision ID: 027
+Revises: 026
+Create Date: 2024-12-10
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "027"
+down_revision: Union[str, None] = "026"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("scraping_jobs", sa.Column("run_state", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("scraping_jobs", "run_state")
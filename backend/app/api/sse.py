@@ -0,0 +1,220 @@
+"""
+Server-Sent Events encoding for the chat streaming endpoints.
+
+Events are dicts of the form {"type": ..., "data": ...}. They are encoded
+with orjson in one pass (a default hook covers Pydantic models, pandas and
+numpy values), and SSEStream sits between the event source and the
+response to:
+- coalesce consecutive ``content`` deltas (and ``thinking`` deltas) that
+  arrive within a short window into one frame
+- send a heartbeat comment when the source is idle, so proxies keep the
+  connection open
+- apply back-pressure: the source is read ahead into a bounded queue, so a
+  stalled client makes the source wait instead of buffering the stream in
+  memory, and when the client falls behind (queue depth over a threshold)
+  pending ``thinking`` deltas are dropped rather than sent late
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import orjson
+
+from app.config import get_settings
+from app.utils.logging import get_logger
+
+logger = get_logger("sse")
+
+HEARTBEAT = b": ping\n\n"
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # Disable nginx buffering
+}
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# Event types whose text deltas can be merged, mapped to the delta field
+_DELTA_FIELDS = {"content": "content", "thinking": "delta"}
+
+_END = object()
+
+
+def _default(obj: Any) -> Any:
+    """orjson fallback for types it does not serialize natively."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if hasattr(obj, "isoformat"):
+        # pandas Timestamp and other datetime-likes
+        return obj.isoformat()
+    if hasattr(obj, "to_dict") and hasattr(obj, "columns"):
+        # pandas DataFrame
+        return obj.to_dict(orient="records")
+    if hasattr(obj, "tolist"):
+        # numpy scalars and arrays orjson does not handle, pandas Series
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+
+def encode_event(event: Dict[str, Any]) -> bytes:
+    """Encode one event as an SSE ``data:`` frame."""
+    return b"data: " + orjson.dumps(event, default=_default, option=_OPTIONS) + b"\n\n"
+
+
+def _delta_text(event: Dict[str, Any]) -> Optional[str]:
+    """Text of a mergeable delta event, or None if the event is not one."""
+    field = _DELTA_FIELDS.get(event.get("type"))
+    data = event.get("data")
+    if field is None or not isinstance(data, dict) or len(data) != 1:
+        return None
+    text = data.get(field)
+    return text if isinstance(text, str) else None
+
+
+def coalesce_events(events: List[Dict[str, Any]], drop_thinking: bool = False) -> List[Dict[str, Any]]:
+    """
+    Merge runs of consecutive delta events of the same type.
+
+    Events are only merged when everything but the delta text is equal, so
+    no metadata is lost; all other events pass through in order.
+
+    Args:
+        events: Events in arrival order
+        drop_thinking: Drop ``thinking`` deltas instead of merging them
+
+    Returns:
+        The coalesced events
+    """
+    merged: List[Dict[str, Any]] = []
+    run_text: List[str] = []
+
+    def _close_run() -> None:
+        if run_text:
+            last = merged[-1]
+            field = _DELTA_FIELDS[last["type"]]
+            merged[-1] = {**last, "data": {field: "".join(run_text)}}
+            run_text.clear()
+
+    for event in events:
+        text = _delta_text(event)
+        if text is not None and drop_thinking and event["type"] == "thinking":
+            continue
+        if text is not None and merged and run_text and _same_stream(merged[-1], event):
+            run_text.append(text)
+            continue
+        _close_run()
+        merged.append(event)
+        if text is not None:
+            run_text.append(text)
+    _close_run()
+    return merged
+
+
+def _same_stream(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    if a.get("type") != b.get("type") or len(a) != len(b):
+        return False
+    return all(key == "data" or b.get(key) == value for key, value in a.items())
+
+
+class SSEStream:
+    """
+    Encodes an async stream of events into SSE frames.
+
+    Iterate it from a StreamingResponse. Counters for the last stream are
+    available as attributes (events_in, frames_out, thinking_dropped).
+    """
+
+    def __init__(
+        self,
+        events: AsyncIterator[Dict[str, Any]],
+        coalesce_ms: Optional[float] = None,
+        heartbeat_seconds: Optional[float] = None,
+        backlog_threshold: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.events = events
+        self.coalesce_seconds = (settings.sse_coalesce_ms if coalesce_ms is None else coalesce_ms) / 1000
+        self.heartbeat_seconds = settings.sse_heartbeat_seconds if heartbeat_seconds is None else heartbeat_seconds
+        self.backlog_threshold = settings.sse_backlog_threshold if backlog_threshold is None else backlog_threshold
+        queue_size = settings.sse_queue_size if queue_size is None else queue_size
+        # The queue must be able to reach the backlog threshold
+        self.queue_size = max(queue_size, self.backlog_threshold)
+
+        self.events_in = 0
+        self.frames_out = 0
+        self.thinking_dropped = 0
+
+    async def _read_ahead(self, queue: asyncio.Queue) -> None:
+        # put() waits while the queue is full; cancellation (client gone) ends the reader
+        try:
+            async for event in self.events:
+                await queue.put(event)
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(_END)
+
+    async def _collect(self, queue: asyncio.Queue, first: Any) -> List[Any]:
+        """Collect the events that go into one write, starting with ``first``."""
+        batch = [first]
+        if self.coalesce_seconds > 0 and isinstance(first, dict) and _delta_text(first) is not None:
+            # Give a token burst a short window to accumulate
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.coalesce_seconds
+            while batch[-1] is not _END and isinstance(batch[-1], dict) and _delta_text(batch[-1]) is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+        while not queue.empty() and batch[-1] is not _END:
+            batch.append(queue.get_nowait())
+        return batch
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        reader = asyncio.create_task(self._read_ahead(queue))
+        try:
+            while True:
+                try:
+                    if self.heartbeat_seconds > 0:
+                        first = await asyncio.wait_for(queue.get(), self.heartbeat_seconds)
+                    else:
+                        first = await queue.get()
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+
+                # A backlog at this point means the previous write was slow
+                backlogged = queue.qsize() >= self.backlog_threshold
+                batch = await self._collect(queue, first)
+
+                done = batch[-1] is _END
+                if done:
+                    batch.pop()
+                error = batch.pop() if batch and isinstance(batch[-1], Exception) else None
+
+                self.events_in += len(batch)
+                events = coalesce_events(batch, drop_thinking=backlogged)
+                if backlogged:
+                    self.thinking_dropped += sum(1 for e in batch if _delta_text(e) is not None and e["type"] == "thinking")
+                if events:
+                    self.frames_out += len(events)
+                    yield b"".join(encode_event(event) for event in events)
+
+                if error is not None:
+                    raise error
+                if done:
+                    break
+        finally:
+            if not reader.done():
+                reader.cancel()
+            logger.debug(
+                f"SSE stream closed: {self.events_in} events in, {self.frames_out} frames out, "
+                f"{self.thinking_dropped} thinking deltas dropped"
+            )
@@ -4,11 +4,8 @@ Analytics API endpoints for dashboard.
 
 from datetime import datetime
 from typing import Optional
-import csv
-import io
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -20,6 +17,7 @@ from app.database.models.llm_call import LLMCallTypeEnum, LLMCallStatusEnum
 from app.services.analytics_service import AnalyticsService
 from app.services.user_reviews_service import UserReviewsService
 from app.utils.logging import get_logger
+from app.utils.streaming_export import EXPORT_FORMAT_PATTERN, export_response, parse_columns, stream_query_chunks
 from sqlalchemy import text
 
 logger = get_logger("analytics_api")
@@ -464,6 +462,19 @@ async def get_user_reviews_stats(
         )
 
 
+# Exportable review columns -> export header (the per-user reviews table schema)
+REVIEW_EXPORT_COLUMNS = {
+    "company_name": "Company",
+    "category": "Category",
+    "text": "Review Text",
+    "rating": "Rating",
+    "source": "Source",
+    "date": "Date",
+    "author": "Author",
+}
+DEFAULT_REVIEW_EXPORT_COLUMNS = ("company_name", "text", "rating", "source", "date", "author")
+
+
 @router.get("/user-reviews/export")
 async def export_user_reviews(
     current_user: ClerkUser = Depends(get_current_user),
@@ -471,16 +482,29 @@ async def export_user_reviews(
     company_id: Optional[str] = None,
     source: Optional[str] = None,
     date_from: Optional[datetime] = None,
-    date_to: Optional[datetime] = None
+    date_to: Optional[datetime] = None,
+    min_rating: Optional[int] = None,
+    max_rating: Optional[int] = None,
+    columns: Optional[str] = Query(None, description="Comma-separated columns to export"),
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN, description="csv, csv.gz or parquet")
 ):
     """
-    Export user reviews as CSV file.
+    Export user reviews as a streaming CSV, gzip-compressed CSV or Parquet file.
     
-    Supports the same filters as the stats endpoint:
+    Supports the same filters as the stats endpoint plus a rating range:
     - company_id
     - source
     - date_from/date_to
+    - min_rating/max_rating
+    
+    Rows are read with a server-side cursor and sent chunk by chunk, so
+    memory and time-to-first-byte don't grow with the export.
     """
+    try:
+        selected = parse_columns(columns, list(REVIEW_EXPORT_COLUMNS), DEFAULT_REVIEW_EXPORT_COLUMNS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     try:
         user_id = current_user.id
         reviews_service = UserReviewsService(db)
@@ -491,53 +515,41 @@ async def export_user_reviews(
         
         # Build where clause
         where_conditions = []
+        params = {}
         company_name = None
         if company_id:
             company = await CompanyRepository.get_by_id(db, company_id)
             if company:
                 company_name = company.name
-                where_conditions.append(f"company_name = '{company_name}'")
+                where_conditions.append("company_name = :company_name")
+                params["company_name"] = company_name
         
         if source:
-            where_conditions.append(f"source = '{source}'")
+            where_conditions.append("source = :source")
+            params["source"] = source
         
         if date_from:
-            where_conditions.append(f"date >= '{date_from.strftime('%Y-%m-%d')}'")
+            where_conditions.append("date >= :date_from")
+            params["date_from"] = datetime.combine(date_from.date(), datetime.min.time())
         if date_to:
-            where_conditions.append(f"date <= '{date_to.strftime('%Y-%m-%d')}'")
+            where_conditions.append("date <= :date_to")
+            params["date_to"] = datetime.combine(date_to.date(), datetime.min.time())
+        if min_rating is not None:
+            where_conditions.append("rating >= :min_rating")
+            params["min_rating"] = min_rating
+        if max_rating is not None:
+            where_conditions.append("rating <= :max_rating")
+            params["max_rating"] = max_rating
         
         where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+        select_list = ", ".join('date("date") AS date' if column == "date" else f'"{column}"' for column in selected)
         
-        # Get all reviews matching filters
         query = text(f"""
-            SELECT company_name, title, text, rating, source, date, author_name
+            SELECT {select_list}
             FROM "{table_name}"
             {where_clause}
-            ORDER BY date DESC
+            ORDER BY "{table_name}".date DESC
         """)
-        result = await db.execute(query)
-        rows = result.fetchall()
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Company', 'Title', 'Review Text', 'Rating', 'Source', 'Date', 'Author'])
-        
-        # Write data rows
-        for row in rows:
-            writer.writerow([
-                row[0],  # company_name
-                row[1],  # title
-                row[2],  # text
-                row[3],  # rating
-                row[4],  # source
-                row[5].strftime('%Y-%m-%d') if row[5] else '',  # date
-                row[6] or ''  # author_name
-            ])
-        
-        output.seek(0)
         
         # Generate filename
         filename_parts = ['reviews']
@@ -549,14 +561,14 @@ async def export_user_reviews(
             filename_parts.append(f"from_{date_from.strftime('%Y-%m-%d')}")
         if date_to:
             filename_parts.append(f"to_{date_to.strftime('%Y-%m-%d')}")
-        filename = '_'.join(filename_parts) + '.csv'
         
-        logger.info(f"Exporting {len(rows)} reviews for user {user_id}")
+        logger.info(f"Streaming {format} review export for user {user_id} ({len(selected)} columns)")
         
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        return export_response(
+            [REVIEW_EXPORT_COLUMNS[column] for column in selected],
+            stream_query_chunks(query, params),
+            format,
+            '_'.join(filename_parts)
         )
         
     except Exception as e:
@@ -571,10 +583,15 @@ async def export_user_reviews(
 async def get_llm_cost_stats(
     current_user: ClerkUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
-    days: int = 30
+    days: int = 30,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
 ):
     """
     Get LLM call cost statistics for the current user.
+
+    Covers the last `days` days, or [start_date, end_date) when given.
+    Served from hourly rollups plus the raw rows not rolled up yet.
     
     Returns:
     - Total calls and success/failure counts
@@ -585,7 +602,9 @@ async def get_llm_cost_stats(
         stats = await LLMCallRepository.get_cost_stats(
             db,
             user_id=current_user.id,
-            days=days
+            days=days,
+            start_date=start_date,
+            end_date=end_date
         )
         return stats
 
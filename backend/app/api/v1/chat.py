@@ -11,18 +11,20 @@ from app.api.deps import (
     get_db,
     validate_session_id,
 )
+from app.api.sse import SSE_HEADERS, SSEStream
 from app.core.security.clerk_auth import ClerkUser, get_current_user
 from app.dependencies import get_orchestrator_service
 from app.exceptions import NotFoundError, ValidationError
 from app.models.chat import ChatRequest, ChatResponse, ChatSession, MessageHistory
 from app.models.feedback import ChatFeedback, FeedbackResponse, FeedbackType
 from app.services.conversation_service import ConversationService
+from app.services.embedding_batcher import estimate_tokens
 from app.services.llm_logger import LLMLogger
 from app.database.models.llm_call import LLMCallTypeEnum
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.responses import StreamingResponse
-import json
 from app.utils.logging import get_logger
+from app.utils.streaming_export import EXPORT_FORMAT_PATTERN, export_response, frame_chunks, parse_columns
 
 logger = get_logger("chat_api")
 
@@ -80,35 +82,16 @@ async def send_message_stream(
             db=db,
             session_id=session_id,
             content=request.message,
-            role=MessageRoleEnum.USER
+            role=MessageRoleEnum.USER,
+            token_count=estimate_tokens(request.message)
         )
         await db.commit()
         logger.info(f"Saved user message {user_message.id} to database")
         
-        # Stream processing function - doesn't use DB for streaming, only for final save
+        # Stream processing function - doesn't use DB for streaming, only for final save.
+        # Events are encoded, coalesced and heartbeated by SSEStream.
         async def event_stream():
             from app.database.session import get_async_session
-            from datetime import datetime, date
-            import asyncio
-            
-            def make_json_serializable(obj):
-                """Recursively convert any object to be JSON serializable."""
-                if obj is None:
-                    return None
-                elif isinstance(obj, (datetime, date)):
-                    return obj.isoformat()
-                elif hasattr(obj, "model_dump"):
-                    # Pydantic model
-                    return obj.model_dump(mode='json')
-                elif isinstance(obj, dict):
-                    return {k: make_json_serializable(v) for k, v in obj.items()}
-                elif isinstance(obj, (list, tuple)):
-                    return [make_json_serializable(item) for item in obj]
-                elif isinstance(obj, (str, int, float, bool)):
-                    return obj
-                else:
-                    # For any other type, try str() as fallback
-                    return str(obj)
             
             accumulated_content = ""
             update_count = 0
@@ -143,33 +126,22 @@ async def send_message_stream(
                     
                     if update["type"] == "content":
                         accumulated_content += update["data"]["content"]
-                        logger.debug(f"Streaming content update #{update_count}: {len(update['data']['content'])} chars")
-                    
-                    serializable_update = make_json_serializable(update)
-                    sse_data = f"data: {json.dumps(serializable_update)}\n\n"
-                    yield sse_data
                     
-                    if update["type"] == "content":
-                        await asyncio.sleep(0.001)
+                    yield update
                 
                 logger.info(f"Stream completed: {update_count} updates sent, {len(accumulated_content)} chars total")
                 
             except Exception as e:
                 logger.error(f"Stream error: {e}", exc_info=True)
-                error_event = {
+                yield {
                     "type": "error",
                     "data": {"error": str(e)}
                 }
-                yield f"data: {json.dumps(error_event)}\n\n"
         
         return StreamingResponse(
-            event_stream(),
+            SSEStream(event_stream()),
             media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no"  # Disable nginx buffering
-            }
+            headers=SSE_HEADERS
         )
         
     except Exception as e:
@@ -233,7 +205,8 @@ async def send_message(
             db=db,
             session_id=session_id,
             content=request.message,
-            role=MessageRoleEnum.USER
+            role=MessageRoleEnum.USER,
+            token_count=estimate_tokens(request.message)
         )
         await db.commit()
         logger.info(f"Saved user message {user_message.id} to database")
@@ -412,93 +385,115 @@ async def create_session(
         )
 
 
+def _format_agent_steps(steps) -> List[dict]:
+    """Format a message's agent steps (in step order) for the frontend."""
+    formatted_steps = []
+    for step in sorted(steps, key=lambda s: s.step_order):
+        # Combine tool_call and structured_output into content
+        content = None
+        if step.tool_call and step.structured_output:
+            # Both call and result - merge them
+            content = {
+                **step.tool_call,
+                "output": step.structured_output
+            }
+        elif step.structured_output:
+            content = step.structured_output
+        elif step.tool_call:
+            content = step.tool_call
+        elif step.prediction:
+            content = step.prediction
+        
+        formatted_steps.append({
+            "step_id": str(step.id),
+            "agent_name": step.agent_name,
+            "content": content,
+            "is_structured": step.structured_output is not None or step.tool_call is not None,
+            "timestamp": step.created_at.isoformat() if step.created_at else None,
+            "status": step.status or "completed",
+            "step_order": step.step_order,
+            "raw_output": step.raw_output  # Include raw_output for markdown rendering
+        })
+    return formatted_steps
+
+
+def _to_api_message(msg, include_steps: bool = True):
+    """Convert a database message (with steps eager-loaded) to the API model."""
+    from app.models.chat import ChatMessage as ApiMessage
+    from app.models.chat import MessageRole
+    from datetime import datetime
+    
+    # Add steps to metadata
+    metadata = dict(msg.extra_metadata) if isinstance(msg.extra_metadata, dict) else {}
+    if include_steps:
+        formatted_steps = _format_agent_steps(msg.steps)
+        if formatted_steps:
+            metadata['agent_steps'] = formatted_steps
+    
+    return ApiMessage(
+        id=str(msg.id),
+        content=msg.content,
+        role=MessageRole(msg.role.value),
+        timestamp=msg.created_at if msg.created_at else datetime.utcnow(),
+        completed_at=msg.completed_at,
+        metadata=metadata,
+    )
+
+
+def _session_metadata(db_session) -> dict:
+    """Session metadata including the title."""
+    metadata = dict(db_session.extra_metadata or {})
+    if db_session.title:
+        metadata["title"] = db_session.title
+    return metadata
+
+
 @router.get("/sessions", response_model=List[ChatSession])
 async def list_sessions(
+    response: Response,
     current_user: Optional[ClerkUser] = Depends(get_current_user),
     db = Depends(get_db),
-    limit: int = 50,
-    offset: int = 0
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    summary: bool = False
 ) -> List[ChatSession]:
     """
     List chat sessions from database.
 
-    Returns a paginated list of chat sessions for the current user.
+    Returns a page of the current user's sessions, most recently updated
+    first. Pass the X-Next-Cursor response header back as `cursor` to fetch
+    the next page (the header is absent on the last page). With
+    `summary=true` each session carries only its last message and a
+    message_count in metadata.
     """
     try:
-        from app.database.repositories.chat_session import ChatSessionRepository
-        from datetime import datetime
+        from app.database.repositories.optimized_chat_repository import OptimizedChatRepository
         
         user_id = current_user.id if current_user else None
         if not user_id:
             return []
         
-        # Fetch sessions from database with messages
-        db_sessions = await ChatSessionRepository.get_user_sessions(
+        # Fixed number of queries per page, independent of sessions/messages/steps
+        db_sessions, next_cursor = await OptimizedChatRepository.get_sessions_page(
             db=db,
             user_id=user_id,
             limit=limit,
-            offset=offset,
-            include_messages=True
+            cursor=cursor,
+            summary=summary
         )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         # Convert to API model
         sessions = []
         for db_session in db_sessions:
-            from app.models.chat import ChatMessage as ApiMessage
-            from app.models.chat import MessageRole
-            from app.database.repositories.chat_message_step import ChatMessageStepRepository
-            
-            messages = []
-            for msg in db_session.messages:
-                # Fetch agent steps for this message
-                agent_steps = await ChatMessageStepRepository.get_by_message_id(db, str(msg.id))
-                
-                # Format steps for frontend
-                formatted_steps = []
-                for step in agent_steps:
-                    # Combine tool_call and structured_output into content
-                    content = None
-                    if step.tool_call and step.structured_output:
-                        # Both call and result - merge them
-                        content = {
-                            **step.tool_call,
-                            "output": step.structured_output
-                        }
-                    elif step.structured_output:
-                        content = step.structured_output
-                    elif step.tool_call:
-                        content = step.tool_call
-                    elif step.prediction:
-                        content = step.prediction
-                    
-                    formatted_steps.append({
-                        "step_id": str(step.id),
-                        "agent_name": step.agent_name,
-                        "content": content,
-                        "is_structured": step.structured_output is not None or step.tool_call is not None,
-                        "timestamp": step.created_at.isoformat() if step.created_at else None,
-                        "status": step.status or "completed",
-                        "step_order": step.step_order,
-                        "raw_output": step.raw_output  # Include raw_output for markdown rendering
-                    })
-                
-                # Add steps to metadata
-                metadata = msg.extra_metadata if isinstance(msg.extra_metadata, dict) else {}
-                if formatted_steps:
-                    metadata['agent_steps'] = formatted_steps
-                
-                messages.append(ApiMessage(
-                    id=str(msg.id),
-                    content=msg.content,
-                    role=MessageRole(msg.role.value),
-                    timestamp=msg.created_at if msg.created_at else datetime.utcnow(),
-                    metadata=metadata
-                ))
-            
-            # Include title and company_id in metadata
-            metadata = db_session.extra_metadata or {}
-            if db_session.title:
-                metadata["title"] = db_session.title
+            metadata = _session_metadata(db_session)
+            if summary:
+                last_message = db_session._last_message
+                messages = [_to_api_message(last_message, include_steps=False)] if last_message else []
+                metadata["message_count"] = db_session._message_count
+            else:
+                messages = [_to_api_message(msg) for msg in db_session.messages]
             
             sessions.append(ChatSession(
                 session_id=str(db_session.id),
@@ -510,6 +505,11 @@ async def list_sessions(
         
         return sessions
 
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
     except Exception as e:
         logger.error(f"Error listing sessions: {e}", exc_info=True)
         raise HTTPException(
@@ -528,16 +528,14 @@ async def get_session(
     Get a specific chat session with full message history from database.
     """
     try:
-        from app.database.repositories.chat_session import ChatSessionRepository
-        from datetime import datetime
+        from app.database.repositories.optimized_chat_repository import OptimizedChatRepository
         
         user_id = current_user.id if current_user else None
         
-        # Fetch from database
-        db_session = await ChatSessionRepository.get_by_id(
+        # Session, messages and steps in a fixed number of queries
+        db_session = await OptimizedChatRepository.get_session_with_steps_optimized(
             db=db,
-            session_id=session_id,
-            include_messages=True
+            session_id=session_id
         )
 
         if not db_session:
@@ -551,62 +549,8 @@ async def get_session(
             )
         
         # Convert to API model
-        from app.models.chat import ChatMessage as ApiMessage
-        from app.models.chat import MessageRole
-        from app.database.repositories.chat_message_step import ChatMessageStepRepository
-        
-        messages = []
-        for msg in db_session.messages:
-            # Fetch agent steps for this message
-            agent_steps = await ChatMessageStepRepository.get_by_message_id(db, str(msg.id))
-            
-            # Format steps for frontend
-            formatted_steps = []
-            for step in agent_steps:
-                # Combine tool_call and structured_output into content
-                content = None
-                if step.tool_call and step.structured_output:
-                    # Both call and result - merge them
-                    content = {
-                        **step.tool_call,
-                        "output": step.structured_output
-                    }
-                elif step.structured_output:
-                    content = step.structured_output
-                elif step.tool_call:
-                    content = step.tool_call
-                elif step.prediction:
-                    content = step.prediction
-                
-                formatted_steps.append({
-                    "step_id": str(step.id),
-                    "agent_name": step.agent_name,
-                    "content": content,
-                    "is_structured": step.structured_output is not None or step.tool_call is not None,
-                    "timestamp": step.created_at.isoformat() if step.created_at else None,
-                    "status": step.status or "completed",
-                    "step_order": step.step_order,
-                    "raw_output": step.raw_output  # Include raw_output for markdown rendering
-                })
-            
-            # Add steps to metadata
-            metadata = msg.extra_metadata if isinstance(msg.extra_metadata, dict) else {}
-            if formatted_steps:
-                metadata['agent_steps'] = formatted_steps
-            
-            messages.append(ApiMessage(
-                id=str(msg.id),
-                content=msg.content,
-                role=MessageRole(msg.role.value),
-                timestamp=msg.created_at.isoformat() if msg.created_at else datetime.utcnow().isoformat(),
-                completed_at=msg.completed_at.isoformat() if msg.completed_at else None,
-                metadata=metadata,
-            ))
-        
-        # Include title and company_id in metadata
-        metadata = db_session.extra_metadata or {}
-        if db_session.title:
-            metadata["title"] = db_session.title
+        messages = [_to_api_message(msg) for msg in db_session.messages]
+        metadata = _session_metadata(db_session)
         
         return ChatSession(
             session_id=str(db_session.id),
@@ -755,21 +699,23 @@ async def clear_session(
 @router.get("/artifacts/{artifact_name}/download")
 async def download_artifact(
     artifact_name: str,
-    current_user: Optional[ClerkUser] = Depends(get_current_user)
+    current_user: Optional[ClerkUser] = Depends(get_current_user),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to export"),
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN, description="csv, csv.gz or parquet")
 ):
     """
-    Download a search artifact as CSV.
+    Download a search artifact as a streaming CSV, gzip-compressed CSV or Parquet file.
     
     Artifacts are created by tools like semantic_search and stored in the DataManager cache.
+    The DataFrame is encoded chunk by chunk, so the download starts immediately.
     """
     try:
         from app.core.llm.lg_workflow.data.manager import DataManager
-        import io
         
         user_id = current_user.id if current_user else None
         
-        # Get the artifact from DataManager cache
-        dm = DataManager.get_instance("default")
+        # Get the artifact from the user's DataManager session
+        dm = DataManager.get_instance(user_id or "default")
         
         # Check if artifact exists in cache
         if artifact_name not in dm._local_cache:
@@ -785,19 +731,14 @@ async def download_artifact(
         else:
             df = item
         
-        # Convert to CSV
-        csv_buffer = io.StringIO()
-        df.to_csv(csv_buffer, index=False)
-        csv_content = csv_buffer.getvalue()
+        try:
+            selected = parse_columns(columns, [str(column) for column in df.columns])
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if columns:
+            df = df[selected]
         
-        # Return as downloadable CSV
-        return StreamingResponse(
-            iter([csv_content]),
-            media_type="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename={artifact_name}.csv"
-            }
-        )
+        return export_response(selected, frame_chunks(df), format, artifact_name)
         
     except HTTPException:
         raise
@@ -23,8 +23,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
 from langchain_core.messages import HumanMessage, AIMessage
 
-from app.core.llm.lg_workflow.graph import create_workflow
+from app.core.llm.lg_workflow.factory import get_workflow_factory
 from app.core.config.settings import get_settings
+from app.services.conversation_history import get_conversation_history_manager
+from app.services.embedding_batcher import estimate_tokens
 
 logger = get_logger("chat_experimental_api")
 
@@ -148,17 +150,9 @@ async def send_message_stream_experimental(
                 await db.commit()
                 logger.info(f"Created experimental session {session_id}")
             
-            # Fetch recent conversation history (last 10 messages = 5 exchanges)
-            messages = await ChatMessageRepository.get_recent_messages(db, session_id, limit=10)
-            conversation_history = []
-            for msg in reversed(messages):  # Reverse to get chronological order
-                content = msg.content
-                # For assistant messages, prepend step summary if available
-                if msg.role.value == "assistant" and msg.extra_metadata:
-                    step_summary = msg.extra_metadata.get("step_summary")
-                    if step_summary:
-                        content = f"<Workflow Summary>{step_summary}</Workflow Summary>\n\n<Final answer>{content}</Final answer>"
-                conversation_history.append({"role": msg.role.value, "content": content})
+            # Rolling summary + newest messages that fit the history token budget
+            history = await get_conversation_history_manager().load(db, session_id)
+            conversation_history = history.messages
             
             # Save user message to database
             user_message = await ChatMessageRepository.create(
@@ -166,6 +160,7 @@ async def send_message_stream_experimental(
                 session_id=session_id, 
                 content=request.message, 
                 role=MessageRoleEnum.USER,
+                token_count=estimate_tokens(request.message),
             )
             await db.commit()
             logger.info(f"Saved user message {user_message.id} to database")
@@ -214,8 +209,9 @@ async def send_message_stream_experimental(
             seen_agents = set()  # Track which agents we've already created boxes for
             
             try:
-                # Initialize workflow with optional focused dataset
-                app = create_workflow(user_id, dataset_table_name=request.dataset_table_name)
+                # Bind the compiled workflow to this user and optional focused dataset
+                factory = get_workflow_factory()
+                app = factory.bind(user_id, request.dataset_table_name)
                 
                 # Prepare input with conversation history
                 # Convert history to LangChain message format
@@ -229,12 +225,18 @@ async def send_message_stream_experimental(
                 # Add current message
                 history_messages.append(HumanMessage(content=request.message))
                 
+                config = {"configurable": {"thread_id": session_id}}
                 inputs = {
-                    "messages": history_messages
+                    "messages": history_messages,
+                    "summary": history.summary,
                 }
-                
-                # Config for checkpointing (optional, but good for history)
-                config = {"configurable": {"thread_id": session_id}}
+
+                # With a durable checkpointer the thread already holds the (summarized)
+                # history; it is only seeded from the database for sessions it has not seen
+                if factory.checkpointer is not None:
+                    state = await app.aget_state(config)
+                    if state.values.get("messages"):
+                        inputs = {"messages": history_messages[-1:]}
 
                 # Stream events using v2 for better event capture
                 async for event in app.astream_events(inputs, config=config, version="v2", recursion_limit=50):
@@ -327,6 +329,10 @@ async def send_message_stream_experimental(
 
                 import re
                 
+                # Make the thread's final checkpoint visible to other workers
+                if factory.checkpointer is not None:
+                    await factory.checkpointer.flush()
+
                 # Mark all steps as completed and clean up content
                 for step in agent_steps:
                     if step.get("status") in ("started", "active"):
@@ -370,6 +376,7 @@ async def send_message_stream_experimental(
                         assistant_message_id, 
                         content=final_content,
                         completed_at=completed_at,
+                        token_count=estimate_tokens(final_content),
                     )
                     
                     # Save agent steps to chat_message_steps table
@@ -431,6 +438,9 @@ async def send_message_stream_experimental(
                                 logger.info(f"Saved step summary for message {assistant_message_id}")
                     except Exception as sum_err:
                         logger.error(f"Failed to generate step summary: {sum_err}")
+                    finally:
+                        # Fold older turns into the session summary off the request path
+                        get_conversation_history_manager().schedule_update(session_id)
                 
                 # Schedule as background task - don't await
                 asyncio.create_task(generate_and_save_summary())
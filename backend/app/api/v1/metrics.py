@@ -5,16 +5,28 @@ Metrics and monitoring endpoints for NeedleAi.
 from typing import Any, Dict
 
 from app.config import Settings, get_settings
+from app.core.llm.lg_workflow.checkpoint import get_checkpoint_stats
+from app.core.llm.lg_workflow.data.cache import get_session_data_cache
+from app.core.llm.lg_workflow.factory import get_workflow_factory
+from app.core.metrics_registry import registry as metrics_registry
 from app.core.monitoring import app_metrics, get_system_info, health_checker
 from app.models.base import StatusResponse
+from app.services.conversation_history import get_conversation_history_stats
+from app.services.embedding_cache import get_embedding_cache
+from app.services.llm_call_writer import get_llm_call_writer_stats
+from app.services.model_registry import get_model_registry
+from app.services.sentiment_engine import get_sentiment_engine_stats
+from app.services.step_buffer import get_step_buffer_stats
 from app.utils.logging import get_logger
 from fastapi import APIRouter, Depends, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 logger = get_logger("metrics_api")
 
 router = APIRouter()
 
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
 
 @router.get("/", response_model=Dict[str, Any])
 async def get_application_metrics(
@@ -36,6 +48,9 @@ async def get_application_metrics(
         # Get system information
         system_info = get_system_info()
 
+        # Get in-process cache and model statistics
+        embedding_cache = get_embedding_cache()
+
         return {
             "service": settings.app_name,
             "version": settings.app_version,
@@ -43,7 +58,16 @@ async def get_application_metrics(
             "metrics": {
                 "application": app_summary,
                 "endpoints": endpoint_stats,
-                "system": system_info
+                "system": system_info,
+                "embedding_cache": embedding_cache.get_stats() if embedding_cache else None,
+                "local_models": get_model_registry().get_stats(),
+                "session_data_cache": get_session_data_cache().get_stats(),
+                "sentiment_engine": get_sentiment_engine_stats(),
+                "step_buffer": get_step_buffer_stats(),
+                "workflow_factory": get_workflow_factory().get_stats(),
+                "workflow_checkpoints": get_checkpoint_stats(),
+                "conversation_history": get_conversation_history_stats(),
+                "llm_call_writer": get_llm_call_writer_stats()
             }
         }
 
@@ -123,7 +147,7 @@ async def get_endpoint_metrics() -> Dict[str, Any]:
                 **stats,
                 "error_rate_percent": round(error_rate, 2),
                 "requests_per_minute": 0,  # Would need time tracking for accurate calculation
-                "p95_response_time": stats["max_time"],  # Simplified, would need percentile calculation
+                "p95_response_time": stats["p95_time"],
                 "throughput": stats["count"] / max(stats["avg_time"], 0.001)  # requests per second
             }
 
@@ -273,55 +297,44 @@ async def reset_metrics(
         )
 
 
-# Prometheus-style metrics endpoint (if needed for external monitoring)
-@router.get("/prometheus")
-async def get_prometheus_metrics() -> str:
+# Prometheus metrics endpoint for external monitoring
+@router.get("/prometheus", response_class=PlainTextResponse)
+async def get_prometheus_metrics() -> PlainTextResponse:
     """
-    Get metrics in Prometheus format.
+    Get metrics in Prometheus text exposition format.
 
-    Returns metrics in a format that can be scraped by Prometheus
-    or other monitoring systems that understand this format.
+    Request latency histograms (per route template, with sketch quantiles)
+    and counters for requests, DB queries, LLM tokens, embedding calls and
+    cache lookups, merged across workers when metrics_multiproc_dir is set.
+    Memory and CPU gauges describe the worker that served the scrape.
     """
     try:
-        summary = app_metrics.get_summary()
-        app_metrics.get_endpoint_stats()
-
-        # Basic Prometheus format metrics
-        metrics_lines = []
-
-        # Application metrics
-        metrics_lines.append(f"# HELP app_requests_total Total number of requests")
-        metrics_lines.append(f"# TYPE app_requests_total counter")
-        metrics_lines.append(f"app_requests_total {summary['total_requests']}")
+        body = metrics_registry.render_prometheus()
 
-        metrics_lines.append(f"# HELP app_errors_total Total number of errors")
-        metrics_lines.append(f"# TYPE app_errors_total counter")
-        metrics_lines.append(f"app_errors_total {summary['total_errors']}")
-
-        metrics_lines.append(f"# HELP app_response_time_seconds Average response time")
-        metrics_lines.append(f"# TYPE app_response_time_seconds gauge")
-        metrics_lines.append(f"app_response_time_seconds {summary['average_response_time_ms'] / 1000}")
-
-        metrics_lines.append(f"# HELP app_active_requests Currently active requests")
-        metrics_lines.append(f"# TYPE app_active_requests gauge")
-        metrics_lines.append(f"app_active_requests {summary['active_requests']}")
+        process_lines = []
 
         # Memory metrics
-        memory_usage = summary.get("memory_usage", {})
+        memory_usage = app_metrics.get_memory_usage()
         if "rss_mb" in memory_usage:
-            metrics_lines.append(f"# HELP app_memory_usage_bytes Memory usage in bytes")
-            metrics_lines.append(f"# TYPE app_memory_usage_bytes gauge")
-            metrics_lines.append(f"app_memory_usage_bytes {memory_usage['rss_mb'] * 1024 * 1024}")
+            process_lines.append("# HELP app_memory_usage_bytes Memory usage in bytes")
+            process_lines.append("# TYPE app_memory_usage_bytes gauge")
+            process_lines.append(f"app_memory_usage_bytes {memory_usage['rss_mb'] * 1024 * 1024}")
 
         # CPU metrics
-        cpu_usage = summary.get("cpu_usage", {})
+        cpu_usage = app_metrics.get_cpu_usage()
         if "percent" in cpu_usage:
-            metrics_lines.append(f"# HELP app_cpu_usage_percent CPU usage percentage")
-            metrics_lines.append(f"# TYPE app_cpu_usage_percent gauge")
-            metrics_lines.append(f"app_cpu_usage_percent {cpu_usage['percent']}")
+            process_lines.append("# HELP app_cpu_usage_percent CPU usage percentage")
+            process_lines.append("# TYPE app_cpu_usage_percent gauge")
+            process_lines.append(f"app_cpu_usage_percent {cpu_usage['percent']}")
 
-        return "\n".join(metrics_lines)
+        if process_lines:
+            body += "\n".join(process_lines) + "\n"
+        return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
 
     except Exception as e:
         logger.error(f"Failed to generate Prometheus metrics: {e}")
-        return f"# Error generating metrics: {str(e)}"
+        return PlainTextResponse(
+            f"# Error generating metrics: {str(e)}\n",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            media_type=PROMETHEUS_CONTENT_TYPE,
+        )
@@ -2,6 +2,7 @@
 Scraping API endpoints.
 """
 
+import hmac
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -17,9 +18,15 @@ from app.database.repositories import (
     UserCreditRepository,
 )
 from app.exceptions import NotFoundError
-from app.models.scraping import CostEstimate, ScrapingJobCreate, ScrapingJobResponse
+from app.models.scraping import CostEstimate, ScrapingBatchCreate, ScrapingJobCreate, ScrapingJobResponse
+from app.services.scrape_orchestrator import apify_webhook_token
 from app.services.scraper_factory import get_scraper_factory
-from app.tasks.scraping_tasks import scrape_reviews_task, generate_fake_reviews_task
+from app.tasks.scraping_tasks import (
+    generate_fake_reviews_task,
+    poll_apify_runs_task,
+    scrape_company_sources_task,
+    scrape_reviews_task,
+)
 from app.utils.logging import get_logger
 
 logger = get_logger("scraping_api")
@@ -156,6 +163,104 @@ async def create_scraping_job(
         )
 
 
+@router.post("/jobs/batch", response_model=List[ScrapingJobResponse], status_code=status.HTTP_201_CREATED)
+async def create_scraping_jobs_batch(
+    data: ScrapingBatchCreate,
+    current_user: ClerkUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    _rate_limit = Depends(check_rate_limit)
+) -> List[ScrapingJobResponse]:
+    """
+    Scrape a company from several sources at once.
+
+    Creates one job per source; a single background task starts all their
+    scraper runs concurrently.
+    """
+    try:
+        # Verify company exists and user owns it
+        company = await CompanyRepository.get_by_id(db, data.company_id)
+        if not company or company.created_by != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Company not found"
+            )
+
+        factory = get_scraper_factory()
+        source_ids = list(dict.fromkeys(data.source_ids))
+        costs = {}
+        for source_id in source_ids:
+            source = await ReviewSourceRepository.get_by_id(db, source_id)
+            if not source or not source.is_active:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Source not found or inactive: {source_id}"
+                )
+            costs[source_id] = await factory.estimate_total_cost(source.source_type, data.review_count)
+
+        # Check credits for all jobs together
+        total_cost = sum(costs.values())
+        has_credits = await UserCreditRepository.has_sufficient_credits(
+            db, current_user.id, total_cost
+        )
+        if not has_credits:
+            credit_account = await UserCreditRepository.get_by_user_id(db, current_user.id)
+            available = credit_account.credits_available if credit_account else 0
+            raise HTTPException(
+                status_code=status.HTTP_402_PAYMENT_REQUIRED,
+                detail=f"Insufficient credits. Required: {total_cost}, Available: {available}"
+            )
+
+        # Create jobs
+        job_ids = []
+        for source_id in source_ids:
+            job = await ScrapingJobRepository.create(
+                db,
+                company_id=data.company_id,
+                source_id=source_id,
+                user_id=current_user.id,
+                total_reviews_target=data.review_count,
+                cost=costs[source_id]
+            )
+            job_ids.append(job.id)
+        await db.commit()
+
+        task = scrape_company_sources_task.delay(job_ids=job_ids, queries=data.queries)
+        logger.info(f"Started scraping {len(job_ids)} sources for company {data.company_id} (task {task.id})")
+
+        result = []
+        for job_id in job_ids:
+            job = await ScrapingJobRepository.set_celery_task_id(db, job_id, task.id)
+            result.append(ScrapingJobResponse.model_validate(job))
+        await db.commit()
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error creating scraping jobs: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create scraping jobs: {str(e)}"
+        )
+
+
+@router.post("/apify/webhook/{job_id}", status_code=status.HTTP_202_ACCEPTED, include_in_schema=False)
+async def apify_run_webhook(job_id: str, token: str):
+    """
+    Apify run webhook: a job's actor run finished.
+
+    Enqueues an immediate polling tick for the job instead of waiting for
+    the next scheduled one. The token is the job's HMAC issued with the run.
+    """
+    if not hmac.compare_digest(token, apify_webhook_token(job_id)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid webhook token")
+
+    poll_apify_runs_task.delay([job_id], reschedule=False)
+    logger.info(f"Apify webhook received for scraping job {job_id}")
+    return {"status": "accepted"}
+
+
 @router.get("/jobs/{job_id}", response_model=ScrapingJobResponse)
 async def get_scraping_job(
     job_id: str,
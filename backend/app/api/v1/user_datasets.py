@@ -5,7 +5,7 @@ User datasets API endpoints for CSV upload and management.
 from typing import List, Optional
 
 from app.config import get_settings
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import check_rate_limit, get_db
@@ -17,6 +17,7 @@ from app.models.user_dataset import (
 )
 from app.services.user_dataset_service import UserDatasetService
 from app.utils.logging import get_logger
+from app.utils.streaming_export import EXPORT_FORMAT_PATTERN, export_response, stream_query_chunks
 
 logger = get_logger("user_datasets_api")
 
@@ -195,6 +196,59 @@ async def get_dataset_data(
         )
 
 
+@router.get("/{dataset_id}/export")
+async def export_dataset(
+    dataset_id: str,
+    current_user: ClerkUser = Depends(require_current_user),
+    service: UserDatasetService = Depends(get_user_dataset_service),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to export"),
+    filter: List[str] = Query(default=[], description="Equality filters as column=value (repeatable)"),
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN, description="csv, csv.gz or parquet"),
+    _rate_limit = Depends(check_rate_limit)
+):
+    """
+    Export a dataset's rows as a streaming CSV, gzip-compressed CSV or Parquet file.
+    
+    Rows are read with a server-side cursor and sent chunk by chunk, so
+    memory and time-to-first-byte don't grow with the dataset.
+    """
+    filters = {}
+    for item in filter:
+        column, separator, value = item.partition("=")
+        if not separator or not column:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid filter '{item}', expected column=value"
+            )
+        filters[column] = value
+
+    try:
+        export = await service.build_export_query(
+            dataset_id=dataset_id,
+            user_id=current_user.id,
+            columns=columns,
+            filters=filters
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error exporting dataset: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export dataset: {str(e)}"
+        )
+
+    if export is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found"
+        )
+
+    query, params, selected = export
+    logger.info(f"Streaming {format} export of dataset {dataset_id} for user {current_user.id}")
+    return export_response(selected, stream_query_chunks(query, params), format, f"dataset_{dataset_id}")
+
+
 @router.delete("/{dataset_id}", status_code=status.HTTP_200_OK)
 async def delete_dataset(
     dataset_id: str,
@@ -0,0 +1,475 @@
+"""
+Process pool for CPU-bound analysis tools.
+
+run_analysis() runs a module-level function in a worker process. Array and
+DataFrame arguments are passed through multiprocessing.shared_memory
+(/dev/shm) up to analysis_shared_memory_max_mb per call, so /dev/shm must
+hold analysis_pool_workers times that (Docker's default shm_size is 64 MB).
+A worker whose call times out or is cancelled is killed and replaced.
+With analysis_pool_workers = 0 functions run on the default thread pool.
+"""
+
+import asyncio
+import atexit
+import functools
+import multiprocessing
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from app.config import get_settings
+from app.core.metrics_registry import (
+    ANALYSIS_ACTIVE_TASKS,
+    ANALYSIS_QUEUE_DEPTH,
+    ANALYSIS_TASK_DURATION,
+    ANALYSIS_TASKS,
+)
+from app.utils.logging import get_logger
+
+logger = get_logger("analysis_pool")
+
+T = TypeVar("T")
+
+
+# ----------------------------------------------------------------------
+# Shared-memory arguments
+# ----------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class SharedArrayRef:
+    """A numpy array in a shared memory segment."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+@dataclass(frozen=True)
+class SharedFrameRef:
+    """A DataFrame serialized into a shared memory segment ("arrow" IPC stream or "pickle")."""
+    name: str
+    size: int
+    format: str
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to a segment the parent owns (and will unlink)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers the segment again; workers share the
+        # parent's resource tracker, for which that is a no-op
+        return shared_memory.SharedMemory(name=name)
+
+
+def _share_array(array: np.ndarray, segments: List[shared_memory.SharedMemory]) -> SharedArrayRef:
+    segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    segments.append(segment)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+    return SharedArrayRef(segment.name, array.shape, array.dtype.str)
+
+
+def _share_frame(df: pd.DataFrame, segments: List[shared_memory.SharedMemory]) -> SharedFrameRef:
+    try:
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        sizer = pa.MockOutputStream()
+        with pa.ipc.new_stream(sizer, table.schema) as writer:
+            writer.write_table(table)
+        size = sizer.size()
+        segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        segments.append(segment)
+        with pa.ipc.new_stream(pa.FixedSizeBufferWriter(pa.py_buffer(segment.buf)), table.schema) as writer:
+            writer.write_table(table)
+        return SharedFrameRef(segment.name, size, "arrow")
+    except (ImportError, ValueError, TypeError, NotImplementedError) as e:
+        # Mixed-type object columns etc. that Arrow cannot represent
+        logger.debug(f"Sharing DataFrame as pickle: {e}")
+
+    data = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+    segment = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    segments.append(segment)
+    segment.buf[:len(data)] = data
+    return SharedFrameRef(segment.name, len(data), "pickle")
+
+
+def _share(value: Any, segments: List[shared_memory.SharedMemory]) -> Any:
+    """Replace arrays and DataFrames by shared memory references."""
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        return _share_array(np.ascontiguousarray(value), segments)
+    if isinstance(value, pd.DataFrame):
+        return _share_frame(value, segments)
+    return value
+
+
+def _shared_size(value: Any) -> Optional[int]:
+    """Bytes value would take in shared memory, or None if it always goes through the pipe."""
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    return None
+
+
+def _share_args(args: tuple, kwargs: Dict[str, Any], max_bytes: int):
+    """Share array and DataFrame arguments up to max_bytes in total; the rest are pickled through the pipe."""
+    segments: List[shared_memory.SharedMemory] = []
+    budget = max_bytes
+
+    def share(value: Any) -> Any:
+        nonlocal budget
+        size = _shared_size(value)
+        if size is None or size > budget:
+            return value
+        budget -= size
+        return _share(value, segments)
+
+    try:
+        shared_args = tuple(share(value) for value in args)
+        shared_kwargs = {key: share(value) for key, value in kwargs.items()}
+    except BaseException:
+        _release(segments)
+        raise
+    return shared_args, shared_kwargs, segments
+
+
+def _release(segments: List[shared_memory.SharedMemory]) -> None:
+    for segment in segments:
+        try:
+            segment.close()
+            segment.unlink()
+        except (FileNotFoundError, BufferError):
+            pass
+
+
+def _open(value: Any, attached: List[shared_memory.SharedMemory]) -> Any:
+    """Worker side of _share: map shared memory references back to values."""
+    if isinstance(value, SharedArrayRef):
+        segment = _attach(value.name)
+        attached.append(segment)
+        return np.ndarray(value.shape, dtype=np.dtype(value.dtype), buffer=segment.buf)
+    if isinstance(value, SharedFrameRef):
+        segment = _attach(value.name)
+        attached.append(segment)
+        if value.format == "arrow":
+            import pyarrow as pa
+            return pa.ipc.open_stream(pa.py_buffer(segment.buf)[:value.size]).read_all().to_pandas()
+        return pickle.loads(segment.buf[:value.size])
+    return value
+
+
+# ----------------------------------------------------------------------
+# Worker processes
+# ----------------------------------------------------------------------
+
+def _worker_main(conn) -> None:
+    """Run (fn, args, kwargs) requests until the pipe closes."""
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+
+        fn, args, kwargs = request
+        attached: List[shared_memory.SharedMemory] = []
+        try:
+            args = tuple(_open(value, attached) for value in args)
+            kwargs = {key: _open(value, attached) for key, value in kwargs.items()}
+            response = (True, fn(*args, **kwargs))
+        except BaseException as e:
+            response = (False, e)
+        args = kwargs = None
+
+        try:
+            conn.send(response)
+        except Exception as e:
+            # Unpicklable result or exception
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+        response = None
+
+        for segment in attached:
+            try:
+                segment.close()
+            except BufferError:
+                # A returned value still views the segment; it is unmapped when collected
+                pass
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe."""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        # Not daemonic, so analyses may use process pools of their own
+        self.process = context.Process(target=_worker_main, args=(child_conn,), name="analysis-worker")
+        self.process.start()
+        child_conn.close()
+
+    def call(self, request: tuple) -> tuple:
+        """Send a request and wait for its response (runs in a pool thread)."""
+        try:
+            self.conn.send(request)
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.conn.close()
+            raise
+
+    def alive(self) -> bool:
+        return self.process.is_alive() and not self.conn.closed
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=5)
+
+
+class AnalysisPool:
+    """Fixed number of analysis worker processes, started on demand."""
+
+    def __init__(self, workers: int, start_method: str = "spawn"):
+        self.workers = workers
+        self._context = multiprocessing.get_context(start_method)
+        self._lock = threading.Lock()
+        self._idle: List[_Worker] = []
+        self._busy: set = set()
+        # Threads that wait on worker pipes, one per worker
+        self._waiters = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-pool")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queued = 0
+        self.active = 0
+        self.killed = 0
+        self._closed = False
+
+    def start(self) -> None:
+        """Start all workers now instead of on first use."""
+        with self._lock:
+            while len(self._idle) + len(self._busy) < self.workers:
+                self._idle.append(_Worker(self._context))
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.workers)
+            self._slots_loop = loop
+        return self._slots
+
+    def _checkout(self) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    break
+                worker.kill()
+            else:
+                worker = _Worker(self._context)
+            self._busy.add(worker)
+            return worker
+
+    def _checkin(self, worker: _Worker, healthy: bool) -> None:
+        with self._lock:
+            self._busy.discard(worker)
+            if healthy and not self._closed:
+                self._idle.append(worker)
+                return
+        worker.kill()
+
+    def _return_checkout(self, slot: asyncio.Semaphore, checkout: asyncio.Future) -> None:
+        """Check in the worker a cancelled caller's checkout took, then free its slot."""
+        if checkout.cancelled() or checkout.exception() is not None:
+            slot.release()
+            return
+        checkin = asyncio.get_running_loop().run_in_executor(None, self._checkin, checkout.result(), True)
+        checkin.add_done_callback(lambda _: slot.release())
+
+    @staticmethod
+    def _release_sharing(slot: asyncio.Semaphore, sharing: asyncio.Future) -> None:
+        """Unlink the segments a cancelled caller's argument copy created, then free its slot."""
+        try:
+            if not sharing.cancelled() and sharing.exception() is None:
+                _release(sharing.result()[2])
+        finally:
+            slot.release()
+
+    async def run(self, fn: Callable[..., T], *args, timeout: Optional[float] = None, **kwargs) -> T:
+        """
+        Run fn(*args, **kwargs) in a worker process.
+
+        Args:
+            fn: Module-level function (pickled by reference)
+            timeout: Seconds before the worker is killed (default analysis_task_timeout_seconds)
+
+        Raises:
+            TimeoutError: If fn did not finish in time
+            RuntimeError: If the worker died
+        """
+        if self._closed:
+            raise RuntimeError("Analysis pool is shut down")
+        settings = get_settings()
+        timeout = timeout or settings.analysis_task_timeout_seconds
+        max_shared_bytes = int(settings.analysis_shared_memory_max_mb * 1024 * 1024)
+        name = getattr(fn, "__name__", "analysis")
+        loop = asyncio.get_running_loop()
+
+        segments: List[shared_memory.SharedMemory] = []
+        outcome = "error"
+        try:
+            self.queued += 1
+            ANALYSIS_QUEUE_DEPTH.inc()
+            slot = self._semaphore()
+            try:
+                await slot.acquire()
+            finally:
+                self.queued -= 1
+                ANALYSIS_QUEUE_DEPTH.dec()
+
+            try:
+                # Inputs are copied into shared memory (off the event loop) only
+                # once a slot is free, so /dev/shm holds one call's per worker.
+                # A cancelled caller's copy is unlinked when the thread finishes.
+                sharing = asyncio.ensure_future(asyncio.to_thread(_share_args, args, kwargs, max_shared_bytes))
+                try:
+                    shared_args, shared_kwargs, segments = await asyncio.shield(sharing)
+                except asyncio.CancelledError:
+                    outcome = "cancelled"
+                    sharing.add_done_callback(functools.partial(self._release_sharing, slot))
+                    slot = None
+                    raise
+
+                # The checkout thread takes a worker even if this task is cancelled
+                # meanwhile; that worker and the slot are returned when it finishes
+                checkout = asyncio.ensure_future(asyncio.to_thread(self._checkout))
+                try:
+                    worker = await asyncio.shield(checkout)
+                except asyncio.CancelledError:
+                    outcome = "cancelled"
+                    checkout.add_done_callback(functools.partial(self._return_checkout, slot))
+                    slot = None
+                    raise
+                self.active += 1
+                ANALYSIS_ACTIVE_TASKS.inc()
+                started = time.perf_counter()
+                healthy = False
+                try:
+                    ok, value = await asyncio.wait_for(
+                        loop.run_in_executor(self._waiters, worker.call, (fn, shared_args, shared_kwargs)),
+                        timeout
+                    )
+                    healthy = True
+                except asyncio.TimeoutError:
+                    outcome = "timeout"
+                    raise TimeoutError(f"Analysis {name} timed out after {timeout:g}s") from None
+                except asyncio.CancelledError:
+                    outcome = "cancelled"
+                    raise
+                except (EOFError, OSError) as e:
+                    raise RuntimeError(f"Analysis worker exited unexpectedly during {name}") from e
+                finally:
+                    self.active -= 1
+                    ANALYSIS_ACTIVE_TASKS.dec()
+                    ANALYSIS_TASK_DURATION.observe(time.perf_counter() - started, (name,))
+                    if not healthy:
+                        self.killed += 1
+                        logger.warning(f"Killing analysis worker running {name} ({outcome})")
+                    # Killing a worker waits for the process to exit
+                    await asyncio.to_thread(self._checkin, worker, healthy)
+            finally:
+                if slot is not None:
+                    slot.release()
+
+            if not ok:
+                raise value
+            outcome = "ok"
+            return value
+        finally:
+            ANALYSIS_TASKS.inc((name, outcome))
+            _release(segments)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "started": len(self._idle) + len(self._busy),
+                "idle": len(self._idle),
+                "queued": self.queued,
+                "active": self.active,
+                "killed": self.killed,
+            }
+
+    def shutdown(self) -> None:
+        """Stop idle workers and kill busy ones."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            busy = list(self._busy)
+        for worker in idle:
+            worker.stop()
+        for worker in busy:
+            worker.kill()
+        self._waiters.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[AnalysisPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_analysis_pool() -> Optional[AnalysisPool]:
+    """The process-wide analysis pool, or None when analyses run on threads."""
+    global _pool
+    settings = get_settings()
+    if settings.analysis_pool_workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = AnalysisPool(settings.analysis_pool_workers, settings.analysis_pool_start_method)
+            atexit.register(_pool.shutdown)
+            logger.info(f"Analysis pool: {settings.analysis_pool_workers} {settings.analysis_pool_start_method} workers")
+        return _pool
+
+
+def shutdown_analysis_pool() -> None:
+    """Stop the analysis workers (a later run_analysis starts a new pool)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+        atexit.unregister(pool.shutdown)
+
+
+async def run_analysis(fn: Callable[..., T], *args, timeout: Optional[float] = None, **kwargs) -> T:
+    """
+    Run a CPU-bound analysis function off the event loop.
+
+    Uses the analysis process pool (fn must be a module-level function and
+    its arguments and result picklable; arrays and DataFrames go through
+    shared memory), or the default thread pool when the pool is disabled.
+    """
+    pool = get_analysis_pool()
+    if pool is not None:
+        return await pool.run(fn, *args, timeout=timeout, **kwargs)
+
+    timeout = timeout or get_settings().analysis_task_timeout_seconds
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(loop.run_in_executor(None, functools.partial(fn, *args, **kwargs)), timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Analysis {getattr(fn, '__name__', 'analysis')} timed out after {timeout:g}s") from None
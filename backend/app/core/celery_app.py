@@ -5,7 +5,7 @@ Celery application stub for task decorators.
 import ssl
 import logging
 from celery import Celery
-from celery.signals import setup_logging
+from celery.signals import setup_logging, worker_process_init, worker_process_shutdown, worker_shutdown
 from rich.console import Console
 from rich.logging import RichHandler
 from app.core.config.settings import get_settings
@@ -89,7 +89,23 @@ celery_config = {
         "app.tasks.chat_tasks",
         "app.tasks.embedding_tasks",
         "app.tasks.sentiment_tasks",
+        "app.tasks.analytics_tasks",
     ],
+    # Periodic maintenance (requires a running `celery beat`)
+    "beat_schedule": {
+        "refresh-llm-call-rollups": {
+            "task": "app.tasks.analytics_tasks.refresh_llm_call_rollups",
+            "schedule": settings.llm_rollup_interval_seconds,
+        },
+        "archive-llm-calls": {
+            "task": "app.tasks.analytics_tasks.archive_llm_calls",
+            "schedule": 3600.0,
+        },
+        "sweep-apify-runs": {
+            "task": "app.tasks.scraping_tasks.sweep_apify_runs_task",
+            "schedule": settings.apify_sweep_interval_seconds,
+        },
+    },
     # Connection resilience settings
     "broker_connection_retry": True,
     "broker_connection_retry_on_startup": True,
@@ -142,3 +158,28 @@ celery_app.conf.update(celery_config)
 
 print(f"DEBUG: Celery configured - SSL in transport_options: {use_ssl}")
 
+
+@worker_process_init.connect
+def warm_up_local_models(**kwargs):
+    """Load configured local models once per worker process."""
+    if settings.local_models_warmup:
+        from app.services.model_registry import get_model_registry
+
+        get_model_registry().warm_up(settings.local_models_warmup)
+
+
+@worker_process_init.connect
+def start_async_runtime(**kwargs):
+    """Give the worker process one long-lived event loop for its async tasks."""
+    from app.core.worker_loop import start_worker_loop
+
+    start_worker_loop()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect  # solo/threads pools have no child processes
+def stop_async_runtime(**kwargs):
+    """Drain queued writes and close the worker's pools, clients and loop."""
+    from app.core.worker_loop import shutdown_worker_loop
+
+    shutdown_worker_loop()
@@ -142,6 +142,14 @@ class Settings(BaseSettings):
     # Vector Database Configuration
     vector_database: str = Field(default="pinecone", description="Vector database provider")
     memory_type: str = Field(default="vector", description="Memory storage type")
+
+    # pgvector Index Configuration
+    vector_index_m: int = Field(default=16, ge=2, le=100, description="HNSW max connections per layer")
+    vector_index_ef_construction: int = Field(default=64, ge=4, le=1000, description="HNSW build-time candidate list size")
+    vector_index_min_rows: int = Field(default=1000, ge=0, description="Embedded rows required before building an HNSW index")
+    vector_index_maintenance_work_mem: str = Field(default="512MB", pattern=r"^\d+(kB|MB|GB)$", description="maintenance_work_mem for HNSW builds")
+    vector_ef_search: int = Field(default=40, ge=1, le=1000, description="Default hnsw.ef_search for ANN queries")
+    vector_iterative_scan: str = Field(default="relaxed_order", pattern="^(off|relaxed_order|strict_order)$", description="hnsw.iterative_scan mode for filtered searches (pgvector >= 0.8)")
     
     # Pinecone Configuration
     pinecone_api_key: Optional[str] = Field(default=None, description="Pinecone API key")
@@ -154,6 +162,14 @@ class Settings(BaseSettings):
     apify_twitter_actor_id: str = Field(default="apidojo/tweet-scraper", description="Apify Twitter scraper actor ID")
     apify_g2_actor_id: str = Field(default="epctex/g2-scraper", description="Apify G2 scraper actor ID")
     apify_trustpilot_actor_id: str = Field(default="compass/trustpilot-scraper", description="Apify Trustpilot scraper actor ID")
+    apify_api_base_url: str = Field(default="https://api.apify.com", description="Apify API base URL (override for a local fake Apify server)")
+    apify_webhook_base_url: Optional[str] = Field(default=None, description="Public base URL of this API that Apify run webhooks are sent to (unset = polling only)")
+    apify_poll_initial_seconds: float = Field(default=5.0, gt=0.0, description="First delay before an Apify run is polled; doubles on every poll")
+    apify_poll_max_seconds: float = Field(default=60.0, gt=0.0, description="Maximum delay between polls of an Apify run")
+    apify_run_timeout_seconds: int = Field(default=1800, ge=60, description="Apify runs still unfinished after this long are aborted")
+    apify_dataset_page_size: int = Field(default=500, ge=1, le=250000, description="Items fetched per Apify dataset page")
+    apify_poll_stale_seconds: float = Field(default=600.0, gt=0.0, description="Running Apify jobs not polled for this long have lost their polling task and are re-enqueued")
+    apify_sweep_interval_seconds: float = Field(default=300.0, gt=0.0, description="Seconds between sweeps for Apify jobs that lost their polling task (Celery beat)")
     
     # ZenRows Configuration (Anti-bot Web Scraping)
     zenrows_api_key: Optional[str] = Field(default=None, description="ZenRows API key for anti-bot scraping")
@@ -189,6 +205,28 @@ class Settings(BaseSettings):
     websocket_heartbeat_interval: int = Field(default=30, ge=5, le=300, description="WebSocket heartbeat interval")
     websocket_max_connections: int = Field(default=1000, ge=1, le=10000, description="Max concurrent WebSocket connections")
 
+    # Streaming (SSE) Configuration
+    sse_coalesce_ms: float = Field(default=25.0, ge=0.0, le=1000.0, description="Window for merging consecutive content deltas into one SSE frame (0 = no window)")
+    sse_heartbeat_seconds: float = Field(default=15.0, ge=0.0, description="Idle seconds before an SSE heartbeat comment is sent (0 = disabled)")
+    sse_backlog_threshold: int = Field(default=64, ge=1, description="Queued events at which a client counts as slow and thinking deltas are dropped")
+    sse_queue_size: int = Field(default=256, ge=1, description="Events read ahead of an SSE client; when full the event source waits for the client")
+
+    # Export Configuration
+    export_chunk_rows: int = Field(default=5000, ge=100, description="Rows fetched from the server-side cursor and encoded per chunk of a streaming export")
+
+    # Review Ingestion Configuration
+    review_insert_chunk_rows: int = Field(default=1000, ge=1, le=2000, description="Scraped reviews per multi-row INSERT (asyncpg allows 32767 bind parameters)")
+    review_reuse_enabled: bool = Field(default=True, description="Copy fresh reviews already scraped for a same-named company into the user's table before scraping")
+    review_reuse_freshness_days: Dict[str, int] = Field(
+        default={
+            "default": 30,
+            "g2": 90,
+            "trustradius": 90,
+            "trustpilot": 30
+        },
+        description="Max age in days of reusable reviews per platform ('default' for the rest, 0 = never reuse)"
+    )
+
     # Security Configuration
     secret_key: str = Field(
         default_factory=lambda: secrets.token_urlsafe(32),
@@ -239,6 +277,91 @@ class Settings(BaseSettings):
     cache_max_size: int = Field(default=1000, ge=10, le=100000, description="Max cache entries")
     cache_backend: str = Field(default="redis", pattern="^(memory|redis)$", description="Cache backend")
 
+    # Embedding Batching Configuration
+    embedding_api_base_url: Optional[str] = Field(default=None, description="Override the embeddings API base URL (e.g. a local stub server)")
+    embedding_max_concurrency: int = Field(default=8, ge=1, le=64, description="Max concurrent embedding requests")
+    embedding_max_tokens_per_request: int = Field(default=250000, ge=1000, le=300000, description="Token budget per embedding request")
+    embedding_max_retries: int = Field(default=5, ge=0, le=20, description="Max retries of a rate-limited embedding request")
+
+    # Embedding Cache Configuration
+    embedding_cache_enabled: bool = Field(default=True, description="Enable content-hash embedding cache")
+    embedding_cache_max_entries: int = Field(default=10000, ge=0, le=1000000, description="Max embeddings kept in the in-process LRU")
+    embedding_cache_ttl_seconds: int = Field(default=30*86400, ge=60, description="TTL for embeddings stored in Valkey")
+    embedding_cache_redis_url: Optional[str] = Field(default=None, description="Valkey URL for the shared embedding cache tier (defaults to redis_url)")
+    embedding_cache_redis_retry_seconds: float = Field(default=30.0, gt=0.0, description="Seconds the embedding cache skips its Valkey tier after a connection failure before trying again")
+
+    # Session Dataset Cache Configuration (lg_workflow DataManager)
+    datamanager_cache_max_bytes: int = Field(default=2 * 1024**3, ge=0, description="Estimated DataFrame bytes kept in memory across all sessions")
+    datamanager_cache_ttl_seconds: int = Field(default=3600, ge=60, description="Idle time after which session datasets and artifacts are dropped")
+    datamanager_max_sessions: int = Field(default=1000, ge=1, description="Max DataManager sessions kept per process")
+    datamanager_spill_enabled: bool = Field(default=True, description="Spill evicted session artifacts to local Parquet files")
+    datamanager_spill_dir: Optional[str] = Field(default=None, description="Directory for spilled artifacts (defaults to a temp dir)")
+
+    # Sentiment Engine Configuration
+    sentiment_backend: str = Field(default="lexicon", pattern="^(lexicon|transformer)$", description="Default sentiment scoring backend")
+    sentiment_transformer_model: str = Field(default="distilbert-base-uncased-finetuned-sst-2-english", description="Local classifier for the transformer sentiment backend")
+    sentiment_transformer_batch_size: int = Field(default=64, ge=1, le=1024, description="Texts per transformer inference batch")
+    sentiment_cache_max_entries: int = Field(default=200000, ge=0, le=5000000, description="Max per-text sentiment scores kept in the in-process LRU")
+    sentiment_parallel_min_rows: int = Field(default=100000, ge=0, description="Uncached texts above which lexicon scoring fans out over a process pool (0 disables)")
+    sentiment_max_workers: int = Field(default=0, ge=0, le=64, description="Sentiment process pool size (0 = CPU count)")
+    sentiment_llm_batch_size: int = Field(default=50, ge=1, le=500, description="Reviews scored per LLM sentiment call")
+    sentiment_llm_max_tokens_per_call: int = Field(default=12000, ge=500, description="Estimated review tokens packed into one LLM sentiment call")
+    sentiment_llm_max_concurrency: int = Field(default=4, ge=1, le=64, description="Concurrent LLM sentiment calls per task")
+    sentiment_llm_max_review_chars: int = Field(default=500, ge=50, description="Review text truncated to this length before LLM scoring")
+    sentiment_llm_write_batch_size: int = Field(default=1000, ge=1, description="LLM sentiment scores written per bulk UPDATE")
+    sentiment_progress_interval_seconds: float = Field(default=2.0, ge=0.0, description="Minimum seconds between Celery progress updates")
+
+    # Analysis Pool Configuration
+    analysis_pool_workers: int = Field(default=2, ge=0, le=64, description="Worker processes for CPU-bound analysis tools (0 = run them on the default thread pool)")
+    analysis_pool_start_method: str = Field(default="spawn", pattern="^(spawn|forkserver)$", description="multiprocessing start method of analysis workers")
+    analysis_shared_memory_max_mb: float = Field(default=24.0, ge=0.0, description="Array/DataFrame arguments of one analysis call passed through /dev/shm; larger ones are pickled through the worker pipe (/dev/shm must hold analysis_pool_workers times this)")
+    analysis_task_timeout_seconds: float = Field(default=300.0, gt=0.0, description="Analysis tasks still running after this long are killed")
+
+    # Chat Step Buffer Configuration
+    step_buffer_flush_interval_seconds: float = Field(default=0.5, ge=0.0, description="Seconds between timed flushes of buffered workflow steps (0 = flush only on size/close)")
+    step_buffer_max_pending: int = Field(default=50, ge=1, description="Buffered step writes that trigger an immediate flush")
+    step_buffer_max_retries: int = Field(default=3, ge=0, description="Extra flush attempts when a chat stream ends")
+
+    # Conversation History Configuration
+    history_token_budget: int = Field(default=4000, ge=100, description="Prompt tokens for conversation history (rolling summary + newest messages)")
+    history_summary_max_tokens: int = Field(default=500, ge=50, description="Target length of a session's rolling summary")
+    history_summary_trigger_tokens: int = Field(default=800, ge=0, description="Tokens of messages outside the history window that trigger a summary update")
+    history_max_messages: int = Field(default=50, ge=1, description="Newest messages considered when assembling history")
+    history_summary_model: str = Field(default="gpt-4.1-nano", description="Model that updates rolling conversation summaries")
+
+    # Workflow Factory Configuration
+    workflow_bound_cache_size: int = Field(default=256, ge=1, description="Per-user bindings of the compiled multi-agent workflow kept in memory")
+    workflow_warmup: bool = Field(default=True, description="Compile the multi-agent workflow at API startup")
+    simple_workflow_cache_ttl_seconds: float = Field(default=300.0, ge=0.0, description="Seconds a user's simple workflow (prompts embed their dataset list) is reused (0 = disabled)")
+    simple_workflow_cache_size: int = Field(default=128, ge=1, description="Users whose simple workflow is kept in memory")
+
+    # Workflow Checkpoint Configuration
+    workflow_checkpointer: str = Field(default="memory", pattern="^(memory|postgres)$", description="Conversation state store for the multi-agent workflow (postgres shares it across API workers)")
+    workflow_checkpoint_flush_interval_seconds: float = Field(default=0.05, ge=0.0, description="Seconds between batched checkpoint writes (0 = flush only on size/read/close)")
+    workflow_checkpoint_max_pending: int = Field(default=200, ge=1, description="Buffered checkpoint rows that trigger an immediate flush")
+    workflow_checkpoint_ttl_seconds: int = Field(default=7 * 24 * 3600, ge=0, description="Threads idle longer than this are pruned (0 = keep forever)")
+    workflow_checkpoint_keep_last: int = Field(default=20, ge=1, description="Checkpoints kept per thread when pruning")
+    workflow_checkpoint_prune_interval_seconds: float = Field(default=3600.0, ge=0.0, description="Seconds between prune runs per worker (0 = disabled)")
+
+    # LLM Call Analytics Configuration
+    llm_rollup_interval_seconds: float = Field(default=300.0, gt=0.0, description="Seconds between incremental refreshes of the hourly LLM call rollups (Celery beat)")
+    llm_rollup_lookback_hours: int = Field(default=3, ge=1, description="Recent hours rebuilt on each rollup refresh so late-completing calls are counted")
+    llm_call_retention_days: int = Field(default=30, ge=0, description="Raw LLM call rows older than this are moved to llm_call_archive (0 = keep)")
+    llm_call_archive_batch_size: int = Field(default=5000, ge=100, description="Rows moved per archive transaction")
+
+    # LLM Call Logging Configuration
+    llm_log_flush_interval_seconds: float = Field(default=0.25, ge=0.0, description="Seconds between batched writes of queued LLM call logs (0 = flush only on size/close)")
+    llm_log_batch_size: int = Field(default=500, ge=1, description="Queued LLM call log writes that trigger an immediate flush")
+    llm_log_queue_size: int = Field(default=10000, ge=1, description="Maximum LLM call log writes held in memory per process")
+    llm_log_overflow: str = Field(default="drop_new", pattern="^(drop_new|drop_oldest)$", description="Which write to drop when the LLM call log queue is full")
+    llm_log_max_retries: int = Field(default=3, ge=0, description="Extra flush attempts for queued LLM call logs on shutdown")
+
+    # Local Model Configuration
+    local_models_warmup: List[str] = Field(
+        default=[],
+        description="Local SentenceTransformer models to load at API/worker startup (e.g. all-MiniLM-L6-v2)"
+    )
+
     # Logging Configuration
     log_level: LogLevel = Field(default=LogLevel.INFO, description="Application log level")
     log_format: str = Field(
@@ -253,6 +376,8 @@ class Settings(BaseSettings):
     # Monitoring Configuration
     enable_metrics: bool = Field(default=True, description="Enable Prometheus metrics")
     metrics_path: str = Field(default="/metrics", description="Metrics endpoint path")
+    metrics_multiproc_dir: Optional[str] = Field(default=None, description="Shared directory for per-worker metric snapshots, merged at scrape time (empty it on deploy)")
+    metrics_snapshot_interval_seconds: float = Field(default=5.0, gt=0.0, description="Seconds between per-worker metric snapshot writes in multi-process mode")
     enable_health_checks: bool = Field(default=True, description="Enable health check endpoints")
     health_check_timeout: int = Field(default=30, ge=1, le=300, description="Health check timeout")
 
@@ -312,6 +437,8 @@ class Settings(BaseSettings):
     celery_worker_prefetch_multiplier: int = Field(default=1, ge=1, le=100, description="Worker prefetch multiplier")
     celery_worker_max_tasks_per_child: int = Field(default=1000, ge=1, description="Max tasks per worker child")
     celery_result_expires: int = Field(default=3600, ge=60, description="Task result expiration time")
+    worker_http_timeout_seconds: float = Field(default=30.0, gt=0.0, description="Timeout of the httpx/aiohttp clients shared by a worker's async tasks")
+    worker_http_max_connections: int = Field(default=100, ge=1, description="Connection pool size of each shared worker HTTP client")
 
     # File Upload Configuration
     max_upload_size: int = Field(default=50*1024*1024, ge=1024, description="Max file upload size in bytes")
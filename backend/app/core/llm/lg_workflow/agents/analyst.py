@@ -1,16 +1,16 @@
 """Data Analyst Agent - performs computations on datasets."""
-from typing import Optional
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from app.core.llm.lg_workflow.tools.analytics import clustering_tool, tfidf_tool, describe_tool
 from app.core.llm.lg_workflow.tools.ml import sentiment_analysis_tool, embedding_tool, linear_regression_tool, trend_analysis_tool, product_gap_detection_tool, negative_review_gap_detector, semantic_search_tool
-from .base import create_agent, llm
+from .base import create_agent, get_bound_context, llm
 
-def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
-    """Create analyst agent with tools bound to user_id and optional focused dataset."""
+def create_analyst_node():
+    """Create analyst agent; user_id and focused dataset are read from the run config."""
     
-    # Create wrapper tools with user_id bound (and optional default table_name)
+    # Wrapper tools take user_id (and the optional focused table_name) from the run config
     @tool
-    async def clustering(table_name: str, target_column: str, n_clusters: int = 3) -> str:
+    async def clustering(table_name: str, target_column: str, n_clusters: int = 3, config: RunnableConfig = None) -> str:
         """
         Performs K-Means clustering on a numeric column of a dataset.
         
@@ -27,11 +27,12 @@ def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
             target_column: Numeric column to cluster on
             n_clusters: Number of clusters to create (default: 3)
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await clustering_tool.coroutine(table_name=actual_table, target_column=target_column, user_id=user_id, n_clusters=n_clusters)
     
     @tool
-    async def tfidf_analysis(table_name: str, text_column: str, max_features: int = 10) -> str:
+    async def tfidf_analysis(table_name: str, text_column: str, max_features: int = 10, config: RunnableConfig = None) -> str:
         """
         Computes TF-IDF (Term Frequency-Inverse Document Frequency) analysis for a text column.
         
@@ -43,11 +44,12 @@ def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
             text_column: Text column to analyze
             max_features: Number of top terms to return (default: 10)
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await tfidf_tool.coroutine(table_name=actual_table, text_column=text_column, user_id=user_id, max_features=max_features)
     
     @tool
-    async def describe_dataset(table_name: str) -> str:
+    async def describe_dataset(table_name: str, config: RunnableConfig = None) -> str:
         """
         Returns descriptive statistics and metadata for a dataset.
         
@@ -59,11 +61,12 @@ def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
         Args:
             table_name: Name of the dataset to describe
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await describe_tool.coroutine(table_name=actual_table, user_id=user_id)
     
     @tool
-    async def sentiment_analysis(table_name: str, text_column: str) -> str:
+    async def sentiment_analysis(table_name: str, text_column: str, config: RunnableConfig = None) -> str:
         """
         Analyzes the sentiment of a text column in a dataset.
         
@@ -79,11 +82,12 @@ def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
             table_name: Name of the dataset
             text_column: Text column to analyze (e.g., 'text', 'review', 'comment')
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await sentiment_analysis_tool.coroutine(table_name=actual_table, text_column=text_column, user_id=user_id)
     
     @tool
-    async def generate_embeddings(table_name: str, text_column: str) -> str:
+    async def generate_embeddings(table_name: str, text_column: str, config: RunnableConfig = None) -> str:
         """
         Generates vector embeddings for a text column using OpenAI's embedding model.
         
@@ -94,11 +98,12 @@ def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
             table_name: Name of the dataset
             text_column: Text column to generate embeddings for
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await embedding_tool.coroutine(table_name=actual_table, text_column=text_column, user_id=user_id)
     
     @tool
-    async def linear_regression(table_name: str, target_column: str, feature_columns: list[str]) -> str:
+    async def linear_regression(table_name: str, target_column: str, feature_columns: list[str], config: RunnableConfig = None) -> str:
         """
         Performs a simple linear regression to predict a target column based on feature columns.
         
@@ -109,11 +114,12 @@ def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
             target_column: Column to predict (dependent variable)
             feature_columns: List of columns to use as features (independent variables)
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await linear_regression_tool.coroutine(table_name=actual_table, target_column=target_column, feature_columns=feature_columns, user_id=user_id)
     
     @tool
-    async def trend_analysis(table_name: str, date_column: str, value_column: str, period: str = "M") -> str:
+    async def trend_analysis(table_name: str, date_column: str, value_column: str, period: str = "M", config: RunnableConfig = None) -> str:
         """
         Analyzes trends in a value column over time.
         
@@ -130,11 +136,12 @@ def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
             value_column: Numeric column to track over time
             period: Aggregation period - 'D' (daily), 'W' (weekly), 'M' (monthly), 'Q' (quarterly), 'Y' (yearly)
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await trend_analysis_tool.coroutine(table_name=actual_table, date_column=date_column, value_column=value_column, user_id=user_id, period=period)
     
     @tool
-    async def product_gap_detection(table_name: str, min_cluster_size: int = 5, eps: float = 0.3) -> str:
+    async def product_gap_detection(table_name: str, min_cluster_size: int = 5, eps: float = 0.3, config: RunnableConfig = None) -> str:
         """
         Detects gaps in a product catalog by clustering on embeddings.
         
@@ -150,6 +157,7 @@ def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
             min_cluster_size: Minimum cluster size for DBSCAN (default: 5)
             eps: DBSCAN epsilon parameter for clustering (default: 0.3)
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await product_gap_detection_tool.coroutine(table_name=actual_table, user_id=user_id, min_cluster_size=min_cluster_size, eps=eps)
     
@@ -160,7 +168,8 @@ def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
         rating_column: str | None = None,
         max_clusters: int = 100,
         min_rating: int = 1,
-        max_rating: int = 3
+        max_rating: int = 3,
+        config: RunnableConfig = None
     ) -> str:
         """
         Detects product gaps from reviews using HDBSCAN clustering + LLM.
@@ -181,6 +190,7 @@ def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
             min_rating: Minimum rating when filtering (default: 1)
             max_rating: Maximum rating when filtering (default: 3)
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await negative_review_gap_detector.coroutine(
             table_name=actual_table, 
@@ -197,7 +207,8 @@ def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
         table_name: str,
         query: str,
         text_column: str = "text",
-        top_k: int = 1000
+        top_k: int = 1000,
+        config: RunnableConfig = None
     ) -> str:
         """
         Performs semantic search to find reviews matching a query.
@@ -214,6 +225,7 @@ def create_analyst_node(user_id: str, dataset_table_name: Optional[str] = None):
             text_column: Column containing review text (default: "text")
             top_k: Maximum results to return (default: 1000)
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await semantic_search_tool.coroutine(
             table_name=actual_table,
@@ -269,14 +281,16 @@ You: "Analysis done, see previous message."
 
 Remember: Tools do all the work. You just call them and say "Analysis done, see previous message." That's it."""
 
-    if dataset_table_name:
-        focused_notice = f"""
+    def build_prompt(config: RunnableConfig) -> str:
+        _, dataset_table_name = get_bound_context(config)
+        if not dataset_table_name:
+            return base_prompt
+        return base_prompt + f"""
 
 ⚠️ FOCUSED MODE ACTIVE ⚠️
 You are working exclusively with dataset: '{dataset_table_name}'
 - ALWAYS use table_name='{dataset_table_name}' for all tool calls
 - Do NOT reference or analyze other datasets
 - The table_name parameter will auto-redirect to this dataset"""
-        base_prompt += focused_notice
     
-    return create_agent(llm, analyst_tools, base_prompt)
+    return create_agent(llm, analyst_tools, build_prompt)
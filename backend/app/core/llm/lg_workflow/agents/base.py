@@ -1,4 +1,7 @@
 """Base utilities for agent creation."""
+from typing import Callable, Optional, Tuple, Union
+from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
 from app.core.config.settings import get_settings
@@ -19,8 +22,30 @@ cheap_llm = ChatOpenAI(
 )
 
 
-def create_agent(llm, tools, system_prompt: str):
-    """Creates a standard ReAct agent node."""
+def get_bound_context(config: Optional[RunnableConfig]) -> Tuple[str, Optional[str]]:
+    """
+    Return the (user_id, dataset_table_name) a workflow run is bound to.
+
+    The graph is compiled once per process; per-user state travels in
+    config["configurable"] (see WorkflowFactory.bind).
+    """
+    configurable = (config or {}).get("configurable", {})
+    return configurable["user_id"], configurable.get("dataset_table_name")
+
+
+def create_agent(llm, tools, system_prompt: Union[str, Callable[[RunnableConfig], str]]):
+    """
+    Creates a standard ReAct agent node.
+
+    system_prompt may be a callable that builds the prompt from the run
+    config, so a single agent instance serves every user.
+    """
+    prompt = system_prompt
+    if callable(system_prompt):
+        def _prompt(state, config: RunnableConfig):
+            return [SystemMessage(content=system_prompt(config))] + state["messages"]
+        prompt = RunnableLambda(_prompt)
+
     # We use the prebuilt create_react_agent which handles tool calling loops
-    agent = create_react_agent(llm, tools, prompt=system_prompt)
+    agent = create_react_agent(llm, tools, prompt=prompt)
     return agent
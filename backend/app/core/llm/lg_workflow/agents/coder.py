@@ -5,12 +5,14 @@ Uses Claude Sonnet 4.5 for superior code generation capabilities.
 This agent is called when other agents cannot handle complex data requests.
 """
 
-from typing import Optional, List, Dict, Any
+from typing import List, Dict, Any
 from langchain_core.tools import tool
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_anthropic import ChatAnthropic
 from langgraph.prebuilt import create_react_agent
 from app.core.config.settings import get_settings
+from .base import get_bound_context
 
 settings = get_settings()
 
@@ -94,11 +96,11 @@ df = get_dataset("{example_table}")
 Write code and execute with execute_python_code tool."""
 
 
-def create_coder_node(user_id: str, dataset_table_name: Optional[str] = None):
+def create_coder_node():
     """Create coder agent node - fetches dataset info at runtime."""
     
     @tool
-    async def execute_python_code(code: str) -> str:
+    async def execute_python_code(code: str, config: RunnableConfig = None) -> str:
         """
         Execute Python code for data analysis.
         
@@ -110,6 +112,7 @@ def create_coder_node(user_id: str, dataset_table_name: Optional[str] = None):
         """
         from app.core.llm.lg_workflow.tools.code_execution import execute_code_tool
         
+        user_id, dataset_table_name = get_bound_context(config)
         return await execute_code_tool(
             code=code,
             dataset_id=dataset_table_name,
@@ -118,8 +121,19 @@ def create_coder_node(user_id: str, dataset_table_name: Optional[str] = None):
     
     tools = [execute_python_code]
     
-    async def coder_node(state):
+    # Built once; the prompt is rendered per run from the dataset info the
+    # node fetches and passes along in the config
+    agent = create_react_agent(
+        claude_llm,
+        tools,
+        prompt=RunnableLambda(
+            lambda state, config: [SystemMessage(content=config["configurable"]["coder_prompt"])] + state["messages"]
+        )
+    )
+    
+    async def coder_node(state, config: RunnableConfig):
         """Async node that fetches dataset info then runs the agent."""
+        user_id, _ = get_bound_context(config)
         
         # Fetch datasets at runtime
         datasets_info = await fetch_datasets_info(user_id)
@@ -127,15 +141,11 @@ def create_coder_node(user_id: str, dataset_table_name: Optional[str] = None):
         # Build prompt with current dataset info
         system_prompt = build_coder_prompt(datasets_info)
         
-        # Create agent with fresh prompt
-        agent = create_react_agent(
-            claude_llm,
-            tools,
-            prompt=system_prompt
-        )
-        
         # Run the agent
-        result = await agent.ainvoke(state)
+        result = await agent.ainvoke(
+            state,
+            config={**config, "configurable": {**config.get("configurable", {}), "coder_prompt": system_prompt}}
+        )
         
         # Tag messages as from Coder
         if result.get("messages"):
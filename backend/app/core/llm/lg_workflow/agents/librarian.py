@@ -1,16 +1,16 @@
 """Data Librarian Agent - helps users find the right datasets."""
-from typing import Optional
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from app.core.llm.lg_workflow.tools.base import list_datasets_tool, get_dataset_info_tool, filter_dataset_tool
 from app.core.llm.lg_workflow.tools.ml import semantic_search_tool
-from .base import create_agent, llm
+from .base import create_agent, get_bound_context, llm
 
-def create_librarian_node(user_id: str, dataset_table_name: Optional[str] = None):
-    """Create librarian agent with tools bound to user_id and optional focused dataset."""
+def create_librarian_node():
+    """Create librarian agent; user_id and focused dataset are read from the run config."""
     
-    # Create wrapper tools with user_id bound
+    # Wrapper tools take user_id (and the optional focused table_name) from the run config
     @tool
-    async def list_datasets() -> str:
+    async def list_datasets(config: RunnableConfig = None) -> str:
         """
         Lists all available datasets with their table names and descriptions.
         
@@ -19,6 +19,7 @@ def create_librarian_node(user_id: str, dataset_table_name: Optional[str] = None
         - Description of the dataset
         - Row count
         """
+        user_id, dataset_table_name = get_bound_context(config)
         result = await list_datasets_tool.coroutine(user_id=user_id)
         
         # If focused on a specific dataset, filter the results
@@ -36,7 +37,7 @@ def create_librarian_node(user_id: str, dataset_table_name: Optional[str] = None
         return result
     
     @tool
-    async def get_dataset_info(table_name: str) -> str:
+    async def get_dataset_info(table_name: str, config: RunnableConfig = None) -> str:
         """
         Returns comprehensive metadata and sample data for a dataset.
         
@@ -51,6 +52,7 @@ def create_librarian_node(user_id: str, dataset_table_name: Optional[str] = None
         Args:
             table_name: Name of the dataset to get info for
         """
+        user_id, dataset_table_name = get_bound_context(config)
         # If focused mode, override the table_name to ensure we use the focused dataset
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await get_dataset_info_tool.coroutine(table_name=actual_table, user_id=user_id)
@@ -60,7 +62,8 @@ def create_librarian_node(user_id: str, dataset_table_name: Optional[str] = None
         table_name: str,
         query: str,
         text_column: str = "text",
-        top_k: int = 1000
+        top_k: int = 1000,
+        config: RunnableConfig = None
     ) -> str:
         """
         Finds reviews/data matching a query using semantic similarity.
@@ -76,6 +79,7 @@ def create_librarian_node(user_id: str, dataset_table_name: Optional[str] = None
             text_column: Column with text content (default: "text")
             top_k: Max results (default: 1000)
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await semantic_search_tool.coroutine(
             table_name=actual_table,
@@ -90,7 +94,8 @@ def create_librarian_node(user_id: str, dataset_table_name: Optional[str] = None
         table_name: str,
         column: str,
         value: str,
-        operator: str = "contains"
+        operator: str = "contains",
+        config: RunnableConfig = None
     ) -> str:
         """
         Filters a dataset by column value for analysis.
@@ -114,6 +119,7 @@ def create_librarian_node(user_id: str, dataset_table_name: Optional[str] = None
             filter_dataset("__user_xyz_reviews", "company_name", "Slack")
             → Creates filtered dataset for Slack reviews only
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await filter_dataset_tool.coroutine(
             table_name=actual_table,
@@ -153,14 +159,16 @@ Then DataAnalyst runs sentiment on that filtered table.
 
 STAY CONCISE - let tools do the work, output minimal text."""
 
-    if dataset_table_name:
-        focused_notice = f"""
+    def build_prompt(config: RunnableConfig) -> str:
+        _, dataset_table_name = get_bound_context(config)
+        if not dataset_table_name:
+            return base_prompt
+        return base_prompt + f"""
 
 ⚠️ FOCUSED MODE ACTIVE ⚠️
 You are working exclusively with dataset: '{dataset_table_name}'
 - list_datasets will only show this dataset
 - get_dataset_info will automatically use this dataset
 - Do NOT reference or suggest other datasets"""
-        base_prompt += focused_notice
     
-    return create_agent(llm, librarian_tools, base_prompt)
+    return create_agent(llm, librarian_tools, build_prompt)
@@ -1,16 +1,17 @@
 """Visualizer Agent - creates plots from datasets."""
-from typing import Any, Optional
+from typing import Any
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from app.core.llm.lg_workflow.tools.base import get_dataset_info_tool
 from app.core.llm.lg_workflow.tools.viz import generate_plot_from_data_tool, generate_plot_tool
-from .base import create_agent, llm
+from .base import create_agent, get_bound_context, llm
 
-def create_visualizer_node(user_id: str, dataset_table_name: Optional[str] = None):
-    """Create visualizer agent with tools bound to user_id and optional focused dataset."""
+def create_visualizer_node():
+    """Create visualizer agent; user_id and focused dataset are read from the run config."""
     
-    # Create wrapper tools with user_id bound (and optional default table_name)
+    # Wrapper tools take user_id (and the optional focused table_name) from the run config
     @tool
-    async def get_dataset_info(table_name: str) -> str:
+    async def get_dataset_info(table_name: str, config: RunnableConfig = None) -> str:
         """
         Returns comprehensive metadata and sample data for a dataset.
         
@@ -25,11 +26,12 @@ def create_visualizer_node(user_id: str, dataset_table_name: Optional[str] = Non
         Args:
             table_name: Name of the dataset to get info for
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await get_dataset_info_tool.coroutine(table_name=actual_table, user_id=user_id)
 
     @tool
-    async def generate_plot_from_data(data: list[dict[str, Any]], x_column: str, y_column: str, title: str, plot_type: str = "bar") -> str:
+    async def generate_plot_from_data(data: list[dict[str, Any]], x_column: str, y_column: str, title: str, plot_type: str = "bar", config: RunnableConfig = None) -> str:
         """
         Generate a high-quality plot from raw data using Plotly.
         
@@ -43,10 +45,11 @@ def create_visualizer_node(user_id: str, dataset_table_name: Optional[str] = Non
             title: Chart title
             plot_type: Type of plot - 'bar' (default), 'scatter', 'line', 'pie', 'histogram'
         """
+        user_id, _ = get_bound_context(config)
         return await generate_plot_from_data_tool.coroutine(data=data, x_column=x_column, y_column=y_column, user_id=user_id, title=title, plot_type=plot_type)
     
     @tool
-    async def generate_plot(table_name: str, x_column: str, y_column: str, plot_type: str = "scatter", title: str = "") -> str:
+    async def generate_plot(table_name: str, x_column: str, y_column: str, plot_type: str = "scatter", title: str = "", config: RunnableConfig = None) -> str:
         """
         Generate a high-quality interactive plot for a dataset using Plotly.
         
@@ -65,6 +68,7 @@ def create_visualizer_node(user_id: str, dataset_table_name: Optional[str] = Non
                 - 'box': Box plot for distribution analysis
             title: Custom chart title (optional, auto-generated if not provided)
         """
+        user_id, dataset_table_name = get_bound_context(config)
         actual_table = dataset_table_name if dataset_table_name else table_name
         return await generate_plot_tool.coroutine(table_name=actual_table, x_column=x_column, y_column=y_column, user_id=user_id, plot_type=plot_type, title=title)
     
@@ -109,14 +113,16 @@ Pass it through
 
 Remember: Tool output is comprehensive. Just call it correctly."""
 
-    if dataset_table_name:
-        focused_notice = f"""
+    def build_prompt(config: RunnableConfig) -> str:
+        _, dataset_table_name = get_bound_context(config)
+        if not dataset_table_name:
+            return base_prompt
+        return base_prompt + f"""
 
 ⚠️ FOCUSED MODE ACTIVE ⚠️
 You are working exclusively with dataset: '{dataset_table_name}'
 - ALWAYS use table_name='{dataset_table_name}' for all tool calls
 - Do NOT reference or visualize other datasets
 - The table_name parameter will auto-redirect to this dataset"""
-        base_prompt += focused_notice
     
-    return create_agent(llm, visualizer_tools, base_prompt)
+    return create_agent(llm, visualizer_tools, build_prompt)
@@ -0,0 +1,549 @@
+"""
+Durable, shared checkpointer for the LangGraph multi-agent workflow.
+
+MemorySaver keeps conversation state in one worker's RAM, so a thread is
+lost on restart and cannot continue on another uvicorn worker. The
+PostgresCheckpointSaver stores checkpoints in the workflow_checkpoint_*
+tables instead:
+- checkpoint rows hold the checkpoint without its channel values; values
+  are stored once per (channel, version) and referenced by version, so
+  unchanged channels are never rewritten
+- values are serialized with msgpack (LangGraph's JsonPlusSerializer);
+  DataFrames are stored as Parquet
+- writes are buffered and persisted in batches, one transaction per flush,
+  off the step's critical path; reads flush first so a worker always sees
+  its own writes
+- threads idle for longer than the TTL are deleted and older checkpoints
+  are trimmed to the last N per thread
+"""
+
+import asyncio
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.config import get_settings
+from app.database.models.workflow_checkpoint import (
+    WorkflowCheckpoint,
+    WorkflowCheckpointBlob,
+    WorkflowCheckpointWrite,
+)
+from app.database.session import get_async_session
+from app.utils.logging import get_logger
+
+logger = get_logger("lg_workflow.checkpoint")
+
+# Rows per multi-row INSERT (asyncpg allows 32767 bind parameters)
+_INSERT_CHUNK = 1000
+
+_PRUNE_OLD_CHECKPOINTS = text("""
+    DELETE FROM workflow_checkpoints c
+    USING (
+        SELECT thread_id, checkpoint_ns, checkpoint_id,
+               row_number() OVER (PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC) AS rank
+        FROM workflow_checkpoints
+    ) ranked
+    WHERE ranked.rank > :keep_last
+      AND c.thread_id = ranked.thread_id
+      AND c.checkpoint_ns = ranked.checkpoint_ns
+      AND c.checkpoint_id = ranked.checkpoint_id
+""")
+
+_PRUNE_ORPHAN_WRITES = text("""
+    DELETE FROM workflow_checkpoint_writes w
+    WHERE NOT EXISTS (
+        SELECT 1 FROM workflow_checkpoints c
+        WHERE c.thread_id = w.thread_id AND c.checkpoint_ns = w.checkpoint_ns AND c.checkpoint_id = w.checkpoint_id
+    )
+""")
+
+_PRUNE_ORPHAN_BLOBS = text("""
+    DELETE FROM workflow_checkpoint_blobs b
+    WHERE NOT EXISTS (
+        SELECT 1 FROM workflow_checkpoints c
+        WHERE c.thread_id = b.thread_id AND c.checkpoint_ns = b.checkpoint_ns
+          AND c.channel_versions ->> b.channel = b.version
+    )
+""")
+
+_stats: Dict[str, float] = {
+    "flushes": 0,
+    "failed_flushes": 0,
+    "checkpoints_written": 0,
+    "blobs_written": 0,
+    "writes_written": 0,
+    "threads_pruned": 0,
+    "total_flush_ms": 0.0,
+    "max_flush_ms": 0.0,
+}
+
+
+def get_checkpoint_stats() -> Dict[str, Any]:
+    """Process-wide flush and prune counters for the metrics endpoint."""
+    flushes = _stats["flushes"]
+    return {
+        "flushes": int(flushes),
+        "failed_flushes": int(_stats["failed_flushes"]),
+        "checkpoints_written": int(_stats["checkpoints_written"]),
+        "blobs_written": int(_stats["blobs_written"]),
+        "writes_written": int(_stats["writes_written"]),
+        "threads_pruned": int(_stats["threads_pruned"]),
+        "avg_flush_ms": round(_stats["total_flush_ms"] / flushes, 2) if flushes else 0.0,
+        "max_flush_ms": round(_stats["max_flush_ms"], 2),
+    }
+
+
+class CheckpointSerializer(JsonPlusSerializer):
+    """msgpack serializer that stores DataFrames as Parquet."""
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if isinstance(obj, pd.DataFrame):
+            buffer = io.BytesIO()
+            obj.to_parquet(buffer, index=True)
+            return "parquet", buffer.getvalue()
+        return super().dumps_typed(obj)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        if data[0] == "parquet":
+            return pd.read_parquet(io.BytesIO(data[1]))
+        return super().loads_typed(data)
+
+
+def _chunks(rows: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    return [rows[i:i + _INSERT_CHUNK] for i in range(0, len(rows), _INSERT_CHUNK)]
+
+
+class PostgresCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpointer backed by Postgres with batched writes.
+
+    Only the async API is implemented; the workflow is always run with
+    ainvoke/astream_events.
+    """
+
+    def __init__(
+        self,
+        flush_interval_seconds: Optional[float] = None,
+        max_pending: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        keep_last: Optional[int] = None,
+        prune_interval_seconds: Optional[float] = None,
+    ):
+        super().__init__(serde=CheckpointSerializer())
+        settings = get_settings()
+        self.flush_interval_seconds = (
+            settings.workflow_checkpoint_flush_interval_seconds if flush_interval_seconds is None else flush_interval_seconds
+        )
+        self.max_pending = settings.workflow_checkpoint_max_pending if max_pending is None else max_pending
+        self.ttl_seconds = settings.workflow_checkpoint_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.keep_last = settings.workflow_checkpoint_keep_last if keep_last is None else keep_last
+        self.prune_interval_seconds = (
+            settings.workflow_checkpoint_prune_interval_seconds if prune_interval_seconds is None else prune_interval_seconds
+        )
+
+        # Pending rows keyed by primary key
+        self._checkpoints: Dict[Tuple, Dict[str, Any]] = {}
+        self._blobs: Dict[Tuple, Dict[str, Any]] = {}
+        self._writes: Dict[Tuple, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_prune = time.monotonic()
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered rows."""
+        return len(self._checkpoints) + len(self._blobs) + len(self._writes)
+
+    # --- Writes ---
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Buffer a checkpoint and the channel values that changed with it."""
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        now = datetime.utcnow()
+
+        c = checkpoint.copy()
+        values = c.pop("channel_values")
+        for channel, version in new_versions.items():
+            type_, blob = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)
+            self._blobs[(thread_id, checkpoint_ns, channel, str(version))] = {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "channel": channel,
+                "version": str(version),
+                "type": type_,
+                "blob": blob,
+                "created_at": now,
+            }
+
+        type_, data = self.serde.dumps_typed(c)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        self._checkpoints[(thread_id, checkpoint_ns, checkpoint["id"])] = {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+            "parent_checkpoint_id": configurable.get("checkpoint_id"),
+            "type": type_,
+            "checkpoint": data,
+            "metadata_type": metadata_type,
+            "checkpoint_metadata": metadata_data,
+            "channel_versions": {k: str(v) for k, v in c["channel_versions"].items()},
+            "created_at": now,
+        }
+        self._on_write()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Buffer the writes of one task for a checkpoint."""
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = configurable["checkpoint_id"]
+        now = datetime.utcnow()
+
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            key = (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            # Regular writes are written once; special writes (errors, interrupts) are replaced
+            if idx >= 0 and key in self._writes:
+                continue
+            type_, blob = self.serde.dumps_typed(value)
+            self._writes[key] = {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "idx": idx,
+                "channel": channel,
+                "type": type_,
+                "blob": blob,
+                "task_path": task_path,
+                "created_at": now,
+            }
+        self._on_write()
+
+    def _on_write(self) -> None:
+        if self.pending >= self.max_pending:
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self.flush())
+        elif self._timer is None and self.flush_interval_seconds > 0:
+            self._timer = asyncio.create_task(self._run_timer())
+
+    async def _run_timer(self) -> None:
+        try:
+            await asyncio.sleep(self.flush_interval_seconds)
+            await asyncio.shield(self.flush())
+            if self.prune_interval_seconds > 0 and time.monotonic() - self._last_prune >= self.prune_interval_seconds:
+                self._last_prune = time.monotonic()
+                await self.aprune_expired()
+        except Exception as e:
+            logger.warning(f"Background checkpoint maintenance failed: {e}")
+        finally:
+            self._timer = None
+            if self.pending:
+                self._on_write()
+
+    async def flush(self) -> bool:
+        """
+        Persist all buffered rows in one transaction.
+
+        Rows are put back on failure (newer buffered rows win) so the next
+        flush retries them; every statement skips or replaces existing keys,
+        so a batch can safely be written twice.
+
+        Returns:
+            True if the buffer was written (or empty), False on failure
+        """
+        async with self._lock:
+            if not self.pending:
+                return True
+
+            checkpoints, self._checkpoints = self._checkpoints, {}
+            blobs, self._blobs = self._blobs, {}
+            writes, self._writes = self._writes, {}
+
+            start = time.perf_counter()
+            try:
+                async with get_async_session() as db:
+                    for chunk in _chunks(list(blobs.values())):
+                        await db.execute(pg_insert(WorkflowCheckpointBlob).values(chunk).on_conflict_do_nothing())
+                    for chunk in _chunks(list(checkpoints.values())):
+                        stmt = pg_insert(WorkflowCheckpoint).values(chunk)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=["thread_id", "checkpoint_ns", "checkpoint_id"],
+                            set_={
+                                "type": stmt.excluded.type,
+                                "checkpoint": stmt.excluded.checkpoint,
+                                "metadata_type": stmt.excluded.metadata_type,
+                                "metadata": stmt.excluded.metadata,
+                                "channel_versions": stmt.excluded.channel_versions,
+                            },
+                        )
+                        await db.execute(stmt)
+                    regular = [row for row in writes.values() if row["idx"] >= 0]
+                    special = [row for row in writes.values() if row["idx"] < 0]
+                    for chunk in _chunks(regular):
+                        await db.execute(pg_insert(WorkflowCheckpointWrite).values(chunk).on_conflict_do_nothing())
+                    for chunk in _chunks(special):
+                        stmt = pg_insert(WorkflowCheckpointWrite).values(chunk)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=["thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"],
+                            set_={"channel": stmt.excluded.channel, "type": stmt.excluded.type, "blob": stmt.excluded.blob},
+                        )
+                        await db.execute(stmt)
+                    await db.commit()
+            except asyncio.CancelledError:
+                self._restore(checkpoints, blobs, writes)
+                raise
+            except Exception as e:
+                _stats["failed_flushes"] += 1
+                logger.warning(f"Checkpoint flush failed ({len(checkpoints)} checkpoints, {len(writes)} writes): {e}")
+                self._restore(checkpoints, blobs, writes)
+                return False
+
+            duration_ms = (time.perf_counter() - start) * 1000
+            _stats["flushes"] += 1
+            _stats["checkpoints_written"] += len(checkpoints)
+            _stats["blobs_written"] += len(blobs)
+            _stats["writes_written"] += len(writes)
+            _stats["total_flush_ms"] += duration_ms
+            _stats["max_flush_ms"] = max(_stats["max_flush_ms"], duration_ms)
+            return True
+
+    def _restore(self, checkpoints: Dict, blobs: Dict, writes: Dict) -> None:
+        self._checkpoints = {**checkpoints, **self._checkpoints}
+        self._blobs = {**blobs, **self._blobs}
+        self._writes = {**writes, **self._writes}
+
+    async def aclose(self) -> None:
+        """Stop the timer and flush what is left."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        if not await self.flush():
+            logger.error(f"Dropping {self.pending} buffered checkpoint rows on shutdown")
+
+    # --- Reads ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get the checkpoint in config, or the thread's latest checkpoint."""
+        await self.flush()
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+
+        stmt = select(WorkflowCheckpoint).where(
+            WorkflowCheckpoint.thread_id == thread_id,
+            WorkflowCheckpoint.checkpoint_ns == checkpoint_ns,
+        )
+        if checkpoint_id := get_checkpoint_id(config):
+            stmt = stmt.where(WorkflowCheckpoint.checkpoint_id == checkpoint_id)
+        else:
+            stmt = stmt.order_by(WorkflowCheckpoint.checkpoint_id.desc()).limit(1)
+
+        async with get_async_session() as db:
+            row = (await db.execute(stmt)).scalars().first()
+            if row is None:
+                return None
+            return await self._load_tuple(db, row)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """List checkpoints newest first, optionally filtered by metadata."""
+        await self.flush()
+        stmt = select(WorkflowCheckpoint)
+        if config is not None:
+            configurable = config["configurable"]
+            stmt = stmt.where(WorkflowCheckpoint.thread_id == configurable["thread_id"])
+            if "checkpoint_ns" in configurable:
+                stmt = stmt.where(WorkflowCheckpoint.checkpoint_ns == configurable["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                stmt = stmt.where(WorkflowCheckpoint.checkpoint_id == checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            stmt = stmt.where(WorkflowCheckpoint.checkpoint_id < before_id)
+        stmt = stmt.order_by(WorkflowCheckpoint.checkpoint_id.desc())
+        if limit is not None and not filter:
+            stmt = stmt.limit(limit)
+
+        async with get_async_session() as db:
+            rows = (await db.execute(stmt)).scalars().all()
+            returned = 0
+            for row in rows:
+                item = await self._load_tuple(db, row)
+                if filter and not all(item.metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                yield item
+                returned += 1
+                if limit is not None and returned >= limit:
+                    break
+
+    async def _load_tuple(self, db, row: WorkflowCheckpoint) -> CheckpointTuple:
+        checkpoint = self.serde.loads_typed((row.type, row.checkpoint))
+
+        channel_values: Dict[str, Any] = {}
+        versions = [(channel, str(version)) for channel, version in checkpoint["channel_versions"].items()]
+        if versions:
+            blobs = await db.execute(
+                select(WorkflowCheckpointBlob.channel, WorkflowCheckpointBlob.type, WorkflowCheckpointBlob.blob).where(
+                    WorkflowCheckpointBlob.thread_id == row.thread_id,
+                    WorkflowCheckpointBlob.checkpoint_ns == row.checkpoint_ns,
+                    tuple_(WorkflowCheckpointBlob.channel, WorkflowCheckpointBlob.version).in_(versions),
+                )
+            )
+            for channel, type_, blob in blobs:
+                if type_ != "empty":
+                    channel_values[channel] = self.serde.loads_typed((type_, blob))
+
+        writes = await db.execute(
+            select(WorkflowCheckpointWrite.task_id, WorkflowCheckpointWrite.channel, WorkflowCheckpointWrite.type, WorkflowCheckpointWrite.blob)
+            .where(
+                WorkflowCheckpointWrite.thread_id == row.thread_id,
+                WorkflowCheckpointWrite.checkpoint_ns == row.checkpoint_ns,
+                WorkflowCheckpointWrite.checkpoint_id == row.checkpoint_id,
+            )
+            .order_by(WorkflowCheckpointWrite.task_path, WorkflowCheckpointWrite.task_id, WorkflowCheckpointWrite.idx)
+        )
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": row.thread_id,
+                    "checkpoint_ns": row.checkpoint_ns,
+                    "checkpoint_id": row.checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((row.metadata_type, row.checkpoint_metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": row.thread_id,
+                        "checkpoint_ns": row.checkpoint_ns,
+                        "checkpoint_id": row.parent_checkpoint_id,
+                    }
+                }
+                if row.parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((type_, blob))) for task_id, channel, type_, blob in writes],
+        )
+
+    # --- Maintenance ---
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints, values and writes of a thread."""
+        for pending in (self._checkpoints, self._blobs, self._writes):
+            for key in [key for key in pending if key[0] == thread_id]:
+                del pending[key]
+        async with get_async_session() as db:
+            for model in (WorkflowCheckpointWrite, WorkflowCheckpointBlob, WorkflowCheckpoint):
+                await db.execute(delete(model).where(model.thread_id == thread_id))
+            await db.commit()
+
+    async def aprune_expired(self) -> int:
+        """
+        Delete threads idle for longer than the TTL and trim the rest.
+
+        Keeps the newest keep_last checkpoints of each thread, then removes
+        writes and channel values no remaining checkpoint references.
+
+        Returns:
+            Number of expired threads deleted
+        """
+        async with get_async_session() as db:
+            expired: List[str] = []
+            if self.ttl_seconds > 0:
+                cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+                result = await db.execute(
+                    select(WorkflowCheckpoint.thread_id)
+                    .group_by(WorkflowCheckpoint.thread_id)
+                    .having(func.max(WorkflowCheckpoint.created_at) < cutoff)
+                )
+                expired = [thread_id for (thread_id,) in result]
+                if expired:
+                    await db.execute(delete(WorkflowCheckpoint).where(WorkflowCheckpoint.thread_id.in_(expired)))
+
+            await db.execute(_PRUNE_OLD_CHECKPOINTS, {"keep_last": self.keep_last})
+            await db.execute(_PRUNE_ORPHAN_WRITES)
+            await db.execute(_PRUNE_ORPHAN_BLOBS)
+            await db.commit()
+
+        _stats["threads_pruned"] += len(expired)
+        if expired:
+            logger.info(f"Pruned {len(expired)} expired workflow threads")
+        return len(expired)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+_checkpointer: Optional[PostgresCheckpointSaver] = None
+
+
+def get_workflow_checkpointer() -> Optional[PostgresCheckpointSaver]:
+    """
+    Get the shared durable checkpointer, or None when workflow_checkpointer is "memory".
+    """
+    global _checkpointer
+    if _checkpointer is None and get_settings().workflow_checkpointer == "postgres":
+        _checkpointer = PostgresCheckpointSaver()
+    return _checkpointer
+
+
+async def close_workflow_checkpointer() -> None:
+    """Flush the shared checkpointer on shutdown."""
+    if _checkpointer is not None:
+        await _checkpointer.aclose()
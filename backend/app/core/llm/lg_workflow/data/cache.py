@@ -0,0 +1,369 @@
+"""
+Bounded, process-wide store for DataManager session DataFrames.
+
+Every session (one per user) keeps two kinds of frames:
+- "loaded": datasets read from the database (plus their embedding matrix),
+  which can always be re-read and are simply dropped on eviction
+- "local": artifacts and modified datasets that only exist in memory, which
+  are spilled to Parquet files on eviction and reloaded transparently
+
+All entries share one LRU ordered by last access and one byte budget based
+on estimated DataFrame sizes. Entries idle for longer than the TTL are
+dropped, including their spill files.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import get_settings
+from app.core.metrics_registry import CACHE_LOOKUPS
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+LOADED = "loaded"
+LOCAL = "local"
+
+_SAMPLE_SIZE = 200
+
+
+def _estimate_object_bytes(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def estimate_dataframe_bytes(df: pd.DataFrame) -> int:
+    """
+    Estimate the memory held by a DataFrame.
+
+    Fixed-width columns are measured exactly; object columns are extrapolated
+    from a sample, counting list and array payloads that pandas' own deep
+    memory_usage ignores. Row views into an embedding matrix count their
+    row's bytes, so a loaded dataset accounts for its matrix exactly once.
+    """
+    total = int(df.memory_usage(index=True, deep=False).sum())
+    n_rows = len(df)
+    if n_rows == 0:
+        return total
+
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        step = max(1, n_rows // _SAMPLE_SIZE)
+        sample = df[col].iloc[::step]
+        per_row = sum(_estimate_object_bytes(v) for v in sample) / len(sample)
+        total += int(per_row * n_rows)
+    return total
+
+
+@dataclass
+class CacheEntry:
+    """A cached DataFrame with its companion payload."""
+    df: Optional[pd.DataFrame]
+    extra: Any
+    nbytes: int
+    rows: int
+    spillable: bool
+    last_access: float
+    spill_path: Optional[str] = None
+
+
+class SessionDataCache:
+    """LRU/TTL cache of session DataFrames bounded by estimated bytes."""
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        spill_enabled: Optional[bool] = None,
+        spill_dir: Optional[str] = None,
+    ):
+        settings = get_settings()
+        self.max_bytes = settings.datamanager_cache_max_bytes if max_bytes is None else max_bytes
+        self.ttl_seconds = ttl_seconds or settings.datamanager_cache_ttl_seconds
+        self.spill_enabled = settings.datamanager_spill_enabled if spill_enabled is None else spill_enabled
+        self.spill_dir = (
+            spill_dir
+            or settings.datamanager_spill_dir
+            or os.path.join(tempfile.gettempdir(), "needleai-datamanager")
+        )
+
+        self._entries: "OrderedDict[Tuple[str, str, str], CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self._spilled_bytes = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._spills = 0
+        self._reloads = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    # ------------------------------------------------------------------ access
+
+    def get(self, namespace: str, session_id: str, name: str) -> Optional[Tuple[pd.DataFrame, Any]]:
+        """Return (df, extra) for an entry, reloading it from disk if it was spilled."""
+        key = (namespace, session_id, name)
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                CACHE_LOOKUPS.inc(("session_data", "miss"))
+                return None
+
+            entry.last_access = time.monotonic()
+            self._entries.move_to_end(key)
+            self._hits += 1
+            CACHE_LOOKUPS.inc(("session_data", "hit"))
+
+            if entry.df is None:
+                if not self._reload(key, entry):
+                    return None
+                self._enforce_budget(keep=key)
+            return entry.df, entry.extra
+
+    def put(
+        self,
+        namespace: str,
+        session_id: str,
+        name: str,
+        df: pd.DataFrame,
+        extra: Any = None,
+    ) -> None:
+        """
+        Store a DataFrame, evicting least recently used entries over the byte budget.
+
+        Args:
+            namespace: LOADED (re-readable, dropped on eviction) or LOCAL (spilled)
+            session_id: Owning session
+            name: Table or artifact name
+            df: Frame to cache
+            extra: Companion payload returned with the frame (description, matrix, ...)
+        """
+        key = (namespace, session_id, name)
+        entry = CacheEntry(
+            df=df,
+            extra=extra,
+            nbytes=estimate_dataframe_bytes(df),
+            rows=len(df),
+            spillable=namespace == LOCAL,
+            last_access=time.monotonic(),
+        )
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            self._expire()
+            self._enforce_budget(keep=key)
+
+    def contains(self, namespace: str, session_id: str, name: str) -> bool:
+        with self._lock:
+            self._expire()
+            return (namespace, session_id, name) in self._entries
+
+    def pop(self, namespace: str, session_id: str, name: str) -> None:
+        with self._lock:
+            self._remove((namespace, session_id, name))
+
+    def names(self, namespace: str, session_id: str) -> List[str]:
+        with self._lock:
+            self._expire()
+            return [k[2] for k in self._entries if k[0] == namespace and k[1] == session_id]
+
+    def summaries(self, namespace: str, session_id: str) -> List[Tuple[str, int, Any]]:
+        """List (name, rows, extra) for a session without reloading spilled frames."""
+        with self._lock:
+            self._expire()
+            return [
+                (k[2], entry.rows, entry.extra)
+                for k, entry in self._entries.items()
+                if k[0] == namespace and k[1] == session_id
+            ]
+
+    def clear_session(self, session_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == session_id]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    # ---------------------------------------------------------------- internals
+
+    def _remove(self, key: Tuple[str, str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        if entry.df is not None:
+            self._bytes -= entry.nbytes
+        if entry.spill_path:
+            self._spilled_bytes -= entry.nbytes
+            self._delete_spill_file(entry.spill_path)
+
+    def _expire(self) -> None:
+        """Drop entries idle longer than the TTL (the LRU order is the access order)."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.last_access >= cutoff:
+                break
+            self._remove(key)
+            self._expirations += 1
+
+    def _enforce_budget(self, keep: Tuple[str, str, str]) -> None:
+        if self._bytes <= self.max_bytes:
+            return
+
+        for key in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if key == keep or entry.df is None:
+                continue
+            if entry.spillable and self.spill_enabled and self._spill(key, entry):
+                continue
+            self._remove(key)
+            self._evictions += 1
+
+        if self._bytes > self.max_bytes:
+            logger.warning(
+                f"Session data cache over budget: {self._bytes} > {self.max_bytes} bytes "
+                f"(entry {keep[2]} alone exceeds the remaining budget)"
+            )
+
+    def _spill(self, key: Tuple[str, str, str], entry: CacheEntry) -> bool:
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"{uuid.uuid4().hex}.parquet")
+        try:
+            entry.df.to_parquet(path, index=True)
+        except Exception as e:
+            # pyarrow missing or a column Arrow can't represent: drop instead
+            logger.warning(f"Could not spill {key[2]} for session {key[1]}: {e}")
+            self._delete_spill_file(path)
+            return False
+
+        entry.df = None
+        entry.spill_path = path
+        self._bytes -= entry.nbytes
+        self._spilled_bytes += entry.nbytes
+        self._spills += 1
+        logger.info(f"Spilled {key[2]} for session {key[1]} to {path} ({entry.nbytes} bytes)")
+        return True
+
+    def _reload(self, key: Tuple[str, str, str], entry: CacheEntry) -> bool:
+        try:
+            df = pd.read_parquet(entry.spill_path)
+        except Exception as e:
+            logger.error(f"Could not reload spilled {key[2]} for session {key[1]}: {e}")
+            self._remove(key)
+            return False
+
+        self._delete_spill_file(entry.spill_path)
+        self._spilled_bytes -= entry.nbytes
+        entry.spill_path = None
+        entry.df = df
+        self._bytes += entry.nbytes
+        self._reloads += 1
+        return True
+
+    @staticmethod
+    def _delete_spill_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # -------------------------------------------------------------------- stats
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "spilled_entries": sum(1 for e in self._entries.values() if e.spill_path),
+                "sessions": len({k[1] for k in self._entries}),
+                "bytes": self._bytes,
+                "spilled_bytes": self._spilled_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 4) if total else 0.0,
+                "spills": self._spills,
+                "reloads": self._reloads,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+class SessionCacheView(MutableMapping):
+    """
+    Dict-like view of one session's entries in a SessionDataCache namespace.
+
+    Values are (df, extra) tuples, matching the (df, description) tuples the
+    DataManager has always stored in its local cache.
+    """
+
+    def __init__(self, store: SessionDataCache, session_id: str, namespace: str):
+        self._store = store
+        self._session_id = session_id
+        self._namespace = namespace
+
+    def __getitem__(self, name: str) -> Tuple[pd.DataFrame, Any]:
+        item = self._store.get(self._namespace, self._session_id, name)
+        if item is None:
+            raise KeyError(name)
+        return item
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        df, extra = value if isinstance(value, tuple) else (value, None)
+        self._store.put(self._namespace, self._session_id, name, df, extra)
+
+    def __delitem__(self, name: str) -> None:
+        if not self._store.contains(self._namespace, self._session_id, name):
+            raise KeyError(name)
+        self._store.pop(self._namespace, self._session_id, name)
+
+    def __contains__(self, name: object) -> bool:
+        return self._store.contains(self._namespace, self._session_id, name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.names(self._namespace, self._session_id))
+
+    def __len__(self) -> int:
+        return len(self._store.names(self._namespace, self._session_id))
+
+    def summaries(self) -> List[Tuple[str, int, Any]]:
+        """List (name, rows, extra) without reloading spilled frames."""
+        return self._store.summaries(self._namespace, self._session_id)
+
+
+# Singleton instance
+_session_data_cache: Optional[SessionDataCache] = None
+
+
+def get_session_data_cache() -> SessionDataCache:
+    """Get the process-wide session data cache."""
+    global _session_data_cache
+    if _session_data_cache is None:
+        _session_data_cache = SessionDataCache()
+    return _session_data_cache
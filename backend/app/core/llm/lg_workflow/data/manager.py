@@ -0,0 +1,254 @@
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from typing import Optional, Dict, Any
+from app.config import get_settings
+from app.core.llm.lg_workflow.data.cache import (
+    LOADED,
+    LOCAL,
+    SessionCacheView,
+    get_session_data_cache,
+)
+from app.services.user_dataset_service import UserDatasetService
+from app.database.repositories.user_dataset import UserDatasetRepository
+from app.database.session import get_async_session
+from app.utils.logging import get_logger
+from app.utils.vectors import embeddings_to_matrix
+
+logger = get_logger(__name__)
+
+class DataManager:
+    """
+    Manages access to user datasets stored in the database.
+    Uses table_name as the primary identifier for datasets.
+
+    One instance exists per session (tools key sessions by user_id). Frames
+    live in the process-wide SessionDataCache, which bounds memory across all
+    sessions; idle sessions are dropped after the cache TTL.
+    """
+    _instances: "OrderedDict[str, DataManager]" = OrderedDict()
+    _instances_lock = threading.Lock()
+    
+    def __new__(cls, session_id: str = "default"):
+        with cls._instances_lock:
+            cls._evict_idle_sessions(session_id)
+            instance = cls._instances.get(session_id)
+            if instance is None:
+                instance = super(DataManager, cls).__new__(cls)
+                instance.session_id = session_id
+                store = get_session_data_cache()
+                # Artifacts and modified datasets: name -> (df, description)
+                instance._local_cache = SessionCacheView(store, session_id, LOCAL)
+                # Datasets loaded from the DB: table_name -> (df, (embedding matrix, dataset version))
+                instance._loaded_datasets = SessionCacheView(store, session_id, LOADED)
+                cls._instances[session_id] = instance
+            cls._instances.move_to_end(session_id)
+            instance._last_access = time.monotonic()
+            return instance
+
+    @classmethod
+    def get_instance(cls, session_id: str = "default") -> 'DataManager':
+        return cls(session_id)
+
+    @classmethod
+    def _evict_idle_sessions(cls, incoming: str) -> None:
+        """Drop sessions idle past the cache TTL, and the oldest ones beyond the session cap."""
+        settings = get_settings()
+        cutoff = time.monotonic() - settings.datamanager_cache_ttl_seconds
+        max_existing = settings.datamanager_max_sessions - (0 if incoming in cls._instances else 1)
+        while cls._instances:
+            session_id, instance = next(iter(cls._instances.items()))
+            if instance._last_access >= cutoff and len(cls._instances) <= max_existing:
+                break
+            cls._instances.pop(session_id)
+            get_session_data_cache().clear_session(session_id)
+            logger.info(f"DataManager[{session_id}]: Evicted idle session")
+
+    @classmethod
+    def reset(cls) -> None:
+        """Drop all sessions and their cached frames."""
+        with cls._instances_lock:
+            cls._instances.clear()
+        get_session_data_cache().clear()
+
+    async def list_datasets(self, user_id: str) -> str:
+        """Lists available datasets for the user."""
+        async with get_async_session() as db:
+            service = UserDatasetService(db)
+            datasets = await service.list_datasets(user_id)
+            
+            if not datasets:
+                return "No datasets found."
+            
+            # Format as a list for the LLM - emphasize table_name as the key identifier
+            output = ["Available Datasets:"]
+            for ds in datasets:
+                table_name = ds['table_name']
+                # Check if we have a local modified version
+                status = " (Modified in session)" if table_name in self._local_cache else ""
+                output.append(f"- Table: {table_name}, Rows: {ds['row_count']}, Description: {ds['description']}{status}")
+            
+            # Also list cached-only datasets (artifacts); summaries don't reload spilled frames
+            for table_name, rows, desc in self._local_cache.summaries():
+                desc = desc or "Intermediate result"
+                
+                # If it's not in the main list (i.e. purely local artifact)
+                if not any(d['table_name'] == table_name for d in datasets):
+                     output.append(f"- Table: {table_name}, Rows: {rows}, Description: {desc} (Session Artifact)")
+
+            return "\n".join(output)
+
+    async def get_dataset(self, table_name: str, user_id: str) -> pd.DataFrame:
+        """Retrieves a dataframe by table_name, checking local cache first."""
+        # Check local cache first
+        if table_name in self._local_cache:
+            item = self._local_cache[table_name]
+            # Handle tuple format
+            if isinstance(item, tuple):
+                df, _ = item
+            else:
+                df = item
+                
+            logger.info(f"DataManager[{self.session_id}]: Returning cached dataset {table_name}")
+            return df
+
+        async with get_async_session() as db:
+            # Get dataset by table_name
+            dataset = await UserDatasetRepository.get_by_table_name(db, table_name, user_id)
+            if not dataset:
+                return pd.DataFrame()  # Return empty DataFrame if dataset not found
+
+            # Reuse the decoded frame/matrix until the dataset row changes
+            version = (str(dataset.id), dataset.updated_at, dataset.row_count)
+            loaded = self._loaded_datasets.get(table_name)
+            if loaded is not None and loaded[1][1] == version:
+                logger.info(f"DataManager[{self.session_id}]: Returning loaded dataset {table_name}")
+                return loaded[0]
+
+            service = UserDatasetService(db)
+            # Embeddings come back as one float32 matrix; the df holds row views into it
+            result = await service.get_dataset_frame(str(dataset.id), user_id, limit=100_000)
+            if not result or result[0].empty:
+                return pd.DataFrame()
+
+            df, matrix = result
+            self._loaded_datasets[table_name] = (df, (matrix, version))
+            return df
+
+    def get_embedding_matrix(self, table_name: str, df: pd.DataFrame) -> np.ndarray:
+        """
+        Returns the float32 embedding matrix aligned with the rows of df.
+
+        For frames derived from a loaded dataset (filtered, reordered or copied)
+        this reuses the dataset's shared matrix instead of rebuilding it from
+        Python objects; other frames (e.g. fresh embedding_tool output) are
+        stacked once.
+        """
+        loaded = self._loaded_datasets.get(table_name)
+        matrix = loaded[1][0] if loaded is not None else None
+        return embeddings_to_matrix(df["__embedding__"], matrix)
+
+    async def get_metadata(self, table_name: str, user_id: str) -> Dict[str, Any]:
+        """Retrieves metadata for a dataset by table_name."""
+        # Check local cache first for basic metadata
+        local_meta = {}
+        if table_name in self._local_cache:
+            item = self._local_cache[table_name]
+            if isinstance(item, tuple):
+                df, desc = item
+            else:
+                df = item
+                desc = "Intermediate result"
+                
+            local_meta = {
+                "table_name": table_name,
+                "row_count": len(df),
+                "description": f"{desc} [Modified in current session]",
+                "field_metadata": [{"column_name": col, "data_type": str(dtype), "description": ""} for col, dtype in df.dtypes.items()]
+            }
+
+        async with get_async_session() as db:
+            dataset = await UserDatasetRepository.get_by_table_name(db, table_name, user_id)
+            
+            if not dataset:
+                # If not in DB but in cache, return local meta
+                if local_meta:
+                    return local_meta
+                return {}
+            
+            metadata = {
+                "id": dataset.id,
+                "table_name": dataset.table_name,
+                "description": dataset.description,
+                "row_count": dataset.row_count,
+                "field_metadata": dataset.field_metadata,
+                "column_stats": dataset.column_stats,
+                "sample_data": dataset.sample_data,
+            }
+            
+            # If in DB and in cache, merge
+            if local_meta:
+                metadata['row_count'] = local_meta['row_count']
+                metadata['description'] = local_meta['description']
+                
+            return metadata
+
+    async def semantic_search(self, table_name: str, query: str, user_id: str, top_n: int = 5) -> pd.DataFrame:
+        """
+        Performs semantic search on a dataset by table_name.
+        WARNING: This currently only works on the DB version of the dataset.
+        """
+        async with get_async_session() as db:
+            # Verify the table exists for this user
+            dataset = await UserDatasetRepository.get_by_table_name(db, table_name, user_id)
+            if not dataset:
+                return pd.DataFrame()
+            
+            service = UserDatasetService(db)
+            try:
+                results = await service.get_dataset_data_from_semantic_search(query, table_name, top_n)
+                return results
+            except AttributeError:
+                logger.error(f"Semantic search method not found on service.")
+                return pd.DataFrame()
+
+    async def update_dataset(self, table_name: str, df: pd.DataFrame, user_id: str) -> bool:
+        """
+        Updates an existing dataset in the local cache ONLY by table_name.
+        Does NOT persist to database.
+        """
+        try:
+            # Preserve description if it exists
+            desc = "Updated dataset"
+            if table_name in self._local_cache:
+                item = self._local_cache[table_name]
+                if isinstance(item, tuple):
+                    _, desc = item
+            
+            self._local_cache[table_name] = (df, desc)
+            logger.info(f"DataManager[{self.session_id}]: Updated dataset {table_name} in local cache. Rows: {len(df)}")
+            return True
+        except Exception as e:
+            logger.error(f"DataManager[{self.session_id}]: Failed to update local cache: {e}")
+            return False
+
+    async def save_artifact(self, data: Any, artifact_name: str, description: str, user_id: str) -> str:
+        """
+        Saves an intermediate result to the local cache with a custom name.
+        Returns the artifact name (table_name).
+        """
+        if isinstance(data, pd.DataFrame):
+            # Use the provided artifact_name or generate one
+            if not artifact_name:
+                import uuid
+                artifact_name = f"artifact_{uuid.uuid4().hex[:8]}"
+            
+            # Store tuple of (dataframe, description)
+            self._local_cache[artifact_name] = (data, description)
+            logger.info(f"DataManager[{self.session_id}]: Saved artifact {artifact_name} to local cache. Desc: {description}")
+            return artifact_name
+        
+        return "ERR_UNSUPPORTED_TYPE"
@@ -0,0 +1,128 @@
+"""
+Compile-once factory for the LangGraph multi-agent workflow.
+
+Building the graph creates every agent (tool schemas, ReAct subgraphs) and
+compiling it validates the whole topology; doing that per chat message
+added hundreds of milliseconds before the first event. The graph is now
+compiled once per process and user-specific state is bound through
+config["configurable"] (user_id, dataset_table_name), which the agents read
+at run time.
+
+Bound instances are cheap config-bound copies of the compiled graph, kept
+in a small LRU keyed by (user_id, dataset_table_name).
+
+With workflow_checkpointer = "postgres" the graph is compiled with the
+shared PostgresCheckpointSaver, so any worker can continue a thread.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.runnables import Runnable
+
+from app.config import get_settings
+from app.core.llm.lg_workflow.checkpoint import get_workflow_checkpointer
+from app.utils.logging import get_logger
+
+logger = get_logger("lg_workflow.factory")
+
+
+class WorkflowFactory:
+    """Compiles the workflow graph once and hands out per-user bound instances."""
+
+    def __init__(self, max_bound: Optional[int] = None):
+        settings = get_settings()
+        self.max_bound = settings.workflow_bound_cache_size if max_bound is None else max_bound
+
+        # Shared durable checkpointer, or None (callers pass their own per instance)
+        self.checkpointer = get_workflow_checkpointer()
+
+        self._graph = None
+        self._bound: "OrderedDict[Tuple[str, Optional[str]], Runnable]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._compile_ms: Optional[float] = None
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def graph(self):
+        """The compiled graph, built on first use."""
+        if self._graph is None:
+            with self._lock:
+                if self._graph is None:
+                    from app.core.llm.lg_workflow.graph import build_workflow_graph
+
+                    start = time.perf_counter()
+                    self._graph = build_workflow_graph().compile(checkpointer=self.checkpointer)
+                    self._compile_ms = (time.perf_counter() - start) * 1000
+                    logger.info(f"Compiled multi-agent workflow in {self._compile_ms:.0f}ms")
+        return self._graph
+
+    def bind(
+        self,
+        user_id: str,
+        dataset_table_name: Optional[str] = None,
+        checkpointer: Optional[Any] = None,
+    ) -> Runnable:
+        """
+        Get the workflow bound to a user and optional focused dataset.
+
+        Args:
+            user_id: The user's ID for data access
+            dataset_table_name: Optional dataset the agents focus on exclusively
+            checkpointer: Optional checkpointer replacing the shared one; such
+                instances are caller-owned and not cached
+
+        Returns:
+            Runnable with the compiled graph's interface (invoke, astream_events, ...)
+        """
+        configurable = {"user_id": user_id, "dataset_table_name": dataset_table_name}
+        if checkpointer is not None:
+            return self.graph.copy(update={"checkpointer": checkpointer}).with_config(configurable=configurable)
+
+        key = (user_id, dataset_table_name)
+        with self._lock:
+            bound = self._bound.get(key)
+            if bound is not None:
+                self._bound.move_to_end(key)
+                self._hits += 1
+                return bound
+            self._misses += 1
+
+        bound = self.graph.with_config(configurable=configurable)
+        with self._lock:
+            self._bound[key] = bound
+            while len(self._bound) > self.max_bound:
+                self._bound.popitem(last=False)
+        return bound
+
+    def warm_up(self) -> float:
+        """Compile the graph ahead of the first request; returns compile time in ms."""
+        self.graph
+        return self._compile_ms or 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Compile time and bound-instance cache counters."""
+        with self._lock:
+            return {
+                "compiled": self._graph is not None,
+                "durable_checkpointer": self.checkpointer is not None,
+                "compile_ms": round(self._compile_ms, 1) if self._compile_ms is not None else None,
+                "bound_entries": len(self._bound),
+                "max_bound": self.max_bound,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+_workflow_factory: Optional[WorkflowFactory] = None
+
+
+def get_workflow_factory() -> WorkflowFactory:
+    """Get the process-wide workflow factory."""
+    global _workflow_factory
+    if _workflow_factory is None:
+        _workflow_factory = WorkflowFactory()
+    return _workflow_factory
@@ -1,6 +1,6 @@
 from typing import Annotated, List, TypedDict
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import BaseMessage, RemoveMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, RemoveMessage, SystemMessage
 from langgraph.graph import StateGraph, END, START
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph.message import add_messages
@@ -18,9 +18,13 @@ from app.core.llm.lg_workflow.agents import (
     members,
 )
 from app.core.llm.lg_workflow.agents.base import settings
+from app.services.embedding_batcher import estimate_tokens
+from app.utils.logging import get_logger
 
 dotenv.load_dotenv()
 
+logger = get_logger("lg_workflow.graph")
+
 
 # --- State Definition ---
 class AgentState(TypedDict):
@@ -28,38 +32,69 @@ class AgentState(TypedDict):
     next: str
     summary: str
 
-def summarize_conversation(state: AgentState):
+def message_tokens(messages: List[BaseMessage]) -> List[int]:
+    """Estimated tokens of each message's content."""
+    return [estimate_tokens(m.content if isinstance(m.content, str) else str(m.content)) for m in messages]
+
+
+def summary_cut(messages: List[BaseMessage], budget: int) -> int:
+    """
+    Index of the first message kept verbatim when the thread exceeds the budget.
+
+    The newest messages that fit the budget are kept, and the cut moves forward
+    to a HumanMessage so a tool call is never separated from its result.
+    Returns 0 when nothing needs summarizing.
+    """
+    tokens = message_tokens(messages)
+    if sum(tokens) <= budget:
+        return 0
+    cut = len(messages)
+    while cut > 0 and tokens[cut - 1] <= budget:
+        budget -= tokens[cut - 1]
+        cut -= 1
+    while cut < len(messages) and not isinstance(messages[cut], HumanMessage):
+        cut += 1
+    # Always keep the latest user turn
+    if cut == len(messages):
+        cut = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+    return cut
+
+
+async def summarize_conversation(state: AgentState):
+    """Fold the messages that overflow the history budget into the rolling summary."""
     summary = state.get("summary", "")
     messages = state["messages"]
+    cut = summary_cut(messages, settings.history_token_budget)
+    if cut == 0:
+        return {}
 
-    if len(messages) > 20:
-        print("===== Summarizing conversation =====")
-        summarize_model = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, api_key=settings.openai_api_key)
-        summary_message = SystemMessage(content=f"Distill the following conversation into a concise summary. Include key actions and results. Current summary: {summary}")
-        response = summarize_model.invoke([summary_message] + messages[:-2])
-
-        new_summary = response.content
-        delete_messages = [RemoveMessage(id=m.id) for m in messages[:-2]]
+    logger.debug(f"Summarizing {cut} of {len(messages)} messages into the conversation summary")
+    summarize_model = ChatOpenAI(model=settings.history_summary_model, temperature=0.3, api_key=settings.openai_api_key)
+    summary_message = SystemMessage(content=(
+        "Update the running summary with the messages below. Keep the datasets used, key actions and results. "
+        f"Current summary: {summary}"
+    ))
+    response = await summarize_model.ainvoke([summary_message] + messages[:cut])
 
-        return {"summary": new_summary, "messages": delete_messages}
-    return {}
+    delete_messages = [RemoveMessage(id=m.id) for m in messages[:cut]]
+    return {"summary": response.content, "messages": delete_messages}
 
 # --- Graph Construction ---
-def create_workflow(user_id: str, dataset_table_name: Optional[str] = None):
+def build_workflow_graph() -> StateGraph:
     """
-    Create the multi-agent workflow.
+    Build the (uncompiled) multi-agent graph.
     
-    Args:
-        user_id: The user's ID for data access
-        dataset_table_name: Optional - if provided, agents will focus exclusively on this dataset
+    Nothing in the graph is user specific: agents read user_id and the
+    optional focused dataset from config["configurable"] at run time, so the
+    graph is compiled once per process by WorkflowFactory.
     """
     workflow = StateGraph(AgentState)
     
-    # Create agent nodes with user_id and optional focused dataset
-    librarian_node = create_librarian_node(user_id, dataset_table_name)
-    analyst_node = create_analyst_node(user_id, dataset_table_name)
-    visualizer_node = create_visualizer_node(user_id, dataset_table_name)
-    coder_node = create_coder_node(user_id, dataset_table_name)
+    # Create agent nodes (user_id and focused dataset come from the run config)
+    librarian_node = create_librarian_node()
+    analyst_node = create_analyst_node()
+    visualizer_node = create_visualizer_node()
+    coder_node = create_coder_node()
 
     workflow.add_node("Supervisor", supervisor_node)
     workflow.add_node("DataLibrarian", librarian_node)
@@ -71,7 +106,7 @@ def create_workflow(user_id: str, dataset_table_name: Optional[str] = None):
     workflow.add_node("Summarize", summarize_conversation)
 
     def check_summary(state: AgentState) -> Literal["Summarize", "Supervisor"]:
-        if len(state["messages"]) > 20:
+        if summary_cut(state["messages"], settings.history_token_budget) > 0:
             return "Summarize"
         return "Supervisor"
 
@@ -92,7 +127,24 @@ def create_workflow(user_id: str, dataset_table_name: Optional[str] = None):
 
     workflow.add_conditional_edges("Supervisor", should_continue)
 
-    # Compile
-    checkpointer = MemorySaver()
-    app = workflow.compile(checkpointer=checkpointer)
-    return app
+    return workflow
+
+
+def create_workflow(user_id: str, dataset_table_name: Optional[str] = None):
+    """
+    Create the multi-agent workflow.
+    
+    Returns the process-wide compiled graph bound to the user. Conversation
+    memory lives in the shared durable checkpointer when one is configured,
+    otherwise in an in-memory checkpointer owned by the returned instance.
+    
+    Args:
+        user_id: The user's ID for data access
+        dataset_table_name: Optional - if provided, agents will focus exclusively on this dataset
+    """
+    from app.core.llm.lg_workflow.factory import get_workflow_factory
+    
+    factory = get_workflow_factory()
+    if factory.checkpointer is not None:
+        return factory.bind(user_id, dataset_table_name)
+    return factory.bind(user_id, dataset_table_name, checkpointer=MemorySaver())
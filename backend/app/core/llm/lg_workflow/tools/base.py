@@ -6,7 +6,7 @@ from typing import List, Optional, Literal
 @tool
 async def list_datasets_tool(user_id: str) -> str:
     """Lists all available datasets with their table names and descriptions."""
-    dm = DataManager.get_instance("default")
+    dm = DataManager.get_instance(user_id)
     return await dm.list_datasets(user_id)
 
 
@@ -31,7 +31,7 @@ async def filter_dataset_tool(
     Returns:
         Info about the filtered dataset and its new table name for subsequent analysis.
     """
-    dm = DataManager.get_instance("default")
+    dm = DataManager.get_instance(user_id)
     df = await dm.get_dataset(table_name, user_id)
     
     if df is None or df.empty:
@@ -106,7 +106,7 @@ async def filter_dataset_tool(
 @tool
 async def get_dataset_info_tool(table_name: str, user_id: str) -> str:
     """Returns comprehensive metadata and sample data for a dataset given its table name."""
-    dm = DataManager.get_instance("default")
+    dm = DataManager.get_instance(user_id)
     df = await dm.get_dataset(table_name, user_id)
     if df is None or df.empty:
         return f"Error: Dataset '{table_name}' not found."
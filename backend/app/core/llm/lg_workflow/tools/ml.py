@@ -1,8 +1,10 @@
 from langchain_core.tools import tool
 from app.core.llm.lg_workflow.data.manager import DataManager
+from app.services.embedding_service import get_embedding_service
+from app.services.sentiment_engine import get_sentiment_engine
+from app.utils.vectors import normalize_rows
 import pandas as pd
-from textblob import TextBlob
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score, mean_squared_error
 import hdbscan
@@ -11,6 +13,112 @@ import os
 import asyncio
 from pydantic import BaseModel, Field
 from typing import List
+from app.core.analysis_pool import run_analysis
+
+# CPU-bound parts of the tools are module-level functions run through
+# run_analysis (analysis worker processes): they receive only the columns
+# they need, plus embedding matrices via shared memory, and return new
+# column values or report text rather than whole datasets.
+
+def _analyze_sentiment(df: pd.DataFrame, table_name: str, text_column: str):
+    result_df = df.copy()
+    
+    # Score the whole column in one batch
+    scores = get_sentiment_engine().score(result_df[text_column].tolist())
+    result_df['sentiment_polarity'] = scores.polarity
+    result_df['sentiment_subjectivity'] = scores.subjectivity
+    result_df['sentiment_label'] = scores.labels()
+    
+    # Build comprehensive report
+    report = []
+    report.append(f"# Sentiment Analysis Report: '{table_name}'")
+    report.append(f"\n**Text Column:** {text_column}")
+    report.append(f"**Total Records Analyzed:** {len(result_df)}\n")
+    
+    # Overall sentiment distribution
+    report.append("## 1. Overall Sentiment Distribution")
+    sentiment_counts = result_df['sentiment_label'].value_counts()
+    total = len(result_df)
+    
+    report.append("\n**Sentiment Breakdown:**\n")
+    for sentiment in ['Positive', 'Neutral', 'Negative']:
+        count = sentiment_counts.get(sentiment, 0)
+        pct = (count / total) * 100
+        emoji = "😊" if sentiment == 'Positive' else "😐" if sentiment == 'Neutral' else "😞"
+        report.append(f"- {emoji} **{sentiment}:** {count} ({pct:.1f}%)")
+    
+    # Sentiment statistics
+    report.append("\n## 2. Sentiment Statistics")
+    polarity_mean = result_df['sentiment_polarity'].mean()
+    polarity_std = result_df['sentiment_polarity'].std()
+    polarity_min = result_df['sentiment_polarity'].min()
+    polarity_max = result_df['sentiment_polarity'].max()
+    subjectivity_mean = result_df['sentiment_subjectivity'].mean()
+    
+    report.append(f"\n**Polarity Scores** (Range: -1.0 to +1.0):")
+    report.append(f"- Mean: {polarity_mean:.3f}")
+    report.append(f"- Std Dev: {polarity_std:.3f}")
+    report.append(f"- Min: {polarity_min:.3f}")
+    report.append(f"- Max: {polarity_max:.3f}")
+    
+    report.append(f"\n**Subjectivity Scores** (Range: 0.0 to 1.0):")
+    report.append(f"- Mean: {subjectivity_mean:.3f}")
+    report.append(f"- This indicates the text is {'mostly subjective' if subjectivity_mean > 0.5 else 'mostly objective'}")
+    
+    # Sentiment insights
+    report.append("\n## 3. Sentiment Insights")
+    if polarity_mean > 0.2:
+        report.append("- 📈 **Overall Positive Sentiment**: The dataset shows predominantly positive sentiment")
+    elif polarity_mean < -0.2:
+        report.append("- 📉 **Overall Negative Sentiment**: The dataset shows predominantly negative sentiment")
+    else:
+        report.append("- ⚖️ **Balanced Sentiment**: The dataset shows balanced or neutral sentiment")
+    
+    if polarity_std > 0.4:
+        report.append("- 🎭 **High Variation**: Sentiment varies significantly across records")
+    else:
+        report.append("- 📊 **Low Variation**: Sentiment is relatively consistent across records")
+    
+    # Most positive examples
+    report.append("\n## 4. Most Positive Examples")
+    most_positive = result_df.nlargest(min(3, len(result_df)), 'sentiment_polarity')
+    report.append("\n**Top 3 Most Positive:**\n")
+    
+    for idx, (_, row) in enumerate(most_positive.iterrows(), 1):
+        report.append(f"**{idx}. Polarity: {row['sentiment_polarity']:.3f}**")
+        text_preview = str(row[text_column])[:200]
+        if len(str(row[text_column])) > 200:
+            text_preview += "..."
+        report.append(f"   - {text_preview}")
+        report.append("")
+    
+    # Most negative examples
+    report.append("## 5. Most Negative Examples")
+    most_negative = result_df.nsmallest(min(3, len(result_df)), 'sentiment_polarity')
+    report.append("\n**Top 3 Most Negative:**\n")
+    
+    for idx, (_, row) in enumerate(most_negative.iterrows(), 1):
+        report.append(f"**{idx}. Polarity: {row['sentiment_polarity']:.3f}**")
+        text_preview = str(row[text_column])[:200]
+        if len(str(row[text_column])) > 200:
+            text_preview += "..."
+        report.append(f"   - {text_preview}")
+        report.append("")
+    
+    # Note about data update
+    report.append("## 6. Data Updated")
+    report.append(f"\n✅ Added 3 new columns to dataset '{table_name}':")
+    report.append("- `sentiment_polarity`: Sentiment score from -1.0 (negative) to +1.0 (positive)")
+    report.append("- `sentiment_subjectivity`: Subjectivity score from 0.0 (objective) to 1.0 (subjective)")
+    report.append("- `sentiment_label`: Categorical label (Positive, Neutral, or Negative)")
+    
+    columns = {
+        'sentiment_polarity': scores.polarity,
+        'sentiment_subjectivity': scores.subjectivity,
+        'sentiment_label': result_df['sentiment_label'].to_numpy(),
+    }
+    return columns, "\n".join(report)
+
 
 @tool
 async def sentiment_analysis_tool(table_name: str, text_column: str, user_id: str) -> str:
@@ -23,7 +131,7 @@ async def sentiment_analysis_tool(table_name: str, text_column: str, user_id: st
     - Most positive and negative examples
     Adds sentiment_polarity, sentiment_subjectivity, and sentiment_label columns to the dataset.
     """
-    dm = DataManager.get_instance("default")
+    dm = DataManager.get_instance(user_id)
     df = await dm.get_dataset(table_name, user_id)
     if df is None or df.empty:
         return f"Error: Dataset '{table_name}' not found."
@@ -32,125 +140,11 @@ async def sentiment_analysis_tool(table_name: str, text_column: str, user_id: st
         available_cols = ", ".join(df.columns[:10].tolist())
         return f"Error: Column '{text_column}' not found. Available columns: {available_cols}"
     
-    def _analyze():
-        result_df = df.copy()
-        
-        # Calculate sentiment scores for all rows
-        sentiments = []
-        for text in result_df[text_column]:
-            try:
-                text_str = str(text) if text is not None else ""
-                blob = TextBlob(text_str)
-                sentiments.append({
-                    'polarity': blob.sentiment.polarity,
-                    'subjectivity': blob.sentiment.subjectivity
-                })
-            except Exception:
-                sentiments.append({'polarity': 0.0, 'subjectivity': 0.0})
-        
-        # Add sentiment columns
-        result_df['sentiment_polarity'] = [s['polarity'] for s in sentiments]
-        result_df['sentiment_subjectivity'] = [s['subjectivity'] for s in sentiments]
-        
-        # Classify sentiment
-        def classify_sentiment(polarity):
-            if polarity > 0.1:
-                return 'Positive'
-            elif polarity < -0.1:
-                return 'Negative'
-            else:
-                return 'Neutral'
-        
-        result_df['sentiment_label'] = result_df['sentiment_polarity'].apply(classify_sentiment)
-        
-        # Build comprehensive report
-        report = []
-        report.append(f"# Sentiment Analysis Report: '{table_name}'")
-        report.append(f"\n**Text Column:** {text_column}")
-        report.append(f"**Total Records Analyzed:** {len(result_df)}\n")
-        
-        # Overall sentiment distribution
-        report.append("## 1. Overall Sentiment Distribution")
-        sentiment_counts = result_df['sentiment_label'].value_counts()
-        total = len(result_df)
-        
-        report.append("\n**Sentiment Breakdown:**\n")
-        for sentiment in ['Positive', 'Neutral', 'Negative']:
-            count = sentiment_counts.get(sentiment, 0)
-            pct = (count / total) * 100
-            emoji = "😊" if sentiment == 'Positive' else "😐" if sentiment == 'Neutral' else "😞"
-            report.append(f"- {emoji} **{sentiment}:** {count} ({pct:.1f}%)")
-        
-        # Sentiment statistics
-        report.append("\n## 2. Sentiment Statistics")
-        polarity_mean = result_df['sentiment_polarity'].mean()
-        polarity_std = result_df['sentiment_polarity'].std()
-        polarity_min = result_df['sentiment_polarity'].min()
-        polarity_max = result_df['sentiment_polarity'].max()
-        subjectivity_mean = result_df['sentiment_subjectivity'].mean()
-        
-        report.append(f"\n**Polarity Scores** (Range: -1.0 to +1.0):")
-        report.append(f"- Mean: {polarity_mean:.3f}")
-        report.append(f"- Std Dev: {polarity_std:.3f}")
-        report.append(f"- Min: {polarity_min:.3f}")
-        report.append(f"- Max: {polarity_max:.3f}")
-        
-        report.append(f"\n**Subjectivity Scores** (Range: 0.0 to 1.0):")
-        report.append(f"- Mean: {subjectivity_mean:.3f}")
-        report.append(f"- This indicates the text is {'mostly subjective' if subjectivity_mean > 0.5 else 'mostly objective'}")
-        
-        # Sentiment insights
-        report.append("\n## 3. Sentiment Insights")
-        if polarity_mean > 0.2:
-            report.append("- 📈 **Overall Positive Sentiment**: The dataset shows predominantly positive sentiment")
-        elif polarity_mean < -0.2:
-            report.append("- 📉 **Overall Negative Sentiment**: The dataset shows predominantly negative sentiment")
-        else:
-            report.append("- ⚖️ **Balanced Sentiment**: The dataset shows balanced or neutral sentiment")
-        
-        if polarity_std > 0.4:
-            report.append("- 🎭 **High Variation**: Sentiment varies significantly across records")
-        else:
-            report.append("- 📊 **Low Variation**: Sentiment is relatively consistent across records")
-        
-        # Most positive examples
-        report.append("\n## 4. Most Positive Examples")
-        most_positive = result_df.nlargest(min(3, len(result_df)), 'sentiment_polarity')
-        report.append("\n**Top 3 Most Positive:**\n")
-        
-        for idx, (_, row) in enumerate(most_positive.iterrows(), 1):
-            report.append(f"**{idx}. Polarity: {row['sentiment_polarity']:.3f}**")
-            text_preview = str(row[text_column])[:200]
-            if len(str(row[text_column])) > 200:
-                text_preview += "..."
-            report.append(f"   - {text_preview}")
-            report.append("")
-        
-        # Most negative examples
-        report.append("## 5. Most Negative Examples")
-        most_negative = result_df.nsmallest(min(3, len(result_df)), 'sentiment_polarity')
-        report.append("\n**Top 3 Most Negative:**\n")
-        
-        for idx, (_, row) in enumerate(most_negative.iterrows(), 1):
-            report.append(f"**{idx}. Polarity: {row['sentiment_polarity']:.3f}**")
-            text_preview = str(row[text_column])[:200]
-            if len(str(row[text_column])) > 200:
-                text_preview += "..."
-            report.append(f"   - {text_preview}")
-            report.append("")
-        
-        # Note about data update
-        report.append("## 6. Data Updated")
-        report.append(f"\n✅ Added 3 new columns to dataset '{table_name}':")
-        report.append("- `sentiment_polarity`: Sentiment score from -1.0 (negative) to +1.0 (positive)")
-        report.append("- `sentiment_subjectivity`: Subjectivity score from 0.0 (objective) to 1.0 (subjective)")
-        report.append("- `sentiment_label`: Categorical label (Positive, Neutral, or Negative)")
-        
-        return result_df, "\n".join(report)
-
-    loop = asyncio.get_running_loop()
     try:
-        result_df, report = await loop.run_in_executor(None, _analyze)
+        columns, report = await run_analysis(_analyze_sentiment, df[[text_column]], table_name, text_column)
+        result_df = df.copy()
+        for column, values in columns.items():
+            result_df[column] = values
         success = await dm.update_dataset(table_name, result_df, user_id)
         if not success:
             return f"Error: Failed to update dataset '{table_name}' with sentiment data."
@@ -165,7 +159,7 @@ async def embedding_tool(table_name: str, text_column: str, user_id: str) -> str
     Adds a new column 'embedding' to the dataset.
     WARNING: This can be slow and cost money for large datasets.
     """
-    dm = DataManager.get_instance("default")
+    dm = DataManager.get_instance(user_id)
     df = await dm.get_dataset(table_name, user_id)
     if df is None or df.empty:
         return f"Error: Dataset '{table_name}' not found."
@@ -174,11 +168,9 @@ async def embedding_tool(table_name: str, text_column: str, user_id: str) -> str
         return f"Error: Column {text_column} not found."
         
     try:
-        embeddings_model = OpenAIEmbeddings(api_key=os.getenv("OPENAI_API_KEY"))
+        # Shared service: cached by content hash, same model as stored __embedding__ columns
         texts = df[text_column].astype(str).tolist()
-        
-        loop = asyncio.get_running_loop()
-        embeddings = await loop.run_in_executor(None, embeddings_model.embed_documents, texts)
+        embeddings = await get_embedding_service().generate_embeddings_batch(texts)
         
         result_df = df.copy()
         result_df['__embedding__'] = embeddings
@@ -195,7 +187,7 @@ async def linear_regression_tool(table_name: str, target_column: str, feature_co
     """
     Performs a simple linear regression to predict a target column based on feature columns.
     """
-    dm = DataManager.get_instance("default")
+    dm = DataManager.get_instance(user_id)
     df = await dm.get_dataset(table_name, user_id)
     if df is None or df.empty:
         return f"Error: Dataset '{table_name}' not found."
@@ -233,6 +225,166 @@ async def linear_regression_tool(table_name: str, target_column: str, feature_co
     except Exception as e:
         return f"Error performing regression: {str(e)}"
 
+def _analyze_trend(df: pd.DataFrame, table_name: str, date_column: str, value_column: str, period: str):
+    data = df.copy()
+    
+    # Convert date column to datetime
+    try:
+        data[date_column] = pd.to_datetime(data[date_column])
+    except Exception as e:
+        return None, None, f"Error: Could not convert '{date_column}' to datetime: {str(e)}"
+    
+    # Remove rows with invalid dates or values
+    data = data.dropna(subset=[date_column, value_column])
+    
+    if data.empty:
+        return None, None, "Error: No valid data after cleaning."
+    
+    # Sort by date
+    data = data.set_index(date_column).sort_index()
+    
+    # Determine time range for context
+    time_range_days = (data.index.max() - data.index.min()).days
+    
+    # Resample by period
+    period_names = {
+        'D': 'Daily', 'W': 'Weekly', 'M': 'Monthly', 
+        'Q': 'Quarterly', 'Y': 'Yearly'
+    }
+    period_name = period_names.get(period, period)
+    
+    resampled = data[value_column].resample(period).mean().dropna()
+    
+    if len(resampled) < 2:
+        return None, None, "Error: Not enough data points for trend analysis (need at least 2)."
+    
+    # Calculate statistics
+    values = resampled.values
+    first_value = values[0]
+    last_value = values[-1]
+    mean_value = np.mean(values)
+    std_value = np.std(values)
+    min_value = np.min(values)
+    max_value = np.max(values)
+    
+    # Calculate trend (linear regression)
+    x = np.arange(len(resampled)).reshape(-1, 1)
+    y = resampled.values
+    from sklearn.linear_model import LinearRegression
+    model = LinearRegression()
+    model.fit(x, y)
+    slope = model.coef_[0]
+    
+    # Calculate percentage change
+    if first_value != 0:
+        pct_change = ((last_value - first_value) / abs(first_value)) * 100
+    else:
+        pct_change = 0 if last_value == 0 else float('inf')
+    
+    # Determine trend direction
+    if abs(pct_change) < 5:
+        trend_direction = "📊 Stable"
+        trend_desc = "stable"
+    elif pct_change > 0:
+        trend_direction = "📈 Increasing"
+        trend_desc = "increasing"
+    else:
+        trend_direction = "📉 Decreasing"
+        trend_desc = "decreasing"
+    
+    # Build comprehensive report
+    report = []
+    report.append(f"# Trend Analysis Report: '{table_name}'")
+    report.append(f"\n**Date Column:** {date_column}")
+    report.append(f"**Value Column:** {value_column}")
+    report.append(f"**Time Range:** {data.index.min().strftime('%Y-%m-%d')} to {data.index.max().strftime('%Y-%m-%d')} ({time_range_days} days)")
+    report.append(f"**Time Grouping:** {period_name} ({period})")
+    report.append(f"**Data Points:** {len(resampled)}\n")
+    
+    # Trend direction
+    report.append("## 1. Trend Direction")
+    report.append(f"\n**Overall Trend:** {trend_direction}")
+    report.append(f"**Trend Description:** The {value_column} shows a {trend_desc} trend over time")
+    report.append(f"**Overall Change:** {pct_change:+.1f}%")
+    report.append(f"**Slope:** {slope:.4f} per {period_name.lower()}")
+    
+    # Summary statistics
+    report.append("\n## 2. Summary Statistics")
+    report.append(f"\n**Time Series Statistics:**")
+    report.append(f"- First Value: {first_value:.2f}")
+    report.append(f"- Last Value: {last_value:.2f}")
+    report.append(f"- Mean: {mean_value:.2f}")
+    report.append(f"- Std Dev: {std_value:.2f}")
+    report.append(f"- Min: {min_value:.2f}")
+    report.append(f"- Max: {max_value:.2f}")
+    report.append(f"- Range: {max_value - min_value:.2f}")
+    
+    # Volatility analysis
+    report.append("\n## 3. Volatility Analysis")
+    cv = (std_value / mean_value) * 100 if mean_value != 0 else 0
+    
+    if cv > 30:
+        volatility_level = "🔴 High"
+        volatility_desc = "Values fluctuate significantly over time"
+    elif cv > 15:
+        volatility_level = "🟡 Moderate"
+        volatility_desc = "Values show some variation over time"
+    else:
+        volatility_level = "🟢 Low"
+        volatility_desc = "Values are relatively stable over time"
+    
+    report.append(f"\n**Volatility Level:** {volatility_level}")
+    report.append(f"**Coefficient of Variation:** {cv:.1f}%")
+    report.append(f"- {volatility_desc}")
+    
+    # Recent time series data
+    report.append(f"\n## 4. Recent {period_name} Values")
+    report.append(f"\n**Last 10 {period_name} Periods:**\n")
+    
+    recent_data = resampled.tail(10).reset_index()
+    recent_data.columns = ['Time Period', value_column]
+    recent_data['Time Period'] = recent_data['Time Period'].dt.strftime('%Y-%m-%d')
+    recent_data[value_column] = recent_data[value_column].round(2)
+    report.append(recent_data.to_markdown(index=False))
+    
+    # Key insights
+    report.append("\n## 5. Key Insights")
+    report.append("\n**Trend Summary:**\n")
+    
+    if pct_change > 20:
+        report.append(f"- 🚀 **Strong Growth**: {value_column} has increased significantly by {pct_change:.1f}%")
+    elif pct_change < -20:
+        report.append(f"- 📉 **Strong Decline**: {value_column} has decreased significantly by {pct_change:.1f}%")
+    elif abs(pct_change) < 5:
+        report.append(f"- 📊 **Stable Performance**: {value_column} remains relatively stable with only {abs(pct_change):.1f}% change")
+    else:
+        report.append(f"- 📈 **Moderate Change**: {value_column} has changed by {pct_change:+.1f}%")
+    
+    if cv > 30:
+        report.append(f"- ⚠️ **High Variability**: Consider investigating causes of fluctuation")
+    
+    # Peak and trough analysis
+    peak_idx = np.argmax(values)
+    trough_idx = np.argmin(values)
+    peak_date = resampled.index[peak_idx].strftime('%Y-%m-%d')
+    trough_date = resampled.index[trough_idx].strftime('%Y-%m-%d')
+    
+    report.append(f"\n**Peak & Trough:**")
+    report.append(f"- Peak: {max_value:.2f} on {peak_date}")
+    report.append(f"- Trough: {min_value:.2f} on {trough_date}")
+    
+    # Save aggregated data as artifact
+    agg_df = resampled.reset_index()
+    agg_df.columns = [date_column, f"avg_{value_column}"]
+    
+    report.append(f"\n## 6. Data Saved")
+    report.append(f"\n✅ Aggregated time series data saved for further analysis")
+    report.append(f"- Period: {period_name} ({period})")
+    report.append(f"- Data Points: {len(agg_df)}")
+    
+    return agg_df, resampled, "\n".join(report)
+
+
 @tool
 async def trend_analysis_tool(table_name: str, date_column: str, value_column: str, user_id: str, period: str = 'M') -> str:
     """
@@ -251,7 +403,7 @@ async def trend_analysis_tool(table_name: str, date_column: str, value_column: s
     - Q: Quarterly
     - Y: Yearly
     """
-    dm = DataManager.get_instance("default")
+    dm = DataManager.get_instance(user_id)
     df = await dm.get_dataset(table_name, user_id)
     if df is None or df.empty:
         return f"Error: Dataset '{table_name}' not found."
@@ -260,168 +412,9 @@ async def trend_analysis_tool(table_name: str, date_column: str, value_column: s
         available_cols = ", ".join(df.columns[:10].tolist())
         return f"Error: Columns '{date_column}' or '{value_column}' not found. Available columns: {available_cols}"
 
-    def _analyze_trend():
-        data = df.copy()
-        
-        # Convert date column to datetime
-        try:
-            data[date_column] = pd.to_datetime(data[date_column])
-        except Exception as e:
-            return None, None, f"Error: Could not convert '{date_column}' to datetime: {str(e)}"
-        
-        # Remove rows with invalid dates or values
-        data = data.dropna(subset=[date_column, value_column])
-        
-        if data.empty:
-            return None, None, "Error: No valid data after cleaning."
-        
-        # Sort by date
-        data = data.set_index(date_column).sort_index()
-        
-        # Determine time range for context
-        time_range_days = (data.index.max() - data.index.min()).days
-        
-        # Resample by period
-        period_names = {
-            'D': 'Daily', 'W': 'Weekly', 'M': 'Monthly', 
-            'Q': 'Quarterly', 'Y': 'Yearly'
-        }
-        period_name = period_names.get(period, period)
-        
-        resampled = data[value_column].resample(period).mean().dropna()
-        
-        if len(resampled) < 2:
-            return None, None, "Error: Not enough data points for trend analysis (need at least 2)."
-        
-        # Calculate statistics
-        values = resampled.values
-        first_value = values[0]
-        last_value = values[-1]
-        mean_value = np.mean(values)
-        std_value = np.std(values)
-        min_value = np.min(values)
-        max_value = np.max(values)
-        
-        # Calculate trend (linear regression)
-        x = np.arange(len(resampled)).reshape(-1, 1)
-        y = resampled.values
-        from sklearn.linear_model import LinearRegression
-        model = LinearRegression()
-        model.fit(x, y)
-        slope = model.coef_[0]
-        
-        # Calculate percentage change
-        if first_value != 0:
-            pct_change = ((last_value - first_value) / abs(first_value)) * 100
-        else:
-            pct_change = 0 if last_value == 0 else float('inf')
-        
-        # Determine trend direction
-        if abs(pct_change) < 5:
-            trend_direction = "📊 Stable"
-            trend_desc = "stable"
-        elif pct_change > 0:
-            trend_direction = "📈 Increasing"
-            trend_desc = "increasing"
-        else:
-            trend_direction = "📉 Decreasing"
-            trend_desc = "decreasing"
-        
-        # Build comprehensive report
-        report = []
-        report.append(f"# Trend Analysis Report: '{table_name}'")
-        report.append(f"\n**Date Column:** {date_column}")
-        report.append(f"**Value Column:** {value_column}")
-        report.append(f"**Time Range:** {data.index.min().strftime('%Y-%m-%d')} to {data.index.max().strftime('%Y-%m-%d')} ({time_range_days} days)")
-        report.append(f"**Time Grouping:** {period_name} ({period})")
-        report.append(f"**Data Points:** {len(resampled)}\n")
-        
-        # Trend direction
-        report.append("## 1. Trend Direction")
-        report.append(f"\n**Overall Trend:** {trend_direction}")
-        report.append(f"**Trend Description:** The {value_column} shows a {trend_desc} trend over time")
-        report.append(f"**Overall Change:** {pct_change:+.1f}%")
-        report.append(f"**Slope:** {slope:.4f} per {period_name.lower()}")
-        
-        # Summary statistics
-        report.append("\n## 2. Summary Statistics")
-        report.append(f"\n**Time Series Statistics:**")
-        report.append(f"- First Value: {first_value:.2f}")
-        report.append(f"- Last Value: {last_value:.2f}")
-        report.append(f"- Mean: {mean_value:.2f}")
-        report.append(f"- Std Dev: {std_value:.2f}")
-        report.append(f"- Min: {min_value:.2f}")
-        report.append(f"- Max: {max_value:.2f}")
-        report.append(f"- Range: {max_value - min_value:.2f}")
-        
-        # Volatility analysis
-        report.append("\n## 3. Volatility Analysis")
-        cv = (std_value / mean_value) * 100 if mean_value != 0 else 0
-        
-        if cv > 30:
-            volatility_level = "🔴 High"
-            volatility_desc = "Values fluctuate significantly over time"
-        elif cv > 15:
-            volatility_level = "🟡 Moderate"
-            volatility_desc = "Values show some variation over time"
-        else:
-            volatility_level = "🟢 Low"
-            volatility_desc = "Values are relatively stable over time"
-        
-        report.append(f"\n**Volatility Level:** {volatility_level}")
-        report.append(f"**Coefficient of Variation:** {cv:.1f}%")
-        report.append(f"- {volatility_desc}")
-        
-        # Recent time series data
-        report.append(f"\n## 4. Recent {period_name} Values")
-        report.append(f"\n**Last 10 {period_name} Periods:**\n")
-        
-        recent_data = resampled.tail(10).reset_index()
-        recent_data.columns = ['Time Period', value_column]
-        recent_data['Time Period'] = recent_data['Time Period'].dt.strftime('%Y-%m-%d')
-        recent_data[value_column] = recent_data[value_column].round(2)
-        report.append(recent_data.to_markdown(index=False))
-        
-        # Key insights
-        report.append("\n## 5. Key Insights")
-        report.append("\n**Trend Summary:**\n")
-        
-        if pct_change > 20:
-            report.append(f"- 🚀 **Strong Growth**: {value_column} has increased significantly by {pct_change:.1f}%")
-        elif pct_change < -20:
-            report.append(f"- 📉 **Strong Decline**: {value_column} has decreased significantly by {pct_change:.1f}%")
-        elif abs(pct_change) < 5:
-            report.append(f"- 📊 **Stable Performance**: {value_column} remains relatively stable with only {abs(pct_change):.1f}% change")
-        else:
-            report.append(f"- 📈 **Moderate Change**: {value_column} has changed by {pct_change:+.1f}%")
-        
-        if cv > 30:
-            report.append(f"- ⚠️ **High Variability**: Consider investigating causes of fluctuation")
-        
-        # Peak and trough analysis
-        peak_idx = np.argmax(values)
-        trough_idx = np.argmin(values)
-        peak_date = resampled.index[peak_idx].strftime('%Y-%m-%d')
-        trough_date = resampled.index[trough_idx].strftime('%Y-%m-%d')
-        
-        report.append(f"\n**Peak & Trough:**")
-        report.append(f"- Peak: {max_value:.2f} on {peak_date}")
-        report.append(f"- Trough: {min_value:.2f} on {trough_date}")
-        
-        # Save aggregated data as artifact
-        agg_df = resampled.reset_index()
-        agg_df.columns = [date_column, f"avg_{value_column}"]
-        
-        report.append(f"\n## 6. Data Saved")
-        report.append(f"\n✅ Aggregated time series data saved for further analysis")
-        report.append(f"- Period: {period_name} ({period})")
-        report.append(f"- Data Points: {len(agg_df)}")
-        
-        return agg_df, resampled, "\n".join(report)
-
-    loop = asyncio.get_running_loop()
     try:
-        result = await loop.run_in_executor(None, _analyze_trend)
+        columns = list(dict.fromkeys([date_column, value_column]))
+        result = await run_analysis(_analyze_trend, df[columns], table_name, date_column, value_column, period)
         
         if result[0] is None:
             return result[2]  # Error message
@@ -441,6 +434,133 @@ async def trend_analysis_tool(table_name: str, date_column: str, value_column: s
     except Exception as e:
         return f"Error analyzing trend: {str(e)}"
 
+def _detect_product_gaps(df: pd.DataFrame, embeddings: np.ndarray, min_cluster_size: int, eps: float) -> str:
+    from sklearn.cluster import DBSCAN
+    
+    # Perform DBSCAN clustering
+    dbscan = DBSCAN(eps=eps, min_samples=min_cluster_size, metric='cosine')
+    cluster_labels = dbscan.fit_predict(embeddings)
+    
+    # Add cluster labels to dataframe
+    result_df = df.copy()
+    result_df["__cluster_id__"] = cluster_labels
+    
+    # Analyze clusters
+    unique_clusters = sorted([c for c in set(cluster_labels) if c != -1])
+    noise_count = (cluster_labels == -1).sum()
+    total_points = len(result_df)
+    
+    # Calculate cluster statistics
+    cluster_stats = []
+    for cluster_id in unique_clusters:
+        cluster_data = result_df[result_df["__cluster_id__"] == cluster_id]
+        cluster_size = len(cluster_data)
+        percentage = (cluster_size / total_points) * 100
+        cluster_stats.append({
+            "cluster_id": cluster_id,
+            "size": cluster_size,
+            "percentage": percentage,
+            "data": cluster_data
+        })
+    
+    # Sort by size
+    cluster_stats.sort(key=lambda x: x["size"], reverse=True)
+    
+    # Build gap analysis report
+    report = []
+    report.append(f"# Product Gap Analysis Report")
+    report.append(f"\n**Total Products:** {total_points}")
+    report.append(f"**Clustered Products:** {total_points - noise_count} ({((total_points - noise_count) / total_points * 100):.1f}%)")
+    report.append(f"**Outlier Products:** {noise_count} ({(noise_count / total_points * 100):.1f}%)")
+    report.append(f"**Number of Product Clusters:** {len(unique_clusters)}\n")
+    
+    # 1. Identify underrepresented clusters (potential gaps)
+    report.append("## 1. Underrepresented Product Clusters (Gaps)")
+    if cluster_stats:
+        avg_cluster_size = np.mean([cs["size"] for cs in cluster_stats])
+        underrepresented = [cs for cs in cluster_stats if cs["size"] < avg_cluster_size * 0.5]
+        
+        if underrepresented:
+            report.append(f"\n**Found {len(underrepresented)} underrepresented clusters** (less than 50% of average size):\n")
+            for cs in underrepresented[:5]:  # Top 5 smallest
+                report.append(f"### Cluster {cs['cluster_id']}")
+                report.append(f"- **Size:** {cs['size']} products ({cs['percentage']:.1f}% of total)")
+                report.append(f"- **Gap Indicator:** This cluster is {(avg_cluster_size / cs['size']):.1f}x smaller than average")
+                
+                # Show sample products
+                sample_cols = [col for col in result_df.columns if col not in ["__embedding__", "__cluster_id__"]]
+                report.append("\n**Sample Products:**")
+                report.append(cs["data"][sample_cols].head(5).to_markdown(index=False))
+                report.append("")
+        else:
+            report.append("\n*No significantly underrepresented clusters found.*\n")
+    else:
+        report.append("\n*No clusters formed. All products are outliers.*\n")
+    
+    # 2. Outlier analysis
+    report.append("## 2. Outlier Products (Niche Opportunities)")
+    outlier_percentage = (noise_count / total_points) * 100 if total_points > 0 else 0
+    if noise_count > 0:
+        report.append(f"\n**{noise_count} outlier products detected** ({outlier_percentage:.1f}% of total)")
+        
+        if outlier_percentage > 10:
+            report.append("\n⚠️ **High outlier rate** suggests:")
+            report.append("- Diverse product needs not covered by main categories")
+            report.append("- Potential for new product lines or features")
+            report.append("- Consider creating new product segments")
+        
+        # Show sample outliers
+        outlier_data = result_df[result_df["__cluster_id__"] == -1]
+        sample_cols = [col for col in result_df.columns if col not in ["__embedding__", "__cluster_id__"]]
+        report.append("\n**Sample Outlier Products:**")
+        report.append(outlier_data[sample_cols].head(5).to_markdown(index=False))
+        report.append("")
+    else:
+        report.append("\n*No significant outliers detected. Good product coverage!*\n")
+    
+    # 3. All clusters with sample data
+    report.append("## 3. All Product Clusters")
+    report.append("\n**Complete Cluster Analysis:**\n")
+    
+    if cluster_stats:
+        avg_cluster_size = np.mean([cs["size"] for cs in cluster_stats])
+        for cs in cluster_stats:
+            report.append(f"### Cluster {cs['cluster_id']}")
+            report.append(f"- **Size:** {cs['size']} products ({cs['percentage']:.1f}% of total)")
+            status = "✓ Well-represented" if cs['size'] >= avg_cluster_size else "⚠️ Underrepresented"
+            report.append(f"- **Status:** {status}")
+            
+            # Show sample products
+            sample_cols = [col for col in result_df.columns if col not in ["__embedding__", "__cluster_id__"]]
+            report.append("\n**Sample Products:**")
+            report.append(cs["data"][sample_cols].head(5).to_markdown(index=False))
+            report.append("")
+    
+    # 4. Gap recommendations
+    report.append("## 4. Product Gap Recommendations")
+    report.append("\n**Key Insights:**\n")
+    
+    if cluster_stats:
+        # Calculate concentration
+        top3_percentage = sum([cs["percentage"] for cs in cluster_stats[:3]])
+        if top3_percentage > 70:
+            report.append(f"- 🎯 **High Concentration:** Top 3 clusters contain {top3_percentage:.1f}% of products")
+            report.append("  - Consider: Are we over-focusing on a few product categories?")
+            report.append("  - Opportunity: Explore underrepresented clusters for innovation")
+        
+        if len(underrepresented) > len(unique_clusters) * 0.3:
+            report.append(f"- 📊 **Many Small Clusters:** {len(underrepresented)} clusters are underrepresented")
+            report.append("  - Suggests: Diverse product needs not being adequately addressed")
+            report.append("  - Action: Investigate these clusters for product gaps")
+    
+    if outlier_percentage > 15:
+        report.append(f"- 🔍 **High Outlier Rate:** {outlier_percentage:.1f}% of products are outliers")
+        report.append("  - Indicates: Significant niche opportunities or product gaps")
+        report.append("  - Recommendation: Deep dive into outlier patterns for new product ideas")
+    
+    return "\n".join(report)
+
+
 @tool
 async def product_gap_detection_tool(
     table_name: str, 
@@ -464,7 +584,7 @@ async def product_gap_detection_tool(
     Returns:
         Detailed gap analysis report with product recommendations
     """
-    dm = DataManager.get_instance("default")
+    dm = DataManager.get_instance(user_id)
     df = await dm.get_dataset(table_name, user_id)
     if df is None or df.empty:
         return f"Error: Dataset '{table_name}' not found."
@@ -472,138 +592,12 @@ async def product_gap_detection_tool(
     if "__embedding__" not in df.columns:
         return f"Error: Dataset must have '__embedding__' column. Use embedding_tool first to generate embeddings."
 
-    def _detect_product_gaps():
-        from sklearn.cluster import DBSCAN
-        
-        # Extract embeddings
-        embeddings = np.array(df["__embedding__"].tolist())
-        
-        # Perform DBSCAN clustering
-        dbscan = DBSCAN(eps=eps, min_samples=min_cluster_size, metric='cosine')
-        cluster_labels = dbscan.fit_predict(embeddings)
-        
-        # Add cluster labels to dataframe
-        result_df = df.copy()
-        result_df["__cluster_id__"] = cluster_labels
-        
-        # Analyze clusters
-        unique_clusters = sorted([c for c in set(cluster_labels) if c != -1])
-        noise_count = (cluster_labels == -1).sum()
-        total_points = len(result_df)
-        
-        # Calculate cluster statistics
-        cluster_stats = []
-        for cluster_id in unique_clusters:
-            cluster_data = result_df[result_df["__cluster_id__"] == cluster_id]
-            cluster_size = len(cluster_data)
-            percentage = (cluster_size / total_points) * 100
-            cluster_stats.append({
-                "cluster_id": cluster_id,
-                "size": cluster_size,
-                "percentage": percentage,
-                "data": cluster_data
-            })
-        
-        # Sort by size
-        cluster_stats.sort(key=lambda x: x["size"], reverse=True)
-        
-        # Build gap analysis report
-        report = []
-        report.append(f"# Product Gap Analysis Report")
-        report.append(f"\n**Total Products:** {total_points}")
-        report.append(f"**Clustered Products:** {total_points - noise_count} ({((total_points - noise_count) / total_points * 100):.1f}%)")
-        report.append(f"**Outlier Products:** {noise_count} ({(noise_count / total_points * 100):.1f}%)")
-        report.append(f"**Number of Product Clusters:** {len(unique_clusters)}\n")
-        
-        # 1. Identify underrepresented clusters (potential gaps)
-        report.append("## 1. Underrepresented Product Clusters (Gaps)")
-        if cluster_stats:
-            avg_cluster_size = np.mean([cs["size"] for cs in cluster_stats])
-            underrepresented = [cs for cs in cluster_stats if cs["size"] < avg_cluster_size * 0.5]
-            
-            if underrepresented:
-                report.append(f"\n**Found {len(underrepresented)} underrepresented clusters** (less than 50% of average size):\n")
-                for cs in underrepresented[:5]:  # Top 5 smallest
-                    report.append(f"### Cluster {cs['cluster_id']}")
-                    report.append(f"- **Size:** {cs['size']} products ({cs['percentage']:.1f}% of total)")
-                    report.append(f"- **Gap Indicator:** This cluster is {(avg_cluster_size / cs['size']):.1f}x smaller than average")
-                    
-                    # Show sample products
-                    sample_cols = [col for col in result_df.columns if col not in ["__embedding__", "__cluster_id__"]]
-                    report.append("\n**Sample Products:**")
-                    report.append(cs["data"][sample_cols].head(5).to_markdown(index=False))
-                    report.append("")
-            else:
-                report.append("\n*No significantly underrepresented clusters found.*\n")
-        else:
-            report.append("\n*No clusters formed. All products are outliers.*\n")
-        
-        # 2. Outlier analysis
-        report.append("## 2. Outlier Products (Niche Opportunities)")
-        outlier_percentage = (noise_count / total_points) * 100 if total_points > 0 else 0
-        if noise_count > 0:
-            report.append(f"\n**{noise_count} outlier products detected** ({outlier_percentage:.1f}% of total)")
-            
-            if outlier_percentage > 10:
-                report.append("\n⚠️ **High outlier rate** suggests:")
-                report.append("- Diverse product needs not covered by main categories")
-                report.append("- Potential for new product lines or features")
-                report.append("- Consider creating new product segments")
-            
-            # Show sample outliers
-            outlier_data = result_df[result_df["__cluster_id__"] == -1]
-            sample_cols = [col for col in result_df.columns if col not in ["__embedding__", "__cluster_id__"]]
-            report.append("\n**Sample Outlier Products:**")
-            report.append(outlier_data[sample_cols].head(5).to_markdown(index=False))
-            report.append("")
-        else:
-            report.append("\n*No significant outliers detected. Good product coverage!*\n")
-        
-        # 3. All clusters with sample data
-        report.append("## 3. All Product Clusters")
-        report.append("\n**Complete Cluster Analysis:**\n")
-        
-        if cluster_stats:
-            avg_cluster_size = np.mean([cs["size"] for cs in cluster_stats])
-            for cs in cluster_stats:
-                report.append(f"### Cluster {cs['cluster_id']}")
-                report.append(f"- **Size:** {cs['size']} products ({cs['percentage']:.1f}% of total)")
-                status = "✓ Well-represented" if cs['size'] >= avg_cluster_size else "⚠️ Underrepresented"
-                report.append(f"- **Status:** {status}")
-                
-                # Show sample products
-                sample_cols = [col for col in result_df.columns if col not in ["__embedding__", "__cluster_id__"]]
-                report.append("\n**Sample Products:**")
-                report.append(cs["data"][sample_cols].head(5).to_markdown(index=False))
-                report.append("")
-        
-        # 4. Gap recommendations
-        report.append("## 4. Product Gap Recommendations")
-        report.append("\n**Key Insights:**\n")
-        
-        if cluster_stats:
-            # Calculate concentration
-            top3_percentage = sum([cs["percentage"] for cs in cluster_stats[:3]])
-            if top3_percentage > 70:
-                report.append(f"- 🎯 **High Concentration:** Top 3 clusters contain {top3_percentage:.1f}% of products")
-                report.append("  - Consider: Are we over-focusing on a few product categories?")
-                report.append("  - Opportunity: Explore underrepresented clusters for innovation")
-            
-            if len(underrepresented) > len(unique_clusters) * 0.3:
-                report.append(f"- 📊 **Many Small Clusters:** {len(underrepresented)} clusters are underrepresented")
-                report.append("  - Suggests: Diverse product needs not being adequately addressed")
-                report.append("  - Action: Investigate these clusters for product gaps")
-        
-        if outlier_percentage > 15:
-            report.append(f"- 🔍 **High Outlier Rate:** {outlier_percentage:.1f}% of products are outliers")
-            report.append("  - Indicates: Significant niche opportunities or product gaps")
-            report.append("  - Recommendation: Deep dive into outlier patterns for new product ideas")
-        
-        return "\n".join(report)
-
-    loop = asyncio.get_running_loop()
     try:
-        return await loop.run_in_executor(None, _detect_product_gaps)
+        # Embeddings (shared float32 matrix for DB-loaded datasets) go to the worker via shared memory
+        embeddings = await asyncio.to_thread(dm.get_embedding_matrix, table_name, df)
+        return await run_analysis(
+            _detect_product_gaps, df.drop(columns=["__embedding__"]), embeddings, min_cluster_size, eps
+        )
     except Exception as e:
         return f"Error detecting product gaps: {str(e)}"
 
@@ -639,7 +633,7 @@ async def semantic_search_tool(
     Returns:
         Markdown formatted results with matching reviews and download link
     """
-    dm = DataManager.get_instance("default")
+    dm = DataManager.get_instance(user_id)
     df = await dm.get_dataset(table_name, user_id)
     
     if df is None or df.empty:
@@ -654,19 +648,22 @@ async def semantic_search_tool(
     # Cap top_k at 1000
     top_k = min(top_k, 1000)
     
+    # Generate embedding for the query (repeated short queries are served from cache)
+    query_embedding = await get_embedding_service().generate_embedding(query)
+    if query_embedding is None:
+        return f"Error: Could not generate an embedding for query '{query}'."
+
     def _search():
-        # Generate embedding for the query
-        embeddings_model = OpenAIEmbeddings(api_key=os.getenv("OPENAI_API_KEY"))
-        query_embedding = embeddings_model.embed_query(query)
         query_vec = np.array(query_embedding)
         
-        # Get all embeddings from dataset
-        embeddings = np.array(df["__embedding__"].tolist())
+        # Get all embeddings from dataset (shared float32 matrix, no per-row lists)
+        embeddings = dm.get_embedding_matrix(table_name, df)
         
         # Compute cosine similarity
-        # Normalize vectors
+        # Normalize vectors (rows without an embedding score 0)
+        query_vec = query_vec.astype(np.float32)
         query_norm = query_vec / np.linalg.norm(query_vec)
-        embeddings_norm = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings_norm = normalize_rows(embeddings)
         
         # Cosine similarity
         similarities = np.dot(embeddings_norm, query_norm)
@@ -755,6 +752,95 @@ class ProductGapsExtraction(BaseModel):
     overall_summary: str = Field(description="Brief summary of the main pain points")
 
 
+def _cluster_and_find_centroids(
+    df: pd.DataFrame,
+    embeddings: np.ndarray,
+    text_column: str,
+    rating_column: str | None,
+    max_clusters: int,
+    min_rating: int,
+    max_rating: int
+):
+    # Filter by rating if rating_column is provided and exists
+    use_rating_filter = rating_column is not None
+    if use_rating_filter:
+        mask = ((df[rating_column] >= min_rating) & (df[rating_column] <= max_rating)).to_numpy()
+        filtered_df = df[mask].copy()
+        # Rows of the dataset's embedding matrix, by position
+        embeddings = embeddings[mask]
+    else:
+        filtered_df = df.copy()
+    
+    if filtered_df.empty:
+        if use_rating_filter:
+            return None, None, "No reviews found with ratings between {} and {}".format(min_rating, max_rating)
+        return None, None, "No reviews found in dataset"
+    
+    n_reviews = len(filtered_df)
+    
+    # Target cluster count: min(n_reviews / 2, max_clusters)
+    target_clusters = min(n_reviews // 2, max_clusters)
+    
+    if n_reviews < 2:
+        return None, None, "Not enough reviews for clustering (minimum 2 required)"
+    
+    # Calculate min_cluster_size to get approximately target_clusters
+    # HDBSCAN finds clusters automatically, but min_cluster_size controls granularity
+    # Rough heuristic: min_cluster_size = n_reviews / target_clusters
+    min_cluster_size = max(2, n_reviews // max(target_clusters, 1))
+    
+    # Perform HDBSCAN clustering
+    clusterer = hdbscan.HDBSCAN(
+        min_cluster_size=min_cluster_size,
+        min_samples=1,
+        metric='euclidean',
+        cluster_selection_method='eom'
+    )
+    cluster_labels = clusterer.fit_predict(embeddings)
+    
+    filtered_df["__cluster_id__"] = cluster_labels
+    
+    # Get unique clusters (excluding noise labeled as -1)
+    unique_clusters = [c for c in set(cluster_labels) if c != -1]
+    
+    # Find centroid review for each cluster
+    centroid_reviews = []
+    for cluster_id in unique_clusters:
+        cluster_mask = cluster_labels == cluster_id
+        cluster_embeddings = embeddings[cluster_mask]
+        cluster_indices = np.where(cluster_mask)[0]
+        
+        if len(cluster_indices) == 0:
+            continue
+        
+        # Find the review closest to the cluster centroid (mean of cluster)
+        cluster_center = cluster_embeddings.mean(axis=0)
+        distances = np.linalg.norm(cluster_embeddings - cluster_center, axis=1)
+        closest_idx = cluster_indices[np.argmin(distances)]
+        
+        centroid_row = filtered_df.iloc[closest_idx]
+        
+        # Get rating if available
+        review_rating = None
+        if use_rating_filter and rating_column in filtered_df.columns:
+            review_rating = int(centroid_row[rating_column]) if pd.notna(centroid_row[rating_column]) else None
+        
+        centroid_reviews.append({
+            "cluster_id": cluster_id,
+            "cluster_size": int(cluster_mask.sum()),
+            "text": str(centroid_row[text_column])[:500],  # Limit text length
+            "rating": review_rating
+        })
+    
+    # Count noise points
+    noise_count = (cluster_labels == -1).sum()
+    
+    # Sort by cluster size (most common issues first)
+    centroid_reviews.sort(key=lambda x: x["cluster_size"], reverse=True)
+    
+    return n_reviews, centroid_reviews, None, int(noise_count), len(unique_clusters), use_rating_filter
+
+
 @tool
 async def negative_review_gap_detector(
     table_name: str,
@@ -786,7 +872,7 @@ async def negative_review_gap_detector(
     Returns:
         Detailed product gap analysis report with actionable insights
     """
-    dm = DataManager.get_instance("default")
+    dm = DataManager.get_instance(user_id)
     df = await dm.get_dataset(table_name, user_id)
     
     if df is None or df.empty:
@@ -801,99 +887,27 @@ async def negative_review_gap_detector(
     # Check rating column only if provided
     use_rating_filter = rating_column is not None and rating_column in df.columns
 
-    def _cluster_and_find_centroids():
-        # Filter by rating if rating_column is provided and exists
-        if use_rating_filter:
-            filtered_df = df[
-                (df[rating_column] >= min_rating) & 
-                (df[rating_column] <= max_rating)
-            ].copy()
-        else:
-            filtered_df = df.copy()
-        
-        if filtered_df.empty:
-            if use_rating_filter:
-                return None, None, "No reviews found with ratings between {} and {}".format(min_rating, max_rating)
-            return None, None, "No reviews found in dataset"
-        
-        n_reviews = len(filtered_df)
-        
-        # Target cluster count: min(n_reviews / 2, max_clusters)
-        target_clusters = min(n_reviews // 2, max_clusters)
-        
-        if n_reviews < 2:
-            return None, None, "Not enough reviews for clustering (minimum 2 required)"
-        
-        # Extract embeddings
-        embeddings = np.array(filtered_df["__embedding__"].tolist())
-        
-        # Calculate min_cluster_size to get approximately target_clusters
-        # HDBSCAN finds clusters automatically, but min_cluster_size controls granularity
-        # Rough heuristic: min_cluster_size = n_reviews / target_clusters
-        min_cluster_size = max(2, n_reviews // max(target_clusters, 1))
-        
-        # Perform HDBSCAN clustering
-        clusterer = hdbscan.HDBSCAN(
-            min_cluster_size=min_cluster_size,
-            min_samples=1,
-            metric='euclidean',
-            cluster_selection_method='eom'
-        )
-        cluster_labels = clusterer.fit_predict(embeddings)
-        
-        filtered_df["__cluster_id__"] = cluster_labels
-        
-        # Get unique clusters (excluding noise labeled as -1)
-        unique_clusters = [c for c in set(cluster_labels) if c != -1]
-        
-        # Find centroid review for each cluster
-        centroid_reviews = []
-        for cluster_id in unique_clusters:
-            cluster_mask = cluster_labels == cluster_id
-            cluster_embeddings = embeddings[cluster_mask]
-            cluster_indices = np.where(cluster_mask)[0]
-            
-            if len(cluster_indices) == 0:
-                continue
-            
-            # Find the review closest to the cluster centroid (mean of cluster)
-            cluster_center = cluster_embeddings.mean(axis=0)
-            distances = np.linalg.norm(cluster_embeddings - cluster_center, axis=1)
-            closest_idx = cluster_indices[np.argmin(distances)]
-            
-            centroid_row = filtered_df.iloc[closest_idx]
-            
-            # Get rating if available
-            review_rating = None
-            if use_rating_filter and rating_column in filtered_df.columns:
-                review_rating = int(centroid_row[rating_column]) if pd.notna(centroid_row[rating_column]) else None
-            
-            centroid_reviews.append({
-                "cluster_id": cluster_id,
-                "cluster_size": int(cluster_mask.sum()),
-                "text": str(centroid_row[text_column])[:500],  # Limit text length
-                "rating": review_rating
-            })
-        
-        # Count noise points
-        noise_count = (cluster_labels == -1).sum()
-        
-        # Sort by cluster size (most common issues first)
-        centroid_reviews.sort(key=lambda x: x["cluster_size"], reverse=True)
-        
-        return filtered_df, centroid_reviews, None, noise_count, len(unique_clusters), use_rating_filter
-    
-    loop = asyncio.get_running_loop()
     try:
-        result = await loop.run_in_executor(None, _cluster_and_find_centroids)
+        # Embeddings (gathered from the shared matrix by row) go to the worker via shared memory
+        embeddings = await asyncio.to_thread(dm.get_embedding_matrix, table_name, df)
+        columns = [text_column] + ([rating_column] if use_rating_filter and rating_column != text_column else [])
+        result = await run_analysis(
+            _cluster_and_find_centroids,
+            df[columns],
+            embeddings,
+            text_column,
+            rating_column if use_rating_filter else None,
+            max_clusters,
+            min_rating,
+            max_rating
+        )
         
         # Handle error case (3 elements) vs success case (6 elements)
         if len(result) == 3:
             _, _, error = result
             return f"Error: {error}"
         
-        filtered_df, centroid_reviews, _, noise_count, n_clusters, used_rating_filter = result
-        n_reviews = len(filtered_df)
+        n_reviews, centroid_reviews, _, noise_count, n_clusters, used_rating_filter = result
         
         # Build prompt for LLM with centroid reviews
         def format_review(i, r):
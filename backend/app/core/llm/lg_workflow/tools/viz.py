@@ -82,7 +82,7 @@ async def generate_plot_tool(
     Returns:
         Markdown formatted report with chart details and file path
     """
-    dm = DataManager.get_instance("default")
+    dm = DataManager.get_instance(user_id)
     df = await dm.get_dataset(table_name, user_id)
     
     if df is None or df.empty:
@@ -1,8 +1,11 @@
 from app.core.llm.simple_workflow.utils.extract_data_from_ctx_by_key import extract_data_from_ctx_by_key
 from app.database.session import get_async_session
 from app.services.user_dataset_service import UserDatasetService
+from app.services.embedding_cache import get_embedding_cache
 from app.services.embedding_service import get_embedding_service
+from app.services.model_registry import get_model_registry
 from app.utils.logging import get_logger
+from app.utils.vectors import embeddings_to_matrix
 
 import asyncio
 import pandas as pd
@@ -50,15 +53,32 @@ async def _generate_embeddings_for_text_fast(texts: List[str]) -> np.ndarray:
         numpy array of embeddings (n_samples, embedding_dim)
     """
     try:
-        from sentence_transformers import SentenceTransformer
+        import sentence_transformers  # noqa: F401 - fall back to OpenAI if missing
         
-        # Use BGE-large - high quality embeddings for clustering
-        model = SentenceTransformer('BAAI/bge-base-en-v1.5')
+        model_name = 'BAAI/bge-base-en-v1.5'
+        dimensions = 768
         
-        # Generate embeddings locally (no API calls) with normalization
-        embeddings = model.encode(texts, normalize_embeddings=True, show_progress_bar=False)
+        # Reuse embeddings of texts we have already encoded
+        cache = get_embedding_cache()
+        cached = await cache.get_many(model_name, dimensions, texts) if cache is not None else [None] * len(texts)
+        missing_indices = [i for i, emb in enumerate(cached) if emb is None]
         
-        logger.info(f"Generated {len(embeddings)} normalized embeddings using BGE-large (local)")
+        if missing_indices:
+            # Use BGE - high quality embeddings for clustering, loaded once per process
+            # Generate embeddings locally (no API calls) with normalization
+            missing_texts = [texts[i] for i in missing_indices]
+            generated = await get_model_registry().aencode(model_name, missing_texts, normalize_embeddings=True)
+            for i, emb in zip(missing_indices, generated):
+                cached[i] = emb
+            if cache is not None:
+                await cache.set_many(model_name, dimensions, missing_texts, generated)
+        
+        embeddings = np.asarray(cached, dtype=np.float32)
+        
+        logger.info(
+            f"Generated {len(embeddings)} normalized embeddings using BGE-large (local), "
+            f"{len(texts) - len(missing_indices)} from cache"
+        )
         
         return embeddings
         
@@ -131,11 +151,8 @@ async def cuterize_dataset(
             # Check if embeddings already exist
             elif "__embedding__" in data.columns:
                 logger.info(f"Using existing __embedding__ column for clustering")
-                # Convert embedding column to numpy array
-                embeddings = np.array([
-                    np.array(emb) if isinstance(emb, (list, np.ndarray)) else np.fromstring(emb.strip('[]'), sep=',')
-                    for emb in data["__embedding__"]
-                ])
+                # Convert embedding column to one float32 matrix
+                embeddings = embeddings_to_matrix(data["__embedding__"])
             
             # Fallback to vector_store_columns configuration
             else:
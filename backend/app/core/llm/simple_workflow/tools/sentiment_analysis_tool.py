@@ -1,13 +1,14 @@
 from app.core.llm.simple_workflow.utils.extract_data_from_ctx_by_key import extract_data_from_ctx_by_key
 from app.database.session import get_async_session
+from app.services.sentiment_engine import get_sentiment_engine
 from app.services.user_dataset_service import UserDatasetService
 from app.utils.logging import get_logger
 
+import asyncio
 import pandas as pd
 import numpy as np
 from llama_index.core.workflow import Context
 from typing import Optional, List
-from textblob import TextBlob
 
 logger = get_logger(__name__)
 
@@ -18,7 +19,7 @@ async def analyze_sentiment(
     text_column: str,
     categories: Optional[List[str]] = None
 ) -> str:
-    """Analyze sentiment in text data using TextBlob.
+    """Analyze sentiment in text data using the shared sentiment engine.
     
     This tool performs sentiment analysis to identify:
     1. Overall sentiment distribution (positive, negative, neutral)
@@ -55,33 +56,11 @@ async def analyze_sentiment(
             # Calculate sentiment scores
             logger.info(f"Analyzing sentiment for {len(analysis_data)} records...")
             
-            sentiments = []
-            for text in analysis_data[text_column]:
-                try:
-                    text_str = str(text) if text is not None else ""
-                    blob = TextBlob(text_str)
-                    sentiments.append({
-                        'polarity': blob.sentiment.polarity,
-                        'subjectivity': blob.sentiment.subjectivity
-                    })
-                except Exception as e:
-                    logger.warning(f"Failed to analyze text: {e}")
-                    sentiments.append({'polarity': 0.0, 'subjectivity': 0.0})
-            
-            # Add sentiment columns
-            analysis_data['__sentiment_polarity__'] = [s['polarity'] for s in sentiments]
-            analysis_data['__sentiment_subjectivity__'] = [s['subjectivity'] for s in sentiments]
-            
-            # Classify sentiment
-            def classify_sentiment(polarity):
-                if polarity > 0.1:
-                    return 'Positive'
-                elif polarity < -0.1:
-                    return 'Negative'
-                else:
-                    return 'Neutral'
-            
-            analysis_data['__sentiment_label__'] = analysis_data['__sentiment_polarity__'].apply(classify_sentiment)
+            # Batch-score off the event loop
+            scores = await asyncio.to_thread(get_sentiment_engine().score, analysis_data[text_column].tolist())
+            analysis_data['__sentiment_polarity__'] = scores.polarity
+            analysis_data['__sentiment_subjectivity__'] = scores.subjectivity
+            analysis_data['__sentiment_label__'] = scores.labels()
             
             # Build report
             report = []
@@ -1,12 +1,21 @@
+import time
+from collections import OrderedDict
+from typing import Tuple
+
 from app.core.llm.simple_workflow.agents import create_coordinator_agent, create_general_assistant_agent, create_data_discovery_agent, create_gap_analysis_agent, create_sentiment_analysis_agent, create_trend_analysis_agent, create_clustering_agent, create_visualization_agent, create_report_writer_agent
 from app.core.llm.simple_workflow.agents.clustering_agent import create_clustering_agent_with_datasets
 from app.core.llm.simple_workflow.agents.data_discovery_agent import create_data_discovery_agent_with_datasets
 from app.core.llm.simple_workflow.agents.gap_analysis_agent import create_gap_analysis_agent_with_datasets
 from app.core.llm.simple_workflow.agents.sentiment_analysis_agent import create_sentiment_analysis_agent_with_datasets
 from app.core.llm.simple_workflow.agents.trend_analysis_agent import create_trend_analysis_agent_with_datasets
+from app.config import get_settings
 from llama_index.core.agent.workflow import AgentWorkflow
 from llama_index.llms.openai import OpenAI
 
+# Built workflows per (user_id, model); prompts embed the user's dataset list,
+# so entries expire after simple_workflow_cache_ttl_seconds
+_workflow_cache: "OrderedDict[Tuple[str, str], Tuple[float, AgentWorkflow]]" = OrderedDict()
+
 
 async def create_product_review_workflow(llm: OpenAI, user_id: str) -> AgentWorkflow:
     """
@@ -50,4 +59,35 @@ async def create_product_review_workflow(llm: OpenAI, user_id: str) -> AgentWork
         timeout=300,  # 5 minutes for complex analysis
     )
     
-    return workflow
\ No newline at end of file
+    return workflow
+
+
+async def get_product_review_workflow(llm: OpenAI, user_id: str) -> AgentWorkflow:
+    """
+    Get the user's product review workflow, reusing a recently built one.
+
+    Building the workflow queries the user's datasets for five agent prompts;
+    run state lives in the llama_index Context, so a built workflow can serve
+    consecutive messages until its TTL expires.
+
+    Args:
+        llm: OpenAI LLM instance
+        user_id: User ID to pre-bind to all tools
+    """
+    settings = get_settings()
+    ttl = settings.simple_workflow_cache_ttl_seconds
+    if ttl <= 0:
+        return await create_product_review_workflow(llm, user_id)
+
+    key = (user_id, getattr(llm, "model", ""))
+    entry = _workflow_cache.get(key)
+    if entry is not None and time.monotonic() - entry[0] < ttl:
+        _workflow_cache.move_to_end(key)
+        return entry[1]
+
+    workflow = await create_product_review_workflow(llm, user_id)
+    _workflow_cache[key] = (time.monotonic(), workflow)
+    _workflow_cache.move_to_end(key)
+    while len(_workflow_cache) > settings.simple_workflow_cache_size:
+        _workflow_cache.popitem(last=False)
+    return workflow
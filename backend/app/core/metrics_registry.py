@@ -0,0 +1,505 @@
+"""
+Process metrics registry with fixed-bucket histograms and quantile sketches.
+
+Shared instruments are defined at the bottom of this module.
+"""
+
+import asyncio
+import json
+import math
+import os
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.config import get_settings
+from app.utils.logging import get_logger
+
+logger = get_logger("metrics_registry")
+
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# Values at or below this are counted in the sketch's zero bin
+_MIN_SKETCH_VALUE = 1e-9
+
+Labels = Tuple[str, ...]
+
+
+class QuantileSketch:
+    """
+    Mergeable log-bucketed quantile sketch (DDSketch-style).
+
+    Values are counted in bins whose bounds grow by gamma = (1+a)/(1-a), so
+    any quantile is returned within relative error a. Memory is bounded by
+    max_bins: when exceeded the lowest bins are collapsed, which only
+    degrades the accuracy of the smallest quantiles.
+    """
+
+    __slots__ = ("alpha", "max_bins", "_log_gamma", "bins", "zeros", "count", "min", "max")
+
+    def __init__(self, alpha: float = 0.01, max_bins: int = 2048):
+        self.alpha = alpha
+        self.max_bins = max_bins
+        self._log_gamma = math.log((1 + alpha) / (1 - alpha))
+        self.bins: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """Count one observation."""
+        if value > _MIN_SKETCH_VALUE:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            bins = self.bins
+            bins[key] = bins.get(key, 0) + 1
+            if len(bins) > self.max_bins:
+                self._collapse()
+        else:
+            self.zeros += 1
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def _collapse(self) -> None:
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        target = keys[excess]
+        for key in keys[:excess]:
+            self.bins[target] += self.bins.pop(key)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Add another sketch's counts (same alpha) into this one."""
+        for key, n in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + n
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated q-quantile (0 <= q <= 1), or None if empty."""
+        if not self.count:
+            return None
+        # Nearest rank: the smallest value with at least q of the observations at or below it
+        rank = max(math.ceil(q * self.count), 1)
+        seen = self.zeros
+        if seen >= rank:
+            return max(self.min, 0.0)
+        gamma = math.exp(self._log_gamma)
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen >= rank:
+                value = 2 * gamma ** key / (gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "alpha": self.alpha,
+            "bins": [[key, n] for key, n in self.bins.items()],
+            "zeros": self.zeros,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(alpha=data.get("alpha", 0.01))
+        sketch.bins = {int(key): int(n) for key, n in data.get("bins", [])}
+        sketch.zeros = data.get("zeros", 0)
+        sketch.count = data.get("count", 0)
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+
+class HistogramValue:
+    """One histogram series: per-bucket counts (last is +Inf), sum and sketch."""
+
+    __slots__ = ("counts", "sum", "sketch")
+
+    def __init__(self, n_buckets: int, alpha: float):
+        self.counts = [0] * (n_buckets + 1)
+        self.sum = 0.0
+        self.sketch = QuantileSketch(alpha)
+
+    @property
+    def count(self) -> int:
+        return self.sketch.count
+
+    def merge(self, other: "HistogramValue") -> None:
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.sum += other.sum
+        self.sketch.merge(other.sketch)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"counts": list(self.counts), "sum": self.sum, "sketch": self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HistogramValue":
+        value = cls(len(data["counts"]) - 1, data["sketch"].get("alpha", 0.01))
+        value.counts = list(data["counts"])
+        value.sum = data["sum"]
+        value.sketch = QuantileSketch.from_dict(data["sketch"])
+        return value
+
+
+class _Metric:
+    """Base for instruments whose values live in per-thread shards."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, Any]] = []
+
+    def _values(self) -> Dict[Labels, Any]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            # list.append is atomic; each thread registers its shard once
+            self._shards.append(values)
+            return values
+
+    def _shard_items(self) -> Iterable[Tuple[Labels, Any]]:
+        for shard in list(self._shards):
+            # Copy under the GIL so a writer inserting a new label is safe
+            yield from list(shard.items())
+
+    def reset(self) -> None:
+        for shard in list(self._shards):
+            shard.clear()
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        values = self._values()
+        values[labels] = values.get(labels, 0.0) + amount
+
+    def collect(self) -> Dict[Labels, float]:
+        merged: Dict[Labels, float] = {}
+        for labels, value in self._shard_items():
+            merged[labels] = merged.get(labels, 0.0) + value
+        return merged
+
+
+class Gauge(Counter):
+    """Up/down gauge (e.g. in-flight requests), summed over threads and live processes."""
+
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram with a quantile sketch per series."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        alpha: float = 0.01,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.alpha = alpha
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        values = self._values()
+        series = values.get(labels)
+        if series is None:
+            series = values[labels] = HistogramValue(len(self.buckets), self.alpha)
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.sketch.add(value)
+
+    def collect(self) -> Dict[Labels, HistogramValue]:
+        merged: Dict[Labels, HistogramValue] = {}
+        for labels, series in self._shard_items():
+            target = merged.get(labels)
+            if target is None:
+                target = merged[labels] = HistogramValue(len(self.buckets), self.alpha)
+            target.merge(series)
+        return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """Named instruments plus snapshot, aggregation and exposition."""
+
+    def __init__(self, multiproc_dir: Optional[str] = None):
+        self._multiproc_dir = multiproc_dir
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self._writer_task: Optional[asyncio.Task] = None
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    @property
+    def multiproc_dir(self) -> Optional[str]:
+        if self._multiproc_dir is not None:
+            return self._multiproc_dir or None
+        return get_settings().metrics_multiproc_dir
+
+    # ------------------------------------------------------------------
+    # Snapshots and aggregation
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """This process's metrics as a JSON-serializable dict."""
+        metrics = {}
+        for name, metric in list(self._metrics.items()):
+            values = metric.collect()
+            if isinstance(metric, Histogram):
+                series = [[list(labels), value.to_dict()] for labels, value in values.items()]
+            else:
+                series = [[list(labels), value] for labels, value in values.items()]
+            metrics[name] = {"kind": metric.kind, "series": series}
+        return {"pid": os.getpid(), "metrics": metrics}
+
+    def write_snapshot(self) -> Optional[str]:
+        """Write this process's snapshot into the multi-process directory."""
+        directory = self.multiproc_dir
+        if not directory:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+        return path
+
+    def _read_snapshots(self, directory: str) -> List[Dict[str, Any]]:
+        snapshots = []
+        own = os.getpid()
+        for filename in os.listdir(directory):
+            if not (filename.startswith("metrics-") and filename.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable metrics snapshot {filename}: {e}")
+                continue
+            if data.get("pid") != own:
+                snapshots.append(data)
+        return snapshots
+
+    def collect(self, aggregate: bool = True) -> Dict[str, Dict[Labels, Any]]:
+        """
+        Merged values per metric name.
+
+        Args:
+            aggregate: Also merge the other workers' snapshots when
+                metrics_multiproc_dir is set
+
+        Returns:
+            {name: {labels: float | HistogramValue}}
+        """
+        result = {name: metric.collect() for name, metric in list(self._metrics.items())}
+        directory = self.multiproc_dir if aggregate else None
+        if not directory or not os.path.isdir(directory):
+            return result
+
+        for data in self._read_snapshots(directory):
+            alive = None
+            for name, entry in data.get("metrics", {}).items():
+                metric = self._metrics.get(name)
+                if metric is None or entry.get("kind") != metric.kind:
+                    continue
+                if metric.kind == "gauge":
+                    if alive is None:
+                        alive = _pid_alive(int(data.get("pid", 0)))
+                    if not alive:
+                        continue
+                values = result.setdefault(name, {})
+                for labels, value in entry["series"]:
+                    labels = tuple(labels)
+                    if isinstance(metric, Histogram):
+                        value = HistogramValue.from_dict(value)
+                        if labels in values:
+                            values[labels].merge(value)
+                        else:
+                            values[labels] = value
+                    else:
+                        values[labels] = values.get(labels, 0.0) + value
+        return result
+
+    def render_prometheus(self, aggregate: bool = True) -> str:
+        """Prometheus text exposition (0.0.4) of the merged metrics."""
+        collected = self.collect(aggregate=aggregate)
+        lines: List[str] = []
+        for name, metric in list(self._metrics.items()):
+            values = collected.get(name) or {}
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            if not isinstance(metric, Histogram):
+                for labels, value in sorted(values.items()):
+                    lines.append(f"{name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}")
+                continue
+
+            quantile_lines = []
+            for labels, series in sorted(values.items()):
+                cumulative = 0
+                for bound, n in zip(metric.buckets + (math.inf,), series.counts):
+                    cumulative += n
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{name}_bucket{_format_labels(metric.labelnames, labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(metric.labelnames, labels)} {_format_value(series.sum)}")
+                lines.append(f"{name}_count{_format_labels(metric.labelnames, labels)} {series.count}")
+                for q in (0.5, 0.95, 0.99):
+                    value = series.sketch.quantile(q)
+                    if value is not None:
+                        label = f'quantile="{q}"'
+                        quantile_lines.append(
+                            f"{name}_quantile{_format_labels(metric.labelnames, labels, label)} {_format_value(value)}"
+                        )
+            # Sketch estimates are a separate gauge family: a histogram can't carry quantiles
+            lines.append(f"# HELP {name}_quantile Sketch estimate of {name} quantiles (relative error {metric.alpha:g})")
+            lines.append(f"# TYPE {name}_quantile gauge")
+            lines.extend(quantile_lines)
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clear this process's values (useful for testing)."""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    # ------------------------------------------------------------------
+    # Periodic snapshot writer
+    # ------------------------------------------------------------------
+
+    def start_snapshot_writer(self, interval: Optional[float] = None) -> bool:
+        """Write snapshots every metrics_snapshot_interval_seconds when multi-process mode is on."""
+        if not self.multiproc_dir or self._writer_task is not None:
+            return False
+        interval = get_settings().metrics_snapshot_interval_seconds if interval is None else interval
+        self._writer_task = asyncio.create_task(self._write_loop(interval))
+        logger.info(f"Writing metrics snapshots to {self.multiproc_dir} every {interval:g}s")
+        return True
+
+    async def _write_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                logger.warning(f"Failed to write metrics snapshot: {e}")
+
+    async def stop_snapshot_writer(self) -> None:
+        """Stop the writer and persist a final snapshot."""
+        task, self._writer_task = self._writer_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self.multiproc_dir:
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                logger.warning(f"Failed to write final metrics snapshot: {e}")
+
+
+# Process-wide registry and shared instruments
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+)
+HTTP_ACTIVE_REQUESTS = registry.gauge("http_requests_active", "HTTP requests in progress")
+DB_QUERIES = registry.counter("db_queries_total", "SQL statements executed", ("operation",))
+LLM_TOKENS = registry.counter("llm_tokens_total", "LLM tokens used", ("model", "kind"))
+EMBEDDING_REQUESTS = registry.counter("embedding_requests_total", "Embedding API requests", ("model",))
+EMBEDDING_INPUTS = registry.counter("embedding_inputs_total", "Texts sent to the embedding API", ("model",))
+CACHE_LOOKUPS = registry.counter("cache_lookups_total", "Cache lookups by cache and result", ("cache", "result"))
+LLM_LOG_DROPPED = registry.counter(
+    "llm_call_log_dropped_total", "LLM call log writes dropped by the async writer", ("reason",)
+)
+ANALYSIS_QUEUE_DEPTH = registry.gauge("analysis_pool_queue_depth", "Analysis tasks waiting for a pool worker")
+ANALYSIS_ACTIVE_TASKS = registry.gauge("analysis_pool_active_tasks", "Analysis tasks running in pool workers")
+ANALYSIS_TASKS = registry.counter(
+    "analysis_pool_tasks_total", "Analysis pool tasks by function and outcome", ("function", "outcome")
+)
+ANALYSIS_TASK_DURATION = registry.histogram(
+    "analysis_pool_task_duration_seconds", "Analysis task run time in pool workers", ("function",)
+)
@@ -3,108 +3,108 @@ Monitoring and observability utilities for NeedleAi.
 """
 
 import asyncio
+import re
 import time
 from contextlib import asynccontextmanager
 from datetime import datetime
 from functools import wraps
-from typing import Any, Dict, List
+from typing import Any, Dict, Optional, Tuple
 
 import psutil
 from app.config import Settings
+from app.core.metrics_registry import (
+    HTTP_ACTIVE_REQUESTS,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HistogramValue,
+)
+from app.core.metrics_registry import registry as metrics_registry
 from app.utils.logging import get_logger
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 
 logger = get_logger("monitoring")
 
+UNMATCHED_ROUTE = "<unmatched>"
+
 
 class ApplicationMetrics:
-    """Application metrics collector."""
+    """
+    Application metrics view over the shared metrics registry.
+
+    Requests are recorded into fixed-bucket histograms and counters keyed by
+    route template (see app.core.metrics_registry); summaries are computed
+    from the merged values, across workers in multi-process mode.
+    """
 
     def __init__(self):
         self.start_time = datetime.utcnow()
-        self.request_count = 0
-        self.error_count = 0
-        self.response_times: List[float] = []
-        self.endpoint_stats: Dict[str, Dict[str, Any]] = {}
         self.active_requests = 0
         self.peak_active_requests = 0
 
     def record_request(self, method: str, path: str, status_code: int, response_time: float):
-        """Record request metrics."""
-        self.request_count += 1
-        self.response_times.append(response_time)
-
-        if status_code >= 400:
-            self.error_count += 1
-
-        # Keep only last 1000 response times
-        if len(self.response_times) > 1000:
-            self.response_times = self.response_times[-1000:]
-
-        # Endpoint-specific stats
-        endpoint_key = f"{method} {path}"
-        if endpoint_key not in self.endpoint_stats:
-            self.endpoint_stats[endpoint_key] = {
-                "count": 0,
-                "errors": 0,
-                "total_time": 0.0,
-                "avg_time": 0.0,
-                "min_time": float('inf'),
-                "max_time": 0.0
-            }
-
-        stats = self.endpoint_stats[endpoint_key]
-        stats["count"] += 1
-        stats["total_time"] += response_time
-        stats["avg_time"] = stats["total_time"] / stats["count"]
-        stats["min_time"] = min(stats["min_time"], response_time)
-        stats["max_time"] = max(stats["max_time"], response_time)
-
-        if status_code >= 400:
-            stats["errors"] += 1
+        """Record request metrics (path should be the route template)."""
+        HTTP_REQUEST_DURATION.observe(response_time, (method, path))
+        HTTP_REQUESTS.inc((method, path, str(status_code)))
 
     def increment_active_requests(self):
         """Increment active request counter."""
         self.active_requests += 1
-        self.peak_active_requests = max(self.peak_active_requests, self.active_requests)
+        HTTP_ACTIVE_REQUESTS.inc()
+        if self.active_requests > self.peak_active_requests:
+            self.peak_active_requests = self.active_requests
 
     def decrement_active_requests(self):
         """Decrement active request counter."""
-        self.active_requests = max(0, self.active_requests - 1)
+        if self.active_requests > 0:
+            self.active_requests -= 1
+            HTTP_ACTIVE_REQUESTS.dec()
+
+    def _collect(self) -> Dict[str, Dict[Tuple[str, ...], Any]]:
+        return metrics_registry.collect()
 
     def get_summary(self) -> Dict[str, Any]:
         """Get metrics summary."""
         uptime = datetime.utcnow() - self.start_time
+        collected = self._collect()
 
-        avg_response_time = 0.0
-        if self.response_times:
-            avg_response_time = sum(self.response_times) / len(self.response_times)
+        requests = collected.get(HTTP_REQUESTS.name, {})
+        request_count = int(sum(requests.values()))
+        error_count = int(sum(n for (_, _, code), n in requests.items() if int(code) >= 400))
+
+        overall = HistogramValue(len(HTTP_REQUEST_DURATION.buckets), HTTP_REQUEST_DURATION.alpha)
+        for series in collected.get(HTTP_REQUEST_DURATION.name, {}).values():
+            overall.merge(series)
+
+        avg_response_time = overall.sum / overall.count if overall.count else 0.0
 
         error_rate = 0.0
-        if self.request_count > 0:
-            error_rate = (self.error_count / self.request_count) * 100
+        if request_count > 0:
+            error_rate = (error_count / request_count) * 100
 
         return {
             "uptime_seconds": uptime.total_seconds(),
             "uptime_human": str(uptime),
-            "total_requests": self.request_count,
-            "total_errors": self.error_count,
+            "total_requests": request_count,
+            "total_errors": error_count,
             "error_rate_percent": round(error_rate, 2),
             "average_response_time_ms": round(avg_response_time * 1000, 2),
-            "active_requests": self.active_requests,
+            "p50_response_time_ms": _ms(overall.sketch.quantile(0.5)),
+            "p95_response_time_ms": _ms(overall.sketch.quantile(0.95)),
+            "p99_response_time_ms": _ms(overall.sketch.quantile(0.99)),
+            "active_requests": int(sum(collected.get(HTTP_ACTIVE_REQUESTS.name, {}).values())),
             "peak_active_requests": self.peak_active_requests,
-            "requests_per_minute": self.get_requests_per_minute(),
+            "requests_per_minute": self.get_requests_per_minute(request_count),
             "memory_usage": self.get_memory_usage(),
             "cpu_usage": self.get_cpu_usage()
         }
 
-    def get_requests_per_minute(self) -> float:
+    def get_requests_per_minute(self, request_count: int) -> float:
         """Calculate requests per minute."""
         uptime = datetime.utcnow() - self.start_time
         if uptime.total_seconds() < 60:
             return 0.0
-        return (self.request_count / uptime.total_seconds()) * 60
+        return (request_count / uptime.total_seconds()) * 60
 
     def get_memory_usage(self) -> Dict[str, Any]:
         """Get memory usage statistics."""
@@ -134,63 +134,111 @@ class ApplicationMetrics:
             return {"error": str(e)}
 
     def get_endpoint_stats(self) -> Dict[str, Dict[str, Any]]:
-        """Get endpoint-specific statistics."""
-        return self.endpoint_stats
+        """Get per-route statistics keyed by "METHOD /route/{template}"."""
+        collected = self._collect()
+
+        errors: Dict[Tuple[str, str], int] = {}
+        for (method, route, code), n in collected.get(HTTP_REQUESTS.name, {}).items():
+            if int(code) >= 400:
+                errors[(method, route)] = errors.get((method, route), 0) + int(n)
+
+        stats = {}
+        for (method, route), series in sorted(collected.get(HTTP_REQUEST_DURATION.name, {}).items()):
+            sketch = series.sketch
+            stats[f"{method} {route}"] = {
+                "count": series.count,
+                "errors": errors.get((method, route), 0),
+                "total_time": series.sum,
+                "avg_time": series.sum / series.count if series.count else 0.0,
+                "min_time": sketch.min if series.count else 0.0,
+                "max_time": sketch.max if series.count else 0.0,
+                "p50_time": sketch.quantile(0.5),
+                "p95_time": sketch.quantile(0.95),
+                "p99_time": sketch.quantile(0.99),
+            }
+        return stats
 
     def reset_metrics(self):
-        """Reset all metrics (useful for testing)."""
+        """Reset this process's metrics (useful for testing)."""
+        metrics_registry.reset()
         self.__init__()
 
 
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
 # Global metrics instance
 app_metrics = ApplicationMetrics()
 
 
 class MetricsMiddleware(BaseHTTPMiddleware):
-    """Middleware to collect request metrics."""
+    """Middleware to collect request metrics per route template."""
 
     async def dispatch(self, request: Request, call_next) -> Response:
         # Skip metrics collection for health checks and metrics endpoints
         if request.url.path in ["/health", "/metrics", "/api/v1/health"]:
             return await call_next(request)
 
-        start_time = time.time()
+        start_time = time.perf_counter()
         app_metrics.increment_active_requests()
+        status_code = 500
 
         try:
             response = await call_next(request)
-
-            # Calculate response time
-            response_time = time.time() - start_time
-
-            # Record metrics
-            app_metrics.record_request(
-                method=request.method,
-                path=request.url.path,
-                status_code=response.status_code,
-                response_time=response_time
-            )
+            status_code = response.status_code
 
             # Add response time header
-            response.headers["X-Response-Time"] = f"{response_time:.3f}s"
+            response.headers["X-Response-Time"] = f"{time.perf_counter() - start_time:.3f}s"
 
             return response
 
-        except Exception:
-            # Record error
-            response_time = time.time() - start_time
+        finally:
             app_metrics.record_request(
                 method=request.method,
-                path=request.url.path,
-                status_code=500,
-                response_time=response_time
+                path=route_template(request),
+                status_code=status_code,
+                response_time=time.perf_counter() - start_time
             )
-            raise
-
-        finally:
             app_metrics.decrement_active_requests()
 
 
+def route_template(request: Request) -> str:
+    """
+    The matched route's path template (e.g. /api/v1/chat/sessions/{session_id}).
+
+    Raw URLs would give every session/dataset ID its own series; requests
+    that matched no route share one label.
+    """
+    route = request.scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if not template:
+        return UNMATCHED_ROUTE
+    return _mount_prefix(request.url.path, route) + template
+
+
+def _mount_prefix(path: str, route: Any) -> str:
+    """
+    The part of path before the route's own match.
+
+    Routes of an included router only know their path within that router,
+    so the prefix is recovered from the URL: the route's pattern matches
+    the shortest tail of path that starts at a '/'.
+    """
+    pattern = getattr(route, "path_regex", None)
+    if pattern is None:
+        return ""
+    suffix = re.compile(pattern.pattern.lstrip("^"))
+    start = len(path)
+    while start > 0:
+        start = path.rfind("/", 0, start)
+        if start < 0:
+            break
+        if suffix.fullmatch(path, start):
+            return path[:start]
+    return ""
+
+
 def performance_monitor(operation_name: str):
     """
     Decorator to monitor performance of functions.
@@ -364,6 +364,105 @@ def resilient(
     return decorator
 
 
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limiter for rate-limited upstream APIs.
+
+    Grants up to `limit` concurrent slots. The limit grows by one after
+    `increase_after` consecutive successes and is halved on a rate-limit
+    response, which also pauses all new acquisitions until the upstream
+    reset time has passed.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        increase_after: int = 5
+    ):
+        self.limit = max(min_limit, min(initial_limit, max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_after = increase_after
+        self.in_flight = 0
+        self.rate_limited_count = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        """Wait for a free slot (and for any rate-limit pause to end)."""
+        loop = asyncio.get_running_loop()
+        async with self._condition:
+            while True:
+                pause = self._paused_until - loop.time()
+                if pause > 0:
+                    self._condition.release()
+                    try:
+                        await asyncio.sleep(pause)
+                    finally:
+                        await self._condition.acquire()
+                    continue
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                await self._condition.wait()
+
+    async def release(self) -> None:
+        """Release a slot."""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.release()
+
+    def on_success(self) -> None:
+        """Record a successful call (additive increase)."""
+        self._successes += 1
+        if self._successes >= self.increase_after and self.limit < self.max_limit:
+            self.limit += 1
+            self._successes = 0
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Record a rate-limit response (multiplicative decrease + pause)."""
+        self.rate_limited_count += 1
+        self._successes = 0
+        self.limit = max(self.min_limit, self.limit // 2)
+        delay = retry_after if retry_after is not None else 1.0
+        loop = asyncio.get_running_loop()
+        self._paused_until = max(self._paused_until, loop.time() + delay)
+        logger.warning(f"Rate limited, concurrency limit now {self.limit}, pausing {delay:.2f}s")
+
+    def on_headroom(self, remaining_requests: Optional[int], remaining_tokens: Optional[int], reset_after: Optional[float]) -> None:
+        """
+        Adjust from upstream rate-limit headers before a 429 happens.
+
+        When the remaining request/token budget is nearly exhausted, pause new
+        calls until the window resets.
+        """
+        nearly_exhausted = (
+            (remaining_requests is not None and remaining_requests <= self.in_flight)
+            or (remaining_tokens is not None and remaining_tokens <= 0)
+        )
+        if nearly_exhausted and reset_after:
+            loop = asyncio.get_running_loop()
+            self._paused_until = max(self._paused_until, loop.time() + reset_after)
+
+    def get_state(self) -> dict:
+        """Get limiter state."""
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "rate_limited_count": self.rate_limited_count,
+        }
+
+
 # Global circuit breaker registry
 _circuit_breakers: dict[str, CircuitBreaker] = {}
 
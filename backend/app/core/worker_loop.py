@@ -0,0 +1,218 @@
+"""
+Persistent event loop and shared async clients for Celery worker processes.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+import aiohttp
+import httpx
+
+from app.config import get_settings
+from app.utils.logging import get_logger
+
+logger = get_logger("worker_loop")
+
+T = TypeVar("T")
+
+
+class WorkerLoop:
+    """A worker process's event loop plus the clients bound to it."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread_id = threading.get_ident()
+        self.pid = os.getpid()
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.aiohttp_session: Optional[aiohttp.ClientSession] = None
+        self.valkey = None
+        self.tasks_run = 0
+
+    def owns_current_thread(self) -> bool:
+        return self.pid == os.getpid() and self.thread_id == threading.get_ident() and not self.loop.is_closed()
+
+    def run(self, coro: Awaitable[T]) -> T:
+        if self.loop.is_running():
+            raise RuntimeError("run_async() called from a coroutine on the worker loop; await it instead")
+        asyncio.set_event_loop(self.loop)
+        self.tasks_run += 1
+        return self.loop.run_until_complete(coro)
+
+    async def aclose(self) -> None:
+        """Drain background writers and close every shared client and pool."""
+        from app.database.session import cleanup_database
+        from app.services.llm_call_writer import close_llm_call_writer
+
+        await close_llm_call_writer()
+        if self.http_client is not None:
+            await self.http_client.aclose()
+        if self.aiohttp_session is not None:
+            await self.aiohttp_session.close()
+        if self.valkey is not None:
+            await self.valkey.disconnect()
+        await cleanup_database()
+
+    def close(self) -> None:
+        try:
+            self.loop.run_until_complete(self.aclose())
+        except Exception as e:
+            logger.error(f"Error closing worker resources: {e}")
+
+        pending = asyncio.all_tasks(self.loop)
+        for task in pending:
+            task.cancel()
+        if pending:
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+
+_worker_loop: Optional[WorkerLoop] = None
+
+
+def start_worker_loop() -> WorkerLoop:
+    """
+    Get this process's worker loop, creating it on first use.
+
+    Called from worker_process_init; a loop inherited from the parent
+    through fork() is discarded, since its connections belong to the parent.
+    """
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.pid != os.getpid() or _worker_loop.loop.is_closed():
+        _worker_loop = WorkerLoop()
+        logger.info(f"Started persistent event loop for worker process {os.getpid()}")
+    return _worker_loop
+
+
+def shutdown_worker_loop() -> None:
+    """Close the shared clients, the database engine and the loop (worker_process_shutdown)."""
+    global _worker_loop
+    worker_loop, _worker_loop = _worker_loop, None
+    if worker_loop is None or not worker_loop.owns_current_thread():
+        return
+    worker_loop.close()
+    logger.info(f"Closed event loop of worker process {os.getpid()} after {worker_loop.tasks_run} tasks")
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """
+    Run a coroutine to completion on the worker's persistent loop.
+
+    The drop-in replacement for asyncio.run() in task code. From a thread
+    other than the loop's owner (e.g. a threads pool) the coroutine runs on
+    a throwaway loop, as asyncio.run() would.
+    """
+    worker_loop = _worker_loop
+    if worker_loop is None or worker_loop.pid != os.getpid() or worker_loop.loop.is_closed():
+        worker_loop = start_worker_loop()
+    if worker_loop.thread_id != threading.get_ident():
+        return asyncio.run(coro)
+    return worker_loop.run(coro)
+
+
+def async_task(func: Callable[..., Awaitable[T]]) -> Callable[..., T]:
+    """
+    Decorator turning a coroutine function into a synchronous Celery task body
+    that runs on the worker loop.
+
+    Usage:
+        @celery_app.task(bind=True)
+        @async_task
+        async def my_task(self, ...):
+            async with get_async_session() as db:
+                ...
+    """
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        return run_async(func(*args, **kwargs))
+
+    return wrapper
+
+
+def _current_worker_loop() -> Optional[WorkerLoop]:
+    """The worker loop, if the calling coroutine is running on it."""
+    if _worker_loop is None:
+        return None
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    return _worker_loop if running is _worker_loop.loop else None
+
+
+def get_worker_http_client() -> Optional[httpx.AsyncClient]:
+    """
+    Shared httpx client of the worker loop (created on first use), or None
+    when not called from a task running on it.
+    """
+    worker_loop = _current_worker_loop()
+    if worker_loop is None:
+        return None
+    if worker_loop.http_client is None or worker_loop.http_client.is_closed:
+        settings = get_settings()
+        worker_loop.http_client = httpx.AsyncClient(
+            timeout=settings.worker_http_timeout_seconds,
+            limits=httpx.Limits(max_connections=settings.worker_http_max_connections),
+            follow_redirects=True,
+        )
+    return worker_loop.http_client
+
+
+def get_worker_aiohttp_session() -> Optional[aiohttp.ClientSession]:
+    """
+    Shared aiohttp session of the worker loop (created on first use), or
+    None when not called from a task running on it.
+    """
+    worker_loop = _current_worker_loop()
+    if worker_loop is None:
+        return None
+    if worker_loop.aiohttp_session is None or worker_loop.aiohttp_session.closed:
+        settings = get_settings()
+        worker_loop.aiohttp_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=settings.worker_http_timeout_seconds),
+            connector=aiohttp.TCPConnector(limit=settings.worker_http_max_connections),
+        )
+    return worker_loop.aiohttp_session
+
+
+async def get_worker_valkey():
+    """
+    Shared, connected Valkey client of the worker loop, or None when not
+    called from a task running on it.
+    """
+    worker_loop = _current_worker_loop()
+    if worker_loop is None:
+        return None
+    if worker_loop.valkey is None:
+        from app.services.redis_client import ValkeyClient
+
+        client = ValkeyClient()
+        await client.connect()
+        worker_loop.valkey = client
+    return worker_loop.valkey
+
+
+@asynccontextmanager
+async def worker_valkey() -> AsyncIterator[Any]:
+    """
+    Connected Valkey client for a task: the worker loop's shared client, or
+    a temporary one (disconnected on exit) when running off the worker loop.
+    """
+    client = await get_worker_valkey()
+    if client is not None:
+        yield client
+        return
+
+    from app.services.redis_client import ValkeyClient
+
+    client = ValkeyClient()
+    await client.connect()
+    try:
+        yield client
+    finally:
+        await client.disconnect()
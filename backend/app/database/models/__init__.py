@@ -9,7 +9,13 @@ from .chat_session import ChatSession
 from .company import Company
 from .credit_transaction import CreditTransaction, TransactionTypeEnum
 from .data_import import DataImport, ImportStatusEnum, ImportTypeEnum
-from .llm_call import LLMCall, LLMCallStatusEnum, LLMCallTypeEnum
+from .llm_call import (
+    LLMCall,
+    LLMCallArchive,
+    LLMCallHourlyRollup,
+    LLMCallStatusEnum,
+    LLMCallTypeEnum,
+)
 from .product_intelligence import ProductIntelligence
 from .review import Review
 from .review_source import ReviewSource, SourceTypeEnum
@@ -18,6 +24,7 @@ from .task_result import TaskResult
 from .user import User, UserStatusEnum
 from .user_credit import UserCredit
 from .user_dataset import UserDataset
+from .workflow_checkpoint import WorkflowCheckpoint, WorkflowCheckpointBlob, WorkflowCheckpointWrite
 
 __all__ = [
     # Core Models
@@ -28,6 +35,8 @@ __all__ = [
     "ApiKey",
     "TaskResult",
     "LLMCall",
+    "LLMCallHourlyRollup",
+    "LLMCallArchive",
     
     # Product Review Models
     "Company",
@@ -40,6 +49,11 @@ __all__ = [
     "DataImport",
     "UserDataset",
 
+    # Workflow Models
+    "WorkflowCheckpoint",
+    "WorkflowCheckpointBlob",
+    "WorkflowCheckpointWrite",
+
     # Enums
     "UserStatusEnum",
     "MessageRoleEnum",
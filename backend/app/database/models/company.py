@@ -5,7 +5,7 @@ Company model for product review analysis.
 import uuid
 from datetime import datetime
 
-from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, String, Text
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, String, Text, func
 from sqlalchemy.orm import relationship
 
 from ..base import Base
@@ -42,6 +42,8 @@ class Company(Base):
     __table_args__ = (
         Index('idx_companies_user_created', 'created_by', 'created_at'),
         Index('idx_companies_domain', 'domain'),
+        # Review pool lookup by company name (see ReviewRepository.count_pool_reviews)
+        Index('idx_companies_normalized_name', func.lower(func.trim(name))),
     )
 
     def __repr__(self):
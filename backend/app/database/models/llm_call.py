@@ -12,7 +12,7 @@ import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Enum as SQLEnum, Float, Index, Integer, JSON, String, Text
+from sqlalchemy import BigInteger, Column, DateTime, Enum as SQLEnum, Float, Index, Integer, JSON, String, Text
 from sqlalchemy.orm import relationship
 
 from ..base import Base
@@ -159,3 +159,54 @@ class LLMCall(Base):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+
+
+class LLMCallHourlyRollup(Base):
+    """
+    Hourly aggregates of llm_calls per user, provider, model, call type and status.
+
+    Maintained by the refresh_llm_call_rollups beat task so cost statistics
+    over long ranges read a few hundred rollup rows instead of raw calls.
+    """
+    __tablename__ = "llm_call_hourly_rollups"
+
+    hour = Column(DateTime, primary_key=True)  # Start of the hour (UTC)
+    user_id = Column(String, primary_key=True, default="", server_default="")  # "" = no user
+    provider = Column(String(50), primary_key=True)
+    model = Column(String(100), primary_key=True)
+    call_type = Column(String(50), primary_key=True)
+    status = Column(String(50), primary_key=True)
+
+    call_count = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(BigInteger, nullable=False, default=0)
+    completion_tokens = Column(BigInteger, nullable=False, default=0)
+    total_tokens = Column(BigInteger, nullable=False, default=0)
+    estimated_cost = Column(Float, nullable=False, default=0.0)
+    latency_count = Column(Integer, nullable=False, default=0)
+    latency_sum_ms = Column(BigInteger, nullable=False, default=0)
+    latency_min_ms = Column(Integer, nullable=True)
+    latency_max_ms = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index('idx_llm_rollup_user_hour', 'user_id', 'hour'),
+    )
+
+
+class LLMCallArchive(Base):
+    """
+    Raw llm_calls rows moved out of the hot table by the retention job.
+
+    The full row is kept as JSON; the columns alongside it are the ones
+    archive lookups filter on.
+    """
+    __tablename__ = "llm_call_archive"
+
+    id = Column(String, primary_key=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    user_id = Column(String, nullable=True, index=True)
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    call_type = Column(String(50), nullable=False)
+    status = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
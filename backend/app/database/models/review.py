@@ -28,6 +28,7 @@ class Review(Base):
     author = Column(String(255), nullable=True)
     url = Column(String(500), nullable=True)  # Link to original review
     platform = Column(String(100), nullable=True)  # Source platform (e.g., "app_store", "reddit", "trustpilot")
+    content_hash = Column(String(64), nullable=True)  # Dedup key set by bulk ingestion (see review_ingestion)
 
     # Analysis
     sentiment_score = Column(Float, nullable=True)  # -1.0 (negative) to 1.0 (positive)
@@ -57,6 +58,8 @@ class Review(Base):
         # Index on platform - created by migration 011
         # Index('idx_reviews_platform', 'platform'),
         Index('idx_reviews_job', 'scraping_job_id'),
+        Index('uq_reviews_company_content_hash', 'company_id', 'content_hash', unique=True),
+        Index('idx_reviews_company_platform_scraped', 'company_id', 'platform', 'scraped_at'),
     )
 
     def __repr__(self):
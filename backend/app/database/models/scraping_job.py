@@ -6,7 +6,7 @@ import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy import Enum as SQLEnum
 from sqlalchemy.orm import relationship
 
@@ -47,6 +47,9 @@ class ScrapingJob(Base):
     # Celery task tracking
     celery_task_id = Column(String, nullable=True, index=True)
 
+    # External run tracking (Apify run id, dataset id, dataset offset read so far, ...)
+    run_state = Column(JSON, nullable=True)
+
     # Error handling
     error_message = Column(Text, nullable=True)
 
@@ -0,0 +1,80 @@
+"""
+LangGraph checkpoint storage for the multi-agent chat workflow.
+
+Mirrors the layout LangGraph's savers use: a checkpoint row references its
+channel values by (channel, version), so a channel is only written again
+when it changes, and pending task writes are stored per checkpoint.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, LargeBinary, String
+
+from ..base import Base
+
+
+class WorkflowCheckpoint(Base):
+    """One checkpoint of a workflow thread (channel values stored separately)."""
+    __tablename__ = "workflow_checkpoints"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="", server_default="")
+    checkpoint_id = Column(String, primary_key=True)
+    parent_checkpoint_id = Column(String, nullable=True)
+
+    # Serialized checkpoint without channel_values, and its metadata
+    type = Column(String(32), nullable=False)
+    checkpoint = Column(LargeBinary, nullable=False)
+    metadata_type = Column(String(32), nullable=False)
+    checkpoint_metadata = Column("metadata", LargeBinary, nullable=False)
+
+    # Copy of checkpoint["channel_versions"] so unreferenced blobs can be pruned in SQL
+    channel_versions = Column(JSON, nullable=False, default=dict)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("idx_workflow_checkpoints_created_at", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<WorkflowCheckpoint(thread_id={self.thread_id}, checkpoint_id={self.checkpoint_id})>"
+
+
+class WorkflowCheckpointBlob(Base):
+    """A channel value at one version, shared by every checkpoint that references it."""
+    __tablename__ = "workflow_checkpoint_blobs"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="", server_default="")
+    channel = Column(String, primary_key=True)
+    version = Column(String, primary_key=True)
+
+    type = Column(String(32), nullable=False)
+    blob = Column(LargeBinary, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<WorkflowCheckpointBlob(thread_id={self.thread_id}, channel={self.channel}, version={self.version})>"
+
+
+class WorkflowCheckpointWrite(Base):
+    """A pending write of one task, applied on top of its checkpoint when resuming."""
+    __tablename__ = "workflow_checkpoint_writes"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="", server_default="")
+    checkpoint_id = Column(String, primary_key=True)
+    task_id = Column(String, primary_key=True)
+    idx = Column(Integer, primary_key=True)
+
+    channel = Column(String, nullable=False)
+    type = Column(String(32), nullable=False)
+    blob = Column(LargeBinary, nullable=True)
+    task_path = Column(String, nullable=False, default="", server_default="")
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<WorkflowCheckpointWrite(checkpoint_id={self.checkpoint_id}, task_id={self.task_id}, idx={self.idx})>"
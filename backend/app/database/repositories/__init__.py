@@ -9,6 +9,7 @@ from .company import CompanyRepository
 from .credit_transaction import CreditTransactionRepository
 from .data_import import DataImportRepository
 from .llm_call import LLMCallRepository
+from .llm_call_rollup import LLMCallRollupRepository
 from .model_converter import ModelConverter
 from .review import ReviewRepository
 from .review_source import ReviewSourceRepository
@@ -26,6 +27,7 @@ __all__ = [
     "ApiKeyRepository",
     "TaskResultRepository",
     "LLMCallRepository",
+    "LLMCallRollupRepository",
     
     # Product Review Repositories
     "CompanyRepository",
@@ -4,7 +4,7 @@ Chat message repository for NeedleAi.
 
 from typing import List, Optional
 
-from sqlalchemy import asc, desc
+from sqlalchemy import asc, desc, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -136,6 +136,19 @@ class ChatMessageRepository:
         await db.refresh(message)
         return message
 
+    @staticmethod
+    async def update_fields(db: AsyncSession, message_id: str, **values) -> int:
+        """
+        Update columns of a message with a single UPDATE (no load/refresh).
+
+        Returns:
+            Number of rows updated (0 if the message does not exist)
+        """
+        result = await db.execute(
+            update(ChatMessage).where(ChatMessage.id == message_id).values(**values)
+        )
+        return result.rowcount
+
     @staticmethod
     async def delete(db: AsyncSession, message_id: str) -> bool:
         """Delete a message."""
@@ -3,7 +3,8 @@ Repository for ChatMessageStep database operations.
 """
 
 from typing import List, Optional, Any
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.models.chat_message_step import ChatMessageStep
@@ -221,3 +222,36 @@ class ChatMessageStepRepository:
         logger.debug(f"Bulk created {len(created_steps)} steps for message {message_id}")
         return created_steps
 
+    @staticmethod
+    async def insert_many(db: AsyncSession, rows: List[dict]) -> None:
+        """
+        Insert step rows with one multi-row INSERT.
+
+        Rows must carry their own ``id``; rows whose id already exists are
+        skipped, so re-sending a batch after a failed commit is safe.
+
+        Args:
+            db: Database session
+            rows: Column dicts (id, message_id, agent_name, step_order, ...)
+        """
+        if not rows:
+            return
+        await db.execute(
+            insert(ChatMessageStep).on_conflict_do_nothing(index_elements=["id"]),
+            rows
+        )
+        logger.debug(f"Inserted {len(rows)} chat message steps")
+
+    @staticmethod
+    async def update_many(db: AsyncSession, rows: List[dict]) -> None:
+        """
+        Apply per-step column updates with one executemany UPDATE by primary key.
+
+        Args:
+            db: Database session
+            rows: Column dicts that each include the step ``id``
+        """
+        if not rows:
+            return
+        await db.execute(update(ChatMessageStep), rows)
+        logger.debug(f"Updated {len(rows)} chat message steps")
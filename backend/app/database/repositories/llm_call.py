@@ -2,14 +2,17 @@
 LLM Call repository for logging and querying LLM API calls.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 
-from sqlalchemy import desc, func
+from sqlalchemy import bindparam, delete, desc, func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.database.models.llm_call import LLMCall, LLMCallStatusEnum, LLMCallTypeEnum
+from app.core.metrics_registry import LLM_TOKENS
+from app.database.models.llm_call import LLMCall, LLMCallArchive, LLMCallStatusEnum, LLMCallTypeEnum
+from app.database.repositories.llm_call_rollup import LLMCallRollupRepository, ceil_hour, floor_hour
 from app.utils.logging import get_logger
 
 logger = get_logger("llm_call_repository")
@@ -70,6 +73,48 @@ class LLMCallRepository:
         await db.refresh(llm_call)
         return llm_call
 
+    @staticmethod
+    async def insert_many(db: AsyncSession, rows: List[dict]) -> None:
+        """
+        Insert call rows with one multi-row INSERT.
+
+        Rows must carry their own ``id`` and the same keys; rows whose id
+        already exists are skipped, so re-sending a batch is safe.
+        """
+        if not rows:
+            return
+        await db.execute(
+            pg_insert(LLMCall).on_conflict_do_nothing(index_elements=["id"]),
+            rows
+        )
+
+    @staticmethod
+    async def update_many(db: AsyncSession, rows: List[dict]) -> None:
+        """
+        Apply per-call column updates, one executemany UPDATE per set of columns.
+
+        Each row holds ``id`` plus the columns to set. Unlike an ORM bulk
+        UPDATE, ids without a row (e.g. a call whose insert was dropped) are
+        skipped instead of failing the whole batch.
+        """
+        groups: Dict[tuple, List[dict]] = {}
+        for row in rows:
+            columns = tuple(sorted(key for key in row if key != "id"))
+            if columns:
+                groups.setdefault(columns, []).append(row)
+
+        table = LLMCall.__table__
+        for columns, group in groups.items():
+            statement = (
+                update(table)
+                .where(table.c.id == bindparam("call_id"))
+                .values({column: bindparam(column) for column in columns})
+            )
+            await db.execute(
+                statement,
+                [{"call_id": row["id"], **{column: row[column] for column in columns}} for row in group]
+            )
+
     @staticmethod
     async def mark_completed(
         db: AsyncSession,
@@ -113,7 +158,16 @@ class LLMCallRepository:
         if finish_reason:
             update_data['finish_reason'] = finish_reason
 
-        return await LLMCallRepository.update(db, call_id, **update_data)
+        call = await LLMCallRepository.update(db, call_id, **update_data)
+
+        # Both LLM call loggers complete through here
+        if call is not None and tokens:
+            for kind in ("prompt", "completion"):
+                count = tokens.get(f"{kind}_tokens")
+                if count:
+                    LLM_TOKENS.inc((call.model or "unknown", kind), count)
+
+        return call
 
     @staticmethod
     async def mark_failed(
@@ -178,48 +232,98 @@ class LLMCallRepository:
         return list(result.scalars().all())
 
     @staticmethod
-    async def get_cost_stats(
+    async def _raw_cost_groups(
         db: AsyncSession,
+        start: datetime,
+        end: Optional[datetime],
         user_id: Optional[str] = None,
-        company_id: Optional[str] = None,
-        days: int = 30
-    ) -> Dict:
-        """Get cost statistics for LLM calls."""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        query = select(LLMCall).filter(LLMCall.created_at >= cutoff_date)
-
+        company_id: Optional[str] = None
+    ) -> List:
+        """Cost aggregates per (call_type, model, status) from raw rows in [start, end)."""
+        query = select(
+            LLMCall.call_type,
+            LLMCall.model,
+            LLMCall.status,
+            func.count().label("count"),
+            func.sum(LLMCall.estimated_cost).label("cost"),
+            func.sum(LLMCall.total_tokens).label("tokens"),
+        ).filter(LLMCall.created_at >= start)
+
+        if end is not None:
+            query = query.filter(LLMCall.created_at < end)
         if user_id:
             query = query.filter(LLMCall.user_id == user_id)
         if company_id:
             query = query.filter(LLMCall.company_id == company_id)
 
-        result = await db.execute(query)
-        calls = list(result.scalars().all())
+        query = query.group_by(LLMCall.call_type, LLMCall.model, LLMCall.status)
+        return list(await db.execute(query))
 
-        total_cost = sum(c.estimated_cost or 0 for c in calls)
-        total_tokens = sum(c.total_tokens or 0 for c in calls)
-        total_calls = len(calls)
-        successful_calls = len([c for c in calls if c.status == LLMCallStatusEnum.SUCCESS])
-        failed_calls = len([c for c in calls if c.status == LLMCallStatusEnum.ERROR])
+    @staticmethod
+    async def get_cost_stats(
+        db: AsyncSession,
+        user_id: Optional[str] = None,
+        company_id: Optional[str] = None,
+        days: int = 30,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Get cost statistics for LLM calls.
 
-        # Group by call type
+        Whole hours already covered by llm_call_hourly_rollups are read from
+        the rollups; the partial hours at the range edges and everything
+        after the last rolled-up hour are aggregated from raw rows in SQL.
+        Company filters aren't rolled up and always use raw rows.
+        """
+        start_date, end_date = _naive_utc(start_date), _naive_utc(end_date)
+        start = start_date or (end_date or datetime.utcnow()) - timedelta(days=days)
+
+        groups = []
+        raw_ranges = [(start, end_date)]
+        if not company_id:
+            latest = await LLMCallRollupRepository.latest_hour(db)
+            if latest is not None:
+                lower = ceil_hour(start)
+                upper = min(floor_hour(end_date), latest) if end_date else latest
+                if lower < upper:
+                    groups += await LLMCallRollupRepository.aggregate(db, lower, upper, user_id=user_id)
+                    raw_ranges = [(start, lower), (upper, end_date)]
+
+        for range_start, range_end in raw_ranges:
+            if range_end is None or range_start < range_end:
+                groups += await LLMCallRepository._raw_cost_groups(
+                    db, range_start, range_end, user_id=user_id, company_id=company_id
+                )
+
+        total_cost = 0.0
+        total_tokens = 0
+        total_calls = 0
+        successful_calls = 0
+        failed_calls = 0
         by_type = {}
-        for call in calls:
-            type_key = call.call_type.value
-            if type_key not in by_type:
-                by_type[type_key] = {'count': 0, 'cost': 0, 'tokens': 0}
-            by_type[type_key]['count'] += 1
-            by_type[type_key]['cost'] += call.estimated_cost or 0
-            by_type[type_key]['tokens'] += call.total_tokens or 0
-
-        # Group by model
         by_model = {}
-        for call in calls:
-            if call.model not in by_model:
-                by_model[call.model] = {'count': 0, 'cost': 0, 'tokens': 0}
-            by_model[call.model]['count'] += 1
-            by_model[call.model]['cost'] += call.estimated_cost or 0
-            by_model[call.model]['tokens'] += call.total_tokens or 0
+        for call_type, model, call_status, count, cost, tokens in groups:
+            type_key = call_type.value if hasattr(call_type, 'value') else call_type
+            status_key = call_status.value if hasattr(call_status, 'value') else call_status
+            cost = cost or 0
+            tokens = int(tokens or 0)
+
+            total_calls += count
+            total_cost += cost
+            total_tokens += tokens
+            if status_key == LLMCallStatusEnum.SUCCESS.value:
+                successful_calls += count
+            elif status_key == LLMCallStatusEnum.ERROR.value:
+                failed_calls += count
+
+            # Group by call type and by model
+            for bucket, key in ((by_type, type_key), (by_model, model)):
+                if key not in bucket:
+                    bucket[key] = {'count': 0, 'cost': 0, 'tokens': 0}
+                bucket[key]['count'] += count
+                bucket[key]['cost'] += cost
+                bucket[key]['tokens'] += tokens
 
         return {
             'total_calls': total_calls,
@@ -230,7 +334,7 @@ class LLMCallRepository:
             'avg_cost_per_call': round(total_cost / total_calls, 4) if total_calls > 0 else 0,
             'by_call_type': by_type,
             'by_model': by_model,
-            'period_days': days
+            'period_days': days if start_date is None else round(((end_date or datetime.utcnow()) - start).total_seconds() / 86400, 2)
         }
 
     @staticmethod
@@ -238,52 +342,73 @@ class LLMCallRepository:
         db: AsyncSession,
         provider: Optional[str] = None,
         model: Optional[str] = None,
-        days: int = 7
+        days: int = 7,
+        call_type: Optional[LLMCallTypeEnum] = None
     ) -> Dict:
-        """Get performance statistics for LLM calls."""
+        """
+        Get latency statistics for successful LLM calls, overall and per
+        (provider, model, call_type).
+
+        On Postgres the percentiles are computed in SQL with percentile_cont;
+        other databases fetch only the latency column and interpolate the
+        same way in Python.
+        """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        query = select(LLMCall).filter(
+        filters = [
             LLMCall.created_at >= cutoff_date,
             LLMCall.status == LLMCallStatusEnum.SUCCESS,
             LLMCall.latency_ms.isnot(None)
-        )
-
+        ]
         if provider:
-            query = query.filter(LLMCall.provider == provider)
+            filters.append(LLMCall.provider == provider)
         if model:
-            query = query.filter(LLMCall.model == model)
-
-        result = await db.execute(query)
-        calls = list(result.scalars().all())
-
-        if not calls:
-            return {
-                'total_calls': 0,
-                'avg_latency_ms': 0,
-                'min_latency_ms': 0,
-                'max_latency_ms': 0,
-                'p50_latency_ms': 0,
-                'p95_latency_ms': 0,
-                'p99_latency_ms': 0
-            }
+            filters.append(LLMCall.model == model)
+        if call_type:
+            filters.append(LLMCall.call_type == call_type)
+
+        group_columns = (LLMCall.provider, LLMCall.model, LLMCall.call_type)
+
+        if db.get_bind().dialect.name == "postgresql":
+            def percentile(p):
+                return func.percentile_cont(p).within_group(LLMCall.latency_ms)
+
+            aggregates = (
+                func.count(), func.avg(LLMCall.latency_ms), func.min(LLMCall.latency_ms),
+                func.max(LLMCall.latency_ms), percentile(0.50), percentile(0.95), percentile(0.99),
+            )
+            overall = (await db.execute(select(*aggregates).filter(*filters))).one()
+            grouped = await db.execute(
+                select(*group_columns, *aggregates).filter(*filters).group_by(*group_columns)
+            )
+            stats = _latency_stats(*overall)
+            breakdown = [
+                {
+                    'provider': row[0],
+                    'model': row[1],
+                    'call_type': row[2].value if hasattr(row[2], 'value') else row[2],
+                    **_latency_stats(*row[3:]),
+                }
+                for row in grouped
+            ]
+        else:
+            result = await db.execute(select(*group_columns, LLMCall.latency_ms).filter(*filters))
+            per_group: Dict[tuple, List[int]] = {}
+            for call_provider, call_model, call_call_type, latency in result:
+                per_group.setdefault((call_provider, call_model, call_call_type), []).append(latency)
+
+            stats = _latencies_stats([latency for values in per_group.values() for latency in values])
+            breakdown = [
+                {
+                    'provider': key[0],
+                    'model': key[1],
+                    'call_type': key[2].value if hasattr(key[2], 'value') else key[2],
+                    **_latencies_stats(values),
+                }
+                for key, values in per_group.items()
+            ]
 
-        latencies = sorted([c.latency_ms for c in calls if c.latency_ms])
-        
-        def percentile(data, p):
-            k = (len(data) - 1) * p
-            f = int(k)
-            c = f + 1 if c < len(data) else f
-            return data[f] + (k - f) * (data[c] - data[f]) if c < len(data) else data[f]
-
-        return {
-            'total_calls': len(calls),
-            'avg_latency_ms': int(sum(latencies) / len(latencies)),
-            'min_latency_ms': min(latencies),
-            'max_latency_ms': max(latencies),
-            'p50_latency_ms': int(percentile(latencies, 0.50)),
-            'p95_latency_ms': int(percentile(latencies, 0.95)),
-            'p99_latency_ms': int(percentile(latencies, 0.99))
-        }
+        breakdown.sort(key=lambda group: group['total_calls'], reverse=True)
+        return {**stats, 'by_group': breakdown}
 
     @staticmethod
     async def get_calls_by_trace(
@@ -303,20 +428,120 @@ class LLMCallRepository:
         db: AsyncSession,
         days_old: int = 90
     ) -> int:
-        """Clean up old LLM call logs (keep for analysis)."""
+        """Delete LLM call logs older than days_old (see archive_calls to keep them)."""
         cutoff_date = datetime.utcnow() - timedelta(days=days_old)
-        
-        result = await db.execute(
-            select(LLMCall).filter(LLMCall.created_at < cutoff_date)
-        )
-        old_calls = result.scalars().all()
-        
-        deleted_count = 0
-        for call in old_calls:
-            await db.delete(call)
-            deleted_count += 1
+
+        result = await db.execute(delete(LLMCall).where(LLMCall.created_at < cutoff_date))
+        deleted_count = result.rowcount or 0
 
         await db.flush()
         logger.info(f"Cleaned up {deleted_count} old LLM call logs")
         return deleted_count
 
+    @staticmethod
+    async def archive_calls(
+        db: AsyncSession,
+        before: datetime,
+        batch_size: int = 5000
+    ) -> int:
+        """
+        Move one batch of calls created before a cutoff into llm_call_archive.
+
+        Rows are copied as JSON payloads and deleted from llm_calls in the
+        same transaction (caller commits); call repeatedly until it returns 0.
+
+        Returns:
+            Number of rows archived
+        """
+        table = LLMCall.__table__
+        result = await db.execute(
+            select(table)
+            .where(table.c.created_at < before)
+            .order_by(table.c.created_at)
+            .limit(batch_size)
+        )
+        rows = [dict(row._mapping) for row in result]
+        if not rows:
+            return 0
+
+        archived_at = datetime.utcnow()
+        await db.execute(insert(LLMCallArchive), [
+            {
+                'id': row['id'],
+                'created_at': row['created_at'],
+                'archived_at': archived_at,
+                'user_id': row['user_id'],
+                'provider': row['provider'],
+                'model': row['model'],
+                'call_type': _json_value(row['call_type']),
+                'status': _json_value(row['status']),
+                'payload': {key: _json_value(value) for key, value in row.items()},
+            }
+            for row in rows
+        ])
+        await db.execute(delete(LLMCall).where(LLMCall.id.in_([row['id'] for row in rows])))
+        return len(rows)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are stored as naive UTC."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _json_value(value):
+    """Archive payload value (enums by value, datetimes as ISO strings)."""
+    if hasattr(value, 'value'):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _latency_stats(count, avg, minimum, maximum, p50, p95, p99) -> Dict:
+    """Latency summary from SQL aggregates."""
+    if not count:
+        return {
+            'total_calls': 0,
+            'avg_latency_ms': 0,
+            'min_latency_ms': 0,
+            'max_latency_ms': 0,
+            'p50_latency_ms': 0,
+            'p95_latency_ms': 0,
+            'p99_latency_ms': 0
+        }
+    return {
+        'total_calls': int(count),
+        'avg_latency_ms': int(avg),
+        'min_latency_ms': int(minimum),
+        'max_latency_ms': int(maximum),
+        'p50_latency_ms': int(p50),
+        'p95_latency_ms': int(p95),
+        'p99_latency_ms': int(p99)
+    }
+
+
+def _percentile_cont(data: List[int], p: float) -> float:
+    """Linear interpolation between closest ranks (Postgres percentile_cont)."""
+    k = (len(data) - 1) * p
+    f = int(k)
+    if f + 1 >= len(data):
+        return data[f]
+    return data[f] + (k - f) * (data[f + 1] - data[f])
+
+
+def _latencies_stats(latencies: List[int]) -> Dict:
+    """Latency summary computed in Python from raw latencies."""
+    if not latencies:
+        return _latency_stats(0, None, None, None, None, None, None)
+    latencies = sorted(latencies)
+    return _latency_stats(
+        len(latencies),
+        sum(latencies) / len(latencies),
+        latencies[0],
+        latencies[-1],
+        _percentile_cont(latencies, 0.50),
+        _percentile_cont(latencies, 0.95),
+        _percentile_cont(latencies, 0.99),
+    )
@@ -0,0 +1,167 @@
+"""
+Hourly LLM call rollup repository.
+
+Rollups are recomputed per hour from llm_calls with one GROUP BY, so a
+refresh is idempotent and late completions (a call is logged as pending
+and completed later) are picked up by re-running the recent hours.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import ColumnElement, delete, func, insert, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models.llm_call import LLMCall, LLMCallHourlyRollup
+from app.utils.logging import get_logger
+
+logger = get_logger("llm_call_rollup_repository")
+
+HOUR = timedelta(hours=1)
+
+
+def floor_hour(value: datetime) -> datetime:
+    """Start of the hour containing value."""
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(value: datetime) -> datetime:
+    """Start of the first hour that begins at or after value."""
+    floored = floor_hour(value)
+    return floored if floored == value else floored + HOUR
+
+
+def hour_bucket(dialect: str, column) -> ColumnElement:
+    """SQL expression truncating a timestamp column to the hour."""
+    # Literals, not bound parameters, so GROUP BY repeats the SELECT expression exactly
+    if dialect == "sqlite":
+        return func.strftime(literal_column("'%Y-%m-%d %H:00:00'"), column)
+    return func.date_trunc(literal_column("'hour'"), column)
+
+
+def _enum_value(value: Any) -> str:
+    return value.value if hasattr(value, "value") else str(value)
+
+
+class LLMCallRollupRepository:
+    """Repository maintaining and reading llm_call_hourly_rollups."""
+
+    @staticmethod
+    async def latest_hour(db: AsyncSession) -> Optional[datetime]:
+        """Most recent rolled-up hour (possibly partial), or None if never refreshed."""
+        result = await db.execute(select(func.max(LLMCallHourlyRollup.hour)))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def refresh(db: AsyncSession, start: datetime, end: datetime) -> int:
+        """
+        Recompute the rollups of every hour in [start, end).
+
+        Args:
+            db: Database session (caller commits)
+            start: First hour to rebuild (floored to the hour)
+            end: End of the range (rounded up to the hour)
+
+        Returns:
+            Number of rollup rows written
+        """
+        start, end = floor_hour(start), ceil_hour(end)
+        hour = hour_bucket(db.get_bind().dialect.name, LLMCall.created_at).label("hour")
+        user_id = func.coalesce(LLMCall.user_id, literal_column("''")).label("user_id")
+
+        query = (
+            select(
+                hour,
+                user_id,
+                LLMCall.provider,
+                LLMCall.model,
+                LLMCall.call_type,
+                LLMCall.status,
+                func.count().label("call_count"),
+                func.coalesce(func.sum(LLMCall.prompt_tokens), 0).label("prompt_tokens"),
+                func.coalesce(func.sum(LLMCall.completion_tokens), 0).label("completion_tokens"),
+                func.coalesce(func.sum(LLMCall.total_tokens), 0).label("total_tokens"),
+                func.coalesce(func.sum(LLMCall.estimated_cost), 0.0).label("estimated_cost"),
+                func.count(LLMCall.latency_ms).label("latency_count"),
+                func.coalesce(func.sum(LLMCall.latency_ms), 0).label("latency_sum_ms"),
+                func.min(LLMCall.latency_ms).label("latency_min_ms"),
+                func.max(LLMCall.latency_ms).label("latency_max_ms"),
+            )
+            .where(LLMCall.created_at >= start, LLMCall.created_at < end)
+            .group_by(hour, user_id, LLMCall.provider, LLMCall.model, LLMCall.call_type, LLMCall.status)
+        )
+        rows: List[Dict[str, Any]] = []
+        for row in await db.execute(query):
+            data = dict(row._mapping)
+            if isinstance(data["hour"], str):
+                data["hour"] = datetime.fromisoformat(data["hour"])
+            data["call_type"] = _enum_value(data["call_type"])
+            data["status"] = _enum_value(data["status"])
+            rows.append(data)
+
+        await db.execute(
+            delete(LLMCallHourlyRollup).where(
+                LLMCallHourlyRollup.hour >= start, LLMCallHourlyRollup.hour < end
+            )
+        )
+        if rows:
+            await db.execute(insert(LLMCallHourlyRollup), rows)
+        return len(rows)
+
+    @staticmethod
+    async def refresh_recent(
+        db: AsyncSession,
+        lookback_hours: int = 3,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Incremental refresh: rebuild from the last rolled-up hour (at most
+        lookback_hours back, so late completions are counted) through now.
+        The first run backfills from the oldest llm_calls row.
+
+        Returns:
+            Dict with the rebuilt range and rows written
+        """
+        now = now or datetime.utcnow()
+        start = floor_hour(now) - timedelta(hours=lookback_hours)
+
+        latest = await LLMCallRollupRepository.latest_hour(db)
+        if latest is None:
+            oldest = (await db.execute(select(func.min(LLMCall.created_at)))).scalar_one_or_none()
+            if oldest is None:
+                return {"start": None, "end": None, "rows": 0}
+            start = floor_hour(oldest)
+        else:
+            start = min(start, latest)
+
+        rows = await LLMCallRollupRepository.refresh(db, start, now)
+        logger.info(f"Rebuilt LLM call rollups {start.isoformat()} - {now.isoformat()} ({rows} rows)")
+        return {"start": start.isoformat(), "end": now.isoformat(), "rows": rows}
+
+    @staticmethod
+    async def aggregate(
+        db: AsyncSession,
+        start: datetime,
+        end: datetime,
+        user_id: Optional[str] = None
+    ) -> List[Any]:
+        """
+        Cost aggregates per (call_type, model, status) over whole hours in [start, end).
+
+        Returns:
+            Rows with call_type, model, status, count, cost, tokens
+        """
+        query = select(
+            LLMCallHourlyRollup.call_type,
+            LLMCallHourlyRollup.model,
+            LLMCallHourlyRollup.status,
+            func.sum(LLMCallHourlyRollup.call_count).label("count"),
+            func.sum(LLMCallHourlyRollup.estimated_cost).label("cost"),
+            func.sum(LLMCallHourlyRollup.total_tokens).label("tokens"),
+        ).where(LLMCallHourlyRollup.hour >= start, LLMCallHourlyRollup.hour < end)
+        if user_id:
+            query = query.where(LLMCallHourlyRollup.user_id == user_id)
+        query = query.group_by(
+            LLMCallHourlyRollup.call_type, LLMCallHourlyRollup.model, LLMCallHourlyRollup.status
+        )
+        return list(await db.execute(query))
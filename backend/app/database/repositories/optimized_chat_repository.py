@@ -9,6 +9,7 @@ This module demonstrates best practices for database query optimization:
 - Query result caching
 """
 
+import base64
 import time
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
@@ -16,15 +17,32 @@ from typing import Any, Dict, List, Optional, Tuple
 from app.database.models.chat_message import ChatMessage, MessageRoleEnum
 from app.database.models.chat_session import ChatSession
 from app.database.models.user import User
+from app.exceptions import ValidationError
 from app.utils.logging import get_logger
-from sqlalchemy import and_, desc, func, text
+from sqlalchemy import and_, desc, func, or_, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import aliased, joinedload, selectinload
 
 logger = get_logger("optimized_chat_repository")
 
 
+def encode_session_cursor(session: ChatSession) -> str:
+    """Opaque keyset cursor pointing just after a session in (updated_at, id) order."""
+    raw = f"{session.updated_at.isoformat()}|{session.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_session_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor from encode_session_cursor into (updated_at, session_id)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        updated_at, session_id = raw.split("|", 1)
+        return datetime.fromisoformat(updated_at), session_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValidationError("Invalid pagination cursor", field="cursor") from e
+
+
 class OptimizedChatRepository:
     """
     Optimized repository for chat operations with N+1 prevention.
@@ -95,6 +113,103 @@ class OptimizedChatRepository:
 
         return sessions
 
+    @staticmethod
+    async def get_sessions_page(
+        db: AsyncSession,
+        user_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        summary: bool = False
+    ) -> Tuple[List[ChatSession], Optional[str]]:
+        """
+        Get one page of a user's sessions with keyset pagination on updated_at.
+
+        The number of queries is fixed regardless of page size:
+        - full mode: sessions, their messages and the messages' steps are
+          loaded with chained selectinload (3 queries)
+        - summary mode: session headers plus one windowed query for each
+          session's last message and message count (2 queries); the results
+          are attached as session._last_message and session._message_count
+
+        Args:
+            db: Database session
+            user_id: Owner of the sessions
+            limit: Page size
+            cursor: Cursor returned with the previous page (None for the first page)
+            summary: Load headers and last message only
+
+        Returns:
+            (sessions, next_cursor); next_cursor is None on the last page
+        """
+        query = (
+            select(ChatSession)
+            .filter(ChatSession.user_id == user_id)
+            .filter(ChatSession.is_active == True)
+        )
+
+        if cursor:
+            updated_at, session_id = decode_session_cursor(cursor)
+            query = query.filter(or_(
+                ChatSession.updated_at < updated_at,
+                and_(ChatSession.updated_at == updated_at, ChatSession.id < session_id)
+            ))
+
+        if not summary:
+            query = query.options(
+                selectinload(ChatSession.messages).selectinload(ChatMessage.steps)
+            )
+
+        # Served by ix_chat_session_user_updated; id breaks updated_at ties
+        query = query.order_by(desc(ChatSession.updated_at), desc(ChatSession.id)).limit(limit + 1)
+        result = await db.execute(query)
+        sessions = list(result.scalars().all())
+
+        next_cursor = None
+        if len(sessions) > limit:
+            sessions = sessions[:limit]
+            next_cursor = encode_session_cursor(sessions[-1])
+
+        if summary and sessions:
+            ranked = (
+                select(
+                    ChatMessage,
+                    func.row_number().over(
+                        partition_by=ChatMessage.session_id,
+                        order_by=desc(ChatMessage.created_at)
+                    ).label("rank"),
+                    func.count().over(partition_by=ChatMessage.session_id).label("message_count")
+                )
+                .filter(ChatMessage.session_id.in_([s.id for s in sessions]))
+                .subquery()
+            )
+            last_message = aliased(ChatMessage, ranked)
+            rows = await db.execute(
+                select(last_message, ranked.c.message_count).filter(ranked.c.rank == 1)
+            )
+            last_by_session = {message.session_id: (message, count) for message, count in rows.all()}
+
+            for session in sessions:
+                message, count = last_by_session.get(session.id, (None, 0))
+                session._last_message = message
+                session._message_count = count
+
+        return sessions, next_cursor
+
+    @staticmethod
+    async def get_session_with_steps_optimized(
+        db: AsyncSession,
+        session_id: str
+    ) -> Optional[ChatSession]:
+        """
+        Get a session with all messages and their agent steps in 3 queries.
+        """
+        result = await db.execute(
+            select(ChatSession)
+            .filter(ChatSession.id == session_id)
+            .options(selectinload(ChatSession.messages).selectinload(ChatMessage.steps))
+        )
+        return result.scalar_one_or_none()
+
     @staticmethod
     async def get_conversation_with_context_optimized(
         db: AsyncSession,
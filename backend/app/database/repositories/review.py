@@ -3,18 +3,28 @@ Review repository for managing collected reviews.
 """
 
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
-from sqlalchemy import and_, desc, func, text
+from sqlalchemy import String, and_, any_, bindparam, desc, func, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.database.models.company import Company
 from app.database.models.review import Review
+from app.utils.dynamic_tables import bulk_write_embeddings
+from app.utils.vector_index import configure_ann_search
 from app.utils.logging import get_logger
 
 logger = get_logger("review_repository")
 
 
+def normalize_company_name(name: str) -> str:
+    """Company name as matched by the review pool (lower(trim(name)), see idx_companies_normalized_name)."""
+    return name.strip(" ").lower()
+
+
 class ReviewRepository:
     """Repository for Review model operations."""
 
@@ -62,6 +72,30 @@ class ReviewRepository:
         logger.info(f"Bulk created {len(review_objects)} reviews")
         return review_objects
 
+    @staticmethod
+    async def insert_many(
+        db: AsyncSession,
+        rows: List[dict]
+    ) -> List[Tuple[str, str]]:
+        """
+        Insert review rows with one multi-row INSERT, skipping duplicates.
+
+        Rows must carry their own ``id``, ``content_hash`` and the same keys.
+        Rows whose (company_id, content_hash) already exists are skipped.
+
+        Returns:
+            (id, content) of the rows actually inserted
+        """
+        if not rows:
+            return []
+        result = await db.execute(
+            pg_insert(Review)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["company_id", "content_hash"])
+            .returning(Review.id, Review.content)
+        )
+        return [(row.id, row.content) for row in result]
+
     @staticmethod
     async def get_by_id(db: AsyncSession, review_id: str) -> Optional[Review]:
         """Get review by ID."""
@@ -125,6 +159,61 @@ class ReviewRepository:
         await db.refresh(review)
         return review
 
+    @staticmethod
+    async def get_pending_sentiment(
+        db: AsyncSession,
+        review_ids: Sequence[str]
+    ) -> List[Tuple[str, str]]:
+        """
+        Get (id, content) of the given reviews that have no sentiment score yet.
+
+        One query regardless of the number of IDs (bound as a single array).
+        """
+        if not review_ids:
+            return []
+
+        query = (
+            select(Review.id, Review.content)
+            .filter(Review.id == any_(bindparam("review_ids", list(review_ids), type_=ARRAY(String))))
+            .filter(Review.sentiment_score.is_(None))
+        )
+        result = await db.execute(query)
+        return [(row.id, row.content) for row in result]
+
+    @staticmethod
+    async def bulk_update_sentiment(
+        db: AsyncSession,
+        review_scores: Sequence[Tuple[str, float]]
+    ) -> int:
+        """
+        Set sentiment scores for many reviews with one UPDATE.
+
+        Args:
+            db: Database session
+            review_scores: (review_id, sentiment_score) pairs
+
+        Returns:
+            Number of reviews updated
+        """
+        if not review_scores:
+            return 0
+
+        result = await db.execute(
+            text(f"""
+                UPDATE {Review.__tablename__} AS r
+                SET sentiment_score = v.score, processed_at = :processed_at
+                FROM unnest(CAST(:ids AS text[]), CAST(:scores AS double precision[])) AS v(id, score)
+                WHERE r.id = v.id
+            """),
+            {
+                "ids": [review_id for review_id, _ in review_scores],
+                "scores": [float(score) for _, score in review_scores],
+                "processed_at": datetime.utcnow(),
+            }
+        )
+        logger.info(f"Bulk updated sentiment for {result.rowcount} reviews")
+        return result.rowcount
+
     @staticmethod
     async def count_company_reviews(
         db: AsyncSession,
@@ -216,16 +305,57 @@ class ReviewRepository:
         Returns:
             Number of reviews updated
         """
-        updated_count = 0
-        for review_id, embedding in review_embeddings:
-            review = await ReviewRepository.get_by_id(db, review_id)
-            if review:
-                review.embedding = embedding
-                updated_count += 1
-        
-        await db.flush()
-        logger.info(f"Bulk updated {updated_count} review embeddings")
-        return updated_count
+        if not review_embeddings:
+            return 0
+
+        review_ids = [review_id for review_id, _ in review_embeddings]
+        embeddings = [embedding for _, embedding in review_embeddings]
+        stats = await bulk_write_embeddings(
+            db,
+            Review.__tablename__,
+            keys=review_ids,
+            embeddings=embeddings,
+            key_column="id",
+            embedding_column="embedding",
+        )
+
+        logger.info(f"Bulk updated {stats['updated']} review embeddings")
+        return stats["updated"]
+
+    @staticmethod
+    async def count_pool_reviews(
+        db: AsyncSession,
+        company_name: str,
+        platform: str,
+        since: datetime,
+        exclude_company_id: Optional[str] = None
+    ) -> int:
+        """
+        Count reviews in the global pool for a company name and platform.
+
+        The pool is every review scraped since ``since`` for any company with
+        the same normalized name, whoever owns it.
+
+        Args:
+            db: Database session
+            company_name: Company name (normalized here)
+            platform: Review platform (e.g. "g2")
+            since: Oldest scraped_at still considered fresh
+            exclude_company_id: Company whose own reviews are left out
+        """
+        query = (
+            select(func.count())
+            .select_from(Review)
+            .join(Company, Company.id == Review.company_id)
+            .filter(
+                func.lower(func.trim(Company.name)) == normalize_company_name(company_name),
+                Review.platform == platform,
+                Review.scraped_at >= since,
+            )
+        )
+        if exclude_company_id:
+            query = query.filter(Review.company_id != exclude_company_id)
+        return (await db.execute(query)).scalar_one()
 
     @staticmethod
     async def get_reviews_without_embeddings(
@@ -249,63 +379,67 @@ class ReviewRepository:
         query_embedding: List[float],
         company_id: Optional[str] = None,
         limit: int = 10,
-        similarity_threshold: float = 0.7
+        similarity_threshold: float = 0.7,
+        source_id: Optional[str] = None,
+        platform: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        ef_search: Optional[int] = None
     ) -> List[tuple[Review, float]]:
         """
         Find reviews similar to the query embedding using cosine similarity.
         
+        The candidate query orders by the bare cosine distance with a LIMIT so
+        the vector index serves it; pre-filters are pushed into that query
+        (with an iterative index scan where supported) and the similarity
+        threshold is applied to the candidates afterwards. Reviews are loaded
+        in the same round trip.
+        
         Args:
             db: Database session
             query_embedding: Query embedding vector
             company_id: Optional company ID to filter results
             limit: Maximum number of results
             similarity_threshold: Minimum similarity score (0-1)
+            source_id: Optional review source ID to filter results
+            platform: Optional platform to filter results
+            start_date: Optional earliest review_date
+            end_date: Optional latest review_date
+            ef_search: Optional hnsw.ef_search override
             
         Returns:
             List of tuples (Review, similarity_score)
         """
-        # Convert embedding to string format for SQL
-        embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
-        
-        # Build the query with similarity calculation
-        # Using cosine distance (1 - cosine similarity)
-        # Lower distance = higher similarity
-        base_query = """
-            SELECT 
-                reviews.*,
-                1 - (reviews.embedding <=> :query_embedding::vector) as similarity
-            FROM reviews
-            WHERE reviews.embedding IS NOT NULL
-        """
-        
-        if company_id:
-            base_query += " AND reviews.company_id = :company_id"
-        
-        base_query += """
-            AND 1 - (reviews.embedding <=> :query_embedding::vector) >= :threshold
-            ORDER BY reviews.embedding <=> :query_embedding::vector
-            LIMIT :limit
-        """
-        
-        params = {
-            'query_embedding': embedding_str,
-            'threshold': similarity_threshold,
-            'limit': limit
-        }
-        
+        distance = Review.embedding.cosine_distance(query_embedding)
+        candidates = select(Review.id.label("id"), distance.label("distance")).filter(
+            Review.embedding.isnot(None)
+        )
+
+        prefilters = []
         if company_id:
-            params['company_id'] = company_id
-        
-        result = await db.execute(text(base_query), params)
-        rows = result.fetchall()
-        
-        # Convert rows to Review objects with similarity scores
-        reviews_with_scores = []
-        for row in rows:
-            # Reconstruct Review object from row
-            review = await ReviewRepository.get_by_id(db, row.id)
-            if review:
-                reviews_with_scores.append((review, float(row.similarity)))
+            prefilters.append(Review.company_id == company_id)
+        if source_id:
+            prefilters.append(Review.source_id == source_id)
+        if platform:
+            prefilters.append(Review.platform == platform)
+        if start_date:
+            prefilters.append(Review.review_date >= start_date)
+        if end_date:
+            prefilters.append(Review.review_date <= end_date)
+        if prefilters:
+            candidates = candidates.filter(*prefilters)
+
+        candidates = candidates.order_by(distance).limit(limit).subquery()
+
+        query = (
+            select(Review, candidates.c.distance)
+            .join(candidates, Review.id == candidates.c.id)
+            .filter(candidates.c.distance <= 1 - similarity_threshold)
+            .order_by(candidates.c.distance)
+        )
+
+        await configure_ann_search(db, limit, filtered=bool(prefilters), ef_search=ef_search)
+        result = await db.execute(query)
         
-        return reviews_with_scores
+        return [(review, 1 - float(row_distance)) for review, row_distance in result.all()]
 
@@ -3,7 +3,7 @@ ScrapingJob repository for managing review collection tasks.
 """
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy import desc
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -150,6 +150,57 @@ class ScrapingJobRepository:
         await db.refresh(job)
         return job
 
+    @staticmethod
+    async def lock_running(db: AsyncSession, job_id: str) -> Optional[ScrapingJob]:
+        """
+        Lock a running job for the rest of the transaction.
+
+        Returns None if the job is not running or another transaction holds
+        the lock (SKIP LOCKED), so concurrent pollers never advance a job twice.
+        """
+        result = await db.execute(
+            select(ScrapingJob)
+            .filter(ScrapingJob.id == job_id, ScrapingJob.status == JobStatusEnum.RUNNING)
+            .with_for_update(skip_locked=True)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def list_running_ids(db: AsyncSession, job_ids: List[str]) -> List[str]:
+        """Return the given job IDs that are still running."""
+        result = await db.execute(
+            select(ScrapingJob.id)
+            .filter(ScrapingJob.id.in_(job_ids), ScrapingJob.status == JobStatusEnum.RUNNING)
+        )
+        running = set(result.scalars().all())
+        return [job_id for job_id in job_ids if job_id in running]
+
+    @staticmethod
+    async def list_running_run_states(db: AsyncSession) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return (id, run_state) of running jobs that track an external run."""
+        result = await db.execute(
+            select(ScrapingJob.id, ScrapingJob.run_state)
+            .filter(ScrapingJob.status == JobStatusEnum.RUNNING, ScrapingJob.run_state.isnot(None))
+        )
+        return [(job_id, run_state) for job_id, run_state in result.all() if run_state]
+
+    @staticmethod
+    async def set_run_state(
+        db: AsyncSession,
+        job_id: str,
+        run_state: Optional[Dict[str, Any]]
+    ) -> Optional[ScrapingJob]:
+        """Set external run tracking state."""
+        job = await ScrapingJobRepository.get_by_id(db, job_id)
+        if not job:
+            return None
+
+        # Assign a new dict so the JSON column is flagged as changed
+        job.run_state = dict(run_state) if run_state is not None else None
+        await db.flush()
+        return job
+
     @staticmethod
     async def get_last_scrape_date(
         db: AsyncSession,
@@ -6,6 +6,7 @@ from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Optional
 
 from app.config import get_settings
+from app.core.metrics_registry import DB_QUERIES
 from app.utils.logging import get_logger
 from sqlalchemy import event, text
 from sqlalchemy.engine import Engine
@@ -19,6 +20,8 @@ from sqlalchemy.pool import StaticPool
 
 logger = get_logger("database_session")
 
+_COUNTED_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE"})
+
 # Import monitoring (lazy to avoid circular imports)
 _monitoring_registered = False
 
@@ -255,6 +258,13 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor.close()
 
 
+@event.listens_for(Engine, "before_cursor_execute")
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    """Count executed statements by leading keyword (SELECT, INSERT, ...)."""
+    operation = statement.lstrip()[:6].upper()
+    DB_QUERIES.inc((operation if operation in _COUNTED_OPERATIONS else "OTHER",))
+
+
 # Initialize database on import if needed
 async def initialize_database():
     """Initialize database tables and connections."""
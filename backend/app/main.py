@@ -5,13 +5,18 @@ A FastAPI + Next.js AI agent application with OpenRouter and Agno
 Auto-generated by cookiecutter-fastapi-nextjs-llm
 """
 
+import asyncio
 from contextlib import asynccontextmanager
 
 import uvicorn
 from app.api.v1.router import api_router
+from app.core.analysis_pool import get_analysis_pool, shutdown_analysis_pool
 from app.core.config.settings import get_settings
 from app.core.config.validation import setup_config_validation
 from app.core.container import get_container
+from app.core.llm.lg_workflow.checkpoint import close_workflow_checkpointer
+from app.core.llm.lg_workflow.factory import get_workflow_factory
+from app.core.metrics_registry import registry as metrics_registry
 from app.core.monitoring import setup_monitoring
 from app.core.tracing import (
     initialize_tracing,
@@ -23,6 +28,8 @@ from app.dependencies import cleanup_orchestrator_services
 from app.exceptions import setup_exception_handlers
 from app.middleware import setup_middleware
 from app.models.base import APIInfo
+from app.services.llm_call_writer import close_llm_call_writer
+from app.services.model_registry import get_model_registry
 from fastapi import FastAPI
 
 
@@ -48,6 +55,28 @@ async def initialize_services():
         container = get_container()
         logger.info("DI container initialized")
 
+        # Warm up local models so the first tool call doesn't pay the load time
+        if settings.local_models_warmup:
+            await asyncio.to_thread(get_model_registry().warm_up, settings.local_models_warmup)
+            logger.info(f"Local models warmed up: {settings.local_models_warmup}")
+
+        # Compile the multi-agent graph so the first chat doesn't pay for it
+        if settings.workflow_warmup:
+            try:
+                compile_ms = await asyncio.to_thread(get_workflow_factory().warm_up)
+                logger.info(f"Multi-agent workflow compiled in {compile_ms:.0f}ms")
+            except Exception as e:
+                logger.warning(f"Workflow warm-up failed, compiling on first request: {e}")
+
+        # Start the analysis workers so the first ML tool call doesn't wait for them
+        analysis_pool = get_analysis_pool()
+        if analysis_pool is not None:
+            await asyncio.to_thread(analysis_pool.start)
+            logger.info(f"Analysis pool started with {analysis_pool.workers} workers")
+
+        # Share request metrics with the other workers (multi-process mode)
+        metrics_registry.start_snapshot_writer()
+
         logger.info("All services initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing services: {e}")
@@ -61,6 +90,18 @@ async def cleanup_services():
         await cleanup_orchestrator_services()
         logger.info("Orchestrator services cleaned up")
 
+        # Persist buffered workflow checkpoints
+        await close_workflow_checkpointer()
+
+        # Drain queued LLM call logs
+        await close_llm_call_writer()
+
+        # Stop the analysis workers
+        await asyncio.to_thread(shutdown_analysis_pool)
+
+        # Leave a final metrics snapshot for the other workers
+        await metrics_registry.stop_snapshot_writer()
+
         # Cleanup DI container
         container = get_container()
         await container.dispose()
@@ -3,7 +3,7 @@ Scraping API models.
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field, model_validator
 
@@ -31,6 +31,24 @@ class ScrapingJobCreate(BaseModel):
         }
 
 
+class ScrapingBatchCreate(BaseModel):
+    """Request to scrape one company from several sources at once."""
+    company_id: str = Field(..., description="Company ID to scrape reviews for")
+    source_ids: List[str] = Field(..., min_length=1, max_length=10, description="Review source IDs")
+    review_count: int = Field(..., ge=1, le=1000, description="Number of reviews to scrape per source")
+    queries: Optional[Dict[str, str]] = Field(None, description="Custom query/URL per source ID")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "company_id": "comp_123",
+                "source_ids": ["source_g2", "source_trustpilot", "source_trustradius"],
+                "review_count": 100,
+                "queries": {"source_g2": "https://www.g2.com/products/notion/reviews"}
+            }
+        }
+
+
 class ScrapingJobResponse(BaseModel):
     """Scraping job response."""
     id: str
@@ -18,6 +18,7 @@ from app.optimal_workflow.query_classifier import classify_query, QueryComplexit
 from app.optimal_workflow.simple_workflow import run_simple_workflow
 from app.optimal_workflow.medium_workflow import run_medium_workflow
 from app.optimal_workflow.workflow import ProductGapWorkflow
+from app.services.step_buffer import StepBuffer
 
 logger = get_logger("llamaindex_workflow.main")
 
@@ -148,6 +149,9 @@ async def run_workflow_streaming(
     # Event queue for streaming with immediate notification
     events = asyncio.Queue()
     workflow_done = asyncio.Event()
+    # Steps and the final answer are persisted in batches; the buffer is closed
+    # by the workflow task itself so writes survive a client disconnect
+    step_buffer = StepBuffer()
     workflow_error = None
     workflow_result = None
     
@@ -190,7 +194,8 @@ async def run_workflow_streaming(
                     user_id=user_id,
                     session_id=session_id,
                     stream_callback=stream_callback,
-                    assistant_message_id=assistant_message_id
+                    assistant_message_id=assistant_message_id,
+                    step_buffer=step_buffer
                 )
                 
             elif classification.complexity == QueryComplexity.MEDIUM:
@@ -201,7 +206,8 @@ async def run_workflow_streaming(
                     user_id=user_id,
                     session_id=session_id,
                     stream_callback=stream_callback,
-                    assistant_message_id=assistant_message_id
+                    assistant_message_id=assistant_message_id,
+                    step_buffer=step_buffer
                 )
                 
             else:  # COMPLEX
@@ -211,6 +217,7 @@ async def run_workflow_streaming(
                     session_id=session_id,
                     assistant_message_id=assistant_message_id,
                     stream_callback=stream_callback,
+                    step_buffer=step_buffer,
                     timeout=900,
                     verbose=True
                 )
@@ -220,7 +227,10 @@ async def run_workflow_streaming(
             logger.exception("Error in workflow execution")
             workflow_error = e
         finally:
-            workflow_done.set()
+            try:
+                await asyncio.shield(step_buffer.close())
+            finally:
+                workflow_done.set()
     
     try:
         # Start workflow in background
@@ -7,6 +7,7 @@ from typing import Optional, Callable, List, Dict, Any
 from llama_index.llms.openai import OpenAI
 
 from app.core.config.settings import get_settings
+from app.services.step_buffer import StepBuffer
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -18,7 +19,8 @@ async def run_medium_workflow(
     user_id: Optional[str] = None,
     session_id: Optional[str] = None,
     stream_callback: Optional[Callable] = None,
-    assistant_message_id: Optional[int] = None
+    assistant_message_id: Optional[int] = None,
+    step_buffer: Optional[StepBuffer] = None
 ) -> str:
     """
     Execute medium complexity workflow for queries that can be answered with conversation history.
@@ -33,6 +35,8 @@ async def run_medium_workflow(
         session_id: Session ID
         stream_callback: Optional callback for streaming events
         assistant_message_id: ID of assistant message to update in database
+        step_buffer: Request step buffer the final answer is written through
+            (a private buffer is flushed before returning if omitted)
         
     Returns:
         Markdown-formatted response
@@ -119,22 +123,14 @@ async def run_medium_workflow(
         
         # Save to database if assistant_message_id provided
         if assistant_message_id:
-            try:
-                from app.database.session import get_async_session
-                from app.database.repositories.chat_message import ChatMessageRepository
-                from datetime import datetime
-                
-                async with get_async_session() as db:
-                    await ChatMessageRepository.update(
-                        db=db,
-                        message_id=assistant_message_id,
-                        content=accumulated_answer,
-                        completed_at=datetime.utcnow()
-                    )
-                    await db.commit()
-                    logger.info(f"💾 Saved medium workflow response to DB (message_id={assistant_message_id})")
-            except Exception as db_error:
-                logger.error(f"Failed to save to database: {db_error}", exc_info=True)
+            buffer = step_buffer or StepBuffer()
+            buffer.complete_message(assistant_message_id, accumulated_answer)
+            # Flush now so the answer is stored before the complete event is sent
+            if step_buffer is None:
+                await buffer.close()
+            else:
+                await buffer.flush()
+            logger.info(f"💾 Queued medium workflow response for DB (message_id={assistant_message_id})")
         
         if stream_callback:
             # Emit step complete
@@ -344,29 +344,16 @@ def execute_sentiment_analysis(data: list[dict], text_column: str, rating_column
         #     grouped = df.groupby(group_by)[rating_column].agg(['mean', 'count']).to_dict('index')
         #     result["grouped_analysis"] = grouped
     else:
-        # No rating column - use TextBlob for sentiment analysis
+        # No rating column - score the text column with the shared sentiment engine
         try:
-            from textblob import TextBlob
+            from app.services.sentiment_engine import get_sentiment_engine
             
-            logger.info(f"No rating column found, using TextBlob for sentiment analysis")
+            logger.info(f"No rating column found, using the sentiment engine for sentiment analysis")
             
-            sentiments = []
-            polarities = []
+            scores = get_sentiment_engine().score(df[text_column].tolist())
+            polarities = scores.polarity
             
-            for text in df[text_column].fillna("").astype(str):
-                blob = TextBlob(text)
-                polarity = blob.sentiment.polarity
-                polarities.append(polarity)
-                
-                # Classify sentiment based on polarity
-                if polarity > 0.1:
-                    sentiments.append('positive')
-                elif polarity < -0.1:
-                    sentiments.append('negative')
-                else:
-                    sentiments.append('neutral')
-            
-            df['sentiment'] = sentiments
+            df['sentiment'] = scores.labels('positive', 'neutral', 'negative')
             df['sentiment_score'] = polarities
             
             result["sentiment_stats"] = {
@@ -392,8 +379,8 @@ def execute_sentiment_analysis(data: list[dict], text_column: str, rating_column
             #     result["grouped_analysis"] = grouped
                 
         except ImportError:
-            logger.warning("TextBlob not installed, skipping text-based sentiment analysis")
-            result["warning"] = "No rating column and TextBlob not available for sentiment analysis"
+            logger.warning("Sentiment lexicon not installed, skipping text-based sentiment analysis")
+            result["warning"] = "No rating column and no sentiment backend available for sentiment analysis"
     
     return result
 
@@ -417,11 +404,13 @@ def execute_feature_extraction(
     
     # Always try to use embeddings for best results
     try:
-        from sentence_transformers import SentenceTransformer
         from sklearn.metrics.pairwise import cosine_similarity
+        from app.services.model_registry import get_model_registry
         
-        logger.info("Loading sentence transformer model for feature extraction")
-        model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Loaded once per process and shared with other tools
+        model_name = 'all-MiniLM-L6-v2'
+        registry = get_model_registry()
+        registry.get_model(model_name)
         embeddings_available = True
     except ImportError:
         logger.warning("sentence-transformers not available, falling back to regex patterns")
@@ -447,13 +436,13 @@ def execute_feature_extraction(
     if embeddings_available:
         logger.info(f"Batch encoding {len(valid_texts)} texts")
         # BATCH ENCODE ALL TEXTS AT ONCE - much faster!
-        text_embeddings = model.encode(valid_texts, batch_size=32, show_progress_bar=False)
+        text_embeddings = registry.encode(model_name, valid_texts, batch_size=32)
         
         # Pre-compute category keyword embeddings once
         logger.info("Encoding category keywords")
         category_embeddings = {}
         for cat_name, keywords in categories_config.items():
-            category_embeddings[cat_name] = model.encode(keywords, show_progress_bar=False)
+            category_embeddings[cat_name] = registry.encode(model_name, keywords)
         
         # Batch categorize all texts
         logger.info("Categorizing texts using batch similarity")
@@ -519,7 +508,7 @@ def execute_feature_extraction(
             # BATCH ENCODE all item texts at once
             texts = [item['full_text'] for item in items]
             logger.info(f"Batch encoding {len(texts)} items for clustering")
-            embeddings = model.encode(texts, batch_size=32, show_progress_bar=False)
+            embeddings = registry.encode(model_name, texts, batch_size=32)
             
             # Compute similarity matrix in one go
             similarity_matrix = cosine_similarity(embeddings)
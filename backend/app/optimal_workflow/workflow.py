@@ -28,6 +28,7 @@ from app.optimal_workflow.agents import (
 )
 from app.optimal_workflow.services.data_retrieval_service import DataRetrievalService
 from app.optimal_workflow.services.nlp_service import NLPService
+from app.services.step_buffer import StepBuffer
 
 logger = get_logger(__name__)
 
@@ -137,11 +138,15 @@ class ProductGapWorkflow(Workflow):
     6. NLP Analysis OR Skip Retrieval -> Generate Answer
     """
 
-    def __init__(self, user_id: str = None, session_id: str = None, assistant_message_id: int = None, stream_callback=None, **kwargs):
+    def __init__(self, user_id: str = None, session_id: str = None, assistant_message_id: int = None, stream_callback=None, step_buffer: Optional[StepBuffer] = None, **kwargs):
         super().__init__(**kwargs)
         self.user_id = user_id
         self.session_id = session_id
         self.assistant_message_id = assistant_message_id  # For saving steps to DB
+        # Steps and the final answer are written through a per-request buffer;
+        # without a caller-provided one the workflow owns and closes its own
+        self._owns_step_buffer = step_buffer is None
+        self.step_buffer = step_buffer or StepBuffer()
         self.message_id = None  # Will be set in start_workflow step
         self.stream_callback = stream_callback  # Callback for streaming events
         self.table_schemas = {}
@@ -176,45 +181,36 @@ class ProductGapWorkflow(Workflow):
 
     async def _track_step_in_db(self, agent_name: str, step_order: int, content: Any, is_structured: bool):
         """
-        Track workflow step in database immediately.
+        Track workflow step in database.
         
-        This stores the step execution details in the database for persistence and auditing.
+        The step is added to the request's step buffer, which writes it
+        together with the other buffered steps on its next flush.
         
         Returns:
-            The created ChatMessageStep object, or None if tracking failed
+            The ID of the buffered ChatMessageStep, or None if tracking failed
         """
         if not self.assistant_message_id:
             logger.warning(f"Cannot save step {agent_name} - no assistant_message_id set")
             return None
             
         try:
-            from app.database.session import get_async_session
-            from app.database.repositories.chat_message_step import ChatMessageStepRepository
+            logger.info(f"[WORKFLOW DB] Buffering step: {agent_name} (order: {step_order})")
             
-            async with get_async_session() as db:
-                logger.info(f"[WORKFLOW DB] Saving step: {agent_name} (order: {step_order})")
-                
-                if is_structured:
-                    step = await ChatMessageStepRepository.create(
-                        db=db,
-                        message_id=self.assistant_message_id,
-                        agent_name=agent_name,
-                        step_order=step_order,
-                        structured_output=content
-                    )
-                else:
-                    step = await ChatMessageStepRepository.create(
-                        db=db,
-                        message_id=self.assistant_message_id,
-                        agent_name=agent_name,
-                        step_order=step_order,
-                        prediction=content if isinstance(content, str) else str(content)
-                    )
-                await db.commit()
-                logger.info(f"[WORKFLOW DB] ✅ Saved step: {agent_name}")
-                return step
+            if is_structured:
+                return self.step_buffer.add_step(
+                    message_id=self.assistant_message_id,
+                    agent_name=agent_name,
+                    step_order=step_order,
+                    structured_output=content
+                )
+            return self.step_buffer.add_step(
+                message_id=self.assistant_message_id,
+                agent_name=agent_name,
+                step_order=step_order,
+                prediction=content if isinstance(content, str) else str(content)
+            )
         except Exception as e:
-            logger.error(f"[WORKFLOW DB] Failed to save step {agent_name}: {e}", exc_info=True)
+            logger.error(f"[WORKFLOW DB] Failed to buffer step {agent_name}: {e}", exc_info=True)
             return None
     
     def _track_tool_calls(self, workflow_step_id: int, tool_calls: list):
@@ -583,7 +579,7 @@ class ProductGapWorkflow(Workflow):
         logger.info(f"✓ NLP Execution complete: {nlp_results.get('successful', 0)} tools succeeded")
         
         # Track step in database (including tool calls)
-        step = await self._track_step_in_db(
+        step_id = await self._track_step_in_db(
             agent_name="NLP Analyzer",
             step_order=4,
             content={
@@ -608,7 +604,7 @@ class ProductGapWorkflow(Workflow):
             "step_order": 4
         })
         # Track individual tool calls
-        if step and nlp_results.get('tool_results'):
+        if step_id and nlp_results.get('tool_results'):
             tool_calls_for_db = []
             seen_calls = nlp_results.get('seen_calls', [])
             
@@ -639,7 +635,7 @@ class ProductGapWorkflow(Workflow):
                     'error': result.get('error', None)
                 })
             
-            self._track_tool_calls(step.id, tool_calls_for_db)
+            self._track_tool_calls(step_id, tool_calls_for_db)
         
         return NLPAnalysisCompleteEvent(
             query=ev.query,
@@ -790,21 +786,14 @@ class ProductGapWorkflow(Workflow):
             is_structured=True
         )
         
-        # Update assistant message with final answer
+        # Update assistant message with final answer (written with the remaining steps)
         if self.assistant_message_id:
-            try:
-                from app.database.session import get_async_session
-                from app.database.repositories.chat_message import ChatMessageRepository
-                
-                async with get_async_session() as db:
-                    assistant_msg = await ChatMessageRepository.get_by_id(db, self.assistant_message_id)
-                    if assistant_msg:
-                        assistant_msg.content = answer
-                        assistant_msg.completed_at = datetime.utcnow()  # Set completion timestamp
-                        await db.commit()
-                        logger.info(f"[WORKFLOW] Updated assistant message {self.assistant_message_id} with final answer and completed_at")
-            except Exception as e:
-                logger.error(f"[WORKFLOW] Failed to update assistant message: {e}", exc_info=True)
+            self.step_buffer.complete_message(self.assistant_message_id, answer)
+            # Flush now so the answer is stored before the complete event is sent
+            if self._owns_step_buffer:
+                await self.step_buffer.close()
+            else:
+                await self.step_buffer.flush()
         
         # Create ChatResponse for complete event
         from app.models.chat import ChatResponse as ChatResponseModel
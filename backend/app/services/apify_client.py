@@ -0,0 +1,185 @@
+"""
+Minimal async client for the Apify API.
+
+The Apify scrapers each opened their own aiohttp.ClientSession per scrape
+and polled their run every 10 seconds. ApifyClient wraps one session (the
+worker's pooled session inside Celery tasks) with the calls the scrapers and
+the scrape orchestrator need:
+- start_run: start an actor run, optionally with an ad-hoc webhook
+- get_run / abort_run
+- get_dataset_page / iter_dataset_pages: read a run's dataset by offset,
+  also while the run is still writing to it
+- wait_for_run: poll with exponential backoff until the run finishes
+
+The base URL comes from apify_api_base_url so tests can point it at a local
+fake Apify server.
+"""
+
+import asyncio
+import base64
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+from app.config import get_settings
+from app.core.worker_loop import get_worker_aiohttp_session
+from app.exceptions import ExternalServiceError
+from app.utils.logging import get_logger
+
+logger = get_logger("apify_client")
+
+RUN_SUCCEEDED = "SUCCEEDED"
+# Run statuses after which the dataset no longer grows
+TERMINAL_STATUSES = frozenset({"SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"})
+# Webhook events sent when a run reaches a terminal status
+WEBHOOK_EVENT_TYPES = [
+    "ACTOR.RUN.SUCCEEDED",
+    "ACTOR.RUN.FAILED",
+    "ACTOR.RUN.ABORTED",
+    "ACTOR.RUN.TIMED_OUT",
+]
+
+
+class ApifyClient:
+    """Apify API calls over a caller-provided aiohttp session."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        api_token: str,
+        base_url: Optional[str] = None,
+    ):
+        self.session = session
+        self.api_token = api_token
+        self.base_url = (base_url or get_settings().apify_api_base_url).rstrip("/")
+
+    @property
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_token}"}
+
+    async def _request(self, method: str, path: str, expected: tuple = (200,), **kwargs) -> Any:
+        async with self.session.request(
+            method, f"{self.base_url}{path}", headers=self._headers, **kwargs
+        ) as response:
+            if response.status not in expected:
+                error_text = await response.text()
+                raise ExternalServiceError(
+                    f"Apify {method} {path} failed with HTTP {response.status}: {error_text[:500]}",
+                    service="apify"
+                )
+            return await response.json()
+
+    async def start_run(
+        self,
+        actor_id: str,
+        actor_input: Dict[str, Any],
+        webhook_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Start an actor run.
+
+        Args:
+            actor_id: Actor ID ("user~actor")
+            actor_input: Actor input
+            webhook_url: URL Apify calls when the run finishes (optional)
+
+        Returns:
+            Run object (id, status, defaultDatasetId, ...)
+        """
+        params = {}
+        if webhook_url:
+            webhooks = [{"eventTypes": WEBHOOK_EVENT_TYPES, "requestUrl": webhook_url}]
+            params["webhooks"] = base64.b64encode(json.dumps(webhooks).encode()).decode()
+        data = await self._request(
+            "POST", f"/v2/acts/{actor_id}/runs", expected=(201,), json=actor_input, params=params
+        )
+        return data["data"]
+
+    async def get_run(self, run_id: str) -> Dict[str, Any]:
+        """Get a run object."""
+        data = await self._request("GET", f"/v2/actor-runs/{run_id}")
+        return data["data"]
+
+    async def abort_run(self, run_id: str) -> Dict[str, Any]:
+        """Abort a run (e.g. once enough items were collected)."""
+        data = await self._request("POST", f"/v2/actor-runs/{run_id}/abort")
+        return data["data"]
+
+    async def get_dataset_page(self, dataset_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get up to limit dataset items starting at offset."""
+        limit = limit or get_settings().apify_dataset_page_size
+        return await self._request(
+            "GET",
+            f"/v2/datasets/{dataset_id}/items",
+            params={"offset": offset, "limit": limit, "clean": "true", "format": "json"}
+        )
+
+    async def iter_dataset_pages(
+        self,
+        dataset_id: str,
+        offset: int = 0,
+        page_size: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield the dataset's items from offset on, one page at a time, until a short page."""
+        page_size = page_size or get_settings().apify_dataset_page_size
+        while True:
+            items = await self.get_dataset_page(dataset_id, offset, page_size)
+            if items:
+                yield items
+            if len(items) < page_size:
+                return
+            offset += len(items)
+
+    async def wait_for_run(
+        self,
+        run_id: str,
+        timeout: Optional[float] = None,
+        initial_delay: Optional[float] = None,
+        max_delay: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Poll a run with exponential backoff until it finishes.
+
+        Returns:
+            The run object of a SUCCEEDED run
+
+        Raises:
+            ExternalServiceError: If the run failed, was aborted or timed out
+        """
+        settings = get_settings()
+        timeout = timeout or settings.apify_run_timeout_seconds
+        delay = initial_delay or settings.apify_poll_initial_seconds
+        max_delay = max_delay or settings.apify_poll_max_seconds
+        deadline = time.monotonic() + timeout
+
+        while True:
+            run = await self.get_run(run_id)
+            status = run["status"]
+            if status == RUN_SUCCEEDED:
+                return run
+            if status in TERMINAL_STATUSES:
+                raise ExternalServiceError(f"Apify actor run {run_id} finished with status: {status}", service="apify")
+            if time.monotonic() + delay > deadline:
+                raise ExternalServiceError(f"Apify actor run {run_id} timed out", service="apify")
+
+            logger.debug(f"Apify run {run_id} status: {status}, next poll in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+
+@asynccontextmanager
+async def apify_client(api_token: str) -> AsyncIterator[ApifyClient]:
+    """
+    ApifyClient over the worker's pooled aiohttp session, or over a
+    temporary session when not running on the worker loop.
+    """
+    session = get_worker_aiohttp_session()
+    if session is not None:
+        yield ApifyClient(session, api_token)
+        return
+
+    async with aiohttp.ClientSession() as session:
+        yield ApifyClient(session, api_token)
@@ -0,0 +1,213 @@
+"""
+Base class for in-memory write buffers persisted in batched transactions.
+
+Writes are keyed by row ID: new rows go out as multi-row INSERTs, and
+changes to a row are coalesced, either into its buffered INSERT row or
+into one UPDATE per row.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.database.session import get_async_session
+from app.utils.logging import get_logger
+
+logger = get_logger("batched_writer")
+
+
+class FlushStats:
+    """Process-wide flush counters and latency of one kind of writer."""
+
+    def __init__(self, *counters: str):
+        self.counts: Dict[str, int] = dict.fromkeys(("flushes", "failed_flushes", *counters, "dropped_writes"), 0)
+        self.total_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def record_flush(self, duration_ms: float, **counts: int) -> None:
+        self.counts["flushes"] += 1
+        for name, count in counts.items():
+            self.counts[name] += count
+        self.total_flush_ms += duration_ms
+        self.max_flush_ms = max(self.max_flush_ms, duration_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        flushes = self.counts["flushes"]
+        return {
+            **self.counts,
+            "avg_flush_ms": round(self.total_flush_ms / flushes, 2) if flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+class BatchedWriter:
+    """
+    Buffers INSERT rows and per-row UPDATEs and writes them in one transaction per flush.
+
+    Flushes run on a timer, when batch_size writes are buffered, and on
+    close(). A failed flush is put back for the next one, so subclasses'
+    INSERTs must skip existing IDs: persistence is at-least-once.
+
+    Subclasses set label and stats and implement _write and _counts.
+    """
+
+    label = "Batched writer"
+    stats: FlushStats
+
+    def __init__(self, flush_interval_seconds: float, batch_size: int, max_retries: int):
+        self.flush_interval_seconds = flush_interval_seconds
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+
+        self._inserts: Dict[str, Dict[str, Any]] = {}
+        self._updates: Dict[str, Dict[str, Any]] = {}
+        # Flushes failed in a row
+        self._failures = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered writes."""
+        return len(self._inserts) + len(self._updates)
+
+    def _take(self) -> Tuple[Dict[str, Dict], ...]:
+        """Empty the buffer, returning what it held."""
+        inserts, self._inserts = self._inserts, {}
+        updates, self._updates = self._updates, {}
+        return inserts, updates
+
+    def _restore(self, inserts: Dict[str, Dict], updates: Dict[str, Dict]) -> None:
+        """Put back writes taken by a failed flush, merged with anything buffered meanwhile."""
+        # Updates buffered during the failed flush target rows that are no
+        # longer in _inserts; fold them back into their INSERT rows.
+        for row_id, row in inserts.items():
+            row.update(self._updates.pop(row_id, {}))
+        self._inserts = {**inserts, **self._inserts}
+
+        for row_id, values in self._updates.items():
+            updates.setdefault(row_id, {}).update(values)
+        self._updates = updates
+
+    async def _write(self, db, inserts: Dict[str, Dict], updates: Dict[str, Dict]) -> None:
+        """Issue the statements for a batch on db (committed by the caller)."""
+        raise NotImplementedError
+
+    def _counts(self, inserts: Dict[str, Dict], updates: Dict[str, Dict]) -> Dict[str, int]:
+        """Stats counters to add for a written batch."""
+        raise NotImplementedError
+
+    def _drop(self, count: int, reason: str) -> None:
+        self.stats.counts["dropped_writes"] += count
+
+    async def _commit(self, *batch: Dict[str, Dict]) -> None:
+        async with get_async_session() as db:
+            await self._write(db, *batch)
+            await db.commit()
+
+    async def _recover(self, batch: Tuple[Dict[str, Dict], ...]) -> bool:
+        """
+        Handle a batch whose flush failed.
+
+        Returns:
+            True if the batch was written after all, False if it was put back
+        """
+        self._restore(*batch)
+        return False
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # A new event loop (a throwaway task loop, a test): the
+            # previous loop's timer, flush task and lock are unusable
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._timer = None
+            self._flush_task = None
+
+    def _flush_due(self) -> bool:
+        return self.pending >= self.batch_size
+
+    def _on_write(self) -> None:
+        try:
+            self._bind_loop()
+        except RuntimeError:
+            return
+
+        # After close() a running flush may already have taken its batch, so late writes get their own
+        if self._flush_due() and (self._closed or self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+        elif (self._timer is None or self._timer.done()) and self.flush_interval_seconds > 0:
+            self._timer = asyncio.create_task(self._run_timer())
+
+    async def _run_timer(self) -> None:
+        await asyncio.sleep(self.flush_interval_seconds)
+        self._timer = None
+        # Shielded so close() cancelling the timer never aborts a flush
+        await asyncio.shield(self.flush())
+        if self.pending:
+            self._on_write()
+
+    async def flush(self) -> bool:
+        """
+        Persist everything buffered so far in one transaction.
+
+        On failure the writes are put back (merged with anything buffered
+        meanwhile) for the next flush.
+
+        Returns:
+            True if the buffer was written (or empty), False on failure
+        """
+        self._bind_loop()
+        async with self._lock:
+            if not self.pending:
+                return True
+
+            batch = self._take()
+            start = time.perf_counter()
+            try:
+                await self._commit(*batch)
+            except asyncio.CancelledError:
+                self._restore(*batch)
+                raise
+            except Exception as e:
+                self.stats.counts["failed_flushes"] += 1
+                self._failures += 1
+                logger.warning(f"{self.label} flush failed ({len(batch[0])} inserts, {len(batch[1])} updates): {e}")
+                if not await self._recover(batch):
+                    return False
+
+            self._failures = 0
+            duration_ms = (time.perf_counter() - start) * 1000
+            self.stats.record_flush(duration_ms, **self._counts(*batch))
+            logger.debug(
+                f"{self.label}: flushed {len(batch[0])} inserts, {len(batch[1])} updates in {duration_ms:.1f}ms"
+            )
+            return True
+
+    async def close(self) -> None:
+        """
+        Stop the timer and flush what is left, retrying with backoff.
+
+        What still fails after max_retries extra attempts is dropped.
+        """
+        self._bind_loop()
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+
+        for attempt in range(self.max_retries + 1):
+            if await self.flush():
+                return
+            if attempt < self.max_retries:
+                await asyncio.sleep(0.2 * 2 ** attempt)
+
+        self._drop(self.pending, "write_failed")
+        logger.error(f"{self.label}: dropping {self.pending} writes after {self.max_retries + 1} flush attempts")
+        self._take()
@@ -0,0 +1,293 @@
+"""
+Token-budgeted conversation history with an incrementally updated summary.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database.models.chat_message import ChatMessage
+from app.database.models.chat_session import ChatSession
+from app.database.session import get_async_session
+from app.services.embedding_batcher import estimate_tokens
+from app.utils.logging import get_logger
+
+logger = get_logger("conversation_history")
+
+SUMMARY_KEY = "history_summary"
+
+# Characters of each message shown to the summarizer
+_SUMMARY_INPUT_CHARS = 2000
+
+_stats: Dict[str, float] = {
+    "loads": 0,
+    "history_tokens": 0,
+    "summary_updates": 0,
+    "failed_summary_updates": 0,
+    "summarized_messages": 0,
+}
+
+
+def get_conversation_history_stats() -> Dict[str, Any]:
+    """Process-wide history assembly and summarization counters."""
+    loads = _stats["loads"]
+    return {
+        "loads": int(loads),
+        "avg_history_tokens": round(_stats["history_tokens"] / loads, 1) if loads else 0.0,
+        "summary_updates": int(_stats["summary_updates"]),
+        "failed_summary_updates": int(_stats["failed_summary_updates"]),
+        "summarized_messages": int(_stats["summarized_messages"]),
+    }
+
+
+def format_message_content(role: str, content: str, extra_metadata: Optional[Dict[str, Any]]) -> str:
+    """Message text as it goes into the history (assistant answers carry their step summary)."""
+    if role == "assistant" and extra_metadata:
+        step_summary = extra_metadata.get("step_summary")
+        if step_summary:
+            return f"<Workflow Summary>{step_summary}</Workflow Summary>\n\n<Final answer>{content}</Final answer>"
+    return content
+
+
+def _role(role: Any) -> str:
+    return role.value if hasattr(role, "value") else role
+
+
+def _message_tokens(text: str, content: Optional[str], token_count: Optional[int]) -> int:
+    # Stored counts cover the raw content only
+    return token_count if token_count and text == content else estimate_tokens(text)
+
+
+@dataclass
+class ConversationHistory:
+    """History assembled for one request."""
+
+    summary: str = ""
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    tokens: int = 0
+
+    def as_messages(self) -> List[Dict[str, str]]:
+        """Messages with the summary (if any) as a leading system message."""
+        if not self.summary:
+            return list(self.messages)
+        return [{"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"}] + self.messages
+
+
+class ConversationHistoryManager:
+    """Builds budgeted history and maintains each session's rolling summary."""
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        summary_max_tokens: Optional[int] = None,
+        summary_trigger_tokens: Optional[int] = None,
+        max_messages: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.token_budget = settings.history_token_budget if token_budget is None else token_budget
+        self.summary_max_tokens = settings.history_summary_max_tokens if summary_max_tokens is None else summary_max_tokens
+        self.summary_trigger_tokens = (
+            settings.history_summary_trigger_tokens if summary_trigger_tokens is None else summary_trigger_tokens
+        )
+        self.max_messages = settings.history_max_messages if max_messages is None else max_messages
+        self.summary_model = settings.history_summary_model
+
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._rerun: Set[str] = set()
+
+    async def _get_summary(self, db: AsyncSession, session_id: str) -> Dict[str, Any]:
+        result = await db.execute(select(ChatSession.extra_metadata).where(ChatSession.id == session_id))
+        extra = result.scalar_one_or_none() or {}
+        return extra.get(SUMMARY_KEY) or {}
+
+    async def load(self, db: AsyncSession, session_id: str, token_budget: Optional[int] = None) -> ConversationHistory:
+        """
+        Assemble the session's history within a token budget.
+
+        Args:
+            db: Database session
+            session_id: Chat session ID
+            token_budget: Overrides the configured history_token_budget
+
+        Returns:
+            The rolling summary plus the newest messages after it that fit
+            the budget, in chronological order
+        """
+        budget = self.token_budget if token_budget is None else token_budget
+        summary = await self._get_summary(db, session_id)
+        summary_text = summary.get("text", "")
+        remaining = budget
+        if summary_text:
+            remaining -= summary.get("tokens") or estimate_tokens(summary_text)
+
+        query = select(
+            ChatMessage.role, ChatMessage.content, ChatMessage.extra_metadata, ChatMessage.token_count
+        ).where(ChatMessage.session_id == session_id)
+        if summary.get("through"):
+            query = query.where(ChatMessage.created_at > datetime.fromisoformat(summary["through"]))
+        query = query.order_by(ChatMessage.created_at.desc()).limit(self.max_messages)
+
+        picked: List[Dict[str, str]] = []
+        for role, content, extra_metadata, token_count in await db.execute(query):
+            role = _role(role)
+            text = format_message_content(role, content or "", extra_metadata)
+            if not text:
+                # Assistant placeholder of a turn still in progress
+                continue
+            tokens = _message_tokens(text, content, token_count)
+            if tokens > remaining:
+                break
+            picked.append({"role": role, "content": text})
+            remaining -= tokens
+        picked.reverse()
+
+        history = ConversationHistory(summary=summary_text, messages=picked, tokens=budget - remaining)
+        _stats["loads"] += 1
+        _stats["history_tokens"] += history.tokens
+        return history
+
+    def schedule_update(self, session_id: str) -> None:
+        """Refresh the session's summary in the background after a turn."""
+        task = self._tasks.get(session_id)
+        if task is not None and not task.done():
+            # Pick up this turn once the running update finishes
+            self._rerun.add(session_id)
+            return
+        self._tasks[session_id] = asyncio.create_task(self._run_update(session_id))
+
+    async def _run_update(self, session_id: str) -> None:
+        try:
+            while True:
+                self._rerun.discard(session_id)
+                await self.update_summary(session_id)
+                if session_id not in self._rerun:
+                    break
+        except Exception as e:
+            _stats["failed_summary_updates"] += 1
+            logger.warning(f"History summary update failed for session {session_id}: {e}")
+        finally:
+            self._tasks.pop(session_id, None)
+
+    async def update_summary(self, session_id: str) -> bool:
+        """
+        Fold messages that no longer fit the history window into the summary.
+
+        Messages after the watermark are token-counted (missing counts are
+        written back); once the ones outside the recent window reach
+        history_summary_trigger_tokens they are summarized together with
+        the previous summary and the watermark moves past them.
+
+        Returns:
+            True if the summary was updated
+        """
+        async with get_async_session() as db:
+            summary = await self._get_summary(db, session_id)
+            query = select(
+                ChatMessage.id, ChatMessage.role, ChatMessage.content, ChatMessage.extra_metadata,
+                ChatMessage.token_count, ChatMessage.created_at,
+            ).where(ChatMessage.session_id == session_id)
+            if summary.get("through"):
+                query = query.where(ChatMessage.created_at > datetime.fromisoformat(summary["through"]))
+            rows = (await db.execute(query.order_by(ChatMessage.created_at))).all()
+
+            backfill = [
+                {"id": row.id, "token_count": estimate_tokens(row.content)}
+                for row in rows if not row.token_count and row.content
+            ]
+            if backfill:
+                await db.execute(update(ChatMessage), backfill)
+            token_counts = {row.id: row.token_count for row in rows}
+            token_counts.update((item["id"], item["token_count"]) for item in backfill)
+
+            # Newest messages that stay verbatim in the window
+            window = self.token_budget - self.summary_max_tokens
+            keep = 0
+            for row in reversed(rows):
+                text = format_message_content(_role(row.role), row.content or "", row.extra_metadata)
+                tokens = _message_tokens(text, row.content, token_counts[row.id])
+                if tokens > window:
+                    break
+                window -= tokens
+                keep += 1
+            overflow = rows[:len(rows) - keep]
+            overflow_tokens = sum(token_counts[row.id] or 0 for row in overflow)
+
+            if not overflow or overflow_tokens < self.summary_trigger_tokens:
+                await db.commit()
+                return False
+
+            text = await self._summarize(summary.get("text", ""), overflow)
+            if not text:
+                await db.commit()
+                return False
+
+            extra = (await db.execute(
+                select(ChatSession.extra_metadata).where(ChatSession.id == session_id)
+            )).scalar_one_or_none() or {}
+            extra = {
+                **extra,
+                SUMMARY_KEY: {
+                    "text": text,
+                    "tokens": estimate_tokens(text),
+                    "through": overflow[-1].created_at.isoformat(),
+                    "messages": (summary.get("messages") or 0) + len(overflow),
+                },
+            }
+            # Keep updated_at: the summary is not user activity
+            await db.execute(
+                update(ChatSession)
+                .where(ChatSession.id == session_id)
+                .values(extra_metadata=extra, updated_at=ChatSession.updated_at)
+            )
+            await db.commit()
+
+        _stats["summary_updates"] += 1
+        _stats["summarized_messages"] += len(overflow)
+        logger.info(f"Folded {len(overflow)} messages ({overflow_tokens} tokens) into the summary of session {session_id}")
+        return True
+
+    async def _summarize(self, previous: str, rows: List[Any]) -> str:
+        from openai import AsyncOpenAI
+
+        settings = get_settings()
+        if not settings.openai_api_key:
+            logger.warning("No OpenAI API key configured, skipping history summarization")
+            return ""
+
+        transcript = "\n".join(
+            f"{_role(row.role)}: {format_message_content(_role(row.role), row.content or '', row.extra_metadata)[:_SUMMARY_INPUT_CHARS]}"
+            for row in rows
+        )
+        prompt = f"""Update the running summary of a conversation between a user and a product review analysis assistant.
+
+Current summary:
+{previous or "(none)"}
+
+New messages to fold in:
+{transcript}
+
+Keep the datasets and tables used, key findings, numbers and the user's open goals. Write at most {self.summary_max_tokens} tokens. Return only the updated summary."""
+
+        client = AsyncOpenAI(api_key=settings.openai_api_key)
+        response = await client.chat.completions.create(
+            model=self.summary_model,
+            messages=[{"role": "user", "content": prompt}],
+            max_completion_tokens=self.summary_max_tokens * 2,
+        )
+        return (response.choices[0].message.content or "").strip()
+
+
+_history_manager: Optional[ConversationHistoryManager] = None
+
+
+def get_conversation_history_manager() -> ConversationHistoryManager:
+    """Get the process-wide conversation history manager."""
+    global _history_manager
+    if _history_manager is None:
+        _history_manager = ConversationHistoryManager()
+    return _history_manager
@@ -0,0 +1,103 @@
+"""
+Token-budgeted batching helpers for the embeddings API.
+
+The embeddings endpoint limits both the number of inputs and the total
+number of tokens per request, so batches are packed by estimated tokens
+rather than by a fixed item count.
+"""
+
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from app.utils.logging import get_logger
+
+logger = get_logger("embedding_batcher")
+
+# OpenAI embeddings request limits
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = 300_000
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken missing or encoding files unavailable offline
+    _encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text.
+
+    Uses tiktoken when available, otherwise a conservative ~3 chars/token
+    heuristic (over-estimating keeps batches under the request limit).
+    """
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 3 + 1
+
+
+def pack_batches(
+    items: Sequence[Tuple[int, str]],
+    max_tokens: int = MAX_TOKENS_PER_REQUEST,
+    max_items: int = MAX_INPUTS_PER_REQUEST
+) -> List[List[Tuple[int, str]]]:
+    """
+    Pack (index, text) items into batches bounded by tokens and item count.
+
+    Order is preserved. An item larger than max_tokens gets a batch of its own.
+
+    Args:
+        items: (original index, text) pairs
+        max_tokens: Token budget per batch
+        max_items: Maximum number of items per batch
+
+    Returns:
+        List of batches of (index, text) pairs
+    """
+    batches: List[List[Tuple[int, str]]] = []
+    current: List[Tuple[int, str]] = []
+    current_tokens = 0
+
+    for index, text in items:
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append((index, text))
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse an OpenAI rate-limit reset header (e.g. "1s", "6m0s", "20ms") to seconds.
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    matches = _DURATION_RE.findall(value)
+    if not matches:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in matches)
+
+
+def parse_int_header(value: Optional[str]) -> Optional[int]:
+    """Parse an integer header value, returning None if absent or invalid."""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
@@ -0,0 +1,278 @@
+"""
+Content-hash embedding cache shared by all embedding call sites.
+
+Embeddings are keyed by (model, dimensions, sha256(normalized text)) and kept
+in two tiers:
+- an in-process LRU (bounded by entry count) for hot queries
+- a shared Valkey tier storing raw float32 bytes with a TTL, so re-embedding
+  the same review text from another worker or a later upload costs nothing
+
+The Valkey tier is optional: if it is unreachable the cache degrades to the
+in-process LRU only, and reconnects after embedding_cache_redis_retry_seconds.
+"""
+
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.config import get_settings
+from app.core.metrics_registry import CACHE_LOOKUPS
+from app.utils.logging import get_logger
+
+logger = get_logger("embedding_cache")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing (trim and collapse whitespace)."""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def make_cache_key(model: str, dimensions: int, text: str) -> str:
+    """Build the cache key for a text embedded with a given model."""
+    digest = hashlib.sha256(normalize_text(text or "").encode("utf-8")).hexdigest()
+    return f"emb:{model}:{dimensions}:{digest}"
+
+
+class EmbeddingCache:
+    """Two-tier (in-process LRU + Valkey) cache of float32 embedding vectors."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        redis_url: Optional[str] = None,
+        use_redis: bool = True,
+        redis_retry_seconds: Optional[float] = None,
+    ):
+        settings = get_settings()
+        self.max_entries = settings.embedding_cache_max_entries if max_entries is None else max_entries
+        self.ttl_seconds = ttl_seconds or settings.embedding_cache_ttl_seconds
+        self.redis_url = redis_url or settings.embedding_cache_redis_url or settings.redis_url
+        self.use_redis = use_redis
+        self.redis_retry_seconds = (
+            settings.embedding_cache_redis_retry_seconds if redis_retry_seconds is None else redis_retry_seconds
+        )
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Valkey client is bound to the event loop it was created on
+        self._redis = None
+        self._redis_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._redis_available = use_redis
+        # Monotonic time before which the Valkey tier is not retried after a failure
+        self._redis_retry_at = 0.0
+
+        self.stats: Dict[str, int] = {
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # In-process tier
+    # ------------------------------------------------------------------
+
+    def _memory_get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+            return vector
+
+    def _memory_set(self, key: str, vector: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    # ------------------------------------------------------------------
+    # Valkey tier
+    # ------------------------------------------------------------------
+
+    async def _get_redis(self):
+        """Get a Valkey client for the running loop, or None if unavailable."""
+        if not self.use_redis or time.monotonic() < self._redis_retry_at:
+            return None
+
+        loop = asyncio.get_running_loop()
+        if self._redis is not None and self._redis_loop is loop:
+            return self._redis
+
+        try:
+            from valkey.asyncio import Valkey as AsyncValkey
+
+            # Raw bytes: vectors are stored as packed float32
+            client = AsyncValkey.from_url(self.redis_url, decode_responses=False)
+            await client.ping()
+            if not self._redis_available:
+                logger.info("Embedding cache Valkey tier reconnected")
+            self._redis = client
+            self._redis_loop = loop
+            self._redis_available = True
+            return client
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+
+    def _redis_failed(self, error: Exception) -> None:
+        """Skip the Valkey tier for redis_retry_seconds after a failed call."""
+        if self._redis_available:
+            logger.warning(
+                f"Embedding cache Valkey tier not available, using in-process cache only "
+                f"for {self.redis_retry_seconds:.0f}s: {error}"
+            )
+        self._redis_available = False
+        self._redis = None
+        self._redis_retry_at = time.monotonic() + self.redis_retry_seconds
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get_many(
+        self,
+        model: str,
+        dimensions: int,
+        texts: Sequence[str],
+    ) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for many texts.
+
+        Args:
+            model: Embedding model name
+            dimensions: Embedding dimensions
+            texts: Texts to look up
+
+        Returns:
+            List aligned with texts; None for cache misses
+        """
+        keys = [make_cache_key(model, dimensions, t) for t in texts]
+        results: List[Optional[List[float]]] = [None] * len(keys)
+
+        missing: List[int] = []
+        for i, key in enumerate(keys):
+            vector = self._memory_get(key)
+            if vector is not None:
+                results[i] = vector.tolist()
+                self.stats["memory_hits"] += 1
+            else:
+                missing.append(i)
+
+        if missing:
+            redis = await self._get_redis()
+            if redis is not None:
+                try:
+                    values = await redis.mget([keys[i] for i in missing])
+                    still_missing = []
+                    for i, raw in zip(missing, values):
+                        if raw is None:
+                            still_missing.append(i)
+                            continue
+                        vector = np.frombuffer(raw, dtype=np.float32)
+                        self._memory_set(keys[i], vector)
+                        results[i] = vector.tolist()
+                        self.stats["redis_hits"] += 1
+                    missing = still_missing
+                except Exception as e:
+                    self._redis_failed(e)
+
+        self.stats["misses"] += len(missing)
+        hits = len(keys) - len(missing)
+        if hits:
+            CACHE_LOOKUPS.inc(("embedding", "hit"), hits)
+        if missing:
+            CACHE_LOOKUPS.inc(("embedding", "miss"), len(missing))
+        return results
+
+    async def set_many(
+        self,
+        model: str,
+        dimensions: int,
+        texts: Sequence[str],
+        embeddings: Sequence[Optional[Sequence[float]]],
+    ) -> None:
+        """
+        Store embeddings for many texts. None embeddings are skipped.
+
+        Args:
+            model: Embedding model name
+            dimensions: Embedding dimensions
+            texts: Texts that were embedded
+            embeddings: Embeddings aligned with texts
+        """
+        entries = {}
+        for text, embedding in zip(texts, embeddings):
+            if embedding is None:
+                continue
+            key = make_cache_key(model, dimensions, text)
+            vector = np.asarray(embedding, dtype=np.float32)
+            self._memory_set(key, vector)
+            entries[key] = vector.tobytes()
+
+        if not entries:
+            return
+        self.stats["sets"] += len(entries)
+
+        redis = await self._get_redis()
+        if redis is None:
+            return
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, raw in entries.items():
+                    pipe.set(key, raw, ex=self.ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+
+    async def get(self, model: str, dimensions: int, text: str) -> Optional[List[float]]:
+        """Look up the embedding for a single text."""
+        return (await self.get_many(model, dimensions, [text]))[0]
+
+    async def set(self, model: str, dimensions: int, text: str, embedding: Sequence[float]) -> None:
+        """Store the embedding for a single text."""
+        await self.set_many(model, dimensions, [text], [embedding])
+
+    def clear(self) -> None:
+        """Clear the in-process tier (the Valkey tier expires by TTL)."""
+        with self._lock:
+            self._memory.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get hit/miss counters and current in-process size."""
+        lookups = self.stats["memory_hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["redis_hits"]
+        return {
+            **self.stats,
+            "memory_entries": len(self._memory),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "redis_available": self._redis_available,
+        }
+
+
+# Singleton instance
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Get the embedding cache singleton, or None if caching is disabled."""
+    global _embedding_cache
+    if not get_settings().embedding_cache_enabled:
+        return None
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
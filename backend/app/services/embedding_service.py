@@ -2,12 +2,23 @@
 Embedding service for generating vector embeddings using OpenAI.
 """
 
+import asyncio
 import logging
-from typing import List, Optional
+import random
+from typing import Any, AsyncIterator, List, Optional, Tuple
 import openai
 from openai import AsyncOpenAI
 
 from app.core.config.settings import get_settings
+from app.core.metrics_registry import EMBEDDING_INPUTS, EMBEDDING_REQUESTS
+from app.core.retry import AdaptiveConcurrencyLimiter
+from app.services.embedding_batcher import (
+    MAX_INPUTS_PER_REQUEST,
+    pack_batches,
+    parse_int_header,
+    parse_reset_duration,
+)
+from app.services.embedding_cache import get_embedding_cache
 
 logger = logging.getLogger(__name__)
 
@@ -15,12 +26,20 @@ logger = logging.getLogger(__name__)
 class EmbeddingService:
     """Service for generating embeddings using OpenAI's text-embedding-3-small model."""
     
-    def __init__(self):
+    def __init__(self, client: Optional[AsyncOpenAI] = None):
         """Initialize the embedding service."""
         self.settings = get_settings()
-        self.client = AsyncOpenAI(api_key=self.settings.openai_api_key)
+        # Retries are handled here (adaptive limiter + bisection), not by the SDK
+        self.client = client or AsyncOpenAI(
+            api_key=self.settings.openai_api_key,
+            base_url=self.settings.embedding_api_base_url,
+            max_retries=0,
+        )
         self.model = "text-embedding-3-small"
         self.dimensions = 1536
+        self.cache = get_embedding_cache()
+        self._limiter: Optional[AdaptiveConcurrencyLimiter] = None
+        self._limiter_loop: Optional[asyncio.AbstractEventLoop] = None
     
     async def generate_embedding(self, text: str) -> Optional[List[float]]:
         """
@@ -36,6 +55,12 @@ class EmbeddingService:
             logger.warning("Empty text provided for embedding generation")
             return None
         
+        if self.cache is not None:
+            cached = await self.cache.get(self.model, self.dimensions, text)
+            if cached is not None:
+                return cached
+        
+        original_text = text
         try:
             # Truncate text if too long (OpenAI has 8191 token limit for embeddings)
             # Rough estimate: 1 token ≈ 4 characters
@@ -44,6 +69,8 @@ class EmbeddingService:
                 text = text[:max_chars]
                 logger.info(f"Text truncated to {max_chars} characters for embedding")
             
+            EMBEDDING_REQUESTS.inc((self.model,))
+            EMBEDDING_INPUTS.inc((self.model,))
             response = await self.client.embeddings.create(
                 model=self.model,
                 input=text,
@@ -53,6 +80,9 @@ class EmbeddingService:
             embedding = response.data[0].embedding
             logger.debug(f"Generated embedding with {len(embedding)} dimensions")
             
+            if self.cache is not None:
+                await self.cache.set(self.model, self.dimensions, original_text, embedding)
+            
             return embedding
             
         except openai.RateLimitError as e:
@@ -68,14 +98,17 @@ class EmbeddingService:
     async def generate_embeddings_batch(
         self, 
         texts: List[str],
-        batch_size: int = 512
+        batch_size: int = MAX_INPUTS_PER_REQUEST
     ) -> List[Optional[List[float]]]:
         """
         Generate embeddings for multiple texts in batches.
         
+        Batches are packed by estimated tokens and sent concurrently under an
+        adaptive limiter (see iter_embeddings_batches).
+        
         Args:
             texts: List of texts to generate embeddings for
-            batch_size: Number of texts to process in each batch
+            batch_size: Maximum number of texts per request
             
         Returns:
             List of embedding vectors (same length as input texts)
@@ -83,48 +116,201 @@ class EmbeddingService:
         if not texts:
             return []
         
-        embeddings = []
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        async for batch_results in self.iter_embeddings_batches(texts, batch_size=batch_size):
+            for index, embedding in batch_results:
+                embeddings[index] = embedding
         
-        # Process in batches to avoid rate limits
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            
-            # Filter out empty texts
-            valid_batch = [(idx, text) for idx, text in enumerate(batch) if text and text.strip()]
-            
-            if not valid_batch:
-                embeddings.extend([None] * len(batch))
-                continue
+        return embeddings
+    
+    async def iter_embeddings_batches(
+        self,
+        texts: List[str],
+        batch_size: int = MAX_INPUTS_PER_REQUEST
+    ) -> AsyncIterator[List[Tuple[int, Optional[List[float]]]]]:
+        """
+        Generate embeddings and yield results as each batch completes.
+        
+        Cache hits are yielded first, then API batches in completion order, so
+        callers can start persisting while later batches are still in flight.
+        Empty texts and items that keep failing yield None.
+        
+        Args:
+            texts: List of texts to generate embeddings for
+            batch_size: Maximum number of texts per request
             
-            try:
-                # Truncate texts if needed
-                max_chars = 30000
-                processed_texts = [
-                    text[:max_chars] if len(text) > max_chars else text
-                    for _, text in valid_batch
-                ]
-                
-                response = await self.client.embeddings.create(
+        Yields:
+            Lists of (index into texts, embedding or None)
+        """
+        if not texts:
+            return
+        
+        pending = [(i, text) for i, text in enumerate(texts) if text and text.strip()]
+        empty = [(i, None) for i, text in enumerate(texts) if not (text and text.strip())]
+        if empty:
+            yield empty
+        
+        if self.cache is not None and pending:
+            cached = await self.cache.get_many(self.model, self.dimensions, [text for _, text in pending])
+            hits = [(i, emb) for (i, _), emb in zip(pending, cached) if emb is not None]
+            pending = [item for item, emb in zip(pending, cached) if emb is None]
+            if hits:
+                logger.info(f"Embeddings: {len(hits)} served from cache, {len(pending)} to generate")
+                yield hits
+        
+        if not pending:
+            return
+        
+        batches = pack_batches(
+            pending,
+            max_tokens=self.settings.embedding_max_tokens_per_request,
+            max_items=min(batch_size, MAX_INPUTS_PER_REQUEST),
+        )
+        texts_by_index = dict(pending)
+        tasks = [asyncio.create_task(self._embed_batch(batch)) for batch in batches]
+        try:
+            for completed, task in enumerate(asyncio.as_completed(tasks), start=1):
+                batch_results = await task
+                if self.cache is not None:
+                    await self.cache.set_many(
+                        self.model,
+                        self.dimensions,
+                        [texts_by_index[i] for i, _ in batch_results],
+                        [emb for _, emb in batch_results],
+                    )
+                logger.info(f"Generated embeddings batch {completed}/{len(tasks)} ({len(batch_results)} items)")
+                yield batch_results
+        finally:
+            # Consumer stopped early or failed: don't leave requests running
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    def _get_limiter(self) -> AdaptiveConcurrencyLimiter:
+        """Get the concurrency limiter for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._limiter is None or self._limiter_loop is not loop:
+            max_concurrency = self.settings.embedding_max_concurrency
+            self._limiter = AdaptiveConcurrencyLimiter(
+                initial_limit=max(1, max_concurrency // 2),
+                max_limit=max_concurrency,
+            )
+            self._limiter_loop = loop
+        return self._limiter
+    
+    async def _embed_batch(
+        self,
+        batch: List[Tuple[int, str]],
+        attempt: int = 0
+    ) -> List[Tuple[int, Optional[List[float]]]]:
+        """
+        Embed one packed batch.
+        
+        Rate-limited requests are retried after the limiter backs off. A request
+        rejected for its input (4xx) bisects the batch so only the offending
+        items end up as None; transient failures (5xx, timeouts, connection
+        errors) are retried with backoff and then fail the batch, and
+        authentication errors fail it at once.
+        """
+        limiter = self._get_limiter()
+        # Truncate texts if needed
+        max_chars = 30000
+        processed_texts = [text[:max_chars] for _, text in batch]
+        
+        try:
+            async with limiter:
+                EMBEDDING_REQUESTS.inc((self.model,))
+                EMBEDDING_INPUTS.inc((self.model,), len(processed_texts))
+                raw_response = await self.client.embeddings.with_raw_response.create(
                     model=self.model,
                     input=processed_texts,
                     encoding_format="float"
                 )
-                
-                # Map embeddings back to original positions
-                batch_embeddings = [None] * len(batch)
-                for (orig_idx, _), embedding_data in zip(valid_batch, response.data):
-                    batch_embeddings[orig_idx] = embedding_data.embedding
-                
-                embeddings.extend(batch_embeddings)
-                
-                logger.info(f"Generated {len(valid_batch)} embeddings in batch {i//batch_size + 1}")
-                
-            except Exception as e:
-                logger.error(f"Error generating embeddings for batch {i//batch_size + 1}: {e}")
-                # Add None for failed batch
-                embeddings.extend([None] * len(batch))
+            limiter.on_success()
+            self._observe_rate_limit_headers(limiter, raw_response.headers)
+            response = raw_response.parse()
+            ordered = sorted(response.data, key=lambda item: item.index)
+            return [(index, item.embedding) for (index, _), item in zip(batch, ordered)]
         
-        return embeddings
+        except openai.RateLimitError as e:
+            if attempt >= self.settings.embedding_max_retries:
+                logger.error(f"Embedding batch of {len(batch)} still rate limited after {attempt} retries: {e}")
+                return [(index, None) for index, _ in batch]
+            retry_after = self._retry_after(e, attempt)
+            limiter.on_rate_limited(retry_after)
+            return await self._embed_batch(batch, attempt + 1)
+        
+        except asyncio.CancelledError:
+            raise
+        
+        except (openai.AuthenticationError, openai.PermissionDeniedError) as e:
+            logger.error(f"Embedding batch of {len(batch)} rejected by the API: {e}")
+            return [(index, None) for index, _ in batch]
+        
+        except openai.APIStatusError as e:
+            if e.status_code >= 500:
+                return await self._retry_batch(batch, attempt, e)
+            if len(batch) == 1:
+                logger.error(f"Error generating embedding for item {batch[0][0]}: {e}")
+                return [(batch[0][0], None)]
+            # Isolate the rejected item(s) by bisecting the batch
+            mid = len(batch) // 2
+            logger.warning(f"Embedding batch of {len(batch)} rejected ({e}), retrying as two halves")
+            left, right = await asyncio.gather(
+                self._embed_batch(batch[:mid]),
+                self._embed_batch(batch[mid:]),
+            )
+            return left + right
+        
+        except Exception as e:
+            return await self._retry_batch(batch, attempt, e)
+    
+    async def _retry_batch(
+        self,
+        batch: List[Tuple[int, str]],
+        attempt: int,
+        error: Exception
+    ) -> List[Tuple[int, Optional[List[float]]]]:
+        """Retry a batch after a transient failure with exponential backoff, or fail it."""
+        if attempt >= self.settings.embedding_max_retries:
+            logger.error(f"Embedding batch of {len(batch)} failed after {attempt} retries: {error}")
+            return [(index, None) for index, _ in batch]
+        delay = self._backoff(attempt)
+        logger.warning(f"Embedding batch of {len(batch)} failed ({error}), retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+        return await self._embed_batch(batch, attempt + 1)
+    
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Exponential backoff with jitter, capped at a minute."""
+        return min(60.0, 2 ** attempt) * (1 + random.random() * 0.1)
+    
+    @staticmethod
+    def _retry_after(error: openai.RateLimitError, attempt: int) -> float:
+        """Get the wait time for a rate-limited request from headers, or back off exponentially."""
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        retry_after_ms = parse_int_header(headers.get("retry-after-ms"))
+        if retry_after_ms is not None:
+            return retry_after_ms / 1000
+        retry_after = parse_reset_duration(headers.get("retry-after"))
+        if retry_after is not None:
+            return retry_after
+        reset = parse_reset_duration(headers.get("x-ratelimit-reset-tokens")) or \
+            parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+        if reset is not None:
+            return reset
+        return EmbeddingService._backoff(attempt)
+    
+    @staticmethod
+    def _observe_rate_limit_headers(limiter: AdaptiveConcurrencyLimiter, headers: Any) -> None:
+        """Feed remaining-budget headers to the limiter so it pauses before a 429."""
+        remaining_requests = parse_int_header(headers.get("x-ratelimit-remaining-requests"))
+        remaining_tokens = parse_int_header(headers.get("x-ratelimit-remaining-tokens"))
+        reset_after = max(
+            parse_reset_duration(headers.get("x-ratelimit-reset-requests")) or 0.0,
+            parse_reset_duration(headers.get("x-ratelimit-reset-tokens")) or 0.0,
+        )
+        limiter.on_headroom(remaining_requests, remaining_tokens, reset_after or None)
     
     def get_dimensions(self) -> int:
         """Get the dimensions of the embedding model."""
@@ -0,0 +1,288 @@
+"""
+Batched writer for LLM call logs, so logging a call never waits on the database.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import String
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError, StatementError
+
+from app.config import get_settings
+from app.core.metrics_registry import LLM_LOG_DROPPED, LLM_TOKENS
+from app.database.models.llm_call import LLMCall, LLMCallStatusEnum, LLMCallTypeEnum
+from app.database.repositories.llm_call import LLMCallRepository
+from app.services.batched_writer import BatchedWriter, FlushStats
+from app.utils.logging import get_logger
+
+logger = get_logger("llm_call_writer")
+
+# Every INSERT row carries all columns (multi-row INSERTs need one key set)
+_COLUMNS = tuple(column.key for column in LLMCall.__table__.columns)
+
+# Column -> width of the bounded String columns (enums excluded)
+_WIDTHS = {
+    column.key: column.type.length
+    for column in LLMCall.__table__.columns
+    if type(column.type) is String and column.type.length
+}
+
+# Rows per multi-row INSERT (asyncpg allows 32767 bind parameters)
+_INSERT_CHUNK = 500
+
+
+def _clip(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Cut strings to their column width so an oversized value never fails a batch."""
+    for key, width in _WIDTHS.items():
+        value = values.get(key)
+        if isinstance(value, str) and len(value) > width:
+            values[key] = value[:width]
+    return values
+
+
+def _is_bad_row(error: Exception) -> bool:
+    """Whether a failed write was rejected for its data, rather than for the connection."""
+    if isinstance(error, (DataError, IntegrityError)):
+        return True
+    # Bind processing errors (e.g. unknown enum value) never reach the database
+    return isinstance(error, StatementError) and not isinstance(error, DBAPIError)
+
+
+def get_llm_call_writer_stats() -> Dict[str, Any]:
+    """Process-wide queue, flush and drop counters for the metrics endpoint."""
+    return {"pending": _writer.pending if _writer is not None else 0, **LLMCallWriter.stats.to_dict()}
+
+
+class LLMCallWriter(BatchedWriter):
+    """
+    Bounded in-memory queue of LLM call log writes, persisted in batches.
+
+    When the queue is full a new call is dropped (drop_new) or the oldest
+    queued one is evicted (drop_oldest). After max_retries failed flushes
+    in a row the batch is written one row per transaction, and rows the
+    database rejects are dropped.
+    """
+
+    label = "LLM call log"
+    stats = FlushStats("calls_inserted", "calls_updated")
+
+    def __init__(
+        self,
+        flush_interval_seconds: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        overflow: Optional[str] = None,
+        max_retries: Optional[int] = None,
+    ):
+        settings = get_settings()
+        super().__init__(
+            settings.llm_log_flush_interval_seconds if flush_interval_seconds is None else flush_interval_seconds,
+            settings.llm_log_batch_size if batch_size is None else batch_size,
+            settings.llm_log_max_retries if max_retries is None else max_retries,
+        )
+        self.queue_size = settings.llm_log_queue_size if queue_size is None else queue_size
+        self.overflow = settings.llm_log_overflow if overflow is None else overflow
+        # Call ID -> (monotonic start, model) of calls not finished yet
+        self._started: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def start_call(
+        self,
+        call_type: LLMCallTypeEnum,
+        provider: str,
+        model: str,
+        messages: list,
+        call_id: Optional[str] = None,
+        **fields: Any,
+    ) -> str:
+        """
+        Queue a new llm_calls row in PENDING state.
+
+        Args:
+            call_type: Type of LLM call
+            provider: LLM provider
+            model: Model name
+            messages: Array of message objects [{"role": "user", "content": "..."}]
+            call_id: ID to store the call under (generated if omitted)
+            **fields: Other LLMCall columns (system_prompt, user_id, session_id, ...)
+
+        Returns:
+            The ID the call will be stored under (even if the write is dropped)
+
+        Raises:
+            TypeError: If fields names a column LLMCall does not have
+        """
+        unknown = set(fields) - set(_COLUMNS)
+        if unknown:
+            raise TypeError(f"Unknown LLM call fields: {', '.join(sorted(unknown))}")
+
+        call_id = call_id or str(uuid.uuid4())
+        now = datetime.utcnow()
+        row = dict.fromkeys(_COLUMNS)
+        row.update(status=LLMCallStatusEnum.PENDING, retry_count=0, started_at=now, created_at=now)
+        row.update(fields)
+        row.update(id=call_id, call_type=call_type, provider=provider, model=model, messages=messages)
+        _clip(row)
+
+        self._started[call_id] = (time.monotonic(), model)
+        while len(self._started) > self.queue_size:
+            self._started.popitem(last=False)
+
+        if self._admit():
+            self._inserts[call_id] = row
+            self._on_write()
+        return call_id
+
+    def complete_call(
+        self,
+        call_id: str,
+        response_message: Any,
+        tokens: Optional[Dict[str, int]] = None,
+        latency_ms: Optional[int] = None,
+        estimated_cost: Optional[float] = None,
+        finish_reason: Optional[str] = None,
+    ) -> None:
+        """
+        Queue the successful completion of a call.
+
+        Latency defaults to the time since start_call in this process.
+        """
+        values: Dict[str, Any] = {
+            "status": LLMCallStatusEnum.SUCCESS,
+            "response_message": response_message,
+            "completed_at": datetime.utcnow(),
+        }
+        if tokens:
+            values.update(
+                prompt_tokens=tokens.get("prompt_tokens"),
+                completion_tokens=tokens.get("completion_tokens"),
+                total_tokens=tokens.get("total_tokens"),
+            )
+        if estimated_cost:
+            values["estimated_cost"] = estimated_cost
+        if finish_reason:
+            values["finish_reason"] = finish_reason
+
+        model = self._finish(call_id, values, latency_ms)
+        _clip(values)
+        if tokens:
+            for kind in ("prompt", "completion"):
+                count = tokens.get(f"{kind}_tokens")
+                if count:
+                    LLM_TOKENS.inc((model or "unknown", kind), count)
+        self._update(call_id, values)
+
+    def fail_call(
+        self,
+        call_id: str,
+        error_message: str,
+        error_code: Optional[str] = None,
+        status: LLMCallStatusEnum = LLMCallStatusEnum.ERROR,
+        latency_ms: Optional[int] = None,
+    ) -> None:
+        """Queue the failure of a call (ERROR, TIMEOUT or RATE_LIMITED)."""
+        values: Dict[str, Any] = {
+            "status": status,
+            "error_message": error_message,
+            "error_code": error_code,
+            "completed_at": datetime.utcnow(),
+        }
+        self._finish(call_id, values, latency_ms)
+        self._update(call_id, _clip(values))
+
+    def _finish(self, call_id: str, values: Dict[str, Any], latency_ms: Optional[int]) -> Optional[str]:
+        started = self._started.pop(call_id, None)
+        if latency_ms is None and started is not None:
+            latency_ms = int((time.monotonic() - started[0]) * 1000)
+        if latency_ms is not None:
+            values["latency_ms"] = latency_ms
+        return started[1] if started is not None else None
+
+    def _update(self, call_id: str, values: Dict[str, Any]) -> None:
+        if call_id in self._inserts:
+            # Merging never grows the queue, so it is always accepted
+            self._inserts[call_id].update(values)
+        elif call_id in self._updates or self._admit():
+            self._updates.setdefault(call_id, {}).update(values)
+        else:
+            return
+        self._on_write()
+
+    def _admit(self) -> bool:
+        """Make room for one more queued write according to the overflow policy."""
+        if self.pending < self.queue_size:
+            return True
+        self._drop(1, "overflow")
+        if self.overflow != "drop_oldest":
+            return False
+
+        queue = self._inserts if self._inserts else self._updates
+        call_id = next(iter(queue))
+        del queue[call_id]
+        self._started.pop(call_id, None)
+        return True
+
+    def _drop(self, count: int, reason: str) -> None:
+        super()._drop(count, reason)
+        LLM_LOG_DROPPED.inc((reason,), count)
+
+    async def _write(self, db, inserts: Dict[str, Dict], updates: Dict[str, Dict]) -> None:
+        rows = list(inserts.values())
+        for offset in range(0, len(rows), _INSERT_CHUNK):
+            await LLMCallRepository.insert_many(db, rows[offset:offset + _INSERT_CHUNK])
+        await LLMCallRepository.update_many(db, [{"id": call_id, **values} for call_id, values in updates.items()])
+
+    def _counts(self, inserts: Dict[str, Dict], updates: Dict[str, Dict]) -> Dict[str, int]:
+        return {"calls_inserted": len(inserts), "calls_updated": len(updates)}
+
+    async def _recover(self, batch: Tuple[Dict[str, Dict], ...]) -> bool:
+        if self._failures <= self.max_retries:
+            return await super()._recover(batch)
+        return await self._write_rows(*batch)
+
+    async def _write_rows(self, inserts: Dict[str, Dict], updates: Dict[str, Dict]) -> bool:
+        """
+        Write a batch that keeps failing one row per transaction, dropping rows the database rejects.
+
+        Stops at the first error that is not about the row itself (the
+        database is down, not the data bad) and puts what is left back.
+        """
+        writes = [(call_id, True, row) for call_id, row in inserts.items()]
+        writes += [(call_id, False, values) for call_id, values in updates.items()]
+        for index, (call_id, is_insert, values) in enumerate(writes):
+            try:
+                await self._commit({call_id: values} if is_insert else {}, {} if is_insert else {call_id: values})
+            except (Exception, asyncio.CancelledError) as e:
+                if isinstance(e, Exception) and _is_bad_row(e):
+                    self._drop(1, "invalid_row")
+                    logger.error(f"Dropping LLM call log {'insert' if is_insert else 'update'} of call {call_id}: {e}")
+                    continue
+                rest = writes[index:]
+                self._restore(
+                    {call_id: values for call_id, is_insert, values in rest if is_insert},
+                    {call_id: values for call_id, is_insert, values in rest if not is_insert},
+                )
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                return False
+        return True
+
+
+_writer: Optional[LLMCallWriter] = None
+
+
+def get_llm_call_writer() -> LLMCallWriter:
+    """Get the process-wide LLM call log writer."""
+    global _writer
+    if _writer is None:
+        _writer = LLMCallWriter()
+    return _writer
+
+
+async def close_llm_call_writer() -> None:
+    """Drain queued LLM call logs on shutdown."""
+    if _writer is not None:
+        await _writer.close()
@@ -3,17 +3,18 @@ LLM Call Logger Service
 
 Provides easy-to-use utilities for logging all LLM API calls.
 Use this service to wrap your LLM calls for automatic logging.
+
+Writes are queued on the process-wide LLMCallWriter and persisted in
+batches, so logging never adds database round trips to an LLM call.
 """
 
-import time
-import uuid
 from contextlib import asynccontextmanager
-from datetime import datetime
 from typing import Any, Dict, Optional
 
-from app.database.models.llm_call import LLMCall, LLMCallStatusEnum, LLMCallTypeEnum
+from app.database.models.llm_call import LLMCallStatusEnum, LLMCallTypeEnum
 from app.database.repositories.llm_call import LLMCallRepository
 from app.database.session import get_async_session
+from app.services.llm_call_writer import get_llm_call_writer
 from app.utils.logging import get_logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -67,58 +68,18 @@ class LLMLogger:
             provider: LLM provider (openrouter, openai, etc.)
             model: Model name
             messages: Array of message objects [{"role": "user", "content": "..."}]
-            db: Database session (optional, creates one if not provided)
+            db: Unused; logs are written by the LLM call writer
             **kwargs: Additional fields (system_prompt, tools, user_id, session_id, etc.)
         
         Yields:
-            log_id: The ID of the created log entry
+            log_id: The ID the log entry is stored under
         """
-        start_time = time.time()
-        log_id = str(uuid.uuid4())
-        
-        # Create or use provided session
-        should_close = False
-        if db is None:
-            async with get_async_session() as db:
-                should_close = True
-                call = await LLMCallRepository.create(
-                    db,
-                    call_type=call_type,
-                    provider=provider,
-                    model=model,
-                    messages=messages,
-                    id=log_id,
-                    started_at=datetime.utcnow(),
-                    **kwargs
-                )
-                await db.commit()
-        else:
-            call = await LLMCallRepository.create(
-                db,
-                call_type=call_type,
-                provider=provider,
-                model=model,
-                messages=messages,
-                id=log_id,
-                started_at=datetime.utcnow(),
-                **kwargs
-            )
-            await db.flush()
-
+        log_id = await LLMLogger.start(call_type, provider, model, messages, **kwargs)
         try:
             yield log_id
         except Exception as e:
-            # Log the error
-            latency = int((time.time() - start_time) * 1000)
-            async with get_async_session() as error_db:
-                await LLMCallRepository.mark_failed(
-                    error_db,
-                    log_id,
-                    error_message=str(e),
-                    status=LLMCallStatusEnum.ERROR
-                )
-                await LLMCallRepository.update(error_db, log_id, latency_ms=latency)
-                await error_db.commit()
+            # Latency is measured by the writer from start()
+            get_llm_call_writer().fail_call(log_id, error_message=str(e), status=LLMCallStatusEnum.ERROR)
             raise
 
     @staticmethod
@@ -133,41 +94,23 @@ class LLMLogger:
         """
         Start logging an LLM call (manual mode).
         
+        The row is queued and written in the background, so this never
+        waits on the database.
+        
         Args:
             messages: Array of message objects [{"role": "user", "content": "..."}]
+            db: Unused; logs are written by the LLM call writer
         
         Returns:
-            log_id: The ID of the created log entry
+            log_id: The ID the log entry is stored under
         """
-        log_id = str(uuid.uuid4())
-        
-        if db is None:
-            async with get_async_session() as db:
-                await LLMCallRepository.create(
-                    db,
-                    call_type=call_type,
-                    provider=provider,
-                    model=model,
-                    messages=messages,
-                    id=log_id,
-                    started_at=datetime.utcnow(),
-                    **kwargs
-                )
-                await db.commit()
-        else:
-            await LLMCallRepository.create(
-                db,
-                call_type=call_type,
-                provider=provider,
-                model=model,
-                messages=messages,
-                id=log_id,
-                started_at=datetime.utcnow(),
-                **kwargs
-            )
-            await db.flush()
-        
-        return log_id
+        return get_llm_call_writer().start_call(
+            call_type=call_type,
+            provider=provider,
+            model=model,
+            messages=messages,
+            **kwargs
+        )
 
     @staticmethod
     async def complete(
@@ -188,44 +131,15 @@ class LLMLogger:
             tokens: Token usage dict with keys: prompt_tokens, completion_tokens, total_tokens
             estimated_cost: Estimated cost in USD
             finish_reason: Completion reason (stop, tool_calls, length, etc.)
-            db: Database session (optional)
+            db: Unused; logs are written by the LLM call writer
         """
-        # Calculate latency
-        if db is None:
-            async with get_async_session() as db:
-                call = await LLMCallRepository.get_by_id(db, log_id)
-                if call and call.started_at:
-                    latency_ms = int((datetime.utcnow() - call.started_at).total_seconds() * 1000)
-                else:
-                    latency_ms = None
-                
-                await LLMCallRepository.mark_completed(
-                    db,
-                    log_id,
-                    response_message=response_message,
-                    tokens=tokens,
-                    latency_ms=latency_ms,
-                    estimated_cost=estimated_cost,
-                    finish_reason=finish_reason
-                )
-                await db.commit()
-        else:
-            call = await LLMCallRepository.get_by_id(db, log_id)
-            if call and call.started_at:
-                latency_ms = int((datetime.utcnow() - call.started_at).total_seconds() * 1000)
-            else:
-                latency_ms = None
-            
-            await LLMCallRepository.mark_completed(
-                db,
-                log_id,
-                response_message=response_message,
-                tokens=tokens,
-                latency_ms=latency_ms,
-                estimated_cost=estimated_cost,
-                finish_reason=finish_reason
-            )
-            await db.flush()
+        get_llm_call_writer().complete_call(
+            log_id,
+            response_message=response_message,
+            tokens=tokens,
+            estimated_cost=estimated_cost,
+            finish_reason=finish_reason
+        )
 
     @staticmethod
     async def fail(
@@ -243,39 +157,14 @@ class LLMLogger:
             error_message: Error message
             error_code: Error code (optional)
             status: Error status (ERROR, TIMEOUT, RATE_LIMITED)
-            db: Database session (optional)
+            db: Unused; logs are written by the LLM call writer
         """
-        if db is None:
-            async with get_async_session() as db:
-                # Calculate latency
-                call = await LLMCallRepository.get_by_id(db, log_id)
-                if call and call.started_at:
-                    latency_ms = int((datetime.utcnow() - call.started_at).total_seconds() * 1000)
-                    await LLMCallRepository.update(db, log_id, latency_ms=latency_ms)
-                
-                await LLMCallRepository.mark_failed(
-                    db,
-                    log_id,
-                    error_message=error_message,
-                    error_code=error_code,
-                    status=status
-                )
-                await db.commit()
-        else:
-            # Calculate latency
-            call = await LLMCallRepository.get_by_id(db, log_id)
-            if call and call.started_at:
-                latency_ms = int((datetime.utcnow() - call.started_at).total_seconds() * 1000)
-                await LLMCallRepository.update(db, log_id, latency_ms=latency_ms)
-            
-            await LLMCallRepository.mark_failed(
-                db,
-                log_id,
-                error_message=error_message,
-                error_code=error_code,
-                status=status
-            )
-            await db.flush()
+        get_llm_call_writer().fail_call(
+            log_id,
+            error_message=error_message,
+            error_code=error_code,
+            status=status
+        )
 
     @staticmethod
     async def get_cost_stats(
@@ -0,0 +1,234 @@
+"""
+Process-wide registry for local SentenceTransformer models.
+
+Each model is loaded lazily once per worker process and served by a single
+inference thread. Concurrent encode requests for the same model are queued
+and coalesced into one batch, which keeps the model off the hot path of
+every tool call and avoids thrashing the CPU with parallel encodes.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.logging import get_logger
+
+logger = get_logger("model_registry")
+
+
+@dataclass
+class _EncodeRequest:
+    """A pending encode call waiting to be coalesced."""
+    texts: List[str]
+    options: tuple
+    future: Future = field(default_factory=Future)
+
+
+@dataclass
+class ModelStats:
+    """Load and inference metrics for one model."""
+    load_seconds: float = 0.0
+    requests: int = 0
+    batches: int = 0
+    texts_encoded: int = 0
+    encode_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "load_seconds": round(self.load_seconds, 3),
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts_encoded": self.texts_encoded,
+            "avg_batch_size": round(self.texts_encoded / self.batches, 1) if self.batches else 0.0,
+            "avg_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "texts_per_sec": round(self.texts_encoded / self.encode_seconds, 1) if self.encode_seconds else 0.0,
+        }
+
+
+class _ModelWorker:
+    """Owns one loaded model and the thread that runs its inference queue."""
+
+    def __init__(self, name: str, max_batch_texts: int):
+        self.name = name
+        self.max_batch_texts = max_batch_texts
+        self.model = None
+        self.stats = ModelStats()
+        self._load_lock = threading.Lock()
+        self._queue: "queue.Queue[_EncodeRequest]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self):
+        """Load the model (once) and start the inference thread."""
+        if self.model is not None:
+            return self.model
+        with self._load_lock:
+            if self.model is None:
+                from sentence_transformers import SentenceTransformer
+
+                start = time.perf_counter()
+                model = SentenceTransformer(self.name)
+                self.stats.load_seconds = time.perf_counter() - start
+                logger.info(f"Loaded local model {self.name} in {self.stats.load_seconds:.2f}s")
+
+                self._thread = threading.Thread(
+                    target=self._run, name=f"model-{self.name}", daemon=True
+                )
+                self.model = model
+                self._thread.start()
+        return self.model
+
+    def submit(self, texts: List[str], options: tuple) -> Future:
+        """Queue an encode request and return its future."""
+        self.load()
+        request = _EncodeRequest(texts=texts, options=options)
+        self._queue.put(request)
+        return request.future
+
+    def _drain(self, first: _EncodeRequest) -> List[_EncodeRequest]:
+        """Collect queued requests with the same options up to max_batch_texts."""
+        batch = [first]
+        total = len(first.texts)
+        deferred = []
+        while total < self.max_batch_texts:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request.options != first.options:
+                deferred.append(request)
+                continue
+            batch.append(request)
+            total += len(request.texts)
+        for request in deferred:
+            self._queue.put(request)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            # Requests whose caller went away are dropped; the rest can no longer be cancelled
+            batch = [request for request in self._drain(first) if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            texts = [text for request in batch for text in request.texts]
+            try:
+                start = time.perf_counter()
+                embeddings = self.model.encode(texts, show_progress_bar=False, **dict(first.options))
+                elapsed = time.perf_counter() - start
+            except Exception as e:
+                for request in batch:
+                    _settle(request.future, exception=e)
+                continue
+
+            self.stats.requests += len(batch)
+            self.stats.batches += 1
+            self.stats.texts_encoded += len(texts)
+            self.stats.encode_seconds += elapsed
+
+            offset = 0
+            for request in batch:
+                count = len(request.texts)
+                _settle(request.future, result=np.asarray(embeddings[offset:offset + count]))
+                offset += count
+
+
+def _settle(future: Future, result: Any = None, exception: Optional[BaseException] = None) -> None:
+    """Resolve one request's future without letting it affect its batch-mates."""
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class LocalModelRegistry:
+    """Registry of lazily loaded local embedding models, one per process."""
+
+    def __init__(self, max_batch_texts: int = 512):
+        self.max_batch_texts = max_batch_texts
+        self._workers: Dict[str, _ModelWorker] = {}
+        self._lock = threading.Lock()
+
+    def _get_worker(self, name: str) -> _ModelWorker:
+        with self._lock:
+            worker = self._workers.get(name)
+            if worker is None:
+                worker = _ModelWorker(name, self.max_batch_texts)
+                self._workers[name] = worker
+            return worker
+
+    def get_model(self, name: str):
+        """
+        Get a loaded model, loading it on first use.
+
+        Raises:
+            ImportError: If sentence-transformers is not installed
+        """
+        return self._get_worker(name).load()
+
+    def encode(self, name: str, texts: Sequence[str], **options) -> np.ndarray:
+        """
+        Encode texts with a local model (blocking).
+
+        Requests from concurrent callers are coalesced into shared batches.
+
+        Args:
+            name: Model name (e.g. 'all-MiniLM-L6-v2')
+            texts: Texts to encode
+            **options: Keyword arguments for SentenceTransformer.encode
+
+        Returns:
+            Array of shape (len(texts), dimensions)
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        future = self._get_worker(name).submit(list(texts), tuple(sorted(options.items())))
+        return future.result()
+
+    async def aencode(self, name: str, texts: Sequence[str], **options) -> np.ndarray:
+        """Encode texts without blocking the event loop."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        worker = self._get_worker(name)
+        if worker.model is None:
+            # First use: load off the event loop
+            await asyncio.to_thread(worker.load)
+        future = worker.submit(list(texts), tuple(sorted(options.items())))
+        return await asyncio.wrap_future(future)
+
+    def warm_up(self, names: Sequence[str]) -> None:
+        """Load models ahead of the first request (skips models that fail to load)."""
+        for name in names:
+            try:
+                self.get_model(name)
+            except Exception as e:
+                logger.warning(f"Failed to warm up local model {name}: {e}")
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get load time, batch size and throughput metrics per loaded model."""
+        with self._lock:
+            workers = list(self._workers.values())
+        return {
+            worker.name: {"loaded": worker.model is not None, **worker.stats.to_dict()}
+            for worker in workers
+        }
+
+
+# Singleton instance
+_model_registry: Optional[LocalModelRegistry] = None
+
+
+def get_model_registry() -> LocalModelRegistry:
+    """Get or create the local model registry singleton."""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = LocalModelRegistry()
+    return _model_registry
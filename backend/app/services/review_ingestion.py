@@ -0,0 +1,128 @@
+"""
+Bulk ingestion of scraped reviews: set-based inserts and batched embedding.
+"""
+
+import hashlib
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database.repositories.review import ReviewRepository
+from app.services.embedding_service import get_embedding_service
+from app.utils.logging import get_logger
+
+logger = get_logger("review_ingestion")
+
+
+def review_content_hash(content: str, author: Optional[str] = None, platform: Optional[str] = None) -> str:
+    """
+    Deduplication key of a review within a company.
+
+    Whitespace and case in the content are ignored; the author and platform
+    are part of the key so identical short reviews by different people are
+    all kept.
+    """
+    normalized = " ".join(content.split()).casefold()
+    key = "\x1f".join((platform or "", (author or "").strip().casefold(), normalized))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def build_review_rows(
+    reviews: Iterable[Any],
+    company_id: str,
+    platform: Optional[str] = None,
+    source_id: Optional[str] = None,
+    scraping_job_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Turn scraped reviews into INSERT rows, dropping empty and repeated ones.
+
+    Args:
+        reviews: ScrapedReview-like objects (content, author, url, review_date, metadata)
+        company_id: Company the reviews belong to
+        platform: Source platform name
+        source_id: Review source ID
+        scraping_job_id: Scraping job ID
+
+    Returns:
+        Rows with id and content_hash set, all with the same keys
+    """
+    now = datetime.utcnow()
+    rows: Dict[str, Dict[str, Any]] = {}
+    for review in reviews:
+        content = (review.content or "").strip()
+        if not content:
+            continue
+        content_hash = review_content_hash(content, review.author, platform)
+        if content_hash in rows:
+            continue
+        rows[content_hash] = {
+            "id": str(uuid.uuid4()),
+            "company_id": company_id,
+            "source_id": source_id,
+            "scraping_job_id": scraping_job_id,
+            "platform": platform,
+            "content": content,
+            "content_hash": content_hash,
+            "author": review.author,
+            "url": review.url,
+            "review_date": review.review_date,
+            "extra_metadata": review.metadata or {},
+            "scraped_at": now,
+        }
+    return list(rows.values())
+
+
+async def insert_reviews(
+    db: AsyncSession,
+    rows: List[Dict[str, Any]],
+    chunk_rows: Optional[int] = None
+) -> List[Tuple[str, str]]:
+    """
+    Insert review rows in multi-row chunks, skipping reviews the company already has.
+
+    Runs in the session's transaction; the caller commits.
+
+    Returns:
+        (id, content) of the newly inserted reviews
+    """
+    chunk_rows = chunk_rows or get_settings().review_insert_chunk_rows
+    inserted: List[Tuple[str, str]] = []
+    for start in range(0, len(rows), chunk_rows):
+        inserted.extend(await ReviewRepository.insert_many(db, rows[start:start + chunk_rows]))
+
+    skipped = len(rows) - len(inserted)
+    logger.info(f"Inserted {len(inserted)} reviews ({skipped} duplicates skipped)")
+    return inserted
+
+
+async def embed_reviews(db: AsyncSession, reviews: List[Tuple[str, str]]) -> int:
+    """
+    Embed the given reviews and store the vectors.
+
+    Each batch is written as soon as the embedder yields it, with one
+    set-based UPDATE; the caller commits.
+
+    Args:
+        db: Database session
+        reviews: (id, content) of the reviews to embed
+
+    Returns:
+        Number of reviews that got an embedding
+    """
+    if not reviews:
+        return 0
+
+    embedding_service = get_embedding_service()
+    embedded = 0
+    async for batch_results in embedding_service.iter_embeddings_batches([content for _, content in reviews]):
+        embedded += await ReviewRepository.bulk_update_embeddings(
+            db,
+            [(reviews[index][0], embedding) for index, embedding in batch_results if embedding is not None]
+        )
+
+    logger.info(f"Generated embeddings for {embedded}/{len(reviews)} reviews")
+    return embedded
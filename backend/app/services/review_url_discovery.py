@@ -9,6 +9,7 @@ from typing import Dict, Optional
 
 import httpx
 
+from app.core.worker_loop import get_worker_http_client
 from app.utils.logging import get_logger
 
 logger = get_logger("review_url_discovery")
@@ -34,14 +35,23 @@ async def search_duckduckgo(query: str) -> str:
     Returns:
         HTML content of search results
     """
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.post(
-            DUCKDUCKGO_URL,
-            data={"q": query, "b": ""},
-            headers={
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-            }
-        )
+    request = {
+        "data": {"q": query, "b": ""},
+        "headers": {
+            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+        },
+        "timeout": 10.0,
+    }
+
+    # Celery tasks reuse the worker's pooled client
+    shared_client = get_worker_http_client()
+    if shared_client is not None:
+        response = await shared_client.post(DUCKDUCKGO_URL, **request)
+        response.raise_for_status()
+        return response.text
+
+    async with httpx.AsyncClient() as client:
+        response = await client.post(DUCKDUCKGO_URL, **request)
         response.raise_for_status()
         return response.text
 
@@ -0,0 +1,367 @@
+"""
+Orchestration of Apify-backed scraping jobs.
+
+launch_scrape_runs starts actor runs and stores their state on the job,
+advance_scrape_runs ingests new dataset pages on each polling tick, and
+list_stalled_runs finds running jobs whose polling chain was lost.
+"""
+
+import asyncio
+import hashlib
+import hmac
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database.models.credit_transaction import TransactionTypeEnum
+from app.database.models.scraping_job import JobStatusEnum
+from app.database.repositories import (
+    CreditTransactionRepository,
+    ReviewSourceRepository,
+    ScrapingJobRepository,
+    UserCreditRepository,
+)
+from app.exceptions import ExternalServiceError
+from app.services.apify_client import RUN_SUCCEEDED, TERMINAL_STATUSES, ApifyClient
+from app.services.review_ingestion import build_review_rows, embed_reviews, insert_reviews
+from app.utils.logging import get_logger
+
+logger = get_logger("scrape_orchestrator")
+
+# Errors talking to Apify that leave the job running until the next tick
+TRANSIENT_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ExternalServiceError)
+
+
+@dataclass
+class ScrapeRun:
+    """An Apify-backed scraping job ready to start its actor run."""
+    job_id: str
+    platform: str
+    scraper: Any  # ApifyActorScraper
+    query: str
+    limit: int
+    reused: int = 0
+
+
+def poll_delay(attempt: int) -> float:
+    """Seconds before polling tick number attempt (0-based): doubles up to apify_poll_max_seconds."""
+    settings = get_settings()
+    return min(settings.apify_poll_max_seconds, settings.apify_poll_initial_seconds * 2 ** attempt)
+
+
+def apify_webhook_token(job_id: str) -> str:
+    """
+    Token authenticating Apify's run webhook for a job.
+
+    Derived from secret_key, so the API and the workers must share it.
+    """
+    return hmac.new(get_settings().secret_key.encode(), job_id.encode(), hashlib.sha256).hexdigest()
+
+
+def apify_webhook_url(job_id: str) -> Optional[str]:
+    """URL Apify calls when the job's run finishes, or None if webhooks are not configured."""
+    base_url = get_settings().apify_webhook_base_url
+    if not base_url:
+        return None
+    return f"{base_url.rstrip('/')}/api/v1/scraping/apify/webhook/{job_id}?token={apify_webhook_token(job_id)}"
+
+
+def _get_scraper(platform: str) -> Any:
+    """Scraper for a platform (imported lazily: the factory pulls in every scraper)."""
+    from app.services.scraper_factory import get_scraper_factory
+    return get_scraper_factory().get_scraper(platform)
+
+
+async def complete_scraping_job(
+    session: AsyncSession,
+    job_id: str,
+    saved_count: int,
+    reused_count: int = 0
+) -> bool:
+    """
+    Bill a running job and mark it completed, then sync its reviews to the user's table.
+
+    Returns:
+        False if the job was not running or is being handled by another transaction
+    """
+    job = await ScrapingJobRepository.lock_running(session, job_id)
+    if not job:
+        await session.rollback()
+        return False
+
+    source = await ReviewSourceRepository.get_by_id(session, job.source_id)
+    source_name = source.name if source else "unknown source"
+
+    # Deduct credits
+    credit_account = await UserCreditRepository.get_by_user_id(session, job.user_id)
+    if credit_account:
+        balance_before = credit_account.credits_available
+        await UserCreditRepository.deduct_credits(session, job.user_id, job.cost)
+
+        # Record transaction
+        await CreditTransactionRepository.create(
+            session,
+            user_credit_id=credit_account.id,
+            transaction_type=TransactionTypeEnum.DEDUCTION,
+            amount=-job.cost,
+            balance_before=balance_before,
+            balance_after=credit_account.credits_available,
+            description=f"Scraping {saved_count} reviews from {source_name}"
+                        + (f" ({reused_count} reused)" if reused_count else ""),
+            scraping_job_id=job_id
+        )
+
+    # Update job to completed
+    await ScrapingJobRepository.update_status(session, job_id, JobStatusEnum.COMPLETED)
+    await ScrapingJobRepository.update_progress(session, job_id, 100.0, saved_count + reused_count)
+    await session.commit()
+
+    # Sync reviews to user's aggregated table
+    try:
+        from app.services.user_reviews_service import UserReviewsService
+        reviews_service = UserReviewsService(session)
+        synced_count = await reviews_service.sync_reviews_to_user_table(
+            user_id=job.user_id,
+            scraping_job_id=job_id
+        )
+        if not synced_count and reused_count:
+            # Served entirely from the review pool
+            await reviews_service.refresh_user_dataset(job.user_id)
+        logger.info(f"Synced {synced_count} reviews to user table for job {job_id}")
+    except Exception as e:
+        await session.rollback()
+        logger.warning(f"Failed to sync reviews to user table for job {job_id}: {e}")
+        # Don't fail job completion if sync fails
+
+    logger.info(f"Scraping job {job_id} completed successfully")
+    return True
+
+
+async def fail_scraping_job(session: AsyncSession, job_id: str, error_message: str) -> None:
+    """Mark a job failed (its transaction so far is rolled back)."""
+    await session.rollback()
+    try:
+        await ScrapingJobRepository.update_status(
+            session,
+            job_id,
+            JobStatusEnum.FAILED,
+            error_message=error_message
+        )
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Failed to mark scraping job {job_id} as failed: {e}")
+
+
+async def launch_scrape_runs(
+    session: AsyncSession,
+    client: ApifyClient,
+    runs: List[ScrapeRun]
+) -> List[str]:
+    """
+    Start the actor runs of several jobs concurrently.
+
+    Each started run's state is saved on its job; jobs whose run could not
+    be started are failed.
+
+    Returns:
+        IDs of the jobs whose run was started
+    """
+    async def start(run: ScrapeRun) -> Dict[str, Any]:
+        if not run.scraper.api_token:
+            raise ExternalServiceError("Apify API token not configured", service="apify")
+        if not await run.scraper.validate_query(run.query):
+            raise ValueError(f"Invalid query: {run.query}")
+        actor_input = run.scraper.build_actor_input(run.query, run.limit)
+        return await client.start_run(run.scraper.ACTOR_ID, actor_input, webhook_url=apify_webhook_url(run.job_id))
+
+    started = await asyncio.gather(*(start(run) for run in runs), return_exceptions=True)
+
+    launched = []
+    started_at = datetime.utcnow().isoformat()
+    for run, result in zip(runs, started):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to start Apify run for job {run.job_id}: {result}")
+            await fail_scraping_job(session, run.job_id, f"Failed to start Apify run: {result}")
+            continue
+
+        await ScrapingJobRepository.set_run_state(session, run.job_id, {
+            "platform": run.platform,
+            "run_id": result["id"],
+            "dataset_id": result["defaultDatasetId"],
+            "status": result.get("status"),
+            "offset": 0,
+            "saved": 0,
+            "reused": run.reused,
+            "started_at": started_at,
+            "polled_at": started_at,
+        })
+        await session.commit()
+        launched.append(run.job_id)
+        logger.info(f"Started Apify {run.platform} run {result['id']} for job {run.job_id}")
+
+    return launched
+
+
+async def advance_scrape_runs(
+    session: AsyncSession,
+    client: ApifyClient,
+    job_ids: List[str]
+) -> List[str]:
+    """
+    One polling tick over the given jobs.
+
+    Each job is advanced under a SKIP LOCKED row lock, so a webhook-triggered
+    tick and a scheduled one never ingest or bill the same job twice.
+
+    Returns:
+        IDs of the jobs that are still running
+    """
+    runs = []
+    for job_id in await ScrapingJobRepository.list_running_ids(session, job_ids):
+        job = await ScrapingJobRepository.get_by_id(session, job_id)
+        if job and job.run_state and job.run_state.get("run_id"):
+            runs.append((job_id, job.run_state["run_id"]))
+    await session.commit()
+
+    statuses = await asyncio.gather(
+        *(client.get_run(run_id) for _, run_id in runs), return_exceptions=True
+    )
+
+    for (job_id, _), run in zip(runs, statuses):
+        if isinstance(run, Exception):
+            logger.warning(f"Failed to get Apify run status for job {job_id}: {run}")
+            run = None
+        try:
+            await _advance_job(session, client, job_id, run)
+        except TRANSIENT_ERRORS as e:
+            await session.rollback()
+            logger.warning(f"Apify error advancing job {job_id}, retrying next poll: {e}")
+            await _mark_polled(session, job_id)
+        except Exception as e:
+            logger.error(f"Error advancing scraping job {job_id}: {e}")
+            await fail_scraping_job(session, job_id, str(e))
+
+    return await ScrapingJobRepository.list_running_ids(session, job_ids)
+
+
+async def list_stalled_runs(session: AsyncSession) -> List[str]:
+    """IDs of running Apify-backed jobs that no polling tick has advanced for apify_poll_stale_seconds."""
+    cutoff = datetime.utcnow() - timedelta(seconds=get_settings().apify_poll_stale_seconds)
+    stalled = []
+    for job_id, run_state in await ScrapingJobRepository.list_running_run_states(session):
+        polled_at = run_state.get("polled_at") or run_state.get("started_at")
+        if run_state.get("run_id") and polled_at and datetime.fromisoformat(polled_at) < cutoff:
+            stalled.append(job_id)
+    await session.commit()
+    return stalled
+
+
+async def _mark_polled(session: AsyncSession, job_id: str) -> None:
+    """Record a tick that could not advance the job, so the sweep knows it is still being polled."""
+    try:
+        job = await ScrapingJobRepository.lock_running(session, job_id)
+        if job and job.run_state:
+            await ScrapingJobRepository.set_run_state(
+                session, job_id, {**job.run_state, "polled_at": datetime.utcnow().isoformat()}
+            )
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.warning(f"Failed to record polling tick of job {job_id}: {e}")
+
+
+async def _advance_job(
+    session: AsyncSession,
+    client: ApifyClient,
+    job_id: str,
+    run: Optional[Dict[str, Any]]
+) -> None:
+    """
+    Ingest a job's new dataset pages and finish it if its run is over.
+
+    Args:
+        run: Run object read at the start of the tick (None if unavailable)
+    """
+    job = await ScrapingJobRepository.lock_running(session, job_id)
+    if not job:
+        # Finished meanwhile, or being advanced by another poller
+        await session.rollback()
+        return
+
+    settings = get_settings()
+    state = dict(job.run_state)
+    target = job.total_reviews_target
+    status = run["status"] if run else state.get("status")
+
+    inserted = []
+    if run is not None:
+        # Pages are read after the status, so a finished run's dataset is read to the end
+        scraper = _get_scraper(state["platform"])
+        async for items in client.iter_dataset_pages(state["dataset_id"], offset=state["offset"]):
+            # Rows per item: the offset only moves past items whose reviews were all inserted
+            item_rows = [
+                build_review_rows(
+                    scraper.parse_items([item]),
+                    company_id=job.company_id,
+                    platform=state["platform"],
+                    source_id=job.source_id,
+                    scraping_job_id=job.id
+                )
+                for item in items
+            ]
+            used = 0
+            while used < len(items) and state["saved"] + state["reused"] < target:
+                # Take whole items until they cover what is missing; duplicates the
+                # insert skips leave a shortfall that the following items make up
+                remaining = target - state["reused"] - state["saved"]
+                rows = []
+                while used < len(items) and len(rows) < remaining:
+                    rows.extend(item_rows[used])
+                    used += 1
+                page_inserted = await insert_reviews(session, rows)
+                state["saved"] += len(page_inserted)
+                inserted.extend(page_inserted)
+            state["offset"] += used
+            if state["saved"] + state["reused"] >= target:
+                break
+
+    collected = state["saved"] + state["reused"]
+    elapsed = (datetime.utcnow() - datetime.fromisoformat(state["started_at"])).total_seconds()
+    timed_out = elapsed > settings.apify_run_timeout_seconds
+
+    if status not in TERMINAL_STATUSES and (collected >= target or timed_out):
+        try:
+            await client.abort_run(state["run_id"])
+            logger.info(f"Aborted Apify run {state['run_id']} of job {job_id}")
+        except Exception as e:
+            logger.warning(f"Failed to abort Apify run {state['run_id']}: {e}")
+        state["aborted"] = True
+
+    state["status"] = status
+    state["polled_at"] = datetime.utcnow().isoformat()
+    await ScrapingJobRepository.set_run_state(session, job_id, state)
+    progress = 20.0 + 60.0 * min(1.0, collected / target) if target else 80.0
+    await ScrapingJobRepository.update_progress(session, job_id, progress, collected)
+    await session.commit()
+
+    # Embed exactly the reviews this tick inserted
+    if inserted:
+        try:
+            await embed_reviews(session, inserted)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.warning(f"Failed to generate embeddings for job {job_id}: {e}")
+
+    if collected >= target or status == RUN_SUCCEEDED:
+        logger.info(f"Scraped {state['saved']} reviews for job {job_id} ({state['reused']} reused)")
+        await complete_scraping_job(session, job_id, state["saved"], state["reused"])
+    elif status in TERMINAL_STATUSES:
+        await fail_scraping_job(session, job_id, f"Apify actor run finished with status: {status}")
+    elif timed_out:
+        await fail_scraping_job(session, job_id, "Apify actor run timed out")
@@ -8,6 +8,7 @@ Working scrapers:
 - CSVImporter: User uploads their own review data
 """
 
+from .apify_actor import ApifyActorScraper
 from .base import BaseReviewScraper, ScrapedProductIntelligence, ScrapedReview, ScrapeResult
 from .csv_importer import CSVImporter
 from .g2_scraper import G2Scraper
@@ -16,6 +17,7 @@ from .trustradius_scraper import TrustRadiusScraper
 
 __all__ = [
     "BaseReviewScraper",
+    "ApifyActorScraper",
     "ScrapedReview",
     "ScrapedProductIntelligence",
     "ScrapeResult",
@@ -0,0 +1,118 @@
+"""
+Base class for scrapers backed by an Apify actor.
+"""
+
+from abc import abstractmethod
+from typing import Any, Dict, List
+
+import aiohttp
+
+from app.exceptions import ExternalServiceError
+from app.services.apify_client import apify_client
+from app.utils.logging import get_logger
+
+from .base import BaseReviewScraper, ScrapedReview
+
+logger = get_logger("apify_actor_scraper")
+
+
+class ApifyActorScraper(BaseReviewScraper):
+    """
+    Review scraper that runs an Apify actor and parses its dataset.
+
+    Subclasses define ACTOR_ID, build_actor_input() and parse_items().
+    scrape() runs the actor and waits for it in-process; Celery jobs instead
+    go through app.services.scrape_orchestrator, which starts the run, hands
+    the wait to a continuation task and parses dataset pages as they appear.
+    """
+
+    ACTOR_ID: str = ""
+
+    def __init__(self, settings: Any):
+        super().__init__(settings)
+        self.api_token = settings.get_secret("apify_api_token")
+
+    @abstractmethod
+    def build_actor_input(self, query: str, limit: int, **kwargs) -> Dict[str, Any]:
+        """
+        Build the actor input for a scrape.
+
+        Args:
+            query: Product/company name, slug or URL
+            limit: Maximum number of reviews
+            **kwargs: Source-specific parameters
+
+        Returns:
+            Actor input
+        """
+        pass
+
+    @abstractmethod
+    def parse_items(self, items: List[Dict[str, Any]]) -> List[ScrapedReview]:
+        """
+        Parse one page of dataset items into reviews.
+
+        Args:
+            items: Dataset items
+
+        Returns:
+            Reviews found in the items
+        """
+        pass
+
+    def start_scrape(self) -> None:
+        """Reset per-scrape state before the first page is parsed."""
+        pass
+
+    async def scrape(
+        self,
+        query: str,
+        limit: int,
+        **kwargs
+    ) -> List[ScrapedReview]:
+        """
+        Run the actor, wait for it to finish and parse its dataset.
+
+        Args:
+            query: Product/company name, slug or URL
+            limit: Maximum number of reviews
+            **kwargs: Source-specific parameters
+
+        Returns:
+            List of scraped reviews
+        """
+        if not await self.validate_query(query):
+            raise ValueError(f"Invalid query: {query}")
+
+        if not self.api_token:
+            raise ExternalServiceError("Apify API token not configured", service="apify")
+
+        source_name = self.get_source_name()
+        try:
+            self.start_scrape()
+            actor_input = self.build_actor_input(query, limit, **kwargs)
+
+            reviews = []
+            async with apify_client(self.api_token) as client:
+                run = await client.start_run(self.ACTOR_ID, actor_input)
+                logger.info(f"Started Apify {source_name} run: {run['id']}")
+
+                run = await client.wait_for_run(run["id"])
+
+                async for items in client.iter_dataset_pages(run["defaultDatasetId"]):
+                    reviews.extend(self.parse_items(items))
+                    if len(reviews) >= limit:
+                        break
+
+            logger.info(f"Scraped {len(reviews)} reviews from {source_name}")
+            return reviews[:limit]
+
+        except aiohttp.ClientError as e:
+            logger.error(f"Network error in {source_name} scraper: {e}")
+            raise ExternalServiceError(f"{source_name} scraping failed: {e}", service="apify")
+        except Exception as e:
+            logger.error(f"Error in {source_name} scraper: {e}")
+            raise ExternalServiceError(
+                f"{source_name} scraping failed: {e}",
+                service=f"{source_name.lower()}_scraper"
+            )
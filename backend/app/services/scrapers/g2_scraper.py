@@ -4,22 +4,18 @@ G2 scraper using Apify's omkar-cloud/g2-product-scraper actor.
 See backend/docs/G2_SCRAPER_SCHEMA.md for full response schema.
 """
 
-import asyncio
-import re
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-import aiohttp
-
-from app.exceptions import ExternalServiceError
 from app.utils.logging import get_logger
 
-from .base import BaseReviewScraper, ScrapedProductIntelligence, ScrapedReview, ScrapeResult
+from .apify_actor import ApifyActorScraper
+from .base import ScrapedProductIntelligence, ScrapedReview, ScrapeResult
 
 logger = get_logger("g2_scraper")
 
 
-class G2Scraper(BaseReviewScraper):
+class G2Scraper(ApifyActorScraper):
     """
     G2 scraper using Apify's G2 Product Scraper actor.
     
@@ -33,7 +29,6 @@ class G2Scraper(BaseReviewScraper):
 
     def __init__(self, settings: Any):
         super().__init__(settings)
-        self.api_token = settings.get_secret("apify_api_token")
         self.cost_per_review = settings.g2_review_cost
         self._last_intelligence: Optional[ScrapedProductIntelligence] = None
 
@@ -58,153 +53,47 @@ class G2Scraper(BaseReviewScraper):
         product = product.lower().strip().replace(" ", "-")
         return f"{self.BASE_URL}/products/{product}/reviews"
 
-    async def scrape(
-        self,
-        query: str,
-        limit: int,
-        **kwargs
-    ) -> List[ScrapedReview]:
+    def start_scrape(self) -> None:
+        """Forget the product intelligence of the previous scrape."""
+        self._last_intelligence = None
+
+    def build_actor_input(self, query: str, limit: int, **kwargs) -> Dict[str, Any]:
         """
-        Scrape G2 reviews.
-        
+        Build omkar-cloud/g2-product-scraper input.
+
         Args:
             query: Product URL or product name/slug
-            limit: Maximum number of reviews
+            limit: Maximum number of reviews (the actor returns all reviews of the product)
             **kwargs: Additional parameters
-            
+
         Returns:
-            List of scraped reviews
+            Actor input
         """
-        if not await self.validate_query(query):
-            raise ValueError(f"Invalid query: {query}")
+        return {
+            "g2ProductUrls": [{"url": self.build_g2_url(query)}]
+        }
 
-        if not self.api_token:
-            raise ExternalServiceError("Apify API token not configured", service="apify")
-
-        try:
-            # Build G2 URL
-            g2_url = self.build_g2_url(query)
-            
-            # Prepare Apify actor input (omkar-cloud/g2-product-scraper format)
-            actor_input = {
-                "g2ProductUrls": [{"url": g2_url}]
-            }
-
-            # Start Apify actor run
-            async with aiohttp.ClientSession() as session:
-                run_id = await self._start_actor_run(session, actor_input)
-                logger.info(f"Started Apify G2 scraper run: {run_id}")
-
-                # Wait for run to complete
-                status_data = await self._wait_for_completion(session, run_id)
-
-                # Get results
-                dataset_id = status_data["data"]["defaultDatasetId"]
-                items = await self._get_results(session, dataset_id)
-
-            # Parse results - actor returns product objects with all_reviews array
-            reviews = []
-            intelligence = None
-            
-            for product in items:
-                product_name = product.get("product_name", "Unknown")
-                product_reviews = product.get("all_reviews", []) or product.get("initial_reviews", [])
-                
-                # Extract product intelligence (first product only)
-                if intelligence is None:
-                    intelligence = self._parse_product_intelligence(product)
-                
-                for review_item in product_reviews:
-                    review = self._parse_review(review_item, product_name)
-                    if review:
-                        reviews.append(review)
-
-            logger.info(f"Scraped {len(reviews)} reviews from G2")
-            
-            # Store intelligence for later retrieval
-            self._last_intelligence = intelligence
-            
-            return reviews[:limit]
-
-        except aiohttp.ClientError as e:
-            logger.error(f"Network error in G2 scraper: {e}")
-            raise ExternalServiceError(f"G2 scraping failed: {e}", service="apify", retryable=True)
-        except Exception as e:
-            logger.error(f"Error in G2 scraper: {e}")
-            raise ExternalServiceError(f"G2 scraping failed: {e}", service="g2_scraper")
-
-    async def _start_actor_run(
-        self, 
-        session: aiohttp.ClientSession, 
-        actor_input: Dict[str, Any]
-    ) -> str:
-        """Start the Apify actor run."""
-        start_url = f"https://api.apify.com/v2/acts/{self.ACTOR_ID}/runs"
-        headers = {"Authorization": f"Bearer {self.api_token}"}
-        
-        async with session.post(
-            start_url,
-            json=actor_input,
-            headers=headers
-        ) as response:
-            if response.status != 201:
-                error_text = await response.text()
-                raise ExternalServiceError(
-                    f"Failed to start Apify actor: {error_text}",
-                    service="apify"
-                )
-            
-            run_data = await response.json()
-
-        return run_data["data"]["id"]
-
-    async def _wait_for_completion(
-        self, 
-        session: aiohttp.ClientSession, 
-        run_id: str,
-        max_wait: int = 600  # 10 minutes
-    ) -> Dict[str, Any]:
-        """Wait for actor run to complete."""
-        headers = {"Authorization": f"Bearer {self.api_token}"}
-        waited = 0
-        status_data = None
-        
-        while waited < max_wait:
-            await asyncio.sleep(10)
-            waited += 10
-
-            status_url = f"https://api.apify.com/v2/acts/{self.ACTOR_ID}/runs/{run_id}"
-            async with session.get(status_url, headers=headers) as response:
-                status_data = await response.json()
-                status = status_data["data"]["status"]
-
-                if status == "SUCCEEDED":
-                    return status_data
-                elif status in ["FAILED", "ABORTED", "TIMED-OUT"]:
-                    raise ExternalServiceError(
-                        f"Apify actor run failed with status: {status}",
-                        service="apify"
-                    )
-
-            logger.debug(f"G2 scraper status: {status}, waited: {waited}s")
-
-        raise ExternalServiceError(
-            "Apify actor run timeout",
-            service="apify",
-            retryable=True
-        )
+    def parse_items(self, items: List[Dict[str, Any]]) -> List[ScrapedReview]:
+        """
+        Parse product objects, each with an all_reviews array.
 
-    async def _get_results(
-        self, 
-        session: aiohttp.ClientSession, 
-        dataset_id: str
-    ) -> List[Dict[str, Any]]:
-        """Get results from the dataset."""
-        headers = {"Authorization": f"Bearer {self.api_token}"}
-        results_url = f"https://api.apify.com/v2/datasets/{dataset_id}/items"
-        
-        async with session.get(results_url, headers=headers) as response:
-            return await response.json()
+        The product intelligence of the first product is kept for
+        get_last_intelligence().
+        """
+        reviews = []
+        for product in items:
+            product_name = product.get("product_name", "Unknown")
+            product_reviews = product.get("all_reviews", []) or product.get("initial_reviews", [])
+
+            # Extract product intelligence (first product only)
+            if self._last_intelligence is None:
+                self._last_intelligence = self._parse_product_intelligence(product)
+
+            for review_item in product_reviews:
+                review = self._parse_review(review_item, product_name)
+                if review:
+                    reviews.append(review)
+        return reviews
 
     def _parse_review(self, item: Dict[str, Any], product_name: str) -> Optional[ScrapedReview]:
         """
@@ -5,22 +5,19 @@ Uses the generic website-content-crawler actor to scrape Trustpilot reviews
 and extract them as markdown content for LLM processing.
 """
 
-import asyncio
 import re
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-import aiohttp
-
-from app.exceptions import ExternalServiceError
 from app.utils.logging import get_logger
 
-from .base import BaseReviewScraper, ScrapedReview
+from .apify_actor import ApifyActorScraper
+from .base import ScrapedReview
 
 logger = get_logger("trustpilot_crawler")
 
 
-class TrustpilotCrawler(BaseReviewScraper):
+class TrustpilotCrawler(ApifyActorScraper):
     """
     Trustpilot scraper using Apify's Website Content Crawler.
     
@@ -33,7 +30,6 @@ class TrustpilotCrawler(BaseReviewScraper):
 
     def __init__(self, settings: Any):
         super().__init__(settings)
-        self.api_token = settings.get_secret("apify_api_token")
         self.cost_per_page = 0.02  # Approximate cost per page crawled
 
     def build_trustpilot_url(self, company: str, page: int = 1) -> str:
@@ -66,173 +62,59 @@ class TrustpilotCrawler(BaseReviewScraper):
         
         return url
 
-    async def scrape(
-        self,
-        query: str,
-        limit: int,
-        **kwargs
-    ) -> List[ScrapedReview]:
+    def build_actor_input(self, query: str, limit: int, **kwargs) -> Dict[str, Any]:
         """
-        Scrape Trustpilot reviews using Website Content Crawler.
-        
+        Build Website Content Crawler input for the company's review pages.
+
         Args:
             query: Company name, slug, or Trustpilot URL
             limit: Maximum number of reviews to collect
             **kwargs: Additional parameters:
                 - max_pages: Max pages to crawl (default: calculated from limit)
-                - wait_for_selector: CSS selector to wait for
-                
+
         Returns:
-            List of scraped reviews
+            Actor input
         """
-        if not await self.validate_query(query):
-            raise ValueError(f"Invalid query: {query}")
-
-        if not self.api_token:
-            raise ExternalServiceError("Apify API token not configured", service="apify")
-
-        try:
-            # Calculate pages needed (Trustpilot shows ~20 reviews per page)
-            reviews_per_page = 20
-            max_pages = kwargs.get("max_pages", (limit // reviews_per_page) + 1)
-            max_pages = min(max_pages, 50)  # Cap at 50 pages
-            
-            # Build start URLs for multiple pages
-            start_urls = []
-            for page in range(1, max_pages + 1):
-                url = self.build_trustpilot_url(query, page)
-                start_urls.append({"url": url})
-            
-            # Prepare Website Content Crawler input
-            actor_input = {
-                "startUrls": start_urls,
-                "maxCrawlPages": max_pages,
-                "maxResults": max_pages,
-                "crawlerType": "playwright:firefox",  # Better for JS-heavy sites
-                "includeUrlGlobs": [
-                    f"{self.BASE_URL}/review/*"
-                ],
-                "excludeUrlGlobs": [
-                    "*/users/*",
-                    "*/categories/*",
-                    "*/about/*",
-                    "*/business/*",
-                ],
-                "htmlTransformer": "readableText",
-                "saveMarkdown": True,
-                "saveHtml": False,
-                "saveScreenshots": False,
-                "maxScrollHeightPixels": 10000,  # Scroll to load more content
-                "pageLoadTimeoutSecs": 60,
-                "maxConcurrency": 5,
-            }
-
-            # Start Apify actor run
-            async with aiohttp.ClientSession() as session:
-                run_id = await self._start_actor_run(session, actor_input)
-                logger.info(f"Started Apify Website Content Crawler run: {run_id}")
-
-                # Wait for completion
-                status_data = await self._wait_for_completion(session, run_id)
-
-                # Get results
-                dataset_id = status_data["data"]["defaultDatasetId"]
-                items = await self._get_results(session, dataset_id)
-
-            # Parse crawled pages into reviews
-            reviews = []
-            for item in items:
-                page_reviews = self._parse_page_content(item)
-                reviews.extend(page_reviews)
-
-            logger.info(f"Extracted {len(reviews)} reviews from Trustpilot")
-            return reviews[:limit]
-
-        except aiohttp.ClientError as e:
-            logger.error(f"Network error in Trustpilot crawler: {e}")
-            raise ExternalServiceError(
-                f"Trustpilot crawling failed: {e}", 
-                service="apify", 
-                retryable=True
-            )
-        except Exception as e:
-            logger.error(f"Error in Trustpilot crawler: {e}")
-            raise ExternalServiceError(
-                f"Trustpilot crawling failed: {e}", 
-                service="trustpilot_crawler"
-            )
-
-    async def _start_actor_run(
-        self, 
-        session: aiohttp.ClientSession, 
-        actor_input: Dict[str, Any]
-    ) -> str:
-        """Start the Apify actor run."""
-        start_url = f"https://api.apify.com/v2/acts/{self.ACTOR_ID}/runs"
-        headers = {"Authorization": f"Bearer {self.api_token}"}
-        
-        async with session.post(
-            start_url,
-            json=actor_input,
-            headers=headers
-        ) as response:
-            if response.status != 201:
-                error_text = await response.text()
-                raise ExternalServiceError(
-                    f"Failed to start Apify actor: {error_text}",
-                    service="apify"
-                )
-            
-            run_data = await response.json()
-            return run_data["data"]["id"]
-
-    async def _wait_for_completion(
-        self, 
-        session: aiohttp.ClientSession, 
-        run_id: str,
-        max_wait: int = 600  # 10 minutes for crawling
-    ) -> Dict[str, Any]:
-        """Wait for actor run to complete."""
-        headers = {"Authorization": f"Bearer {self.api_token}"}
-        waited = 0
-        status_data = None
-        
-        while waited < max_wait:
-            await asyncio.sleep(10)  # Check every 10 seconds
-            waited += 10
-
-            status_url = f"https://api.apify.com/v2/acts/{self.ACTOR_ID}/runs/{run_id}"
-            async with session.get(status_url, headers=headers) as response:
-                status_data = await response.json()
-                status = status_data["data"]["status"]
-
-                if status == "SUCCEEDED":
-                    return status_data
-                elif status in ["FAILED", "ABORTED", "TIMED-OUT"]:
-                    raise ExternalServiceError(
-                        f"Apify actor run failed with status: {status}",
-                        service="apify"
-                    )
-                
-                logger.debug(f"Crawler status: {status}, waited: {waited}s")
-
-        raise ExternalServiceError(
-            "Apify actor run timeout",
-            service="apify",
-            retryable=True
-        )
-
-    async def _get_results(
-        self, 
-        session: aiohttp.ClientSession, 
-        dataset_id: str
-    ) -> List[Dict[str, Any]]:
-        """Get results from the dataset."""
-        headers = {"Authorization": f"Bearer {self.api_token}"}
-        results_url = f"https://api.apify.com/v2/datasets/{dataset_id}/items"
-        
-        async with session.get(results_url, headers=headers) as response:
-            return await response.json()
+        # Calculate pages needed (Trustpilot shows ~20 reviews per page)
+        reviews_per_page = 20
+        max_pages = kwargs.get("max_pages", (limit // reviews_per_page) + 1)
+        max_pages = min(max_pages, 50)  # Cap at 50 pages
+
+        # Build start URLs for multiple pages
+        start_urls = []
+        for page in range(1, max_pages + 1):
+            url = self.build_trustpilot_url(query, page)
+            start_urls.append({"url": url})
+
+        return {
+            "startUrls": start_urls,
+            "maxCrawlPages": max_pages,
+            "maxResults": max_pages,
+            "crawlerType": "playwright:firefox",  # Better for JS-heavy sites
+            "includeUrlGlobs": [
+                f"{self.BASE_URL}/review/*"
+            ],
+            "excludeUrlGlobs": [
+                "*/users/*",
+                "*/categories/*",
+                "*/about/*",
+                "*/business/*",
+            ],
+            "htmlTransformer": "readableText",
+            "saveMarkdown": True,
+            "saveHtml": False,
+            "saveScreenshots": False,
+            "maxScrollHeightPixels": 10000,  # Scroll to load more content
+            "pageLoadTimeoutSecs": 60,
+            "maxConcurrency": 5,
+        }
+
+    def parse_items(self, items: List[Dict[str, Any]]) -> List[ScrapedReview]:
+        """Parse crawled pages into reviews."""
+        reviews = []
+        for item in items:
+            reviews.extend(self._parse_page_content(item))
+        return reviews
 
     def _parse_page_content(self, item: Dict[str, Any]) -> List[ScrapedReview]:
         """
@@ -2,22 +2,18 @@
 TrustRadius scraper using Apify's scraped/trustradius-review-scraper actor.
 """
 
-import asyncio
-import re
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-import aiohttp
-
-from app.exceptions import ExternalServiceError
 from app.utils.logging import get_logger
 
-from .base import BaseReviewScraper, ScrapedReview
+from .apify_actor import ApifyActorScraper
+from .base import ScrapedReview
 
 logger = get_logger("trustradius_scraper")
 
 
-class TrustRadiusScraper(BaseReviewScraper):
+class TrustRadiusScraper(ApifyActorScraper):
     """
     TrustRadius scraper using Apify actor.
     
@@ -29,7 +25,6 @@ class TrustRadiusScraper(BaseReviewScraper):
 
     def __init__(self, settings: Any):
         super().__init__(settings)
-        self.api_token = settings.get_secret("apify_api_token")
         self.cost_per_review = settings.trustradius_review_cost
 
     def build_url(self, product: str) -> str:
@@ -40,95 +35,21 @@ class TrustRadiusScraper(BaseReviewScraper):
         product = product.lower().strip().replace(" ", "-")
         return f"{self.BASE_URL}/products/{product}/reviews"
 
-    async def scrape(
-        self,
-        query: str,
-        limit: int,
-        **kwargs
-    ) -> List[ScrapedReview]:
-        """Scrape TrustRadius reviews."""
-        if not await self.validate_query(query):
-            raise ValueError(f"Invalid query: {query}")
-
-        if not self.api_token:
-            raise ExternalServiceError("Apify API token not configured", service="apify")
-
-        try:
-            url = self.build_url(query)
-            
-            actor_input = {
-                "url": url,
-                "maxReviews": limit
-            }
-
-            async with aiohttp.ClientSession() as session:
-                run_id = await self._start_actor_run(session, actor_input)
-                logger.info(f"Started TrustRadius scraper run: {run_id}")
-
-                status_data = await self._wait_for_completion(session, run_id)
-
-                dataset_id = status_data["data"]["defaultDatasetId"]
-                items = await self._get_results(session, dataset_id)
-
-            reviews = []
-            for item in items:
-                review = self._parse_review(item)
-                if review:
-                    reviews.append(review)
-
-            logger.info(f"Scraped {len(reviews)} reviews from TrustRadius")
-            return reviews[:limit]
-
-        except aiohttp.ClientError as e:
-            logger.error(f"Network error: {e}")
-            raise ExternalServiceError(f"TrustRadius scraping failed: {e}", service="apify", retryable=True)
-        except Exception as e:
-            logger.error(f"Error: {e}")
-            raise ExternalServiceError(f"TrustRadius scraping failed: {e}", service="trustradius_scraper")
-
-    async def _start_actor_run(self, session: aiohttp.ClientSession, actor_input: Dict[str, Any]) -> str:
-        """Start the Apify actor run."""
-        start_url = f"https://api.apify.com/v2/acts/{self.ACTOR_ID}/runs"
-        headers = {"Authorization": f"Bearer {self.api_token}"}
-        
-        async with session.post(start_url, json=actor_input, headers=headers) as response:
-            if response.status != 201:
-                error_text = await response.text()
-                raise ExternalServiceError(f"Failed to start Apify actor: {error_text}", service="apify")
-            
-            run_data = await response.json()
-            return run_data["data"]["id"]
-
-    async def _wait_for_completion(self, session: aiohttp.ClientSession, run_id: str, max_wait: int = 600) -> Dict[str, Any]:
-        """Wait for actor run to complete."""
-        headers = {"Authorization": f"Bearer {self.api_token}"}
-        waited = 0
-        
-        while waited < max_wait:
-            await asyncio.sleep(10)
-            waited += 10
-
-            status_url = f"https://api.apify.com/v2/acts/{self.ACTOR_ID}/runs/{run_id}"
-            async with session.get(status_url, headers=headers) as response:
-                status_data = await response.json()
-                status = status_data["data"]["status"]
-
-                if status == "SUCCEEDED":
-                    return status_data
-                elif status in ["FAILED", "ABORTED", "TIMED-OUT"]:
-                    raise ExternalServiceError(f"Apify actor failed: {status}", service="apify")
-                
-                logger.debug(f"TrustRadius scraper status: {status}, waited: {waited}s")
-
-        raise ExternalServiceError("Apify actor run timeout", service="apify", retryable=True)
-
-    async def _get_results(self, session: aiohttp.ClientSession, dataset_id: str) -> List[Dict[str, Any]]:
-        """Get results from the dataset."""
-        headers = {"Authorization": f"Bearer {self.api_token}"}
-        results_url = f"https://api.apify.com/v2/datasets/{dataset_id}/items"
-        
-        async with session.get(results_url, headers=headers) as response:
-            return await response.json()
+    def build_actor_input(self, query: str, limit: int, **kwargs) -> Dict[str, Any]:
+        """Build scraped/trustradius-review-scraper input."""
+        return {
+            "url": self.build_url(query),
+            "maxReviews": limit
+        }
+
+    def parse_items(self, items: List[Dict[str, Any]]) -> List[ScrapedReview]:
+        """Parse review items."""
+        reviews = []
+        for item in items:
+            review = self._parse_review(item)
+            if review:
+                reviews.append(review)
+        return reviews
 
     def _parse_review(self, item: Dict[str, Any]) -> Optional[ScrapedReview]:
         """Parse TrustRadius review from scraped/trustradius-review-scraper actor."""
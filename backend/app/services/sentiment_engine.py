@@ -0,0 +1,510 @@
+"""
+Batch sentiment scoring shared by all workflows.
+
+Replaces per-row TextBlob loops with a single engine that scores whole
+columns at once and returns TextBlob-compatible polarity (-1..1) and
+subjectivity (0..1) arrays. Two backends are available:
+- "lexicon": TextBlob's own en-sentiment lexicon applied with vectorized
+  numpy operations over the tokenized corpus (negations and intensifying
+  adverbs included), so scores match TextBlob closely at a fraction of the cost
+- "transformer": a small local sentiment classifier run in batches; polarity
+  is P(positive) - P(negative) and subjectivity comes from the lexicon
+
+Results are cached per backend by text hash, and lexicon scoring of large
+batches fans out over a process pool.
+"""
+
+import hashlib
+import math
+import multiprocessing
+import os
+import re
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+from app.utils.logging import get_logger
+
+logger = get_logger("sentiment_engine")
+
+# Polarity thresholds used by every sentiment report
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+
+# TextBlob's pattern analyzer: "not good" is slightly bad, "not bad" slightly good
+NEGATION_FACTOR = -0.5
+NEGATIONS = ("no", "not", "n't", "never")
+# Each "!" boosts the preceding assessment's polarity
+EXCLAMATION_FACTOR = 1.25
+
+_DOC_SEPARATOR = "\x00"
+# Lowercased words; "don't" splits into "do" + "n't" like TextBlob's tokenizer
+_TOKEN_RE = re.compile(r"[a-z]+(?=n't\b)|n't|[a-z]+(?:-[a-z]+)*|!|\x00")
+
+
+@dataclass
+class SentimentScores:
+    """Polarity and subjectivity for a batch of texts, in input order."""
+    polarity: np.ndarray
+    subjectivity: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.polarity)
+
+    def labels(self, positive: str = "Positive", neutral: str = "Neutral", negative: str = "Negative") -> np.ndarray:
+        """Classify each polarity score, see classify_polarity."""
+        return classify_polarity(self.polarity, positive, neutral, negative)
+
+
+def classify_polarity(
+    polarity: Any,
+    positive: str = "Positive",
+    neutral: str = "Neutral",
+    negative: str = "Negative",
+) -> np.ndarray:
+    """Label polarity scores as positive (> 0.1), negative (< -0.1) or neutral."""
+    polarity = np.asarray(polarity, dtype=np.float64)
+    return np.select(
+        [polarity > POSITIVE_THRESHOLD, polarity < NEGATIVE_THRESHOLD],
+        [positive, negative],
+        default=neutral,
+    ).astype(object)
+
+
+def _textblob_lexicon_path() -> Path:
+    try:
+        import textblob
+    except ImportError as e:
+        raise ImportError("textblob is required for the lexicon sentiment backend") from e
+    return Path(textblob.__file__).parent / "en" / "en-sentiment.xml"
+
+
+class LexiconBackend:
+    """
+    Vectorized scorer over TextBlob's sentiment lexicon.
+
+    The batch is joined into one string and tokenized with a single regex
+    pass; tokens are mapped to lexicon ids with a hash index and all
+    per-word rules (modifiers, negations, averaging per document) are numpy
+    operations over the token arrays. Follows TextBlob's PatternAnalyzer:
+    an adverb from the lexicon multiplies the next word's scores by its
+    intensity, a negation right before an assessment scales its polarity by
+    -0.5, and a document scores the mean over its assessments.
+    """
+
+    name = "lexicon"
+
+    def __init__(self, lexicon_path: Optional[Path] = None):
+        import pandas as pd
+
+        words, polarity, subjectivity, intensity, modifier = self._load(lexicon_path or _textblob_lexicon_path())
+
+        # Negations, single letters and "!" are looked up even without a lexicon entry
+        lexicon_words = set(words)
+        letters = [chr(c) for c in range(ord("a"), ord("z") + 1)]
+        extra = [w for w in list(NEGATIONS) + letters + ["!"] if w not in lexicon_words] + [_DOC_SEPARATOR]
+        vocab = words + extra
+        size = len(vocab)
+        self._index = pd.Index(vocab)
+        self._separator = size - 1
+
+        pad = np.zeros(len(extra))
+        self._polarity = np.concatenate([polarity, pad])
+        self._subjectivity = np.concatenate([subjectivity, pad])
+        self._intensity = np.concatenate([intensity, pad + 1.0])
+        self._known = np.zeros(size, dtype=bool)
+        self._known[:len(words)] = True
+        self._modifier = np.concatenate([modifier, np.zeros(len(extra), dtype=bool)])
+        self._negation = np.asarray(self._index.isin(NEGATIONS))
+        self._short = np.array([len(w.strip("'")) <= 1 for w in vocab]) & ~self._index.isin([_DOC_SEPARATOR])
+        self._exclamation = np.asarray(self._index.isin(["!"]))
+
+    @staticmethod
+    def _load(path: Path) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Load the lexicon the way TextBlob's English Sentiment does."""
+        senses: Dict[str, Dict[Optional[str], List[Tuple[float, float, float]]]] = {}
+        for node in ElementTree.parse(path).getroot().iter("word"):
+            form = node.get("form")
+            if not form:
+                continue
+            senses.setdefault(form, {}).setdefault(node.get("pos"), []).append((
+                float(node.get("polarity", 0.0)),
+                float(node.get("subjectivity", 0.0)),
+                float(node.get("intensity", 1.0)),
+            ))
+
+        # Average senses per part of speech, then across parts of speech
+        table: Dict[str, Dict[Optional[str], Tuple[float, float, float]]] = {}
+        for word, by_pos in senses.items():
+            entry = {pos: tuple(np.mean(values, axis=0)) for pos, values in by_pos.items()}
+            entry[None] = tuple(np.mean(list(entry.values()), axis=0))
+            table[word] = entry
+
+        # Adjectives also score as adverbs: "terrible" -> "terribly"
+        for word, entry in list(table.items()):
+            if "JJ" in entry:
+                stem = word[:-1] + "i" if word.endswith("y") else word
+                stem = stem[:-2] if stem.endswith("le") else stem
+                adverb = table.setdefault(stem + "ly", {})
+                adverb["RB"] = adverb[None] = entry["JJ"]
+
+        # Input is lowercased before lookup, so capitalized forms never match
+        words = [w for w in table if w == w.lower()]
+        values = np.array([table[w][None] for w in words], dtype=np.float64).reshape(-1, 3)
+        modifier = np.array(["RB" in table[w] for w in words], dtype=bool)
+        return words, values[:, 0], values[:, 1], values[:, 2], modifier
+
+    def score(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(texts)
+        if n == 0:
+            return np.zeros(0), np.zeros(0)
+
+        corpus = _DOC_SEPARATOR.join(texts)
+        if corpus.count(_DOC_SEPARATOR) != n - 1:
+            corpus = _DOC_SEPARATOR.join(t.replace(_DOC_SEPARATOR, " ") for t in texts)
+        codes = self._index.get_indexer(_TOKEN_RE.findall(corpus.lower()))
+        if len(codes) == 0:
+            return np.zeros(n), np.zeros(n)
+
+        doc = np.cumsum(codes == self._separator)
+        ids = np.maximum(codes, 0)
+        in_vocab = codes >= 0
+        known = in_vocab & self._known[ids]
+        negation = in_vocab & self._negation[ids]
+        short = in_vocab & self._short[ids]
+
+        # Neighbour lookups never cross a document boundary
+        same_doc = np.zeros(len(codes), dtype=bool)
+        same_doc[1:] = doc[1:] == doc[:-1]
+        prev_ids = _shift(ids, 0)
+
+        # "not good" / "not a good": a negation right before a word, optionally past one short word
+        negated = _shift(negation, False) & same_doc
+        negated |= _shift(short, False) & same_doc & _shift(negation, False, 2) & _shift(same_doc, False)
+
+        # "very good" folds into the adverb's assessment, scaled by its intensity
+        # (inverted when the adverb itself is negated: "not very good")
+        modified = known & _shift(known, False) & same_doc & self._modifier[prev_ids]
+        intensity = self._intensity[prev_ids]
+        scale = np.where(modified, np.where(_shift(negated, False), 1.0 / intensity, intensity), 1.0)
+        polarity = np.clip(self._polarity[ids] * scale, -1.0, 1.0)
+        subjectivity = np.clip(self._subjectivity[ids] * scale, -1.0, 1.0)
+
+        # One assessment per run of head + modified words; it takes the last word's scores
+        heads = known & ~modified
+        head_positions = np.flatnonzero(heads)
+        if len(head_positions) == 0:
+            return np.zeros(n), np.zeros(n)
+        head_number = np.cumsum(heads)
+        members = np.flatnonzero(known)
+        group = head_number[members]
+        last = members[np.append(group[1:] != group[:-1], True)]
+        values_polarity = polarity[last]
+        values_subjectivity = subjectivity[last]
+
+        # "!" boosts the latest assessment in the same document
+        marks = np.flatnonzero(in_vocab & self._exclamation[ids])
+        marks = marks[head_number[marks] > 0]
+        boosted = head_number[marks] - 1
+        boosted = boosted[doc[head_positions[boosted]] == doc[marks]]
+        boosts = np.bincount(boosted, minlength=len(head_positions))
+        values_polarity = np.clip(values_polarity * EXCLAMATION_FACTOR ** boosts, -1.0, 1.0)
+
+        values_polarity = np.where(negated[head_positions], values_polarity * NEGATION_FACTOR, values_polarity)
+
+        head_doc = doc[head_positions]
+        counts = np.bincount(head_doc, minlength=n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            polarity_out = np.bincount(head_doc, weights=values_polarity, minlength=n) / counts
+            subjectivity_out = np.bincount(head_doc, weights=values_subjectivity, minlength=n) / counts
+        return np.nan_to_num(polarity_out), np.nan_to_num(subjectivity_out)
+
+
+def _shift(values: np.ndarray, fill: Any, periods: int = 1) -> np.ndarray:
+    """Shift an array right by periods, filling the head."""
+    out = np.empty_like(values)
+    out[:periods] = fill
+    out[periods:] = values[:-periods]
+    return out
+
+
+class TransformerBackend:
+    """
+    Batched local sentiment classifier (transformers text-classification pipeline).
+
+    Polarity is P(positive) - P(negative), which keeps the -1..1 scale and
+    works for two- and three-label models. Classifiers have no notion of
+    subjectivity, so it is taken from the lexicon backend.
+    """
+
+    name = "transformer"
+
+    def __init__(self, model_name: str, batch_size: int = 64, lexicon: Optional[LexiconBackend] = None):
+        try:
+            from transformers import pipeline
+        except ImportError as e:
+            raise ImportError("transformers is required for the transformer sentiment backend") from e
+
+        start = time.perf_counter()
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._pipeline = pipeline("text-classification", model=model_name, top_k=None, truncation=True)
+        self._lexicon = lexicon
+        self._lock = threading.Lock()
+
+        # Label name -> polarity sign; unnamed labels (LABEL_0..) run negative to positive
+        labels = [self._pipeline.model.config.id2label[i] for i in sorted(self._pipeline.model.config.id2label)]
+        self._signs: Dict[str, float] = {}
+        for i, label in enumerate(labels):
+            lowered = label.lower()
+            if lowered.startswith("pos"):
+                self._signs[label] = 1.0
+            elif lowered.startswith("neg"):
+                self._signs[label] = -1.0
+            elif not lowered.startswith("neu") and len(labels) > 1 and i in (0, len(labels) - 1):
+                self._signs[label] = -1.0 if i == 0 else 1.0
+        logger.info(f"Loaded sentiment model {model_name} in {time.perf_counter() - start:.1f}s")
+
+    def score(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        if len(texts) == 0:
+            return np.zeros(0), np.zeros(0)
+
+        # The pipeline is not safe to call from several threads at once
+        with self._lock:
+            outputs = self._pipeline(list(texts), batch_size=self.batch_size)
+
+        polarity = np.array([
+            sum(self._signs.get(entry["label"], 0.0) * entry["score"] for entry in labels)
+            for labels in outputs
+        ])
+
+        if self._lexicon is not None:
+            _, subjectivity = self._lexicon.score(texts)
+        else:
+            subjectivity = np.zeros(len(texts))
+        return polarity, subjectivity
+
+
+# Lexicon tables are loaded once per pool worker process
+_worker_lexicon: Optional[LexiconBackend] = None
+
+
+def _score_lexicon_chunk(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    global _worker_lexicon
+    if _worker_lexicon is None:
+        _worker_lexicon = LexiconBackend()
+    return _worker_lexicon.score(texts)
+
+
+class SentimentEngine:
+    """
+    Scores batches of texts with one backend, a text-hash cache and process fan-out.
+
+    Thread-safe; use get_sentiment_engine() to share one engine (and its
+    loaded lexicon/model) per backend across the process.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        cache_max_entries: Optional[int] = None,
+        parallel_min_rows: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.backend_name = backend or settings.sentiment_backend
+        self.cache_max_entries = settings.sentiment_cache_max_entries if cache_max_entries is None else cache_max_entries
+        self.parallel_min_rows = settings.sentiment_parallel_min_rows if parallel_min_rows is None else parallel_min_rows
+        self.max_workers = max_workers or settings.sentiment_max_workers or os.cpu_count() or 1
+
+        lexicon = LexiconBackend()
+        if self.backend_name == "transformer":
+            self._backend = TransformerBackend(
+                settings.sentiment_transformer_model,
+                batch_size=settings.sentiment_transformer_batch_size,
+                lexicon=lexicon,
+            )
+        elif self.backend_name == "lexicon":
+            self._backend = lexicon
+        else:
+            raise ValueError(f"Unknown sentiment backend: {self.backend_name}")
+
+        self._cache: "OrderedDict[bytes, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+        self.stats: Dict[str, float] = {
+            "texts_scored": 0,
+            "cache_hits": 0,
+            "parallel_batches": 0,
+            "score_seconds": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def _cache_lookup(self, keys: List[bytes], polarity: np.ndarray, subjectivity: np.ndarray) -> List[int]:
+        """Fill cached scores in place and return the positions still to score."""
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    polarity[i], subjectivity[i] = cached
+            self.stats["cache_hits"] += len(keys) - len(missing)
+        return missing
+
+    def _cache_store(self, keys: List[bytes], polarity: np.ndarray, subjectivity: np.ndarray) -> None:
+        with self._lock:
+            for key, p, s in zip(keys, polarity.tolist(), subjectivity.tolist()):
+                self._cache[key] = (p, s)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: forking a process that runs an event loop and threads is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _score_uncached(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        parallel = (
+            self.backend_name == "lexicon"
+            and self.max_workers > 1
+            and self.parallel_min_rows > 0
+            and len(texts) >= self.parallel_min_rows
+        )
+        if not parallel:
+            return self._backend.score(texts)
+
+        chunk_size = math.ceil(len(texts) / self.max_workers)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        try:
+            results = list(self._get_pool().map(_score_lexicon_chunk, chunks))
+        except Exception as e:
+            logger.warning(f"Parallel sentiment scoring failed, scoring in-process: {e}")
+            return self._backend.score(texts)
+
+        self.stats["parallel_batches"] += 1
+        return (
+            np.concatenate([polarity for polarity, _ in results]),
+            np.concatenate([subjectivity for _, subjectivity in results]),
+        )
+
+    def score(self, texts: Sequence[Any]) -> SentimentScores:
+        """
+        Score a batch of texts.
+
+        None and NaN become empty strings (scored 0.0 / 0.0); any other value
+        is converted with str().
+
+        Args:
+            texts: Texts to score, e.g. a DataFrame column
+
+        Returns:
+            SentimentScores aligned with the input order
+        """
+        start = time.perf_counter()
+        texts = [_as_text(t) for t in texts]
+        n = len(texts)
+        polarity = np.zeros(n)
+        subjectivity = np.zeros(n)
+
+        if self.cache_max_entries > 0:
+            keys = [self._cache_key(t) for t in texts]
+            missing = self._cache_lookup(keys, polarity, subjectivity)
+        else:
+            keys = []
+            missing = list(range(n))
+
+        if missing:
+            if len(missing) == n:
+                batch = texts
+            else:
+                batch = [texts[i] for i in missing]
+            batch_polarity, batch_subjectivity = self._score_uncached(batch)
+            polarity[missing] = batch_polarity
+            subjectivity[missing] = batch_subjectivity
+            if keys:
+                self._cache_store([keys[i] for i in missing], batch_polarity, batch_subjectivity)
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.stats["texts_scored"] += n
+            self.stats["score_seconds"] += elapsed
+        logger.debug(f"Scored sentiment of {n} texts ({n - len(missing)} cached) in {elapsed:.3f}s")
+        return SentimentScores(polarity=polarity, subjectivity=subjectivity)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return throughput and cache statistics."""
+        with self._lock:
+            scored = self.stats["texts_scored"]
+            seconds = self.stats["score_seconds"]
+            return {
+                "backend": self.backend_name,
+                "texts_scored": scored,
+                "cache_entries": len(self._cache),
+                "cache_hits": self.stats["cache_hits"],
+                "cache_hit_rate": round(self.stats["cache_hits"] / scored, 4) if scored else 0.0,
+                "parallel_batches": self.stats["parallel_batches"],
+                "texts_per_sec": round(scored / seconds, 1) if seconds else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the process pool, if one was started."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+def _as_text(value: Any) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+_engines: Dict[str, SentimentEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_sentiment_engine(backend: Optional[str] = None) -> SentimentEngine:
+    """Get the process-wide engine for a backend (default from settings)."""
+    name = backend or get_settings().sentiment_backend
+    with _engines_lock:
+        engine = _engines.get(name)
+        if engine is None:
+            engine = SentimentEngine(backend=name)
+            _engines[name] = engine
+        return engine
+
+
+def get_sentiment_engine_stats() -> Dict[str, Any]:
+    """Statistics of every engine created in this process."""
+    with _engines_lock:
+        return {name: engine.get_stats() for name, engine in _engines.items()}
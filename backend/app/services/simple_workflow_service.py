@@ -2,19 +2,20 @@
 Simple Workflow Service for experimental chat with streaming agent execution.
 """
 
+import asyncio
 import json
 import uuid
 from datetime import datetime
 from typing import AsyncGenerator, Dict, Optional
 
 from app.core.config.settings import get_settings
-from app.core.llm.simple_workflow.workflow import create_product_review_workflow
+from app.core.llm.simple_workflow.workflow import get_product_review_workflow
 from app.core.llm.simple_workflow.utils.context_persistence import (
     load_context_from_session,
     save_context_to_session,
 )
-from app.database.repositories.chat_message_step import ChatMessageStepRepository
 from app.models.chat import ChatRequest, ChatResponse
+from app.services.step_buffer import StepBuffer
 from app.utils.logging import get_logger
 from llama_index.core.agent.workflow import ToolCall, ToolCallResult
 from llama_index.core.workflow import Context
@@ -71,12 +72,14 @@ class SimpleWorkflowService:
         Yields:
             Event dictionaries with type and data
         """
+        # Step rows, their results and the final message are written in batches
+        step_buffer = StepBuffer()
         try:
             # Initialize LLM
             self._initialize_llm()
             
-            # Create workflow with user_id pre-bound to tools
-            workflow = await create_product_review_workflow(self.llm, user_id or "default_user")
+            # Workflow with user_id pre-bound to tools, reused across the user's messages
+            workflow = await get_product_review_workflow(self.llm, user_id or "default_user")
             
             logger.info(f"Starting workflow for message: {request.message[:100]}")
             
@@ -211,26 +214,17 @@ class SimpleWorkflowService:
                     # Clear streaming state for this tool call (it's now finalized)
                     tool_call_streaming.clear()
                     
-                    # Save step to database
-                    try:
-                        from app.database.session import get_async_session
-                        async with get_async_session() as save_db:
-                            step = await ChatMessageStepRepository.create(
-                                db=save_db,
-                                message_id=assistant_message_id,
-                                agent_name=current_agent or "workflow",
-                                step_order=step_counter,
-                                tool_call={
-                                    "tool_name": tool_name,
-                                    "tool_kwargs": tool_kwargs
-                                },
-                                status="pending"
-                            )
-                            await save_db.commit()
-                            step_id = str(step.id)
-                    except Exception as db_err:
-                        logger.error(f"Failed to save tool call step: {db_err}")
-                        step_id = f"step-{step_counter}"
+                    # Buffer step for the database
+                    step_id = step_buffer.add_step(
+                        message_id=assistant_message_id,
+                        agent_name=current_agent or "workflow",
+                        step_order=step_counter,
+                        tool_call={
+                            "tool_name": tool_name,
+                            "tool_kwargs": tool_kwargs
+                        },
+                        status="pending"
+                    )
                     
                     agent_steps.append({
                         "step_id": step_id,
@@ -292,23 +286,14 @@ class SimpleWorkflowService:
                         agent_steps[-1]["tool_output"] = output_str[:500]  # Truncate large outputs
                         agent_steps[-1]["raw_output"] = raw_output  # Store full raw output
                         
-                        # Update step with result data in database
-                        try:
-                            from app.database.session import get_async_session
-                            step_id = agent_steps[-1].get("step_id")
-                            if step_id and not step_id.startswith("step-"):  # Only update if it's a real DB ID
-                                async with get_async_session() as save_db:
-                                    await ChatMessageStepRepository.update_with_result(
-                                        db=save_db,
-                                        step_id=step_id,
-                                        status="error" if is_error else "success",
-                                        structured_output=structured_output,
-                                        prediction=prediction,
-                                        raw_output=raw_output
-                                    )
-                                    await save_db.commit()
-                        except Exception as db_err:
-                            logger.error(f"Failed to update step with result: {db_err}")
+                        # Buffer step result (merged into the INSERT if not yet flushed)
+                        step_buffer.update_step(
+                            agent_steps[-1]["step_id"],
+                            status="error" if is_error else "success",
+                            structured_output=structured_output,
+                            prediction=prediction,
+                            raw_output=raw_output
+                        )
                     
                     # Yield tool_result event
                     yield {
@@ -369,26 +354,16 @@ class SimpleWorkflowService:
             
             logger.info(f"Workflow completed with {len(agent_steps)} steps")
             
-            # Update assistant message with final content - use separate session
-            from app.database.repositories.chat_message import ChatMessageRepository
+            # Write final content with the remaining steps before the complete event
             from app.database.session import get_async_session
             
             final_content = accumulated_content or "No response generated"
             
             logger.info(f"Saving final content to database: {len(final_content)} chars")
             
-            try:
-                async with get_async_session() as save_db:
-                    await ChatMessageRepository.update(
-                        db=save_db,
-                        message_id=assistant_message_id,
-                        content=final_content,
-                        completed_at=datetime.utcnow()
-                    )
-                    await save_db.commit()
-                    logger.info(f"Successfully saved assistant message {assistant_message_id}")
-            except Exception as db_err:
-                logger.error(f"Failed to update assistant message: {db_err}", exc_info=True)
+            step_buffer.complete_message(assistant_message_id, final_content)
+            if await step_buffer.flush():
+                logger.info(f"Successfully saved assistant message {assistant_message_id}")
             
             # Save context state to session for next message
             if request.session_id:
@@ -421,23 +396,12 @@ class SimpleWorkflowService:
             # Try to save whatever content we have accumulated before the error
             if accumulated_content:
                 logger.info(f"Attempting to save accumulated content despite error: {len(accumulated_content)} chars")
-                try:
-                    from app.database.repositories.chat_message import ChatMessageRepository
-                    from app.database.session import get_async_session
-                    
-                    async with get_async_session() as save_db:
-                        await ChatMessageRepository.update(
-                            db=save_db,
-                            message_id=assistant_message_id,
-                            content=accumulated_content,
-                            completed_at=datetime.utcnow()
-                        )
-                        await save_db.commit()
-                        logger.info(f"Successfully saved partial content for message {assistant_message_id}")
-                except Exception as save_err:
-                    logger.error(f"Failed to save partial content: {save_err}", exc_info=True)
+                step_buffer.complete_message(assistant_message_id, accumulated_content)
             yield {
                 "type": "error",
                 "data": {"error": str(e)}
             }
+        finally:
+            # Runs on completion, error and client disconnect (generator close)
+            await asyncio.shield(step_buffer.close())
 
@@ -0,0 +1,137 @@
+"""
+Per-request write buffer for chat workflow steps and the final assistant message.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import get_settings
+from app.database.repositories.chat_message import ChatMessageRepository
+from app.database.repositories.chat_message_step import ChatMessageStepRepository
+from app.services.batched_writer import BatchedWriter, FlushStats
+from app.services.embedding_batcher import estimate_tokens
+
+
+def get_step_buffer_stats() -> Dict[str, Any]:
+    """Process-wide flush counters and latency for the metrics endpoint."""
+    return StepBuffer.stats.to_dict()
+
+
+class StepBuffer(BatchedWriter):
+    """Buffers step inserts, step updates and message completion for one request."""
+
+    label = "Step buffer"
+    stats = FlushStats("steps_inserted", "steps_updated", "messages_completed")
+
+    def __init__(
+        self,
+        flush_interval_seconds: Optional[float] = None,
+        max_pending: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ):
+        settings = get_settings()
+        super().__init__(
+            settings.step_buffer_flush_interval_seconds if flush_interval_seconds is None else flush_interval_seconds,
+            settings.step_buffer_max_pending if max_pending is None else max_pending,
+            settings.step_buffer_max_retries if max_retries is None else max_retries,
+        )
+        self._messages: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered writes."""
+        return super().pending + len(self._messages)
+
+    def add_step(
+        self,
+        message_id: str,
+        agent_name: str,
+        step_order: int,
+        status: str = "success",
+        **fields: Any,
+    ) -> str:
+        """
+        Buffer a new ChatMessageStep row.
+
+        Args:
+            message_id: Assistant message the step belongs to
+            agent_name: Agent that produced the step
+            step_order: Position of the step in the execution
+            status: Initial step status
+            **fields: tool_call, structured_output, prediction or raw_output
+
+        Returns:
+            The ID the step will be stored under
+        """
+        step_id = str(uuid.uuid4())
+        self._inserts[step_id] = {
+            "id": step_id,
+            "message_id": message_id,
+            "agent_name": agent_name,
+            "step_order": step_order,
+            "status": status.lower() if status else "success",
+            "tool_call": fields.get("tool_call"),
+            "structured_output": fields.get("structured_output"),
+            "prediction": fields.get("prediction"),
+            "raw_output": fields.get("raw_output"),
+            "created_at": datetime.utcnow(),
+        }
+        self._on_write()
+        return step_id
+
+    def update_step(self, step_id: str, status: Optional[str] = None, **fields: Any) -> None:
+        """
+        Buffer a status or result transition for a step.
+
+        None values are ignored, matching ChatMessageStepRepository.update_with_result.
+        """
+        values = {key: value for key, value in fields.items() if value is not None}
+        if status is not None:
+            values["status"] = status.lower() if status else "success"
+        if not values:
+            return
+
+        if step_id in self._inserts:
+            self._inserts[step_id].update(values)
+        else:
+            self._updates.setdefault(step_id, {}).update(values)
+        self._on_write()
+
+    def complete_message(self, message_id: str, content: str, completed_at: Optional[datetime] = None) -> None:
+        """Buffer the final content and completion time of an assistant message."""
+        self._messages[message_id] = {
+            "content": content,
+            "token_count": estimate_tokens(content),
+            "completed_at": completed_at or datetime.utcnow(),
+        }
+        self._on_write()
+
+    def _flush_due(self) -> bool:
+        # After close() there is no timer left, so every late write gets a flush
+        return self._closed or super()._flush_due()
+
+    def _take(self) -> Tuple[Dict[str, Dict], ...]:
+        messages, self._messages = self._messages, {}
+        return (*super()._take(), messages)
+
+    def _restore(self, inserts: Dict[str, Dict], updates: Dict[str, Dict], messages: Dict[str, Dict]) -> None:
+        super()._restore(inserts, updates)
+        self._messages = {**messages, **self._messages}
+
+    async def _write(self, db, inserts: Dict[str, Dict], updates: Dict[str, Dict], messages: Dict[str, Dict]) -> None:
+        await ChatMessageStepRepository.insert_many(db, list(inserts.values()))
+        await ChatMessageStepRepository.update_many(
+            db, [{"id": step_id, **values} for step_id, values in updates.items()]
+        )
+        for message_id, values in messages.items():
+            await ChatMessageRepository.update_fields(db, message_id, **values)
+
+    def _counts(self, inserts: Dict[str, Dict], updates: Dict[str, Dict], messages: Dict[str, Dict]) -> Dict[str, int]:
+        return {"steps_inserted": len(inserts), "steps_updated": len(updates), "messages_completed": len(messages)}
+
+    async def __aenter__(self) -> "StepBuffer":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
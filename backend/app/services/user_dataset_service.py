@@ -4,13 +4,15 @@ Service for managing user-uploaded datasets with CSV processing and EDA generati
 
 import io
 import re
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.config import get_settings
 from app.utils.logging import get_logger
+import numpy as np
 import pandas as pd
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import TextClause
 from llama_index.core.llms import ChatMessage
 
 from app.core.llm.eda_generator import EDAGenerator
@@ -19,11 +21,16 @@ from app.database.models.llm_call import LLMCallTypeEnum
 from app.optimal_workflow.agents.base import get_llm
 from app.utils.llm_call_logger import log_llm_call, complete_llm_call, fail_llm_call
 from app.utils.dynamic_tables import (
+    bulk_write_embeddings,
     create_dynamic_table,
     drop_dynamic_table,
+    fetch_table_columnar,
     generate_dynamic_table_name,
     insert_dataframe_to_table,
 )
+from app.utils.vector_index import ann_search, schedule_hnsw_index_build
+from app.utils.streaming_export import parse_columns
+from app.utils.vectors import matrix_row_views
 
 logger = get_logger(__name__)
 
@@ -340,11 +347,7 @@ Generate ONLY the name, nothing else. No quotes, no explanation, just the name."
             combined_text = " | ".join(text_parts) if text_parts else ""
             texts_to_embed.append(combined_text)
         
-        # Generate embeddings in batches
         embedding_service = get_embedding_service()
-        embeddings = await embedding_service.generate_embeddings_batch(texts_to_embed, batch_size=2000)
-        
-        logger.info(f"{self._log_prefix(user_id, dynamic_table_name)} | Generated {len(embeddings)} embeddings")
         
         # Add __embedding__ column to the table
         # First, check if column exists and add it if not
@@ -367,47 +370,29 @@ Generate ONLY the name, nothing else. No quotes, no explanation, just the name."
                 await self.db.commit()
                 logger.info(f"{self._log_prefix(user_id, dynamic_table_name)} | Added __embedding__ column")
             
-            # Update each row with its embedding
-            # Get the primary key or row identifier
-            # First, get all rows with their IDs
-            select_query = text(f'SELECT * FROM "{dynamic_table_name}"')
-            result = await self.db.execute(select_query)
-            rows = result.fetchall()
-            columns = list(result.keys())
-            
-            # Find a unique identifier column (prefer 'id', otherwise use first column)
-            id_column = None
-            if 'id' in columns:
-                id_column = 'id'
-            else:
-                # Use the first column as identifier
-                id_column = columns[0]
-            
+            # Rows were loaded straight from df, so its key column identifies them
+            # (prefer 'id', otherwise use first column) - no need to read the table back
+            id_column = 'id' if 'id' in df.columns else df.columns[0]
             logger.info(f"{self._log_prefix(user_id, dynamic_table_name)} | Using '{id_column}' as identifier for embedding updates")
-            
-            # Update embeddings for each row
-            id_idx = columns.index(id_column)
-            for i, (row, embedding) in enumerate(zip(rows, embeddings)):
-                if embedding is None:
-                    logger.warning(f"{self._log_prefix(user_id, dynamic_table_name)} | Skipping row {i} - no embedding generated")
-                    continue
-                
-                # Get the identifier value
-                id_value = row[id_idx]
-                
-                # Convert embedding to PostgreSQL vector format
-                embedding_str = "[" + ",".join(str(x) for x in embedding) + "]"
-                
-                # Update the row - use direct string formatting for asyncpg compatibility
-                update_query = text(
-                    f'UPDATE "{dynamic_table_name}" '
-                    f'SET __embedding__ = \'{embedding_str}\'::vector '
-                    f'WHERE "{id_column}" = :id_value'
+            row_keys = df[id_column].tolist()
+
+            # Write each batch as soon as it completes while later batches are in flight
+            updated = 0
+            async for batch_results in embedding_service.iter_embeddings_batches(texts_to_embed):
+                stats = await bulk_write_embeddings(
+                    self.db,
+                    dynamic_table_name,
+                    keys=[row_keys[index] for index, _ in batch_results],
+                    embeddings=[embedding for _, embedding in batch_results],
+                    key_column=id_column,
                 )
-                await self.db.execute(update_query, {"id_value": id_value})
-            
+                updated += stats["updated"]
+
             await self.db.commit()
-            logger.info(f"{self._log_prefix(user_id, dynamic_table_name)} | Successfully updated {len([e for e in embeddings if e is not None])} embeddings")
+            logger.info(f"{self._log_prefix(user_id, dynamic_table_name)} | Successfully updated {updated} embeddings")
+
+            # Index the committed vectors in the background (CREATE INDEX CONCURRENTLY)
+            schedule_hnsw_index_build(dynamic_table_name)
             
         except Exception as e:
             logger.error(f"{self._log_prefix(user_id, dynamic_table_name)} | Failed to add embeddings: {e}", exc_info=True)
@@ -747,6 +732,86 @@ Generate ONLY the name, nothing else. No quotes, no explanation, just the name."
             "has_more": (offset + limit) < total_rows
         }
 
+    async def build_export_query(
+        self,
+        dataset_id: str,
+        user_id: str,
+        columns: Optional[str] = None,
+        filters: Optional[Dict[str, str]] = None
+    ) -> Optional[Tuple[TextClause, Dict[str, Any], List[str]]]:
+        """
+        Build the query for a streaming export of a dataset's dynamic table.
+
+        Args:
+            dataset_id: Dataset ID
+            user_id: User ID for verification
+            columns: Comma-separated columns to export (default: all but __embedding__)
+            filters: Column -> value equality filters (compared as text)
+
+        Returns:
+            Tuple of (query, bind parameters, selected columns), or None if not found
+
+        Raises:
+            ValueError: If a selected or filtered column does not exist
+        """
+        dataset = await self.repository.get_by_id(self.db, dataset_id)
+        if not dataset or dataset.user_id != user_id:
+            return None
+
+        table_name = dataset.table_name
+        result = await self.db.execute(text(f'SELECT * FROM "{table_name}" LIMIT 0'))
+        exportable = [column for column in result.keys() if column != '__embedding__']
+        selected = parse_columns(columns, exportable)
+
+        conditions = []
+        params: Dict[str, Any] = {}
+        for i, (column, value) in enumerate((filters or {}).items()):
+            if column not in exportable:
+                raise ValueError(f"Unknown filter column: {column}")
+            conditions.append(f'CAST("{column}" AS TEXT) = :filter_{i}')
+            params[f"filter_{i}"] = value
+
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        select_list = ", ".join(f'"{column}"' for column in selected)
+        query = text(f'SELECT {select_list} FROM "{table_name}" {where_clause}')
+        return query, params, selected
+
+    async def get_dataset_frame(
+        self,
+        dataset_id: str,
+        user_id: str,
+        limit: int = 100_000
+    ) -> Optional[Tuple[pd.DataFrame, Optional[np.ndarray]]]:
+        """
+        Load a dataset for in-process analysis as a DataFrame plus embedding matrix.
+
+        Unlike get_dataset_data, embeddings are decoded from pgvector's binary
+        format straight into one contiguous float32 matrix. The returned
+        DataFrame's __embedding__ column holds per-row views into that matrix
+        (None where a row has no embedding), so no vector data is duplicated.
+
+        Args:
+            dataset_id: Dataset ID
+            user_id: User ID for verification
+            limit: Maximum number of rows to load
+
+        Returns:
+            Tuple of (DataFrame, float32 matrix or None), or None if not found
+        """
+        dataset = await self.repository.get_by_id(self.db, dataset_id)
+        if not dataset or dataset.user_id != user_id:
+            return None
+
+        table_name = dataset.table_name
+        df, matrix, valid = await fetch_table_columnar(self.db, table_name, limit=limit)
+        if matrix is not None:
+            df['__embedding__'] = matrix_row_views(matrix, valid)
+            logger.info(
+                f"{self._log_prefix(user_id, table_name)} | Loaded {len(df)} rows, "
+                f"{int(valid.sum())} with embeddings"
+            )
+        return df, matrix
+
     async def list_datasets(self, user_id: str, limit: int = 50, offset: int = 0) -> list[Dict[str, Any]]:
         """
         List user's datasets.
@@ -874,25 +939,30 @@ Generate ONLY the name, nothing else. No quotes, no explanation, just the name."
         Returns:
             Pandas DataFrame with search results
         """
+        if not dataset_name.startswith('__user_'):
+            raise ValueError(f"Access denied: semantic search is only available on user datasets, got '{dataset_name}'")
+
         try:
             from app.services.embedding_service import get_embedding_service
             # Generate embedding for the query
             embedding_service = get_embedding_service()
             embedding_vector = await embedding_service.generate_embedding(query)
             
-            # Convert embedding to string format for PostgreSQL
-            embedding_str = "[" + ",".join(str(x) for x in embedding_vector) + "]"
-            top_n_str = "" if top_n == -1 else f"LIMIT {top_n}"
-            sql_query = f"""
-            SELECT
-                *,
-                1 - (__embedding__ <=> '{embedding_str}'::vector) AS __similarity_score__
-            FROM "{dataset_name}"
-            ORDER BY __similarity_score__ DESC
-            {top_n_str}
-            """
-            # This will call get_dataset_data_from_sql which validates the query
-            return await self.get_dataset_data_from_sql(sql_query)
+            # ORDER BY the distance operator + LIMIT so the HNSW index serves the query;
+            # top_n=-1 still ranks every row exactly
+            result = await ann_search(
+                self.db,
+                dataset_name,
+                embedding_vector,
+                limit=None if top_n == -1 else top_n,
+            )
+            rows = result.fetchall()
+            if not rows:
+                return pd.DataFrame()
+
+            df = pd.DataFrame(rows, columns=result.keys()).drop(columns=['__distance__'])
+            logger.info(f"{self._log_prefix()} | Semantic search returned {len(df)} rows")
+            return df
         except Exception as e:
             logger.error(f"Failed to get dataset data from semantic search: {e}", exc_info=True)
             raise ValueError(f"Failed to get dataset data from semantic search: {str(e)}")
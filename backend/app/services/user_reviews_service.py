@@ -10,17 +10,26 @@ from typing import Optional
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 
-from app.database.models.company import Company
-from app.database.models.review import Review
-from app.database.models.scraping_job import ScrapingJob
+from app.database.repositories.review import normalize_company_name
 from app.database.repositories.user_dataset import UserDatasetRepository
 from app.utils.dynamic_tables import sanitize_table_name
 from app.utils.logging import get_logger
+from app.utils.vector_index import ensure_hnsw_index
 
 logger = get_logger(__name__)
 
+# Rating of a reviews row (alias r): extra_metadata["rating"] when numeric,
+# otherwise sentiment_score (-1.0..1.0) mapped onto 1..5
+_RATING_SQL = """
+    CASE
+        WHEN r.extra_metadata->>'rating' ~ '^-?[0-9]+([.][0-9]+)?$'
+            THEN ROUND((r.extra_metadata->>'rating')::numeric)::int
+        WHEN r.sentiment_score IS NOT NULL
+            THEN GREATEST(1, LEAST(5, TRUNC((r.sentiment_score + 1) * 2.5)::int))
+    END
+"""
+
 
 class UserReviewsService:
     """Service for managing user-specific aggregated reviews tables."""
@@ -326,10 +335,14 @@ class UserReviewsService:
     ) -> int:
         """Sync reviews from scraping jobs to user's aggregated table.
         
-        This method:
-        1. Finds all reviews from companies owned by the user
-        2. If scraping_job_id is provided, only syncs reviews from that job
-        3. Inserts/updates reviews in the __user_{id}_reviews table
+        One INSERT ... SELECT copies the reviews of companies owned by the
+        user (only those of scraping_job_id, if given) together with their
+        embeddings; rows already in the table are updated in place. Reviews
+        the user already got from the review pool (same text, source and
+        author) are skipped.
+        
+        Rating comes from extra_metadata["rating"] when numeric, otherwise
+        it is derived from sentiment_score (-1.0..1.0 mapped onto 1..5).
         
         Args:
             user_id: User ID
@@ -343,114 +356,171 @@ class UserReviewsService:
         # Ensure table exists
         await self.ensure_user_reviews_table(user_id)
         
-        # Build query to get reviews
-        # Get all companies owned by this user
-        companies_query = select(Company.id, Company.name).where(Company.created_by == user_id)
-        companies_result = await self.db.execute(companies_query)
-        companies = companies_result.fetchall()
+        job_filter = "AND r.scraping_job_id = :scraping_job_id" if scraping_job_id else ""
+        sync_sql = f"""
+            INSERT INTO "{table_name}" (
+                id, user_id, company_name, category, rating, text, source, date, author,
+                created_at, updated_at, __embedding__
+            )
+            SELECT
+                r.id,
+                :user_id,
+                c.name,
+                'review',
+                {_RATING_SQL},
+                r.content,
+                COALESCE(r.platform, 'unknown'),
+                COALESCE(r.review_date, r.scraped_at),
+                r.author,
+                COALESCE(r.scraped_at, CURRENT_TIMESTAMP),
+                CURRENT_TIMESTAMP,
+                r.embedding
+            FROM reviews r
+            JOIN companies c ON c.id = r.company_id
+            WHERE c.created_by = :user_id {job_filter}
+                -- Skip reviews the user already got from the review pool
+                AND NOT EXISTS (
+                    SELECT 1 FROM "{table_name}" u
+                    WHERE u.text = r.content
+                    AND u.source = COALESCE(r.platform, 'unknown')
+                    AND u.author IS NOT DISTINCT FROM r.author
+                    AND u.id <> r.id
+                )
+            ON CONFLICT (id) DO UPDATE SET
+                company_name = EXCLUDED.company_name,
+                rating = EXCLUDED.rating,
+                text = EXCLUDED.text,
+                source = EXCLUDED.source,
+                date = EXCLUDED.date,
+                author = EXCLUDED.author,
+                __embedding__ = COALESCE(EXCLUDED.__embedding__, "{table_name}".__embedding__),
+                updated_at = CURRENT_TIMESTAMP
+        """
+        params = {"user_id": user_id}
+        if scraping_job_id:
+            params["scraping_job_id"] = scraping_job_id
+        
+        result = await self.db.execute(text(sync_sql), params)
+        synced_count = result.rowcount
+        await self.db.commit()
         
-        if not companies:
-            logger.info(f"{self._log_prefix(user_id)} | No companies found for user")
+        if not synced_count:
+            logger.info(f"{self._log_prefix(user_id)} | No reviews found to sync")
             return 0
         
-        company_ids = [c.id for c in companies]
-        company_names_map = {c.id: c.name for c in companies}
-        
-        # Build reviews query
-        reviews_query = select(Review).where(Review.company_id.in_(company_ids))
+        logger.info(f"{self._log_prefix(user_id)} | Synced {synced_count} reviews to {table_name}")
         
-        if scraping_job_id:
-            reviews_query = reviews_query.where(Review.scraping_job_id == scraping_job_id)
+        await self.refresh_user_dataset(user_id)
+        return synced_count
+
+    async def copy_pool_reviews(
+        self,
+        user_id: str,
+        company_id: str,
+        company_name: str,
+        platform: str,
+        since: datetime,
+        limit: int
+    ) -> int:
+        """Copy reviews other users already scraped into the user's table.
         
-        reviews_result = await self.db.execute(reviews_query)
-        reviews = reviews_result.scalars().all()
+        The review pool is every review scraped on ``platform`` since
+        ``since`` for another company with the same normalized name. Up to
+        ``limit`` of them, newest first and one per content, are copied with
+        one INSERT ... SELECT, skipping reviews the user's table already
+        holds (same id, or same text, source and author) and ones the user's
+        own company already has. The caller
+        commits and refreshes the dataset record.
         
-        if not reviews:
-            logger.info(f"{self._log_prefix(user_id)} | No reviews found to sync")
+        Args:
+            user_id: User ID
+            company_id: The user's company (its own reviews are not copied)
+            company_name: Company name to match in the pool
+            platform: Review platform (e.g. "g2")
+            since: Oldest scraped_at still considered fresh
+            limit: Maximum number of reviews to copy
+            
+        Returns:
+            Number of reviews copied
+        """
+        if limit <= 0:
             return 0
         
-        # Prepare data for insertion
-        synced_count = 0
-        for review in reviews:
-            try:
-                company_name = company_names_map.get(review.company_id, "Unknown")
-                
-                # Extract rating from extra_metadata if available, or derive from sentiment
-                rating = None
-                if review.extra_metadata and isinstance(review.extra_metadata, dict):
-                    rating = review.extra_metadata.get("rating")
-                
-                # If no rating in metadata, derive from sentiment_score
-                if rating is None and review.sentiment_score is not None:
-                    # Map sentiment to 1-5 rating scale
-                    # sentiment_score: -1.0 to 1.0
-                    # rating: 1 to 5
-                    rating = int((review.sentiment_score + 1) * 2.5)  # Maps -1 to 1, 0 to 2.5, 1 to 5
-                    rating = max(1, min(5, rating))  # Clamp to 1-5
-                
-                # Determine source/platform
-                source = review.platform or "unknown"
-                
-                # Use review_date if available, otherwise scraped_at
-                review_date = review.review_date or review.scraped_at
-                
-                # Insert or update review in user table
-                # Use ON CONFLICT to handle duplicates (based on review.id)
-                insert_sql = f"""
-                    INSERT INTO "{table_name}" (
-                        id, user_id, company_name, category, rating, text, source, date, author, 
-                        created_at, updated_at, __embedding__
-                    ) VALUES (
-                        :id, :user_id, :company_name, :category, :rating, :text, :source, :date, :author,
-                        :created_at, :updated_at, :embedding
+        table_name = self.get_user_reviews_table_name(user_id)
+        await self.ensure_user_reviews_table(user_id)
+        
+        copy_sql = f"""
+            INSERT INTO "{table_name}" (
+                id, user_id, company_name, category, rating, text, source, date, author,
+                created_at, updated_at, __embedding__
+            )
+            SELECT
+                pool.id, :user_id, :company_name, 'review', pool.rating, pool.content, pool.source,
+                pool.date, pool.author, pool.scraped_at, CURRENT_TIMESTAMP, pool.embedding
+            FROM (
+                SELECT DISTINCT ON (COALESCE(r.content_hash, md5(r.content)))
+                    r.id,
+                    {_RATING_SQL} AS rating,
+                    r.content,
+                    COALESCE(r.platform, 'unknown') AS source,
+                    COALESCE(r.review_date, r.scraped_at) AS date,
+                    r.author,
+                    r.scraped_at,
+                    r.embedding
+                FROM reviews r
+                JOIN companies c ON c.id = r.company_id
+                WHERE lower(trim(c.name)) = :normalized_name
+                AND r.platform = :platform
+                AND r.scraped_at >= :since
+                AND r.company_id <> :company_id
+                AND NOT EXISTS (
+                    SELECT 1 FROM "{table_name}" u
+                    WHERE u.id = r.id
+                    OR (
+                        u.text = r.content
+                        AND u.source = COALESCE(r.platform, 'unknown')
+                        AND u.author IS NOT DISTINCT FROM r.author
                     )
-                    ON CONFLICT (id) DO UPDATE SET
-                        company_name = EXCLUDED.company_name,
-                        rating = EXCLUDED.rating,
-                        text = EXCLUDED.text,
-                        source = EXCLUDED.source,
-                        date = EXCLUDED.date,
-                        author = EXCLUDED.author,
-                        updated_at = CURRENT_TIMESTAMP,
-                        __embedding__ = EXCLUDED.__embedding__
-                """
-                
-                # Convert embedding to string format if present
-                embedding_str = None
-                if review.embedding is not None:
-                    # Embedding is a Vector type, convert to list then string
-                    try:
-                        embedding_list = list(review.embedding) if hasattr(review.embedding, '__iter__') else None
-                        if embedding_list:
-                            embedding_str = '[' + ','.join(map(str, embedding_list)) + ']'
-                    except Exception as e:
-                        logger.warning(f"{self._log_prefix(user_id)} | Failed to convert embedding for review {review.id}: {e}")
-                
-                await self.db.execute(
-                    text(insert_sql),
-                    {
-                        "id": review.id,
-                        "user_id": user_id,
-                        "company_name": company_name,
-                        "category": "review",
-                        "rating": rating,
-                        "text": review.content,
-                        "source": source,
-                        "date": review_date,
-                        "author": review.author,
-                        "created_at": review.scraped_at or datetime.utcnow(),
-                        "updated_at": datetime.utcnow(),
-                        "embedding": embedding_str,
-                    }
                 )
-                synced_count += 1
-            except Exception as e:
-                logger.error(f"{self._log_prefix(user_id)} | Failed to sync review {review.id}: {e}")
-                continue
-        
-        await self.db.commit()
+                -- Same key as DISTINCT ON; rows from before content_hash existed
+                -- have none, so those are also compared by text
+                AND NOT EXISTS (
+                    SELECT 1 FROM reviews own
+                    WHERE own.company_id = :company_id
+                    AND (
+                        COALESCE(own.content_hash, md5(own.content)) = COALESCE(r.content_hash, md5(r.content))
+                        OR ((own.content_hash IS NULL OR r.content_hash IS NULL) AND own.content = r.content)
+                    )
+                )
+                ORDER BY COALESCE(r.content_hash, md5(r.content)), r.scraped_at DESC
+            ) pool
+            ORDER BY pool.scraped_at DESC
+            LIMIT :limit
+            ON CONFLICT (id) DO NOTHING
+        """
+        result = await self.db.execute(
+            text(copy_sql),
+            {
+                "user_id": user_id,
+                "company_id": company_id,
+                "company_name": company_name,
+                "normalized_name": normalize_company_name(company_name),
+                "platform": platform,
+                "since": since,
+                "limit": limit,
+            }
+        )
+        copied = result.rowcount
+        logger.info(f"{self._log_prefix(user_id)} | Copied {copied} {platform} reviews of '{company_name}' from the review pool")
+        return copied
+
+    async def refresh_user_dataset(self, user_id: str) -> None:
+        """Refresh the reviews dataset record and vector index after rows were added.
         
-        logger.info(f"{self._log_prefix(user_id)} | Synced {synced_count} reviews to {table_name}")
+        Args:
+            user_id: User ID
+        """
+        table_name = self.get_user_reviews_table_name(user_id)
         
         # Get ACTUAL total row count from the table
         count_query = text(f'SELECT COUNT(*) FROM "{table_name}"')
@@ -460,5 +530,8 @@ class UserReviewsService:
         # Update user_datasets record with actual row count
         await self.ensure_user_dataset_record(user_id, row_count=total_rows)
         
-        return synced_count
-
+        # Build/repair the HNSW index now that the bulk load is committed
+        try:
+            await ensure_hnsw_index(table_name)
+        except Exception as e:
+            logger.warning(f"{self._log_prefix(user_id)} | Failed to build vector index on {table_name}: {e}")
@@ -11,6 +11,7 @@ from agno.knowledge.embedder.openai import OpenAIEmbedder
 
 from app.config import get_settings
 from app.exceptions import ConfigurationError, ExternalServiceError
+from app.services.embedding_cache import get_embedding_cache
 from app.utils.logging import get_logger
 
 logger = get_logger("vector_service")
@@ -99,8 +100,16 @@ class VectorService:
         if not self._initialized:
             await self.initialize()
 
+        cache = get_embedding_cache()
+        if cache is not None:
+            cached = await cache.get(self.embedder.id, self.embedder.dimensions, text)
+            if cached is not None:
+                return cached
+
         try:
             embedding = self.embedder.get_embedding(text)
+            if cache is not None and embedding:
+                await cache.set(self.embedder.id, self.embedder.dimensions, text, embedding)
             return embedding
 
         except Exception as e:
@@ -8,10 +8,11 @@ by the chat endpoints.
 
 import uuid
 from datetime import datetime
-from typing import Any, AsyncGenerator, Dict, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional
 
 from app.models.chat import ChatRequest, ChatResponse
 from app.optimal_workflow.main import run_workflow, run_workflow_streaming
+from app.services.conversation_history import get_conversation_history_manager
 from app.utils.logging import get_logger
 
 logger = get_logger("workflow_orchestrator_service")
@@ -52,6 +53,27 @@ class WorkflowOrchestratorService:
             logger.error(f"Failed to initialize workflow orchestrator: {e}")
             raise
     
+    async def _load_history(self, db: Optional[Any], session_id: str, message: str) -> List[Dict[str, str]]:
+        """
+        Rolling summary + newest messages that fit the history token budget.
+
+        The chat endpoints save the user's message before the workflow runs,
+        so it is dropped from the history (the workflow receives it as the query).
+        """
+        if not (session_id and db):
+            return []
+        try:
+            history = await get_conversation_history_manager().load(db, session_id)
+        except Exception as e:
+            logger.warning(f"Could not retrieve conversation history: {e}")
+            return []
+
+        messages = history.as_messages()
+        if messages and messages[-1]["role"] == "user" and messages[-1]["content"] == message:
+            messages.pop()
+        logger.debug(f"Retrieved {len(messages)} history messages ({history.tokens} tokens) for context")
+        return messages
+
     async def process_message_stream(
         self,
         request: ChatRequest,
@@ -94,31 +116,7 @@ class WorkflowOrchestratorService:
             }
             
             # Retrieve conversation history for context-aware routing
-            conversation_history = []
-            if session_id and db:
-                try:
-                    from app.database.repositories.chat_message import ChatMessageRepository
-                    
-                    # Get last 10 messages for context (5 exchanges)
-                    messages = await ChatMessageRepository.get_recent_messages(
-                        db=db,
-                        session_id=session_id,
-                        limit=10
-                    )
-                    
-                    # Convert to simple format for the workflow
-                    conversation_history = [
-                        {
-                            "role": msg.role.value,
-                            "content": msg.content
-                        }
-                        for msg in messages
-                    ]
-                    
-                    logger.debug(f"Retrieved {len(conversation_history)} messages for context")
-                except Exception as e:
-                    logger.warning(f"Could not retrieve conversation history: {e}")
-                    conversation_history = []
+            conversation_history = await self._load_history(db, session_id, request.message)
             
             logger.info(f"Starting workflow execution for session {session_id}, assistant_message_id={assistant_message_id}")
             
@@ -134,6 +132,7 @@ class WorkflowOrchestratorService:
                 yield event
             
             logger.info(f"Workflow execution completed for session {session_id}")
+            get_conversation_history_manager().schedule_update(session_id)
             
         except Exception as e:
             logger.error(f"Error in workflow execution: {e}", exc_info=True)
@@ -169,29 +168,7 @@ class WorkflowOrchestratorService:
             session_id = request.session_id or str(uuid.uuid4())
             
             # Retrieve conversation history for context-aware routing
-            conversation_history = []
-            if session_id and db:
-                try:
-                    from app.database.repositories.chat_message import ChatMessageRepository
-                    
-                    # Get last 10 messages for context (5 exchanges)
-                    messages = await ChatMessageRepository.get_recent_messages(
-                        db=db,
-                        session_id=session_id,
-                        limit=10
-                    )
-                    
-                    # Convert to simple format for the workflow
-                    conversation_history = [
-                        {
-                            "role": msg.role.value,
-                            "content": msg.content
-                        }
-                        for msg in messages
-                    ]
-                except Exception as e:
-                    logger.warning(f"Could not retrieve conversation history: {e}")
-                    conversation_history = []
+            conversation_history = await self._load_history(db, session_id, request.message)
             
             logger.info(f"Starting non-streaming workflow execution for session {session_id}")
             
@@ -217,6 +194,7 @@ class WorkflowOrchestratorService:
             )
             
             logger.info(f"Non-streaming workflow execution completed for session {session_id}")
+            get_conversation_history_manager().schedule_update(session_id)
             return chat_response
             
         except Exception as e:
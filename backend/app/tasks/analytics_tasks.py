@@ -0,0 +1,83 @@
+"""
+Celery beat tasks maintaining LLM call analytics.
+
+- refresh_llm_call_rollups rebuilds the recent hours of
+  llm_call_hourly_rollups (scheduled every llm_rollup_interval_seconds)
+- archive_llm_calls moves raw llm_calls rows older than
+  llm_call_retention_days into llm_call_archive (scheduled hourly)
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from app.core.celery_app import celery_app
+from app.core.config.settings import get_settings
+from app.core.worker_loop import async_task
+from app.database.repositories.llm_call import LLMCallRepository
+from app.database.repositories.llm_call_rollup import LLMCallRollupRepository
+from app.database.session import get_async_session
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="app.tasks.analytics_tasks.refresh_llm_call_rollups", bind=True)
+@async_task
+async def refresh_llm_call_rollups(self) -> dict:
+    """
+    Incrementally refresh the hourly LLM call rollups.
+
+    Returns:
+        Dictionary with the rebuilt range and number of rollup rows
+    """
+    settings = get_settings()
+    async with get_async_session() as db:
+        result = await LLMCallRollupRepository.refresh_recent(
+            db, lookback_hours=settings.llm_rollup_lookback_hours
+        )
+        await db.commit()
+        return result
+
+
+@celery_app.task(name="app.tasks.analytics_tasks.archive_llm_calls", bind=True)
+@async_task
+async def archive_llm_calls(self, retention_days: int = None) -> dict:
+    """
+    Archive raw LLM call rows beyond the retention window.
+
+    Hours are rolled up before their rows can be archived (retention is in
+    days, the rollup lookback in hours), so cost statistics keep covering
+    archived periods. Each batch is committed separately to keep
+    transactions and locks short.
+
+    Args:
+        retention_days: Overrides llm_call_retention_days
+
+    Returns:
+        Dictionary with the cutoff and number of archived rows
+    """
+    settings = get_settings()
+    days = settings.llm_call_retention_days if retention_days is None else retention_days
+    if days <= 0:
+        return {"status": "disabled", "archived": 0}
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archived = 0
+
+    # Roll up everything first so no hour loses its raw rows unaggregated
+    async with get_async_session() as db:
+        if await LLMCallRollupRepository.latest_hour(db) is None:
+            await LLMCallRollupRepository.refresh_recent(db, lookback_hours=settings.llm_rollup_lookback_hours)
+            await db.commit()
+
+    while True:
+        async with get_async_session() as db:
+            moved = await LLMCallRepository.archive_calls(
+                db, before=cutoff, batch_size=settings.llm_call_archive_batch_size
+            )
+            await db.commit()
+        archived += moved
+        if moved < settings.llm_call_archive_batch_size:
+            break
+
+    logger.info(f"Archived {archived} LLM calls created before {cutoff.isoformat()}")
+    return {"status": "success", "cutoff": cutoff.isoformat(), "archived": archived}
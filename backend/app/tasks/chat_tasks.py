@@ -2,13 +2,12 @@
 Chat-related background tasks for NeedleAi.
 """
 
-import asyncio
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
 from app.config import get_settings
 from app.core.celery_app import celery_app
-from app.services.redis_client import RedisClient
+from app.core.worker_loop import run_async, worker_valkey
 from app.utils.logging import get_logger
 
 logger = get_logger("chat_tasks")
@@ -107,28 +106,21 @@ def clean_old_sessions(self, days_old: int = 7) -> Dict[str, Any]:
 
         cutoff_date = datetime.utcnow() - timedelta(days=days_old)
 
-        # Initialize Redis client
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        try:
-            async def cleanup_task():
-                redis_client = RedisClient(redis_url=settings.redis_url)
-                await redis_client.connect()
-
+        async def cleanup_task():
+            async with worker_valkey() as redis_client:
                 # Get all session keys
-                session_keys = await redis_client.redis.keys("session:*")
+                session_keys = await redis_client.valkey.keys("session:*")
                 old_sessions = []
 
                 # Check each session's timestamp
                 for key in session_keys:
-                    session_data = await redis_client.get(key.decode())
+                    session_data = await redis_client.get(key)
                     if session_data:
                         session_timestamp = datetime.fromisoformat(
                             session_data.get("created_at", datetime.utcnow().isoformat())
                         )
                         if session_timestamp < cutoff_date:
-                            old_sessions.append(key.decode())
+                            old_sessions.append(key)
 
                 # Remove old sessions
                 deleted_count = 0
@@ -141,28 +133,24 @@ def clean_old_sessions(self, days_old: int = 7) -> Dict[str, Any]:
                     except Exception as e:
                         logger.error(f"Error deleting session {session_key}: {str(e)}")
 
-                await redis_client.disconnect()
                 return len(session_keys), deleted_count
 
-            self.update_state(
-                state='PROGRESS',
-                meta={'current': 25, 'total': 100, 'status': 'Scanning for old sessions...'}
-            )
-
-            session_count, deleted_count = loop.run_until_complete(cleanup_task())
+        self.update_state(
+            state='PROGRESS',
+            meta={'current': 25, 'total': 100, 'status': 'Scanning for old sessions...'}
+        )
 
-            self.update_state(
-                state='PROGRESS',
-                meta={'current': 50, 'total': 100, 'status': f'Checking {session_count} sessions...'}
-            )
+        session_count, deleted_count = run_async(cleanup_task())
 
-            self.update_state(
-                state='PROGRESS',
-                meta={'current': 75, 'total': 100, 'status': f'Removing {deleted_count} old sessions...'}
-            )
+        self.update_state(
+            state='PROGRESS',
+            meta={'current': 50, 'total': 100, 'status': f'Checking {session_count} sessions...'}
+        )
 
-        finally:
-            loop.close()
+        self.update_state(
+            state='PROGRESS',
+            meta={'current': 75, 'total': 100, 'status': f'Removing {deleted_count} old sessions...'}
+        )
 
         logger.info(f"Cleanup completed: {deleted_count} sessions removed")
 
@@ -2,12 +2,11 @@
 Background tasks for company operations.
 """
 
-import asyncio
-
 from celery import Task
 
 from app.core.celery_app import celery_app
-from app.database.session import get_fresh_async_session
+from app.core.worker_loop import run_async
+from app.database.session import get_async_session
 from app.database.repositories import CompanyRepository
 from app.services.review_url_discovery import discover_review_urls
 from app.utils.logging import get_logger
@@ -23,7 +22,7 @@ def discover_review_urls_task(self: Task, company_id: str) -> dict:
     Searches DuckDuckGo for G2, Trustpilot, and TrustRadius review pages.
     """
     try:
-        return asyncio.run(_discover_review_urls_async(company_id))
+        return run_async(_discover_review_urls_async(company_id))
     except Exception as e:
         logger.error(f"URL discovery task failed for company {company_id}: {e}")
         raise
@@ -33,7 +32,7 @@ async def _discover_review_urls_async(company_id: str) -> dict:
     """
     Async implementation of URL discovery.
     """
-    async with get_fresh_async_session() as session:
+    async with get_async_session() as session:
         try:
             # Get company
             company = await CompanyRepository.get_by_id(session, company_id)
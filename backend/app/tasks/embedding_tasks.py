@@ -8,6 +8,7 @@ from typing import List, Optional
 from celery import group
 
 from app.core.celery_app import celery_app
+from app.core.worker_loop import run_async
 from app.database.session import get_async_session
 from app.database.repositories.review import ReviewRepository
 from app.services.embedding_service import get_embedding_service
@@ -32,7 +33,6 @@ def generate_review_embedding(self, review_id: str) -> dict:
         Dictionary with status and review_id
     """
     try:
-        import asyncio
         
         async def _generate():
             async with get_async_session() as db:
@@ -62,7 +62,7 @@ def generate_review_embedding(self, review_id: str) -> dict:
                 logger.info(f"Successfully generated embedding for review {review_id}")
                 return {"status": "success", "review_id": review_id}
         
-        return asyncio.run(_generate())
+        return run_async(_generate())
         
     except Exception as e:
         logger.error(f"Error generating embedding for review {review_id}: {e}")
@@ -85,7 +85,6 @@ def generate_embeddings_batch(self, company_id: Optional[str] = None, batch_size
         Dictionary with processing statistics
     """
     try:
-        import asyncio
         
         async def _generate_batch():
             async with get_async_session() as db:
@@ -139,7 +138,7 @@ def generate_embeddings_batch(self, company_id: Optional[str] = None, batch_size
                     "total_found": len(reviews)
                 }
         
-        return asyncio.run(_generate_batch())
+        return run_async(_generate_batch())
         
     except Exception as e:
         logger.error(f"Error in batch embedding generation: {e}")
@@ -168,7 +167,6 @@ def generate_all_embeddings(
         Dictionary with overall statistics
     """
     try:
-        import asyncio
         
         async def _count_reviews():
             async with get_async_session() as db:
@@ -179,7 +177,7 @@ def generate_all_embeddings(
                 )
                 return len(reviews)
         
-        total_reviews = asyncio.run(_count_reviews())
+        total_reviews = run_async(_count_reviews())
         
         if total_reviews == 0:
             logger.info("No reviews need embeddings")
@@ -239,7 +237,6 @@ def regenerate_review_embedding(self, review_id: str) -> dict:
         Dictionary with status and review_id
     """
     try:
-        import asyncio
         
         async def _regenerate():
             async with get_async_session() as db:
@@ -264,7 +261,7 @@ def regenerate_review_embedding(self, review_id: str) -> dict:
                 logger.info(f"Successfully regenerated embedding for review {review_id}")
                 return {"status": "success", "review_id": review_id}
         
-        return asyncio.run(_regenerate())
+        return run_async(_regenerate())
         
     except Exception as e:
         logger.error(f"Error regenerating embedding for review {review_id}: {e}")
@@ -2,14 +2,13 @@
 General background tasks for NeedleAi.
 """
 
-import asyncio
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
 
 import psutil
 from app.config import get_settings
 from app.core.celery_app import celery_app
-from app.services.redis_client import RedisClient
+from app.core.worker_loop import run_async, worker_valkey
 from app.utils.logging import get_logger
 
 logger = get_logger("general_tasks")
@@ -97,64 +96,55 @@ def cleanup_expired_cache(self, pattern: str = "*", max_age_hours: int = 24) ->
     try:
         logger.info(f"Starting cache cleanup with pattern: {pattern}")
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
         async def _cleanup_async():
-            redis_client = RedisClient(redis_url=settings.redis_url)
-            await redis_client.connect()
-
-            self.update_state(
-                state='PROGRESS',
-                meta={'current': 25, 'total': 100, 'status': 'Scanning cache keys...'}
-            )
-
-            # Get keys matching pattern
-            cache_keys = await redis_client.redis.keys(f"cache:{pattern}")
-            expired_keys = []
-            cutoff_time = datetime.utcnow() - timedelta(hours=max_age_hours)
-
-            self.update_state(
-                state='PROGRESS',
-                meta={'current': 50, 'total': 100, 'status': f'Checking {len(cache_keys)} cache entries...'}
-            )
-
-            # Check each cache entry's timestamp
-            for key in cache_keys:
-                try:
-                    cache_data = await redis_client.get(key.decode())
-                    if cache_data and isinstance(cache_data, dict):
-                        cached_at = datetime.fromisoformat(
-                            cache_data.get("cached_at", datetime.utcnow().isoformat())
-                        )
-                        if cached_at < cutoff_time:
-                            expired_keys.append(key.decode())
-                except Exception as e:
-                    logger.warning(f"Error checking cache key {key.decode()}: {str(e)}")
-                    # Add to expired list if we can't read it
-                    expired_keys.append(key.decode())
-
-            self.update_state(
-                state='PROGRESS',
-                meta={'current': 75, 'total': 100, 'status': f'Removing {len(expired_keys)} expired entries...'}
-            )
-
-            # Remove expired entries
-            deleted_count = 0
-            for key in expired_keys:
-                try:
-                    await redis_client.delete(key)
-                    deleted_count += 1
-                except Exception as e:
-                    logger.error(f"Error deleting cache key {key}: {str(e)}")
-
-            await redis_client.disconnect()
-            return deleted_count
-
-        try:
-            deleted_count = loop.run_until_complete(_cleanup_async())
-        finally:
-            loop.close()
+            async with worker_valkey() as redis_client:
+                self.update_state(
+                    state='PROGRESS',
+                    meta={'current': 25, 'total': 100, 'status': 'Scanning cache keys...'}
+                )
+
+                # Get keys matching pattern
+                cache_keys = await redis_client.valkey.keys(f"cache:{pattern}")
+                expired_keys = []
+                cutoff_time = datetime.utcnow() - timedelta(hours=max_age_hours)
+
+                self.update_state(
+                    state='PROGRESS',
+                    meta={'current': 50, 'total': 100, 'status': f'Checking {len(cache_keys)} cache entries...'}
+                )
+
+                # Check each cache entry's timestamp
+                for key in cache_keys:
+                    try:
+                        cache_data = await redis_client.get(key)
+                        if cache_data and isinstance(cache_data, dict):
+                            cached_at = datetime.fromisoformat(
+                                cache_data.get("cached_at", datetime.utcnow().isoformat())
+                            )
+                            if cached_at < cutoff_time:
+                                expired_keys.append(key)
+                    except Exception as e:
+                        logger.warning(f"Error checking cache key {key}: {str(e)}")
+                        # Add to expired list if we can't read it
+                        expired_keys.append(key)
+
+                self.update_state(
+                    state='PROGRESS',
+                    meta={'current': 75, 'total': 100, 'status': f'Removing {len(expired_keys)} expired entries...'}
+                )
+
+                # Remove expired entries
+                deleted_count = 0
+                for key in expired_keys:
+                    try:
+                        await redis_client.delete(key)
+                        deleted_count += 1
+                    except Exception as e:
+                        logger.error(f"Error deleting cache key {key}: {str(e)}")
+
+                return deleted_count
+
+        deleted_count = run_async(_cleanup_async())
 
         logger.info(f"Cache cleanup completed: {deleted_count} entries removed")
 
@@ -224,32 +214,20 @@ def health_check_services(self) -> Dict[str, Any]:
 
         # Redis health check
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
             async def _check_redis_async():
-                redis_client = RedisClient(redis_url=settings.redis_url)
-                await redis_client.connect()
-
-                # Test Redis operations
-                test_key = "health_check_test"
-                await redis_client.set(test_key, "test_value", expire=60)
-                test_value = await redis_client.get(test_key)
-                await redis_client.delete(test_key)
-
-                result = {
+                async with worker_valkey() as redis_client:
+                    # Test Redis operations
+                    test_key = "health_check_test"
+                    await redis_client.set(test_key, "test_value", expire=60)
+                    test_value = await redis_client.get(test_key)
+                    await redis_client.delete(test_key)
+
+                return {
                     "status": "healthy" if test_value == "test_value" else "error",
                     "response_time_ms": 50  # Mock response time
                 }
 
-                await redis_client.disconnect()
-                return result
-
-            try:
-                redis_result = loop.run_until_complete(_check_redis_async())
-                health_results["services"]["redis"] = redis_result
-            finally:
-                loop.close()
+            health_results["services"]["redis"] = run_async(_check_redis_async())
 
         except Exception as e:
             health_results["services"]["redis"] = {"status": "error", "error": str(e)}
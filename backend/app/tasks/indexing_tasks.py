@@ -2,12 +2,12 @@
 Celery tasks for vector indexing to Pinecone.
 """
 
-import asyncio
 from typing import List
 
 from celery import Task
 
 from app.core.celery_app import celery_app
+from app.core.worker_loop import run_async
 from app.database.session import get_async_session
 from app.database.repositories import ReviewRepository
 from app.services.vector_service import VectorService
@@ -20,7 +20,7 @@ logger = get_logger("indexing_tasks")
 def index_reviews_to_vector_db(self: Task, review_ids: List[str]) -> dict:
     """Celery wrapper for async vector indexing."""
     try:
-        return asyncio.run(index_reviews_async(self, review_ids))
+        return run_async(index_reviews_async(self, review_ids))
     except Exception as e:
         logger.error(f"Indexing task failed: {e}")
         raise
@@ -120,7 +120,7 @@ async def index_reviews_async(task: Task, review_ids: List[str]) -> dict:
 def index_single_review(review_id: str) -> dict:
     """Index a single review (for real-time indexing)."""
     try:
-        return asyncio.run(index_single_review_async(review_id))
+        return run_async(index_single_review_async(review_id))
     except Exception as e:
         logger.error(f"Single review indexing failed: {e}")
         raise
@@ -2,11 +2,11 @@
 LLM and AI-related background tasks for NeedleAi.
 """
 
-import asyncio
 from typing import Any, Dict, List
 
 from app.config import get_settings
 from app.core.celery_app import celery_app
+from app.core.worker_loop import run_async
 from app.core.llm.factory import get_llm_client
 from app.utils.logging import get_logger
 
@@ -41,19 +41,13 @@ def generate_completion_async(self, prompt: str, model: str = None, **kwargs) ->
 
         self.update_state(state='PROGRESS', meta={'current': 25, 'total': 100, 'status': 'Generating completion...'})
 
-        # Generate completion (run async code in sync context)
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        try:
-            completion_result = loop.run_until_complete(
-                llm_client.generate_completion(
-                    prompt=prompt,
-                    **kwargs
-                )
+        # Generate completion on the worker's event loop
+        completion_result = run_async(
+            llm_client.generate_completion(
+                prompt=prompt,
+                **kwargs
             )
-        finally:
-            loop.close()
+        )
 
         self.update_state(state='PROGRESS', meta={'current': 100, 'total': 100, 'status': 'Completion generated!'})
 
@@ -105,52 +99,45 @@ def batch_process_messages(self, messages: List[Dict[str, Any]], model: str = No
             settings=settings
         )
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        try:
-            for i, message in enumerate(messages):
-                try:
-                    # Update progress
-                    progress = int((i / len(messages)) * 100)
-                    self.update_state(
-                        state='PROGRESS',
-                        meta={
-                            'current': i,
-                            'total': len(messages),
-                            'progress': progress,
-                            'status': f'Processing message {i+1}/{len(messages)}'
-                        }
-                    )
+        for i, message in enumerate(messages):
+            try:
+                # Update progress
+                progress = int((i / len(messages)) * 100)
+                self.update_state(
+                    state='PROGRESS',
+                    meta={
+                        'current': i,
+                        'total': len(messages),
+                        'progress': progress,
+                        'status': f'Processing message {i+1}/{len(messages)}'
+                    }
+                )
 
-                    # Process message
-                    result = loop.run_until_complete(
-                        llm_client.generate_completion(
-                            prompt=message.get("content", ""),
-                            max_tokens=message.get("max_tokens", 150),
-                            temperature=message.get("temperature", 0.7)
-                        )
+                # Process message
+                result = run_async(
+                    llm_client.generate_completion(
+                        prompt=message.get("content", ""),
+                        max_tokens=message.get("max_tokens", 150),
+                        temperature=message.get("temperature", 0.7)
                     )
+                )
 
-                    results.append({
-                        "index": i,
-                        "message_id": message.get("id"),
-                        "result": result,
-                        "status": "success"
-                    })
-
-                except Exception as msg_error:
-                    logger.error(f"Error processing message {i}: {str(msg_error)}")
-                    failed_count += 1
-                    results.append({
-                        "index": i,
-                        "message_id": message.get("id"),
-                        "error": str(msg_error),
-                        "status": "failed"
-                    })
-
-        finally:
-            loop.close()
+                results.append({
+                    "index": i,
+                    "message_id": message.get("id"),
+                    "result": result,
+                    "status": "success"
+                })
+
+            except Exception as msg_error:
+                logger.error(f"Error processing message {i}: {str(msg_error)}")
+                failed_count += 1
+                results.append({
+                    "index": i,
+                    "message_id": message.get("id"),
+                    "error": str(msg_error),
+                    "status": "failed"
+                })
 
         logger.info(f"Batch processing completed: {len(messages) - failed_count} succeeded, {failed_count} failed")
 
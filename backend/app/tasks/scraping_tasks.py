@@ -2,16 +2,19 @@
 Celery tasks for review scraping and fake review generation.
 """
 
-import asyncio
-from typing import List
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 
 from celery import Task
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
 from app.core.celery_app import celery_app
+from app.core.worker_loop import run_async
+from app.database.models.company import Company
 from app.database.models.scraping_job import JobStatusEnum
 from app.database.models.review_source import SourceTypeEnum
-from app.database.session import get_fresh_async_session
+from app.database.session import get_async_session
 from app.database.repositories import (
     CompanyRepository,
     ReviewRepository,
@@ -21,14 +24,130 @@ from app.database.repositories import (
     CreditTransactionRepository
 )
 from app.database.models.credit_transaction import TransactionTypeEnum
+from app.services.apify_client import apify_client
 from app.services.scraper_factory import get_scraper_factory
+from app.services.scrapers import ApifyActorScraper
 from app.services.fake_review_generator import get_fake_review_generator
 from app.services.embedding_service import get_embedding_service
+from app.services.review_ingestion import build_review_rows, embed_reviews, insert_reviews
+from app.services.scrape_orchestrator import (
+    ScrapeRun,
+    advance_scrape_runs,
+    complete_scraping_job,
+    fail_scraping_job,
+    launch_scrape_runs,
+    list_stalled_runs,
+    poll_delay,
+)
 from app.utils.logging import get_logger
 
 logger = get_logger("scraping_tasks")
 
 
+def review_reuse_since(platform: str) -> Optional[datetime]:
+    """Oldest scraped_at of reusable reviews on a platform, or None if reuse is off for it."""
+    settings = get_settings()
+    if not settings.review_reuse_enabled:
+        return None
+    windows = settings.review_reuse_freshness_days
+    days = windows.get(platform, windows.get("default", 0))
+    if days <= 0:
+        return None
+    return datetime.utcnow() - timedelta(days=days)
+
+
+async def reuse_pool_reviews(
+    session: AsyncSession,
+    user_id: str,
+    company: Company,
+    platform: str,
+    review_count: int
+) -> int:
+    """
+    Pre-scrape planner: serve what it can of a job from the global review pool.
+
+    Fresh reviews already scraped (for any user) for a company with the same
+    name on the same platform are copied into the user's reviews table, so
+    only the remaining delta has to be scraped.
+
+    Returns:
+        Number of reviews copied (0..review_count)
+    """
+    since = review_reuse_since(platform)
+    if since is None:
+        return 0
+
+    available = await ReviewRepository.count_pool_reviews(
+        session, company.name, platform, since, exclude_company_id=company.id
+    )
+    if not available:
+        return 0
+
+    from app.services.user_reviews_service import UserReviewsService
+    reused = await UserReviewsService(session).copy_pool_reviews(
+        user_id=user_id,
+        company_id=company.id,
+        company_name=company.name,
+        platform=platform,
+        since=since,
+        limit=review_count
+    )
+    await session.commit()
+    logger.info(f"Review pool: {available} fresh {platform} reviews for '{company.name}', reused {reused}/{review_count}")
+    return reused
+
+
+async def start_scraping_job(session: AsyncSession, job_id: str):
+    """
+    Mark a job running and serve what it can from the review pool.
+
+    Returns:
+        (job, company, source, platform name, number of reused reviews)
+    """
+    # Get job
+    job = await ScrapingJobRepository.get_by_id(session, job_id)
+    if not job:
+        raise ValueError(f"Job not found: {job_id}")
+
+    # Update job status to running
+    await ScrapingJobRepository.update_status(
+        session,
+        job_id,
+        JobStatusEnum.RUNNING
+    )
+    await session.commit()
+
+    # Get company
+    company = await CompanyRepository.get_by_id(session, job.company_id)
+    if not company:
+        raise ValueError(f"Company not found: {job.company_id}")
+
+    # Get source
+    source = await ReviewSourceRepository.get_by_id(session, job.source_id)
+    if not source:
+        raise ValueError(f"Source not found: {job.source_id}")
+
+    # Determine platform name from source type (e.g., "g2", "trustpilot", "trustradius")
+    # source_type can be either an enum or a string depending on how it was loaded
+    if source.source_type:
+        platform_name = source.source_type.value if hasattr(source.source_type, 'value') else str(source.source_type)
+    else:
+        platform_name = "unknown"
+
+    # Reuse reviews already scraped for this company/platform; scrape only the rest
+    reused_count = 0
+    try:
+        reused_count = await reuse_pool_reviews(session, job.user_id, company, platform_name, job.total_reviews_target)
+    except Exception as e:
+        await session.rollback()
+        logger.warning(f"Review pool lookup failed for job {job_id}, scraping everything: {e}")
+        # The rollback expired them; reload now rather than lazily (no implicit IO under asyncio)
+        for instance in (job, company, source):
+            await session.refresh(instance)
+
+    return job, company, source, platform_name, reused_count
+
+
 @celery_app.task(bind=True, max_retries=3)
 def scrape_reviews_task(
     self: Task,
@@ -45,7 +164,7 @@ def scrape_reviews_task(
     This wraps the async scraping function to run in Celery.
     """
     try:
-        return asyncio.run(
+        return run_async(
             scrape_reviews_async(self, job_id, company_id, source_id, user_id, review_count, custom_query)
         )
     except Exception as e:
@@ -66,105 +185,78 @@ async def scrape_reviews_async(
     Async scraping implementation.
     
     Steps:
-    1. Get company and source details
+    1. Get company and source details, reuse pooled reviews
     2. Initialize scraper
-    3. Scrape reviews with progress updates
-    4. Save reviews to database
+    3. Apify scrapers: start the actor run and return; poll_apify_runs_task
+       ingests its dataset and finishes the job
+    4. Other scrapers: scrape and save reviews
     5. Deduct credits from user
     6. Update job status
     """
-    settings = get_settings()
-    
-    async with get_fresh_async_session() as session:
+    async with get_async_session() as session:
         try:
-            # Get job
-            job = await ScrapingJobRepository.get_by_id(session, job_id)
-            if not job:
-                raise ValueError(f"Job not found: {job_id}")
-
-            # Update job status to running
-            await ScrapingJobRepository.update_status(
-                session,
-                job_id,
-                JobStatusEnum.RUNNING
-            )
-            await session.commit()
-
-            # Get company
-            company = await CompanyRepository.get_by_id(session, company_id)
-            if not company:
-                raise ValueError(f"Company not found: {company_id}")
-
-            # Get source
-            source = await ReviewSourceRepository.get_by_id(session, source_id)
-            if not source:
-                raise ValueError(f"Source not found: {source_id}")
-
-            # Update progress: 10%
-            task.update_state(
-                state='PROGRESS',
-                meta={'current': 10, 'total': 100, 'status': 'Initializing scraper...'}
-            )
-            await ScrapingJobRepository.update_progress(session, job_id, 10.0, 0)
-            await session.commit()
-
-            # Get scraper
-            factory = get_scraper_factory()
-            scraper = factory.get_scraper(source.source_type)
+            job, company, source, platform_name, reused_count = await start_scraping_job(session, job_id)
+            remaining_count = review_count - reused_count
 
             # Update progress: 20%
             task.update_state(
                 state='PROGRESS',
                 meta={'current': 20, 'total': 100, 'status': f'Scraping {source.name}...'}
             )
-            await ScrapingJobRepository.update_progress(session, job_id, 20.0, 0)
+            await ScrapingJobRepository.update_progress(session, job_id, 20.0, reused_count)
             await session.commit()
 
-            # Scrape reviews - use custom query if provided, otherwise fallback to company name
-            query = custom_query or company.name
-            logger.info(f"Scraping with query: {query}")
-            scraped_reviews = await scraper.scrape(query=query, limit=review_count)
-
-            logger.info(f"Scraped {len(scraped_reviews)} reviews for job {job_id}")
+            scraper = None
+            if remaining_count > 0:
+                # Get scraper
+                factory = get_scraper_factory()
+                scraper = factory.get_scraper(source.source_type)
+
+                # Scrape reviews - use custom query if provided, otherwise fallback to company name
+                query = custom_query or company.name
+                logger.info(f"Scraping {remaining_count} reviews with query: {query}")
+
+            if isinstance(scraper, ApifyActorScraper):
+                # Release the worker while the actor runs
+                async with apify_client(scraper.api_token) as client:
+                    launched = await launch_scrape_runs(session, client, [
+                        ScrapeRun(job_id, platform_name, scraper, query, remaining_count, reused_count)
+                    ])
+                if launched:
+                    poll_apify_runs_task.apply_async(args=[launched], countdown=poll_delay(0))
+                return {
+                    "job_id": job_id,
+                    "status": "running" if launched else "failed",
+                    "reviews_reused": reused_count,
+                    "cost": job.cost
+                }
+
+            scraped_reviews = []
+            if scraper is not None:
+                scraped_reviews = await scraper.scrape(query=query, limit=remaining_count)
+
+            logger.info(f"Scraped {len(scraped_reviews)} reviews for job {job_id} ({reused_count} reused)")
 
             # Update progress: 60%
             task.update_state(
                 state='PROGRESS',
                 meta={'current': 60, 'total': 100, 'status': 'Saving reviews...'}
             )
-            await ScrapingJobRepository.update_progress(session, job_id, 60.0, len(scraped_reviews))
+            await ScrapingJobRepository.update_progress(session, job_id, 60.0, reused_count + len(scraped_reviews))
             await session.commit()
 
             # Save reviews to database
-            # Determine platform name from source type (e.g., "g2", "trustpilot", "trustradius")
-            # source_type can be either an enum or a string depending on how it was loaded
-            if source.source_type:
-                platform_name = source.source_type.value if hasattr(source.source_type, 'value') else str(source.source_type)
-            else:
-                platform_name = "unknown"
-            
-            saved_count = 0
-            saved_review_ids = []
-            for scraped in scraped_reviews:
-                try:
-                    review = await ReviewRepository.create(
-                        session,
-                        company_id=company_id,
-                        source_id=source_id,
-                        scraping_job_id=job_id,
-                        platform=platform_name,  # Set the platform!
-                        content=scraped.content,
-                        author=scraped.author,
-                        url=scraped.url,
-                        review_date=scraped.review_date,
-                        metadata=scraped.metadata
-                    )
-                    saved_count += 1
-                    saved_review_ids.append(review.id)
-                except Exception as e:
-                    logger.warning(f"Failed to save review: {e}")
-                    continue
 
+            # Multi-row INSERT; reviews the company already has are skipped
+            rows = build_review_rows(
+                scraped_reviews,
+                company_id=company_id,
+                platform=platform_name,
+                source_id=source_id,
+                scraping_job_id=job_id
+            )
+            inserted_reviews = await insert_reviews(session, rows)
+            saved_count = len(inserted_reviews)
             await session.commit()
 
             # Update progress: 70%
@@ -173,29 +265,13 @@ async def scrape_reviews_async(
                 meta={'current': 70, 'total': 100, 'status': 'Generating embeddings...'}
             )
 
-            # Generate embeddings for the saved reviews
-            if saved_review_ids:
+            # Embed exactly the reviews this job inserted
+            if inserted_reviews:
                 try:
-                    embedding_service = get_embedding_service()
-                    reviews_to_embed = await ReviewRepository.get_reviews_without_embeddings(
-                        session, limit=len(saved_review_ids), company_id=company_id
-                    )
-                    
-                    if reviews_to_embed:
-                        # Generate embeddings in batch
-                        texts = [r.content for r in reviews_to_embed]
-                        embeddings = await embedding_service.generate_embeddings_batch(texts)
-                        
-                        # Update reviews with embeddings
-                        embedded_count = 0
-                        for review, embedding in zip(reviews_to_embed, embeddings):
-                            if embedding:
-                                await ReviewRepository.update_embedding(session, review.id, embedding)
-                                embedded_count += 1
-                        
-                        await session.commit()
-                        logger.info(f"Generated embeddings for {embedded_count} reviews")
+                    await embed_reviews(session, inserted_reviews)
+                    await session.commit()
                 except Exception as e:
+                    await session.rollback()
                     logger.warning(f"Failed to generate embeddings: {e}")
                     # Don't fail job completion if embedding fails
 
@@ -205,53 +281,14 @@ async def scrape_reviews_async(
                 meta={'current': 85, 'total': 100, 'status': 'Deducting credits...'}
             )
 
-            # Deduct credits
-            credit_account = await UserCreditRepository.get_by_user_id(session, user_id)
-            if credit_account:
-                balance_before = credit_account.credits_available
-                await UserCreditRepository.deduct_credits(session, user_id, job.cost)
-                
-                # Record transaction
-                await CreditTransactionRepository.create(
-                    session,
-                    user_credit_id=credit_account.id,
-                    transaction_type=TransactionTypeEnum.DEDUCTION,
-                    amount=-job.cost,
-                    balance_before=balance_before,
-                    balance_after=credit_account.credits_available,
-                    description=f"Scraping {saved_count} reviews from {source.name}",
-                    scraping_job_id=job_id
-                )
-                await session.commit()
-
-            # Update job to completed
-            await ScrapingJobRepository.update_status(
-                session,
-                job_id,
-                JobStatusEnum.COMPLETED
-            )
-            await ScrapingJobRepository.update_progress(session, job_id, 100.0, saved_count)
-            await session.commit()
-
-            # Sync reviews to user's aggregated table
-            try:
-                from app.services.user_reviews_service import UserReviewsService
-                reviews_service = UserReviewsService(session)
-                synced_count = await reviews_service.sync_reviews_to_user_table(
-                    user_id=user_id,
-                    scraping_job_id=job_id
-                )
-                logger.info(f"Synced {synced_count} reviews to user table for job {job_id}")
-            except Exception as e:
-                logger.warning(f"Failed to sync reviews to user table for job {job_id}: {e}")
-                # Don't fail job completion if sync fails
-
-            logger.info(f"Scraping job {job_id} completed successfully")
+            # Deduct credits, complete the job and sync reviews to the user's table
+            await complete_scraping_job(session, job_id, saved_count, reused_count)
 
             return {
                 "job_id": job_id,
                 "status": "completed",
                 "reviews_saved": saved_count,
+                "reviews_reused": reused_count,
                 "cost": job.cost
             }
 
@@ -259,18 +296,149 @@ async def scrape_reviews_async(
             logger.error(f"Error in scraping job {job_id}: {e}")
             
             # Update job to failed
+            await fail_scraping_job(session, job_id, str(e))
+
+            raise
+
+
+@celery_app.task(bind=True)
+def scrape_company_sources_task(
+    self: Task,
+    job_ids: List[str],
+    queries: Optional[Dict[str, str]] = None
+) -> dict:
+    """
+    Start the scraping jobs of one company's sources together.
+
+    The Apify actor runs of all jobs are started concurrently and one
+    poll_apify_runs_task follows them all; jobs of other sources are handed
+    to scrape_reviews_task.
+
+    Args:
+        job_ids: Scraping job IDs (one per source)
+        queries: Optional custom query per source ID
+    """
+    try:
+        return run_async(scrape_company_sources_async(job_ids, queries or {}))
+    except Exception as e:
+        logger.error(f"Multi-source scraping task failed: {e}")
+        raise
+
+
+async def scrape_company_sources_async(job_ids: List[str], queries: Dict[str, str]) -> dict:
+    """Prepare the jobs and launch their actor runs over one Apify client."""
+    settings = get_settings()
+    factory = get_scraper_factory()
+    runs = []
+    finished = []
+    delegated = []
+
+    async with get_async_session() as session:
+        for job_id in job_ids:
             try:
-                await ScrapingJobRepository.update_status(
-                    session,
-                    job_id,
-                    JobStatusEnum.FAILED,
-                    error_message=str(e)
-                )
+                job = await ScrapingJobRepository.get_by_id(session, job_id)
+                source = await ReviewSourceRepository.get_by_id(session, job.source_id) if job else None
+                scraper = factory.get_scraper(source.source_type) if source else None
+                if job and not isinstance(scraper, ApifyActorScraper):
+                    scrape_reviews_task.delay(
+                        job_id=job_id,
+                        company_id=job.company_id,
+                        source_id=job.source_id,
+                        user_id=job.user_id,
+                        review_count=job.total_reviews_target,
+                        custom_query=queries.get(job.source_id)
+                    )
+                    delegated.append(job_id)
+                    continue
+
+                job, company, source, platform_name, reused_count = await start_scraping_job(session, job_id)
+                remaining_count = job.total_reviews_target - reused_count
+                query = queries.get(job.source_id) or company.name
+
+                if remaining_count <= 0:
+                    await complete_scraping_job(session, job_id, 0, reused_count)
+                    finished.append(job_id)
+                    continue
+
+                await ScrapingJobRepository.update_progress(session, job_id, 20.0, reused_count)
                 await session.commit()
-            except:
-                pass
+                runs.append(ScrapeRun(job_id, platform_name, scraper, query, remaining_count, reused_count))
+            except Exception as e:
+                logger.error(f"Error starting scraping job {job_id}: {e}")
+                await fail_scraping_job(session, job_id, str(e))
 
-            raise
+        launched = []
+        if runs:
+            async with apify_client(settings.get_secret("apify_api_token")) as client:
+                launched = await launch_scrape_runs(session, client, runs)
+        if launched:
+            poll_apify_runs_task.apply_async(args=[launched], countdown=poll_delay(0))
+
+    logger.info(
+        f"Started {len(launched)} Apify runs for jobs {job_ids} "
+        f"({len(finished)} served from the review pool, {len(delegated)} delegated)"
+    )
+    return {"launched": launched, "completed": finished, "delegated": delegated}
+
+
+@celery_app.task
+def poll_apify_runs_task(job_ids: List[str], attempt: int = 0, reschedule: bool = True) -> dict:
+    """
+    Continuation of Apify-backed jobs: one polling tick, then reschedule.
+
+    Instead of sleeping in the worker, the task re-enqueues itself for the
+    jobs still running with an exponentially growing countdown. Run webhooks
+    enqueue an extra tick with reschedule=False. A tick that fails (database
+    or worker loop error) is rescheduled for all its jobs, so the chain only
+    ends when no job is left running.
+
+    Args:
+        job_ids: Scraping job IDs to advance
+        attempt: Number of ticks so far
+        reschedule: Whether to schedule the next tick for jobs still running
+    """
+    try:
+        pending = run_async(poll_apify_runs_async(job_ids))
+    except Exception as e:
+        logger.error(f"Apify polling tick {attempt} for jobs {job_ids} failed, retrying: {e}")
+        pending = job_ids
+    if pending and reschedule:
+        poll_apify_runs_task.apply_async(
+            args=[pending],
+            kwargs={"attempt": attempt + 1},
+            countdown=poll_delay(attempt + 1)
+        )
+    return {"job_ids": job_ids, "pending": pending, "attempt": attempt}
+
+
+@celery_app.task
+def sweep_apify_runs_task() -> dict:
+    """
+    Put running Apify jobs that lost their polling task back on one (Celery beat).
+
+    A job whose continuation was dropped (task lost with its worker, broker
+    outage while rescheduling) is otherwise never polled again, so it would
+    neither finish nor hit its run timeout.
+    """
+    stalled = run_async(sweep_apify_runs_async())
+    if stalled:
+        logger.warning(f"Re-enqueueing polling for {len(stalled)} stalled Apify jobs: {stalled}")
+        poll_apify_runs_task.apply_async(args=[stalled])
+    return {"stalled": stalled}
+
+
+async def sweep_apify_runs_async() -> List[str]:
+    """Running Apify jobs whose last polling tick is older than apify_poll_stale_seconds."""
+    async with get_async_session() as session:
+        return await list_stalled_runs(session)
+
+
+async def poll_apify_runs_async(job_ids: List[str]) -> List[str]:
+    """Advance the jobs' Apify runs; returns the jobs still running."""
+    settings = get_settings()
+    async with get_async_session() as session:
+        async with apify_client(settings.get_secret("apify_api_token")) as client:
+            return await advance_scrape_runs(session, client, job_ids)
 
 
 @celery_app.task(bind=True, max_retries=3)
@@ -288,7 +456,7 @@ def generate_fake_reviews_task(
     This generates fake reviews using LLM one at a time with embeddings.
     """
     try:
-        return asyncio.run(
+        return run_async(
             generate_fake_reviews_async(self, job_id, company_id, source_id, user_id, review_count)
         )
     except Exception as e:
@@ -317,7 +485,7 @@ async def generate_fake_reviews_async(
     """
     settings = get_settings()
     
-    async with get_fresh_async_session() as session:
+    async with get_async_session() as session:
         try:
             # Get job
             job = await ScrapingJobRepository.get_by_id(session, job_id)
@@ -3,129 +3,204 @@ Celery tasks for sentiment analysis.
 """
 
 import asyncio
-from typing import List
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from celery import Task
+from pydantic import BaseModel, Field
 
 from app.config import get_settings
 from app.core.celery_app import celery_app
+from app.core.worker_loop import run_async
 from app.database.session import get_async_session
 from app.database.repositories import ReviewRepository
+from app.services.embedding_batcher import pack_batches
 from app.utils.logging import get_logger
 
 logger = get_logger("sentiment_tasks")
 
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+SENTIMENT_INSTRUCTIONS = """
+You are a sentiment analysis expert. You receive a numbered list of customer reviews.
+Score the sentiment of every review.
+
+Score scale:
+- 1.0: Very positive
+- 0.5: Positive
+- 0.0: Neutral
+- -0.5: Negative
+- -1.0: Very negative
+
+Return exactly one score per review, using the review's number as its index.
+"""
+
+
+class ReviewSentiment(BaseModel):
+    """Sentiment score of one review in a batch."""
+    index: int = Field(description="Number of the review in the batch")
+    score: float = Field(description="Sentiment score between -1.0 and 1.0")
+
+
+class SentimentBatch(BaseModel):
+    """Sentiment scores for a batch of reviews."""
+    scores: List[ReviewSentiment] = Field(description="One score per review")
+
+
+class ProgressReporter:
+    """Publishes Celery PROGRESS state at most once per interval."""
+
+    def __init__(self, task: Task, total: int, interval_seconds: float):
+        self.task = task
+        self.total = total
+        self.interval_seconds = interval_seconds
+        self._last_update = 0.0
+
+    def update(self, done: int, analyzed: int, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_update < self.interval_seconds:
+            return
+        self._last_update = now
+        progress = int((done / self.total) * 100) if self.total else 100
+        self.task.update_state(
+            state='PROGRESS',
+            meta={'current': progress, 'total': 100, 'analyzed': analyzed}
+        )
+
+
+def build_batch_prompt(batch: Sequence[Tuple[str, str]]) -> str:
+    """Number the reviews of a batch for the scoring prompt."""
+    return "\n\n".join(f"Review {i}: {content}" for i, (_, content) in enumerate(batch))
+
+
+def parse_batch_scores(batch: Sequence[Tuple[str, str]], result: SentimentBatch) -> List[Tuple[str, float]]:
+    """
+    Map the model's indexed scores back to review IDs.
+
+    Scores are clamped to [-1, 1]; out-of-range indices and duplicates are
+    ignored, so reviews the model skipped stay unscored.
+    """
+    scored: Dict[int, float] = {}
+    for item in result.scores:
+        if 0 <= item.index < len(batch) and item.index not in scored:
+            scored[item.index] = max(-1.0, min(1.0, float(item.score)))
+    return [(batch[index][0], score) for index, score in sorted(scored.items())]
+
+
+def create_sentiment_llm():
+    """Structured-output chat model returning a SentimentBatch."""
+    from langchain_openai import ChatOpenAI
+
+    settings = get_settings()
+    llm = ChatOpenAI(
+        model=settings.default_model,
+        api_key=settings.get_secret("openrouter_api_key"),
+        base_url=OPENROUTER_BASE_URL,
+        temperature=0,
+        max_retries=3,
+    )
+    return llm.with_structured_output(SentimentBatch)
+
 
 @celery_app.task(bind=True)
 def analyze_sentiment_batch(self: Task, review_ids: List[str]) -> dict:
     """Celery wrapper for async sentiment analysis."""
     try:
-        return asyncio.run(analyze_sentiment_batch_async(self, review_ids))
+        return run_async(analyze_sentiment_batch_async(self, review_ids))
     except Exception as e:
         logger.error(f"Sentiment analysis task failed: {e}")
         raise
 
 
-async def analyze_sentiment_batch_async(task: Task, review_ids: List[str]) -> dict:
+async def analyze_sentiment_batch_async(task: Task, review_ids: List[str], llm: Optional[Any] = None) -> dict:
     """
     Analyze sentiment for a batch of reviews using LLM.
-    
-    Uses a simple prompt-based approach with the configured LLM.
+
+    Pending reviews are loaded with one query and packed many per
+    structured-output LLM call; calls run concurrently under a semaphore and
+    results are written back with bulk UPDATEs (one per write batch). Celery
+    progress is published at most every sentiment_progress_interval_seconds.
+
+    Args:
+        task: Bound Celery task (for progress updates)
+        review_ids: Reviews to analyze; already-scored reviews are skipped
+        llm: Structured-output model (defaults to create_sentiment_llm())
+
+    Returns:
+        Dict with analyzed, failed and total counts and the number of LLM calls
     """
     settings = get_settings()
-    
+
     try:
-        from agno.agent import Agent
-        from agno.models.openrouter import OpenRouter
-        
-        # Create sentiment analysis agent with latest API
-        api_key = settings.get_secret("openrouter_api_key")
-        api_key_str = str(api_key) if hasattr(api_key, '__str__') else api_key
-        
-        agent = Agent(
-            model=OpenRouter(
-                id=settings.default_model,
-                api_key=api_key_str,
-            ),
-            instructions="""
-            You are a sentiment analysis expert. Analyze the sentiment of customer reviews and provide a score.
-            
-            Score scale:
-            - 1.0: Very positive
-            - 0.5: Positive
-            - 0.0: Neutral
-            - -0.5: Negative
-            - -1.0: Very negative
-            
-            Respond with ONLY a number between -1.0 and 1.0.
-            """,
-        )
-        
+        llm = llm or create_sentiment_llm()
     except ImportError:
-        logger.error("Agno not available for sentiment analysis")
-        return {"success": False, "error": "Agno not installed"}
+        logger.error("langchain-openai not available for sentiment analysis")
+        return {"success": False, "error": "langchain-openai not installed"}
 
     async with get_async_session() as session:
-        analyzed_count = 0
-        failed_count = 0
-
-        for i, review_id in enumerate(review_ids):
+        pending = await ReviewRepository.get_pending_sentiment(session, review_ids)
+
+    max_chars = settings.sentiment_llm_max_review_chars
+    items = [(review_id, (content or "")[:max_chars]) for review_id, content in pending]
+    batches = pack_batches(
+        items,
+        max_tokens=settings.sentiment_llm_max_tokens_per_call,
+        max_items=settings.sentiment_llm_batch_size,
+    )
+    logger.info(
+        f"Scoring sentiment of {len(items)} pending reviews (of {len(review_ids)}) "
+        f"in {len(batches)} LLM calls"
+    )
+
+    semaphore = asyncio.Semaphore(settings.sentiment_llm_max_concurrency)
+    progress = ProgressReporter(task, len(items), settings.sentiment_progress_interval_seconds)
+    write_batch_size = settings.sentiment_llm_write_batch_size
+    results: List[Tuple[str, float]] = []
+    analyzed_count = 0
+    failed_count = 0
+    done_count = 0
+
+    async def _score(batch: List[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], List[Tuple[str, float]]]:
+        async with semaphore:
             try:
-                # Get review
-                review = await ReviewRepository.get_by_id(session, review_id)
-                if not review or review.sentiment_score is not None:
-                    continue  # Skip if already analyzed
-
-                # Analyze sentiment with LLM using async arun()
-                prompt = f"Review: {review.content[:500]}"  # Truncate long reviews
-                response = await agent.arun(prompt)
-                
-                # Parse sentiment score
-                try:
-                    if isinstance(response, str):
-                        score_text = response
-                    elif hasattr(response, 'content'):
-                        score_text = response.content
-                    else:
-                        score_text = str(response)
-                    
-                    sentiment_score = float(score_text.strip())
-                    
-                    # Clamp to valid range
-                    sentiment_score = max(-1.0, min(1.0, sentiment_score))
-                    
-                except (ValueError, AttributeError):
-                    logger.warning(f"Could not parse sentiment score from: {response}")
-                    sentiment_score = 0.0  # Default to neutral
-
-                # Update review with sentiment
-                await ReviewRepository.update_sentiment(
-                    session,
-                    review_id,
-                    sentiment_score
-                )
-                analyzed_count += 1
-
-                # Update progress
-                progress = int(((i + 1) / len(review_ids)) * 100)
-                task.update_state(
-                    state='PROGRESS',
-                    meta={'current': progress, 'total': 100, 'analyzed': analyzed_count}
-                )
-
+                result = await llm.ainvoke([
+                    ("system", SENTIMENT_INSTRUCTIONS),
+                    ("human", build_batch_prompt(batch)),
+                ])
+                return batch, parse_batch_scores(batch, result)
             except Exception as e:
-                logger.warning(f"Failed to analyze sentiment for review {review_id}: {e}")
-                failed_count += 1
-                continue
-
-        # Commit all changes
-        await session.commit()
-
-        logger.info(f"Sentiment analysis completed: {analyzed_count} analyzed, {failed_count} failed")
-
-        return {
-            "analyzed": analyzed_count,
-            "failed": failed_count,
-            "total": len(review_ids)
-        }
-
+                logger.warning(f"Failed to analyze sentiment for {len(batch)} reviews: {e}")
+                return batch, []
+
+    async def _flush() -> int:
+        nonlocal results
+        if not results:
+            return 0
+        chunk, results = results, []
+        async with get_async_session() as session:
+            updated = await ReviewRepository.bulk_update_sentiment(session, chunk)
+            await session.commit()
+        return updated
+
+    for finished in asyncio.as_completed([_score(batch) for batch in batches]):
+        batch, scores = await finished
+        results.extend(scores)
+        analyzed_count += len(scores)
+        failed_count += len(batch) - len(scores)
+        done_count += len(batch)
+
+        if len(results) >= write_batch_size:
+            await _flush()
+        progress.update(done_count, analyzed_count)
+
+    await _flush()
+    progress.update(done_count, analyzed_count, force=True)
+
+    logger.info(f"Sentiment analysis completed: {analyzed_count} analyzed, {failed_count} failed")
+
+    return {
+        "analyzed": analyzed_count,
+        "failed": failed_count,
+        "total": len(review_ids),
+        "llm_calls": len(batches)
+    }
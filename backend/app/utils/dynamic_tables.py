@@ -4,9 +4,12 @@ Utilities for creating and managing dynamic database tables from DataFrames.
 
 import json
 import re
-from typing import Any
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from app.config import get_settings
+import numpy as np
 import pandas as pd
 from sqlalchemy import text
 from sqlalchemy.types import (
@@ -21,6 +24,7 @@ from sqlalchemy.types import (
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.utils.logging import get_logger
+from app.utils.vectors import decode_pgvector_binary, pgvector_dimensions
 
 logger = get_logger(__name__)
 
@@ -226,23 +230,382 @@ async def create_dynamic_table(
     return True
 
 
+def _serialize_json_value(value: Any) -> Optional[str]:
+    """Serialize a single value for storage in a JSONB column."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, str):
+        # If already a JSON string, keep it as-is
+        try:
+            json.loads(value)
+            return value
+        except (json.JSONDecodeError, TypeError):
+            return json.dumps(value)
+    return json.dumps(value)
+
+
+def serialize_json_column(series: pd.Series) -> list:
+    """
+    Serialize a whole column for JSONB storage.
+
+    Nulls are resolved once for the column with a vectorized mask, so only
+    non-null values go through the JSON encoder.
+
+    Args:
+        series: Column values (dicts, lists or JSON strings)
+
+    Returns:
+        List of JSON strings (None for nulls)
+    """
+    null_mask = _null_mask(series)
+    values = series.tolist()
+    return [
+        None if is_null else _serialize_json_value(value)
+        for value, is_null in zip(values, null_mask)
+    ]
+
+
+def _null_mask(series: pd.Series) -> list:
+    """Return a per-row null mask, treating container values as non-null."""
+    if series.dtype == object:
+        # pd.isna on a list/dict cell is ambiguous; only scalars can be null
+        return [
+            not isinstance(v, (dict, list)) and bool(pd.isna(v))
+            for v in series.tolist()
+        ]
+    return series.isna().tolist()
+
+
+def coerce_column_for_copy(series: pd.Series, pg_type: str) -> list:
+    """
+    Coerce a DataFrame column to Python values matching a PostgreSQL column type.
+
+    Binary COPY requires exact Python types per column (str for TEXT, int for
+    INTEGER, ...), so conversion is done once per column rather than per cell.
+
+    Args:
+        series: Column to convert
+        pg_type: information_schema data_type of the target column
+
+    Returns:
+        List of Python values with None for nulls
+    """
+    pg_type = pg_type.lower()
+
+    if pg_type == 'jsonb' or pg_type == 'json':
+        return serialize_json_column(series)
+
+    null_mask = series.isna().to_numpy()
+    has_nulls = bool(null_mask.any())
+
+    if pg_type in ('integer', 'bigint', 'smallint'):
+        if has_nulls:
+            values = series.astype(object).where(~null_mask, None)
+            return [None if v is None else int(v) for v in values.tolist()]
+        return series.astype('int64').tolist()
+
+    if pg_type in ('double precision', 'real', 'numeric'):
+        values = pd.to_numeric(series, errors='coerce').astype('float64')
+        result = values.tolist()
+        if has_nulls or values.isna().any():
+            return [None if v != v else v for v in result]  # NaN != NaN
+        return result
+
+    if pg_type == 'boolean':
+        values = series.astype(object).where(~null_mask, None).tolist()
+        return [None if v is None else bool(v) for v in values]
+
+    if pg_type.startswith('timestamp') or pg_type == 'date':
+        values = pd.to_datetime(series, errors='coerce')
+        if getattr(values.dt, 'tz', None) is not None and 'with time zone' not in pg_type:
+            values = values.dt.tz_convert('UTC').dt.tz_localize(None)
+        converted = values.dt.to_pydatetime()
+        if pg_type == 'date':
+            return [None if pd.isna(v) else v.date() for v in converted]
+        return [None if pd.isna(v) else v for v in converted]
+
+    # TEXT and anything else: pandas keeps NaN in an object column's null
+    # slots, so nulls are mapped to None per value
+    if has_nulls:
+        values = series.astype(object).where(~null_mask, None).tolist()
+        return [None if v is None else str(v) for v in values]
+    return series.astype(str).tolist()
+
+
+async def get_asyncpg_connection(db: AsyncSession) -> Any:
+    """
+    Get the raw asyncpg connection behind an AsyncSession.
+
+    The connection is the one bound to the session's current transaction, so
+    anything executed on it commits or rolls back together with the session.
+    """
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    return raw_connection.driver_connection
+
+
+async def _get_table_column_types(db: AsyncSession, table_name: str) -> Dict[str, str]:
+    """Get a mapping of column name to information_schema data_type."""
+    result = await db.execute(
+        text("""
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_schema = 'public'
+            AND table_name = :table_name
+            ORDER BY ordinal_position
+        """),
+        {"table_name": table_name}
+    )
+    return {row[0]: row[1] for row in result.fetchall()}
+
+
+async def copy_dataframe_to_table(
+    db: AsyncSession,
+    table_name: str,
+    df: pd.DataFrame,
+    chunk_size: int = 50000
+) -> int:
+    """
+    Stream DataFrame rows into an existing table with binary COPY FROM STDIN.
+
+    Uses the session's pooled asyncpg connection and runs inside the session's
+    transaction, so the caller is responsible for committing. Rows are coerced
+    chunk by chunk to keep peak memory bounded for large uploads.
+
+    Args:
+        db: Database session (PostgreSQL/asyncpg)
+        table_name: Sanitized name of the target table
+        df: DataFrame whose columns are already sanitized
+        chunk_size: Number of rows coerced and sent per COPY
+
+    Returns:
+        Number of rows copied
+    """
+    column_types = await _get_table_column_types(db, table_name)
+    columns = [col for col in df.columns if col in column_types]
+    missing = [col for col in df.columns if col not in column_types]
+    if missing:
+        raise ValueError(f"Columns {missing} do not exist in table {table_name}")
+
+    asyncpg_conn = await get_asyncpg_connection(db)
+
+    rows_copied = 0
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        column_values = [
+            coerce_column_for_copy(chunk[col], column_types[col])
+            for col in columns
+        ]
+        await asyncpg_conn.copy_records_to_table(
+            table_name,
+            records=zip(*column_values),
+            columns=columns,
+            schema_name='public'
+        )
+        rows_copied += len(chunk)
+
+    return rows_copied
+
+
+async def bulk_write_embeddings(
+    db: AsyncSession,
+    table_name: str,
+    keys: Sequence[Any],
+    embeddings: Sequence[Optional[Sequence[float]]],
+    key_column: str = 'id',
+    embedding_column: str = '__embedding__',
+    chunk_size: int = 10000
+) -> Dict[str, Any]:
+    """
+    Write embeddings back to a table with one set-based UPDATE.
+
+    (key, vector) pairs are staged into a temporary table with binary COPY
+    (vectors as float4[] rather than decimal text), then applied with a single
+    UPDATE ... FROM join. Runs inside the session's transaction; the caller
+    commits. Pairs whose embedding is None are skipped.
+
+    Args:
+        db: Database session (PostgreSQL/asyncpg)
+        table_name: Sanitized name of the target table
+        keys: Row key values, aligned with embeddings
+        embeddings: Embedding vectors (or None)
+        key_column: Column identifying rows in the target table
+        embedding_column: pgvector column to update
+        chunk_size: Number of pairs sent per COPY
+
+    Returns:
+        Dict with staged/updated row counts, elapsed seconds and rows_per_sec
+    """
+    start_time = time.perf_counter()
+
+    pairs = [(key, emb) for key, emb in zip(keys, embeddings) if emb is not None]
+    if not pairs:
+        return {"staged": 0, "updated": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+
+    column_types = await _get_table_column_types(db, table_name)
+    if key_column not in column_types:
+        raise ValueError(f"Column {key_column} does not exist in table {table_name}")
+    key_type = column_types[key_column]
+
+    stage_table = f"_embedding_stage_{uuid.uuid4().hex[:12]}"
+    await db.execute(text(
+        f'CREATE TEMP TABLE "{stage_table}" (row_key {key_type}, embedding real[]) ON COMMIT DROP'
+    ))
+
+    asyncpg_conn = await get_asyncpg_connection(db)
+    for start in range(0, len(pairs), chunk_size):
+        chunk = pairs[start:start + chunk_size]
+        chunk_keys = coerce_column_for_copy(pd.Series([key for key, _ in chunk]), key_type)
+        chunk_vectors = [
+            emb.tolist() if hasattr(emb, 'tolist') else list(emb)
+            for _, emb in chunk
+        ]
+        await asyncpg_conn.copy_records_to_table(
+            stage_table,
+            records=zip(chunk_keys, chunk_vectors),
+            columns=['row_key', 'embedding']
+        )
+
+    result = await db.execute(text(f"""
+        UPDATE "{table_name}" AS t
+        SET "{embedding_column}" = s.embedding::vector
+        FROM "{stage_table}" AS s
+        WHERE t."{key_column}" = s.row_key
+    """))
+    await db.execute(text(f'DROP TABLE IF EXISTS "{stage_table}"'))
+
+    elapsed = time.perf_counter() - start_time
+    stats = {
+        "staged": len(pairs),
+        "updated": result.rowcount,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(len(pairs) / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    logger.info(
+        f"Bulk wrote {stats['updated']} embeddings into {table_name} "
+        f"in {stats['seconds']}s ({stats['rows_per_sec']} rows/sec)"
+    )
+    return stats
+
+
+async def fetch_table_columnar(
+    db: AsyncSession,
+    table_name: str,
+    limit: int = 100_000,
+    embedding_column: str = '__embedding__',
+    chunk_size: int = 10000
+) -> Tuple[pd.DataFrame, Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Read a table as a DataFrame of scalar columns plus one float32 embedding matrix.
+
+    The embedding column is fetched as pgvector's binary representation
+    (vector_send) through a server-side cursor and decoded chunk by chunk
+    into a preallocated matrix, so no per-element Python floats are created.
+    JSON/JSONB columns are parsed the same way get_dataset_data does.
+
+    Args:
+        db: Database session (PostgreSQL/asyncpg)
+        table_name: Sanitized name of the table
+        limit: Maximum number of rows to read
+        embedding_column: Name of the vector column
+        chunk_size: Rows fetched from the cursor per round trip
+
+    Returns:
+        Tuple of (scalar DataFrame, float32 matrix or None, mask of rows with an embedding or None)
+    """
+    column_types = await _get_table_column_types(db, table_name)
+    if not column_types:
+        raise ValueError(f"Table '{table_name}' does not exist.")
+
+    count_result = await db.execute(text(f'SELECT COUNT(*) FROM "{table_name}"'))
+    n_rows = min(count_result.scalar() or 0, limit)
+
+    has_embeddings = embedding_column in column_types
+    scalar_columns = [col for col in column_types if col != embedding_column]
+    select_list = [f'"{col}"' for col in scalar_columns]
+    if has_embeddings:
+        select_list.append(f'vector_send("{embedding_column}")')
+
+    asyncpg_conn = await get_asyncpg_connection(db)
+    stmt = await asyncpg_conn.prepare(
+        f'SELECT {", ".join(select_list)} FROM "{table_name}" LIMIT $1'
+    )
+    json_positions = [
+        i for i, attr in enumerate(stmt.get_attributes()[:len(scalar_columns)])
+        if attr.type.name in ('json', 'jsonb')
+    ]
+
+    values: List[list] = [[] for _ in scalar_columns]
+    matrix: Optional[np.ndarray] = None
+    valid: Optional[np.ndarray] = None
+    rows_read = 0
+
+    cursor = await stmt.cursor(n_rows)
+    while rows_read < n_rows:
+        records = await cursor.fetch(chunk_size)
+        if not records:
+            break
+        for i in range(len(scalar_columns)):
+            values[i].extend(record[i] for record in records)
+
+        if has_embeddings:
+            buffers = [record[-1] for record in records]
+            if matrix is None:
+                dim = next((pgvector_dimensions(buf) for buf in buffers if buf is not None), 0)
+                if dim:
+                    matrix = np.empty((n_rows, dim), dtype=np.float32)
+                    valid = np.zeros(n_rows, dtype=bool)
+                    # Rows before the first non-NULL embedding stay zero
+                    matrix[:rows_read] = 0.0
+            if matrix is not None:
+                chunk_end = rows_read + len(records)
+                valid[rows_read:chunk_end] = decode_pgvector_binary(
+                    buffers, matrix[rows_read:chunk_end]
+                )
+        rows_read += len(records)
+
+    for i in json_positions:
+        values[i] = [
+            json.loads(v) if isinstance(v, str) else v
+            for v in values[i]
+        ]
+
+    df = pd.DataFrame({col: values[i] for i, col in enumerate(scalar_columns)})
+    if matrix is not None and rows_read < n_rows:
+        matrix = matrix[:rows_read]
+        valid = valid[:rows_read]
+
+    if matrix is not None:
+        logger.info(
+            f"Loaded {rows_read} rows from {table_name} with a {matrix.shape[0]}x{matrix.shape[1]} "
+            f"float32 embedding matrix ({matrix.nbytes / 1024 / 1024:.1f} MB)"
+        )
+    return df, matrix, valid
+
+
 async def insert_dataframe_to_table(
     db: AsyncSession,
     table_name: str,
     df: pd.DataFrame,
     if_exists: str = 'append',
-    chunk_size: int = 1000
+    chunk_size: int = 50000,
+    use_copy: bool = True
 ) -> int:
     """
     Insert DataFrame data into a table using bulk insert.
-    
+
+    On PostgreSQL the rows are streamed with binary COPY over the session's
+    connection (see copy_dataframe_to_table); other databases, or
+    use_copy=False, fall back to pandas to_sql on a separate sync engine.
+
     Args:
         db: Database session
         table_name: Name of the table
         df: DataFrame with data to insert
         if_exists: What to do if data exists ('fail', 'replace', 'append')
         chunk_size: Number of rows to insert per chunk
-        
+        use_copy: Use COPY FROM STDIN when the database supports it
+
     Returns:
         Number of rows inserted
     """
@@ -252,67 +615,64 @@ async def insert_dataframe_to_table(
         sanitized_table_name = table_name.lower()  # Just lowercase, preserve structure
     else:
         sanitized_table_name = sanitize_table_name(table_name)
-    
-    # Identify JSON columns before renaming
-    json_columns = set()
-    for col in df.columns:
-        if is_json_column(df[col]):
-            sanitized_col = sanitize_column_name(col)
-            json_columns.add(sanitized_col)
-    
+
     # Sanitize column names in DataFrame
-    df_renamed = df.copy()
-    column_mapping = {}
-    for col in df.columns:
-        sanitized_col = sanitize_column_name(col)
-        if col != sanitized_col:
-            column_mapping[col] = sanitized_col
-            df_renamed = df_renamed.rename(columns={col: sanitized_col})
-    
+    df_renamed = df.rename(columns={col: sanitize_column_name(col) for col in df.columns})
+
+    if use_copy and db.bind.dialect.driver == 'asyncpg':
+        # Make sure the target table exists with the right semantics for if_exists
+        await create_dynamic_table(db, sanitized_table_name, df_renamed, if_exists=if_exists)
+        rows_inserted = await copy_dataframe_to_table(
+            db, sanitized_table_name, df_renamed, chunk_size=chunk_size
+        )
+    else:
+        rows_inserted = _insert_dataframe_via_to_sql(
+            sanitized_table_name, df_renamed, if_exists=if_exists, chunk_size=min(chunk_size, 1000)
+        )
+
+    logger.info(f"Inserted {rows_inserted} rows into {sanitized_table_name}")
+    return rows_inserted
+
+
+def _insert_dataframe_via_to_sql(
+    table_name: str,
+    df: pd.DataFrame,
+    if_exists: str = 'append',
+    chunk_size: int = 1000
+) -> int:
+    """
+    Insert DataFrame data with pandas to_sql (multi-row INSERT statements).
+
+    Kept as a fallback for databases without COPY support.
+    """
     # Serialize JSON columns for JSONB storage
-    for col in df_renamed.columns:
-        if col in json_columns:
-            # Convert dict/list to JSON string for JSONB columns
-            def serialize_json(value):
-                if pd.isna(value):
-                    return None
-                if isinstance(value, (dict, list)):
-                    return json.dumps(value)
-                elif isinstance(value, str):
-                    # If already a JSON string, validate it
-                    try:
-                        json.loads(value)  # Validate JSON
-                        return value
-                    except (json.JSONDecodeError, TypeError):
-                        return json.dumps(value)
-                else:
-                    return json.dumps(value)
-            
-            df_renamed[col] = df_renamed[col].apply(serialize_json)
-    
+    df_serialized = df.copy()
+    for col in df_serialized.columns:
+        if is_json_column(df_serialized[col]):
+            df_serialized[col] = serialize_json_column(df_serialized[col])
+
     # Replace NaN with None for proper NULL handling
-    df_renamed = df_renamed.where(pd.notna(df_renamed), None)
-    
-    # Use pandas to_sql for bulk insert (more efficient)
-    # We need to use sync connection for pandas, but get it from async session's bind
+    df_serialized = df_serialized.where(pd.notna(df_serialized), None)
+
+    # We need to use sync connection for pandas
     from sqlalchemy import create_engine
-    
+
     settings = get_settings()
     # Create sync engine from database URL (pandas requires sync connection)
     sync_engine = create_engine(settings.database_url, pool_pre_ping=True)
-    
-    rows_inserted = df_renamed.to_sql(
-        name=sanitized_table_name,
-        con=sync_engine,
-        if_exists=if_exists,
-        index=False,
-        method='multi',
-        chunksize=chunk_size
-    )
-    
-    sync_engine.dispose()
-    
-    logger.info(f"Inserted {rows_inserted} rows into {sanitized_table_name}")
+
+    try:
+        rows_inserted = df_serialized.to_sql(
+            name=table_name,
+            con=sync_engine,
+            if_exists=if_exists,
+            index=False,
+            method='multi',
+            chunksize=chunk_size
+        )
+    finally:
+        sync_engine.dispose()
+
     return rows_inserted
 
 
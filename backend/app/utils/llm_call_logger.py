@@ -5,8 +5,6 @@ This module provides a decorator and helper functions to automatically log
 all LLM calls to the llm_calls table.
 """
 
-import time
-from datetime import datetime
 from typing import Any, Dict, Optional
 from functools import wraps
 
@@ -15,7 +13,7 @@ from llama_index.llms.openai import OpenAI
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.models.llm_call import LLMCallTypeEnum, LLMCallStatusEnum
-from app.database.repositories.llm_call import LLMCallRepository
+from app.services.llm_call_writer import get_llm_call_writer
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -78,11 +76,13 @@ async def log_llm_call(
     """
     Log an LLM call before execution.
     
+    The row is queued on the LLM call writer and persisted in the background.
+    
     Args:
         llm: LLM instance
         messages: List of ChatMessage objects
         call_type: Type of LLM call
-        db: Database session
+        db: Unused; logs are written by the LLM call writer
         user_id: Optional user ID
         **kwargs: Additional metadata (session_id, company_id, etc.)
         
@@ -99,19 +99,15 @@ async def log_llm_call(
             system_prompt = msg.content if isinstance(msg.content, str) else str(msg.content)
             break
     
-    llm_call = await LLMCallRepository.create(
-        db,
+    return get_llm_call_writer().start_call(
         call_type=call_type,
         provider=provider,
         model=model,
         messages=messages_dict,
         system_prompt=system_prompt,
         user_id=user_id,
-        started_at=datetime.utcnow(),
         **kwargs
     )
-    
-    return llm_call.id
 
 
 async def complete_llm_call(
@@ -127,7 +123,7 @@ async def complete_llm_call(
     Args:
         log_id: Log entry ID
         response: LLM response object (ChatResponse or similar)
-        db: Database session
+        db: Unused; logs are written by the LLM call writer
         tokens: Token usage dict
         estimated_cost: Estimated cost in USD
     """
@@ -167,8 +163,7 @@ async def complete_llm_call(
         if hasattr(raw, 'choices') and raw.choices:
             finish_reason = getattr(raw.choices[0], 'finish_reason', None)
     
-    await LLMCallRepository.mark_completed(
-        db,
+    get_llm_call_writer().complete_call(
         log_id,
         response_message=response_message,
         tokens=tokens,
@@ -189,11 +184,10 @@ async def fail_llm_call(
     Args:
         log_id: Log entry ID
         error: Exception that occurred
-        db: Database session
+        db: Unused; logs are written by the LLM call writer
         status: Error status
     """
-    await LLMCallRepository.mark_failed(
-        db,
+    get_llm_call_writer().fail_call(
         log_id,
         error_message=str(error),
         error_code=type(error).__name__,
@@ -0,0 +1,229 @@
+"""
+Streaming CSV / gzip CSV / Parquet exports, read and encoded one chunk at a time.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import math
+import zlib
+from datetime import date, datetime
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Sequence
+
+import pandas as pd
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql.elements import TextClause
+
+from app.config import get_settings
+from app.database.session import get_async_session
+
+# format -> (media type, file extension)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    "csv": ("text/csv", ".csv"),
+    "csv.gz": ("application/gzip", ".csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+EXPORT_FORMAT_PATTERN = "^(csv|csv\\.gz|parquet)$"
+
+
+def parse_columns(columns: Optional[str], allowed: Sequence[str], default: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Parse a comma-separated column selection.
+
+    Args:
+        columns: Requested columns ("a,b,c"), or None/empty for the default
+        allowed: Columns that may be selected, in their natural order
+        default: Columns exported when none are requested (default: allowed)
+
+    Returns:
+        Selected columns in the requested order
+
+    Raises:
+        ValueError: If a requested column is not allowed
+    """
+    if not columns:
+        return list(default if default is not None else allowed)
+    selected = [column.strip() for column in columns.split(",") if column.strip()]
+    unknown = [column for column in selected if column not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+    return list(dict.fromkeys(selected))
+
+
+async def stream_query_chunks(
+    statement: TextClause,
+    params: Optional[Dict[str, Any]] = None,
+    chunk_rows: Optional[int] = None
+) -> AsyncIterator[List[tuple]]:
+    """
+    Run a query on its own session with a server-side cursor, yielding row chunks.
+
+    The session lives as long as the iteration, not the request, so the
+    response can keep streaming after the endpoint has returned.
+    """
+    chunk_rows = chunk_rows or get_settings().export_chunk_rows
+    async with get_async_session() as db:
+        result = await db.stream(statement.execution_options(yield_per=chunk_rows), params or {})
+        async for partition in result.partitions(chunk_rows):
+            yield [tuple(row) for row in partition]
+
+
+async def frame_chunks(df: pd.DataFrame, chunk_rows: Optional[int] = None) -> AsyncIterator[List[tuple]]:
+    """Yield an in-memory DataFrame as row chunks, giving the event loop a turn between chunks."""
+    chunk_rows = chunk_rows or get_settings().export_chunk_rows
+    for start in range(0, len(df), chunk_rows):
+        yield list(df.iloc[start:start + chunk_rows].itertuples(index=False, name=None))
+        await asyncio.sleep(0)
+
+
+def _plain(value: Any) -> Any:
+    """Normalize a cell for export: JSON values as text, NaN/NaT as missing."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    if value is pd.NaT or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+def _csv_value(value: Any) -> Any:
+    value = _plain(value)
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+async def _encode_csv(header: Sequence[str], chunks: AsyncIterable[List[tuple]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue().encode("utf-8")
+
+    async for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def _gzip(data: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    # wbits=31: gzip container, so the output is a regular .gz file
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for block in data:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting what ParquetWriter writes until drained."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(_csv_value(value))
+
+
+async def _encode_parquet(header: Sequence[str], chunks: AsyncIterable[List[tuple]]) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = None
+    schema = None
+    text_columns: set = set()
+    try:
+        async for rows in chunks:
+            if not rows:
+                continue
+            columns = {name: [_plain(row[i]) for row in rows] for i, name in enumerate(header)}
+            if schema is None:
+                # Columns that are all NULL in the first chunk can't be typed; export them as
+                # text, stringifying whatever later chunks hold in them
+                inferred = pa.Table.from_pydict(columns).schema
+                text_columns = {field.name for field in inferred if pa.types.is_null(field.type)}
+                schema = pa.schema([
+                    pa.field(field.name, pa.string()) if field.name in text_columns else field
+                    for field in inferred
+                ])
+                writer = pq.ParquetWriter(sink, schema)
+            for name in text_columns:
+                columns[name] = [_text(value) for value in columns[name]]
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            yield sink.drain()
+
+        if writer is None:
+            writer = pq.ParquetWriter(sink, pa.schema([pa.field(name, pa.string()) for name in header]))
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+
+def encode_export(header: Sequence[str], chunks: AsyncIterable[List[tuple]], fmt: str = "csv") -> AsyncIterator[bytes]:
+    """
+    Encode row chunks as a byte stream in the given export format.
+
+    Args:
+        header: Column names (CSV header / Parquet field names)
+        chunks: Lists of row tuples in header order
+        fmt: One of EXPORT_FORMATS
+
+    Returns:
+        Async iterator of encoded blocks
+    """
+    if fmt == "parquet":
+        return _encode_parquet(header, chunks)
+    if fmt == "csv.gz":
+        return _gzip(_encode_csv(header, chunks))
+    if fmt == "csv":
+        return _encode_csv(header, chunks)
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+
+def export_response(
+    header: Sequence[str],
+    chunks: AsyncIterable[List[tuple]],
+    fmt: str,
+    filename: str
+) -> StreamingResponse:
+    """
+    Build a streaming download response.
+
+    Args:
+        header: Column names
+        chunks: Lists of row tuples in header order
+        fmt: One of EXPORT_FORMATS
+        filename: Download name without extension
+    """
+    media_type, extension = EXPORT_FORMATS[fmt]
+    return StreamingResponse(
+        encode_export(header, chunks, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}{extension}"}
+    )
@@ -0,0 +1,281 @@
+"""
+pgvector HNSW index management and filtered approximate nearest-neighbour search.
+
+Indexes are built with CREATE INDEX CONCURRENTLY on a dedicated autocommit
+connection after bulk loads, so writers are never blocked and request
+transactions are not held open. Searches order by the raw distance operator
+(so the planner can use the index), apply similarity thresholds outside the
+ANN subquery, and tune hnsw.ef_search / iterative scans per query.
+"""
+
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# pgvector caps hnsw.ef_search at 1000
+MAX_EF_SEARCH = 1000
+
+_pgvector_version: Optional[Tuple[int, ...]] = None
+_pending_builds: Dict[str, asyncio.Task] = {}
+
+
+def hnsw_index_name(table_name: str, column: str) -> str:
+    """Deterministic index name that fits PostgreSQL's 63-character limit."""
+    name = f"idx_{table_name}_{column}_hnsw"
+    if len(name) <= 63:
+        return name
+    digest = hashlib.sha1(name.encode()).hexdigest()[:10]
+    return f"idx_{table_name[:40]}_{digest}_hnsw"
+
+
+async def get_pgvector_version(db: AsyncSession) -> Tuple[int, ...]:
+    """Return the installed pgvector version, e.g. (0, 8, 0)."""
+    global _pgvector_version
+    if _pgvector_version is None:
+        result = await db.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))
+        version = result.scalar() or "0"
+        _pgvector_version = tuple(int(part) for part in version.split(".") if part.isdigit())
+    return _pgvector_version
+
+
+async def ensure_hnsw_index(
+    table_name: str,
+    column: str = "__embedding__",
+    m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+    min_rows: Optional[int] = None,
+) -> bool:
+    """
+    Create (or repair) the HNSW cosine index on a vector column.
+
+    Runs on its own autocommit connection so it can use CONCURRENTLY. Tables
+    with fewer than min_rows embedded rows are skipped: an exact scan is as
+    fast there, and the index is picked up after a later bulk load. An index
+    left INVALID by an interrupted concurrent build is dropped and rebuilt.
+
+    Args:
+        table_name: Table holding the vectors
+        column: Vector column name
+        m: HNSW max connections per layer (default from settings)
+        ef_construction: HNSW build candidate list size (default from settings)
+        min_rows: Minimum embedded rows before indexing (default from settings)
+
+    Returns:
+        True if an index was built
+    """
+    from app.database.session import get_async_engine
+
+    settings = get_settings()
+    m = m or settings.vector_index_m
+    ef_construction = ef_construction or settings.vector_index_ef_construction
+    min_rows = settings.vector_index_min_rows if min_rows is None else min_rows
+    index_name = hnsw_index_name(table_name, column)
+
+    engine = get_async_engine()
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+        result = await conn.execute(
+            text("""
+                SELECT i.indisvalid
+                FROM pg_class c
+                JOIN pg_index i ON i.indexrelid = c.oid
+                WHERE c.relname = :index_name
+            """),
+            {"index_name": index_name}
+        )
+        valid = result.scalar()
+        if valid:
+            return False
+        if valid is False:
+            logger.warning(f"Dropping invalid vector index {index_name} before rebuilding")
+            await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"'))
+
+        result = await conn.execute(text(
+            f'SELECT COUNT(*) FROM (SELECT 1 FROM "{table_name}" '
+            f'WHERE "{column}" IS NOT NULL LIMIT {int(min_rows)}) s'
+        ))
+        embedded_rows = result.scalar()
+        if embedded_rows < min_rows:
+            logger.info(
+                f"Skipping HNSW index on {table_name}.{column}: "
+                f"{embedded_rows} embedded rows < {min_rows}"
+            )
+            return False
+
+        await conn.execute(text(
+            f"SET maintenance_work_mem = '{settings.vector_index_maintenance_work_mem}'"
+        ))
+        logger.info(f"Building HNSW index {index_name} (m={m}, ef_construction={ef_construction})")
+        await conn.execute(text(f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index_name}"
+            ON "{table_name}" USING hnsw ("{column}" vector_cosine_ops)
+            WITH (m = {int(m)}, ef_construction = {int(ef_construction)})
+        """))
+        await conn.execute(text(f'ANALYZE "{table_name}"'))
+
+    logger.info(f"Built HNSW index {index_name}")
+    return True
+
+
+def schedule_hnsw_index_build(table_name: str, column: str = "__embedding__") -> Optional[asyncio.Task]:
+    """
+    Build the HNSW index in the background after a bulk load.
+
+    At most one build per index runs at a time. Call only after the load has
+    been committed; the concurrent build cannot see uncommitted rows.
+    """
+    key = hnsw_index_name(table_name, column)
+    task = _pending_builds.get(key)
+    if task is not None and not task.done():
+        return task
+
+    async def _build():
+        try:
+            await ensure_hnsw_index(table_name, column)
+        except Exception as e:
+            logger.error(f"HNSW index build for {table_name}.{column} failed: {e}")
+        finally:
+            _pending_builds.pop(key, None)
+
+    task = asyncio.create_task(_build())
+    _pending_builds[key] = task
+    return task
+
+
+async def configure_ann_search(
+    db: AsyncSession,
+    limit: Optional[int],
+    filtered: bool = False,
+    ef_search: Optional[int] = None,
+) -> None:
+    """
+    Set transaction-local HNSW search parameters for the next query.
+
+    ef_search is raised to at least the requested limit (HNSW never returns
+    more than ef_search rows per scan). With pre-filters, pgvector >= 0.8
+    continues the scan iteratively until enough rows pass the filter; older
+    versions get a larger ef_search instead.
+    """
+    settings = get_settings()
+    ef = ef_search or settings.vector_ef_search
+    if limit:
+        ef = max(ef, limit)
+
+    iterative = filtered and settings.vector_iterative_scan != "off"
+    if iterative and await get_pgvector_version(db) >= (0, 8):
+        await db.execute(
+            text("SELECT set_config('hnsw.iterative_scan', :mode, true)"),
+            {"mode": settings.vector_iterative_scan}
+        )
+    elif filtered:
+        ef *= 4
+
+    await db.execute(
+        text("SELECT set_config('hnsw.ef_search', :ef, true)"),
+        {"ef": str(min(ef, MAX_EF_SEARCH))}
+    )
+
+
+def build_filter_clause(filters: Optional[Dict[str, Any]], params: Dict[str, Any]) -> List[str]:
+    """
+    Translate pre-filters into SQL conditions, adding bind values to params.
+
+    A value may be a scalar (equality), a list/set (IN), or a (low, high)
+    tuple for ranges where either bound may be None.
+    """
+    conditions = []
+    for i, (column, value) in enumerate((filters or {}).items()):
+        if value is None:
+            continue
+        quoted = '"' + column.replace('"', '') + '"'
+        if isinstance(value, tuple):
+            low, high = value
+            if low is not None:
+                params[f"f{i}_low"] = low
+                conditions.append(f"{quoted} >= :f{i}_low")
+            if high is not None:
+                params[f"f{i}_high"] = high
+                conditions.append(f"{quoted} <= :f{i}_high")
+        elif isinstance(value, (list, set, frozenset)):
+            params[f"f{i}"] = list(value)
+            conditions.append(f"{quoted} = ANY(:f{i})")
+        else:
+            params[f"f{i}"] = value
+            conditions.append(f"{quoted} = :f{i}")
+    return conditions
+
+
+def format_vector(embedding: Sequence[float]) -> str:
+    """Format an embedding as a pgvector text literal."""
+    return "[" + ",".join(str(float(x)) for x in embedding) + "]"
+
+
+async def ann_search(
+    db: AsyncSession,
+    table_name: str,
+    query_embedding: Sequence[float],
+    limit: Optional[int] = 10,
+    column: str = "__embedding__",
+    similarity_threshold: Optional[float] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    ef_search: Optional[int] = None,
+):
+    """
+    Cosine nearest-neighbour search over a table, index-assisted when possible.
+
+    The inner query orders by the bare `<=>` expression with a LIMIT so an
+    HNSW index can serve it; the similarity threshold is applied to the
+    returned distances outside that subquery instead of in WHERE, where it
+    would force a sequential scan. limit=None runs an exact full ordering.
+
+    Args:
+        db: Database session
+        table_name: Table to search
+        query_embedding: Query vector
+        limit: Maximum number of rows (None for all rows, exact)
+        column: Vector column name
+        similarity_threshold: Minimum cosine similarity (0-1)
+        filters: Pre-filters, see build_filter_clause
+        ef_search: Override hnsw.ef_search for this query
+
+    Returns:
+        SQLAlchemy result with the table's columns plus __similarity_score__
+    """
+    params: Dict[str, Any] = {"query_embedding": format_vector(query_embedding)}
+    conditions = [f'"{column}" IS NOT NULL'] + build_filter_clause(filters, params)
+    distance = f'"{column}" <=> CAST(:query_embedding AS vector)'
+
+    limit_sql = ""
+    if limit is not None:
+        params["limit"] = int(limit)
+        limit_sql = "LIMIT :limit"
+        await configure_ann_search(db, limit, filtered=len(conditions) > 1, ef_search=ef_search)
+
+    threshold_sql = ""
+    if similarity_threshold is not None:
+        params["max_distance"] = 1 - similarity_threshold
+        threshold_sql = "WHERE ann.__distance__ <= :max_distance"
+
+    query = f"""
+        SELECT ann.*, 1 - ann.__distance__ AS __similarity_score__
+        FROM (
+            SELECT t.*, {distance} AS __distance__
+            FROM "{table_name}" AS t
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {distance}
+            {limit_sql}
+        ) AS ann
+        {threshold_sql}
+        ORDER BY ann.__distance__
+    """
+    return await db.execute(text(query), params)
+
@@ -0,0 +1,149 @@
+"""
+Helpers for moving embedding vectors between pgvector and NumPy.
+
+Embeddings are kept as one contiguous float32 matrix per dataset. DataFrames
+only carry per-row views into that matrix, so tools can rebuild the matrix
+for any slice of the frame without materialising Python floats.
+"""
+
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# pgvector binary (send/recv) format: int16 dim, int16 unused, dim x float4, big-endian
+PGVECTOR_HEADER_BYTES = 4
+PGVECTOR_DTYPE = np.dtype('>f4')
+
+
+def pgvector_dimensions(buffer: bytes) -> int:
+    """Read the dimension count from a pgvector binary value."""
+    return int.from_bytes(buffer[:2], 'big')
+
+
+def decode_pgvector_binary(
+    buffers: Sequence[Optional[bytes]],
+    out: np.ndarray
+) -> np.ndarray:
+    """
+    Decode pgvector binary values into rows of a preallocated float32 matrix.
+
+    When every value is present and has the matrix's dimensions, the buffers
+    are joined once and converted with a single strided cast; otherwise rows
+    are decoded one by one and NULL values are left as zero vectors.
+
+    Args:
+        buffers: Values returned by vector_send(), NULL as None
+        out: float32 array of shape (len(buffers), dim) to fill
+
+    Returns:
+        Boolean mask of the rows that had an embedding
+    """
+    n_rows, dim = out.shape
+    row_bytes = PGVECTOR_HEADER_BYTES + dim * PGVECTOR_DTYPE.itemsize
+    valid = np.fromiter((buf is not None for buf in buffers), dtype=bool, count=n_rows)
+
+    if valid.all() and all(len(buf) == row_bytes for buf in buffers):
+        raw = np.frombuffer(b''.join(buffers), dtype=np.uint8).reshape(n_rows, row_bytes)
+        out[:] = raw[:, PGVECTOR_HEADER_BYTES:].view(PGVECTOR_DTYPE)
+        return valid
+
+    for i, buf in enumerate(buffers):
+        if buf is None:
+            out[i] = 0.0
+            continue
+        if pgvector_dimensions(buf) != dim:
+            raise ValueError(
+                f"Embedding at row {i} has {pgvector_dimensions(buf)} dimensions, expected {dim}"
+            )
+        out[i] = np.frombuffer(buf, dtype=PGVECTOR_DTYPE, count=dim, offset=PGVECTOR_HEADER_BYTES)
+    return valid
+
+
+def matrix_row_views(matrix: np.ndarray, valid: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Build an object array of per-row views into a matrix, for use as a DataFrame column.
+
+    Rows flagged as invalid are stored as None so existing NULL checks keep working.
+    """
+    column = np.empty(len(matrix), dtype=object)
+    for i in range(len(matrix)):
+        column[i] = matrix[i] if valid is None or valid[i] else None
+    return column
+
+
+def _parse_vector(value) -> np.ndarray:
+    if isinstance(value, str):
+        return np.fromstring(value.strip('[]'), sep=',', dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+def _view_positions(values: Iterable, matrix: np.ndarray) -> Optional[np.ndarray]:
+    """Map row views back to their row positions in matrix, or None if any value is not a view."""
+    values = list(values)
+    if not all(isinstance(v, np.ndarray) and v.base is not None for v in values):
+        return None
+
+    base_ptr = matrix.__array_interface__['data'][0]
+    row_stride = matrix.strides[0]
+    pointers = np.fromiter(
+        (v.__array_interface__['data'][0] for v in values), dtype=np.int64, count=len(values)
+    )
+    offsets = pointers - base_ptr
+    positions = offsets // row_stride
+    if (
+        (offsets < 0).any()
+        or (offsets % row_stride).any()
+        or (positions >= len(matrix)).any()
+        or any(v.shape != matrix.shape[1:] for v in values[:1])
+    ):
+        return None
+    return positions
+
+
+def embeddings_to_matrix(
+    column: pd.Series,
+    matrix: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Return the float32 embedding matrix for a DataFrame's embedding column.
+
+    If the column holds views into ``matrix`` (as produced by the columnar
+    loader) the matrix itself is returned when the column covers it in order,
+    or a single gather of the referenced rows for filtered/reordered frames.
+    Any other content (lists, arrays, pgvector text) is stacked into a new
+    float32 matrix; missing values become zero vectors.
+
+    Args:
+        column: The __embedding__ column
+        matrix: Matrix the column's views were taken from, if known
+
+    Returns:
+        float32 array of shape (len(column), dim)
+    """
+    if matrix is not None and len(column) > 0:
+        positions = _view_positions(column.values, matrix)
+        if positions is not None:
+            if len(positions) == len(matrix) and (positions == np.arange(len(matrix))).all():
+                return matrix
+            return matrix[positions]
+
+    vectors = [None if v is None or (isinstance(v, float) and np.isnan(v)) else _parse_vector(v) for v in column]
+    dims = {v.shape[0] for v in vectors if v is not None}
+    if not dims:
+        raise ValueError("Embedding column has no vectors")
+    if len(dims) > 1:
+        raise ValueError(f"Embedding column has mixed dimensions: {sorted(dims)}")
+
+    result = np.zeros((len(vectors), dims.pop()), dtype=np.float32)
+    for i, v in enumerate(vectors):
+        if v is not None:
+            result[i] = v
+    return result
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalise matrix rows, leaving zero rows (missing embeddings) as zeros."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
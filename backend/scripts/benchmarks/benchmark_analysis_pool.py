@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark event-loop latency while analyses run: default thread pool vs analysis process pool.
+
+Runs several TF-IDF analyses (the tfidf_tool worker function) over synthetic
+review texts concurrently, first on the default thread pool (the old
+run_in_executor(None, ...) path), then through AnalysisPool, while a ticker
+coroutine measures how late the event loop wakes it up. Reports wall time and
+the p50/p99/max loop lag of each mode.
+
+Usage: python scripts/benchmarks/benchmark_analysis_pool.py [--rows 20000] [--tasks 4] [--workers 2]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+WORDS = (
+    "the app is very good but support was slow and not helpful . great value for the price , "
+    "really easy to set up ! terrible onboarding , never again . pricing is a bit expensive "
+    "though the reporting features are excellent and the team is responsive . buggy sync , "
+    "awful mobile experience , decent integrations , would not recommend for large teams ."
+).split()
+
+
+def _make_texts(rows: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(15, 80))) for _ in range(rows)]
+
+
+async def _measure(run_tasks, interval: float = 0.01):
+    """Run the analyses while sampling event-loop lag every interval seconds."""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await run_tasks()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+
+    lags.sort()
+    return elapsed, lags[len(lags) // 2], lags[int(len(lags) * 0.99)], lags[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event-loop lag during concurrent analyses")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--tasks", type=int, default=4, help="Concurrent analyses")
+    parser.add_argument("--workers", type=int, default=2, help="Analysis pool size")
+    args = parser.parse_args()
+
+    import pandas as pd
+    from app.core.analysis_pool import AnalysisPool
+    from app.core.llm.lg_workflow.tools.analytics import _tfidf
+
+    df = pd.DataFrame({"text": _make_texts(args.rows)})
+    pool = AnalysisPool(args.workers)
+    pool.start()
+
+    async def threads():
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(None, _tfidf, df, "bench", "text", 10) for _ in range(args.tasks)
+        ))
+
+    async def processes():
+        await asyncio.gather(*(pool.run(_tfidf, df, "bench", "text", 10) for _ in range(args.tasks)))
+
+    async def run():
+        # Warm up the workers' imports
+        await pool.run(_tfidf, df.head(100), "bench", "text", 10)
+        return [
+            ("thread pool", await _measure(threads)),
+            (f"process pool ({args.workers})", await _measure(processes)),
+        ]
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        pool.shutdown()
+
+    print(f"{args.tasks} concurrent TF-IDF analyses over {args.rows:,} texts\n")
+    print(f"{'mode':>20} {'wall s':>8} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for mode, (elapsed, p50, p99, worst) in results:
+        print(f"{mode:>20} {elapsed:>8.2f} {p50:>11.1f} {p99:>11.1f} {worst:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
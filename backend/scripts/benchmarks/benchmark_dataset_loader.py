@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark user dataset bulk loading: binary COPY vs pandas to_sql.
+
+Each (path, size) case runs in a fresh subprocess so peak RSS is measured
+in isolation. Requires a reachable PostgreSQL (DATABASE_URL).
+
+Usage: python scripts/benchmarks/benchmark_dataset_loader.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import resource
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+
+def build_frame(rows: int):
+    """Build a DataFrame shaped like a typical review upload."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "rating": rng.integers(1, 6, rows),
+        "score": rng.random(rows),
+        "verified": rng.random(rows) > 0.5,
+        "created_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        "text": [f"Review number {i} about search being slow" for i in range(rows)],
+        "meta": [{"source": "g2", "rank": int(i % 10)} for i in range(rows)],
+    })
+
+
+async def _load(rows: int, use_copy: bool) -> float:
+    from app.database.session import get_async_session, cleanup_database
+    from app.utils.dynamic_tables import create_dynamic_table, drop_dynamic_table, insert_dataframe_to_table
+
+    df = build_frame(rows)
+    table_name = f"__bench_{uuid.uuid4().hex[:12]}"
+
+    async with get_async_session() as db:
+        await create_dynamic_table(db, table_name, df, if_exists="fail")
+        await db.commit()
+        try:
+            start = time.perf_counter()
+            await insert_dataframe_to_table(db, table_name, df, if_exists="append", use_copy=use_copy)
+            await db.commit()
+            elapsed = time.perf_counter() - start
+        finally:
+            await drop_dynamic_table(db, table_name)
+            await db.commit()
+
+    await cleanup_database()
+    return elapsed
+
+
+def _run_case(rows: int, use_copy: bool, queue) -> None:
+    elapsed = asyncio.run(_load(rows, use_copy))
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put((elapsed, peak_rss_mb))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dataset bulk loading")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'rows':>10} {'path':>8} {'seconds':>10} {'rows/sec':>12} {'peak RSS MB':>12}")
+    for rows in args.sizes:
+        for use_copy in (False, True):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_case, args=(rows, use_copy, queue))
+            proc.start()
+            elapsed, peak_rss_mb = queue.get()
+            proc.join()
+            label = "copy" if use_copy else "to_sql"
+            print(f"{rows:>10} {label:>8} {elapsed:>10.2f} {rows / elapsed:>12,.0f} {peak_rss_mb:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
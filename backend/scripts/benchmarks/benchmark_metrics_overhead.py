@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request metrics recording overhead.
+
+Records a synthetic request mix (20 route templates, lognormal latencies,
+2% errors) through:
+- legacy: the old ApplicationMetrics.record_request (last-1000 list
+  re-sliced per request, per-path min/max/avg dict)
+- registry: the route-template histogram + counter recording
+
+and reports µs per request plus the cost of one summary/exposition.
+
+Usage: python scripts/benchmarks/benchmark_metrics_overhead.py [--requests 200000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+
+class LegacyMetrics:
+    """The list-based recorder ApplicationMetrics used before the registry."""
+
+    def __init__(self):
+        self.request_count = 0
+        self.error_count = 0
+        self.response_times = []
+        self.endpoint_stats = {}
+
+    def record_request(self, method, path, status_code, response_time):
+        self.request_count += 1
+        self.response_times.append(response_time)
+        if status_code >= 400:
+            self.error_count += 1
+        if len(self.response_times) > 1000:
+            self.response_times = self.response_times[-1000:]
+        endpoint_key = f"{method} {path}"
+        if endpoint_key not in self.endpoint_stats:
+            self.endpoint_stats[endpoint_key] = {
+                "count": 0, "errors": 0, "total_time": 0.0, "avg_time": 0.0,
+                "min_time": float('inf'), "max_time": 0.0,
+            }
+        stats = self.endpoint_stats[endpoint_key]
+        stats["count"] += 1
+        stats["total_time"] += response_time
+        stats["avg_time"] = stats["total_time"] / stats["count"]
+        stats["min_time"] = min(stats["min_time"], response_time)
+        stats["max_time"] = max(stats["max_time"], response_time)
+        if status_code >= 400:
+            stats["errors"] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metrics recording overhead")
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    from app.core.metrics_registry import registry
+    from app.core.monitoring import ApplicationMetrics
+
+    rng = random.Random(42)
+    routes = [f"/api/v1/resource{i}/{{item_id}}" for i in range(20)]
+    mix = [
+        (rng.choice(("GET", "POST")), rng.choice(routes), 500 if rng.random() < 0.02 else 200, rng.lognormvariate(-3, 1))
+        for _ in range(args.requests)
+    ]
+
+    results = {}
+    for name, metrics in (("legacy", LegacyMetrics()), ("registry", ApplicationMetrics())):
+        record = metrics.record_request
+        start = time.perf_counter()
+        for method, path, status_code, latency in mix:
+            record(method, path, status_code, latency)
+        results[name] = (time.perf_counter() - start) / len(mix) * 1e6
+
+    start = time.perf_counter()
+    summary = ApplicationMetrics().get_summary()
+    summary_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    registry.render_prometheus()
+    render_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{len(mix):,} requests over {len(routes)} route templates\n")
+    print(f"{'recorder':>10} {'µs/request':>12}")
+    for name, us in results.items():
+        print(f"{name:>10} {us:>12.2f}")
+    print(f"\nsummary {summary_ms:.1f}ms (p50 {summary['p50_response_time_ms']}ms, "
+          f"p99 {summary['p99_response_time_ms']}ms), exposition {render_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
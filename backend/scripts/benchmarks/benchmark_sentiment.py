@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark sentiment scoring throughput: per-row TextBlob vs the batch engine.
+
+Generates synthetic review texts, scores a sample with TextBlob (the old
+per-row loop) and the full set with the lexicon backend, cold and cached,
+and reports reviews/sec plus the mean absolute polarity difference.
+
+Usage: python scripts/benchmarks/benchmark_sentiment.py [--rows 100000] [--textblob-rows 5000] [--workers 1]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+WORDS = (
+    "the app is very good but support was slow and not helpful . great value for the price , "
+    "really easy to set up ! terrible onboarding , never again . pricing is a bit expensive "
+    "though the reporting features are excellent and the team is responsive . buggy sync , "
+    "awful mobile experience , decent integrations , would not recommend for large teams ."
+).split()
+
+
+def _make_texts(rows: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(15, 80))) for _ in range(rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sentiment scoring throughput")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--textblob-rows", type=int, default=5_000, help="Rows scored with per-row TextBlob")
+    parser.add_argument("--workers", type=int, default=1, help="Process pool size (1 = single core)")
+    args = parser.parse_args()
+
+    import numpy as np
+    from textblob import TextBlob
+    from app.services.sentiment_engine import SentimentEngine
+
+    texts = _make_texts(args.rows)
+
+    start = time.perf_counter()
+    baseline = np.array([TextBlob(t).sentiment.polarity for t in texts[:args.textblob_rows]])
+    textblob_rate = args.textblob_rows / (time.perf_counter() - start)
+
+    engine = SentimentEngine(
+        backend="lexicon",
+        cache_max_entries=args.rows,
+        parallel_min_rows=0 if args.workers <= 1 else 1,
+        max_workers=args.workers,
+    )
+    start = time.perf_counter()
+    scores = engine.score(texts)
+    cold_rate = args.rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    engine.score(texts)
+    cached_rate = args.rows / (time.perf_counter() - start)
+    engine.shutdown()
+
+    diff = np.abs(scores.polarity[:args.textblob_rows] - baseline).mean()
+    print(f"{'mode':>20} {'reviews/sec':>12}")
+    print(f"{'textblob per-row':>20} {textblob_rate:>12,.0f}")
+    print(f"{'engine cold':>20} {cold_rate:>12,.0f}")
+    print(f"{'engine cached':>20} {cached_rate:>12,.0f}")
+    print(f"\nmean |polarity - textblob| over {args.textblob_rows:,} rows: {diff:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark SSE encoding throughput of the chat stream on one core.
+
+Replays a synthetic chat stream (mostly content tokens, some thinking
+deltas, step events carrying datetimes and Pydantic models) through:
+- legacy: recursive make_json_serializable + json.dumps per event (the old
+  event_stream loop, without its per-token asyncio.sleep)
+- encode: orjson encode_event per event
+- stream: SSEStream with read-ahead and coalescing
+
+and reports events/sec and the number of frames written.
+
+Usage: python scripts/benchmarks/benchmark_sse_encoding.py [--tokens 100000] [--coalesce-ms 25]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+
+def make_json_serializable(obj):
+    """The per-event conversion used by the old chat event_stream."""
+    if obj is None:
+        return None
+    elif isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    elif hasattr(obj, "model_dump"):
+        return obj.model_dump(mode='json')
+    elif isinstance(obj, dict):
+        return {k: make_json_serializable(v) for k, v in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [make_json_serializable(item) for item in obj]
+    elif isinstance(obj, (str, int, float, bool)):
+        return obj
+    else:
+        return str(obj)
+
+
+def _make_events(tokens: int):
+    from pydantic import BaseModel
+
+    class StepOutput(BaseModel):
+        query_type: str
+        needs_data_retrieval: bool
+        created_at: datetime
+
+    events = []
+    for i in range(tokens):
+        if i % 500 == 0:
+            events.append({
+                "type": "agent_step_complete",
+                "data": {
+                    "step_id": f"step-{i}",
+                    "agent_name": "Query Analyzer",
+                    "content": StepOutput(query_type="analysis", needs_data_retrieval=True, created_at=datetime.utcnow()),
+                    "timestamp": datetime.utcnow(),
+                    "step_order": i // 500,
+                },
+            })
+        if i % 500 < 100:
+            # Each step reasons for a while before answering
+            events.append({"type": "thinking", "data": {"delta": "considering "}})
+        else:
+            events.append({"type": "content", "data": {"content": "token "}, "session_id": "session-1"})
+    return events
+
+
+async def _replay(events):
+    for i, event in enumerate(events):
+        yield event
+        if i % 64 == 0:
+            # Let the stream interleave with the producer like a live LLM stream
+            await asyncio.sleep(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SSE encoding throughput")
+    parser.add_argument("--tokens", type=int, default=100_000, help="Thinking/content deltas to replay")
+    parser.add_argument("--coalesce-ms", type=float, default=25.0)
+    args = parser.parse_args()
+
+    from app.api.sse import SSEStream, encode_event
+
+    events = _make_events(args.tokens)
+
+    start = time.perf_counter()
+    for event in events:
+        f"data: {json.dumps(make_json_serializable(event))}\n\n".encode()
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for event in events:
+        encode_event(event)
+    encoded = time.perf_counter() - start
+
+    async def _stream():
+        stream = SSEStream(_replay(events), coalesce_ms=args.coalesce_ms, heartbeat_seconds=0)
+        async for _ in stream:
+            pass
+        return stream
+
+    start = time.perf_counter()
+    stream = asyncio.run(_stream())
+    streamed = time.perf_counter() - start
+
+    n = len(events)
+    print(f"{len(events):,} events ({args.tokens:,} deltas)\n")
+    print(f"{'mode':>10} {'events/sec':>12} {'frames':>10}")
+    print(f"{'legacy':>10} {n / legacy:>12,.0f} {n:>10,}")
+    print(f"{'encode':>10} {n / encoded:>12,.0f} {n:>10,}")
+    print(f"{'stream':>10} {n / streamed:>12,.0f} {stream.frames_out:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark semantic search latency: exact scan vs HNSW vs filtered HNSW.
+
+For each table size a synthetic review table is generated server-side,
+queried with exact ordering (no index), then indexed with
+ensure_hnsw_index and queried again with and without a company/date
+pre-filter. Reports p50/p99 latency and recall@k against the exact results.
+Requires a reachable PostgreSQL with pgvector (DATABASE_URL).
+
+Usage: python scripts/benchmarks/benchmark_vector_search.py [--sizes 10000 100000 1000000] [--dims 384]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+
+async def _create_table(db, table_name: str, rows: int, dims: int) -> None:
+    from sqlalchemy import text
+
+    await db.execute(text(f"""
+        CREATE TABLE "{table_name}" (
+            id BIGINT PRIMARY KEY,
+            company_name TEXT,
+            source TEXT,
+            date TIMESTAMP,
+            __embedding__ vector({dims})
+        )
+    """))
+    await db.execute(text(f"""
+        INSERT INTO "{table_name}" (id, company_name, source, date, __embedding__)
+        SELECT
+            g,
+            'company_' || (g % 20),
+            (ARRAY['g2', 'trustpilot', 'capterra'])[1 + g % 3],
+            TIMESTAMP '2024-01-01' + (g % 365) * INTERVAL '1 day',
+            (SELECT array_agg(random()::real) FROM generate_series(1, {dims}) WHERE g > 0)::vector
+        FROM generate_series(1, {rows}) AS g
+    """))
+    await db.commit()
+
+
+async def _run_queries(db, table_name, queries, top_k, filters=None):
+    from app.utils.vector_index import ann_search
+
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = await ann_search(db, table_name, query, limit=top_k, filters=filters)
+        ids = [row.id for row in result.fetchall()]
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(ids)
+        await db.commit()
+    return latencies, results
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _recall(approx, exact):
+    hits = sum(len(set(a) & set(e)) for a, e in zip(approx, exact))
+    total = sum(len(e) for e in exact)
+    return hits / total if total else 1.0
+
+
+async def _bench(rows: int, dims: int, n_queries: int, top_k: int) -> None:
+    import numpy as np
+    from app.database.session import get_async_session, cleanup_database
+    from app.utils.dynamic_tables import drop_dynamic_table
+    from app.utils.vector_index import ensure_hnsw_index
+
+    rng = np.random.default_rng(7)
+    queries = rng.random((n_queries, dims), dtype=np.float32).tolist()
+    filters = {"company_name": "company_3", "date": (datetime(2024, 3, 1), datetime(2024, 9, 1))}
+    table_name = f"__bench_vec_{uuid.uuid4().hex[:12]}"
+
+    async with get_async_session() as db:
+        start = time.perf_counter()
+        await _create_table(db, table_name, rows, dims)
+        load_seconds = time.perf_counter() - start
+        try:
+            # No index yet: these are exact sequential scans and the recall baseline
+            exact_lat, exact_ids = await _run_queries(db, table_name, queries, top_k)
+            exact_f_lat, exact_f_ids = await _run_queries(db, table_name, queries, top_k, filters)
+
+            start = time.perf_counter()
+            await ensure_hnsw_index(table_name, min_rows=0)
+            build_seconds = time.perf_counter() - start
+
+            ann_lat, ann_ids = await _run_queries(db, table_name, queries, top_k)
+            ann_f_lat, ann_f_ids = await _run_queries(db, table_name, queries, top_k, filters)
+        finally:
+            await drop_dynamic_table(db, table_name)
+            await db.commit()
+
+    await cleanup_database()
+
+    print(f"\n{rows:,} rows x {dims} dims (load {load_seconds:.1f}s, HNSW build {build_seconds:.1f}s)")
+    print(f"{'mode':>16} {'p50 ms':>10} {'p99 ms':>10} {f'recall@{top_k}':>10}")
+    for label, latencies, ids, truth in [
+        ("exact", exact_lat, exact_ids, exact_ids),
+        ("hnsw", ann_lat, ann_ids, exact_ids),
+        ("exact+filter", exact_f_lat, exact_f_ids, exact_f_ids),
+        ("hnsw+filter", ann_f_lat, ann_f_ids, exact_f_ids),
+    ]:
+        print(
+            f"{label:>16} {statistics.median(latencies):>10.2f} {_percentile(latencies, 99):>10.2f} "
+            f"{_recall(ids, truth):>10.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pgvector semantic search latency")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dims", type=int, default=384, help="Vector dimensions (1536 matches production)")
+    parser.add_argument("--queries", type=int, default=100, help="Queries per mode")
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    for rows in args.sizes:
+        asyncio.run(_bench(rows, args.dims, args.queries, args.top_k))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request workflow setup of the multi-agent chat.
+
+Compares what each chat message paid before reaching the first event:
+- legacy: build every agent and compile the graph per request (the old
+  create_workflow call in the experimental chat endpoint)
+- factory: bind the user to the graph compiled once by WorkflowFactory
+
+Requires OPENAI_API_KEY/ANTHROPIC_API_KEY to be set (any value) so the
+agent LLM clients can be constructed; no requests are sent.
+
+Usage: python scripts/benchmarks/benchmark_workflow_startup.py [--requests 50] [--users 10]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+
+def _percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return statistics.median(ordered), p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-agent workflow setup per request")
+    parser.add_argument("--requests", type=int, default=50, help="Simulated chat requests")
+    parser.add_argument("--users", type=int, default=10, help="Distinct users the requests rotate through")
+    args = parser.parse_args()
+
+    from langgraph.checkpoint.memory import MemorySaver
+
+    from app.core.llm.lg_workflow.factory import WorkflowFactory
+    from app.core.llm.lg_workflow.graph import build_workflow_graph
+
+    legacy = []
+    for i in range(args.requests):
+        start = time.perf_counter()
+        build_workflow_graph().compile(checkpointer=MemorySaver())
+        legacy.append((time.perf_counter() - start) * 1000)
+
+    factory = WorkflowFactory(max_bound=args.users)
+    start = time.perf_counter()
+    factory.warm_up()
+    warm_up_ms = (time.perf_counter() - start) * 1000
+
+    bound = []
+    for i in range(args.requests):
+        start = time.perf_counter()
+        factory.bind(f"user-{i % args.users}", None)
+        bound.append((time.perf_counter() - start) * 1000)
+
+    print(f"{args.requests} requests over {args.users} users (factory warm-up {warm_up_ms:.1f}ms, once per process)\n")
+    print(f"{'mode':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for name, samples in (("legacy", legacy), ("factory", bound)):
+        p50, p95 = _percentiles(samples)
+        print(f"{name:>10} {p50:>10.3f} {p95:>10.3f}")
+    print(f"\nfactory stats: {factory.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
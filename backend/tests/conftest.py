@@ -5,8 +5,9 @@ Test configuration and fixtures for NeedleAi backend tests.
 import asyncio
 import re
 import time
+from contextlib import asynccontextmanager
 from typing import Any, AsyncGenerator, Generator
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import pytest_asyncio
@@ -16,6 +17,7 @@ from app.database.base import Base, get_db
 from app.database.repositories import ApiKeyRepository, UserRepository
 from app.main import app
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import DataError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
@@ -229,6 +231,54 @@ def mock_redis_client():
     return mock
 
 
+class FakeBatchDatabase:
+    """
+    Stands in for the database behind a BatchedWriter.
+
+    Records the rows each flush writes; can fail the first N commits and
+    reject the INSERT of given IDs as invalid data.
+    """
+
+    def __init__(self):
+        self.fail_commits = 0
+        self.invalid_ids = set()
+        self.commits = 0
+        self.inserted = []
+        self.updated = []
+        self.messages = {}
+
+    @asynccontextmanager
+    async def session(self):
+        db = MagicMock(commit=AsyncMock(side_effect=self._commit))
+        yield db
+
+    async def _commit(self):
+        if self.fail_commits:
+            self.fail_commits -= 1
+            raise RuntimeError("connection lost")
+        self.commits += 1
+
+    async def insert_many(self, db, rows):
+        if self.invalid_ids & {row["id"] for row in rows}:
+            raise DataError("INSERT ...", {}, Exception("value too long for type character varying(100)"))
+        self.inserted.append([dict(row) for row in rows])
+
+    async def update_many(self, db, rows):
+        self.updated.append([dict(row) for row in rows])
+
+    async def update_fields(self, db, row_id, **values):
+        self.messages[row_id] = values
+        return 1
+
+
+@pytest.fixture
+def batch_db():
+    """Fake database for BatchedWriter flushes; patch the writer's repositories with its methods."""
+    fake = FakeBatchDatabase()
+    with patch("app.services.batched_writer.get_async_session", fake.session):
+        yield fake
+
+
 # Test data fixtures
 @pytest.fixture
 def sample_chat_request() -> dict:
@@ -0,0 +1,121 @@
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pandas as pd
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+
+from app.core.llm.lg_workflow.checkpoint import (
+    CheckpointSerializer,
+    PostgresCheckpointSaver,
+    get_checkpoint_stats,
+)
+
+
+def make_checkpoint(checkpoint_id, messages):
+    checkpoint = empty_checkpoint()
+    checkpoint["id"] = checkpoint_id
+    checkpoint["channel_values"] = {"messages": messages, "summary": ""}
+    checkpoint["channel_versions"] = {"messages": "2", "summary": "1"}
+    return checkpoint
+
+
+class TestCheckpointSerializer(unittest.TestCase):
+    def test_messages_round_trip_as_msgpack(self):
+        serde = CheckpointSerializer()
+        messages = [HumanMessage(content="hi", id="1"), AIMessage(content="hello", id="2")]
+
+        type_, data = serde.dumps_typed(messages)
+
+        self.assertEqual(type_, "msgpack")
+        self.assertEqual(serde.loads_typed((type_, data)), messages)
+
+    def test_dataframes_are_stored_as_parquet(self):
+        serde = CheckpointSerializer()
+        df = pd.DataFrame({"rating": [1, 5], "text": ["bad", "great"]})
+
+        type_, data = serde.dumps_typed(df)
+
+        self.assertEqual(type_, "parquet")
+        pd.testing.assert_frame_equal(serde.loads_typed((type_, data)), df)
+
+
+class TestPostgresCheckpointSaver(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.saver = PostgresCheckpointSaver(flush_interval_seconds=0, max_pending=1000, prune_interval_seconds=0)
+        self.config = {"configurable": {"thread_id": "session-1", "checkpoint_ns": ""}}
+
+    async def test_only_changed_channels_are_buffered(self):
+        checkpoint = make_checkpoint("c1", [HumanMessage(content="hi", id="1")])
+
+        saved = await self.saver.aput(self.config, checkpoint, {"step": 1}, {"messages": "2"})
+
+        self.assertEqual(saved["configurable"]["checkpoint_id"], "c1")
+        self.assertEqual(list(self.saver._blobs), [("session-1", "", "messages", "2")])
+        row = self.saver._checkpoints[("session-1", "", "c1")]
+        self.assertEqual(row["channel_versions"], {"messages": "2", "summary": "1"})
+        self.assertNotIn("channel_values", self.saver.serde.loads_typed((row["type"], row["checkpoint"])))
+
+    async def test_regular_writes_are_kept_and_special_writes_replaced(self):
+        config = {"configurable": {**self.config["configurable"], "checkpoint_id": "c1"}}
+
+        await self.saver.aput_writes(config, [("messages", "first"), ("__error__", "boom")], "task-1")
+        await self.saver.aput_writes(config, [("messages", "second"), ("__error__", "retry")], "task-1")
+
+        values = {key[-1]: self.saver.serde.loads_typed((row["type"], row["blob"])) for key, row in self.saver._writes.items()}
+        self.assertEqual(values[0], "first")
+        self.assertEqual(values[-1], "retry")
+
+    async def test_max_pending_triggers_a_batched_flush(self):
+        saver = PostgresCheckpointSaver(flush_interval_seconds=0, max_pending=2, prune_interval_seconds=0)
+        with patch.object(saver, "flush", AsyncMock(return_value=True)) as flush:
+            await saver.aput(self.config, make_checkpoint("c1", []), {}, {"messages": "2"})
+            await saver._flush_task
+
+        flush.assert_awaited_once()
+
+    async def test_failed_flush_keeps_rows_for_the_next_attempt(self):
+        @asynccontextmanager
+        async def failing_session():
+            db = MagicMock(execute=AsyncMock(side_effect=RuntimeError("connection lost")), commit=AsyncMock())
+            yield db
+
+        await self.saver.aput(self.config, make_checkpoint("c1", []), {}, {"messages": "2"})
+        failed_before = get_checkpoint_stats()["failed_flushes"]
+
+        with patch("app.core.llm.lg_workflow.checkpoint.get_async_session", failing_session):
+            self.assertFalse(await self.saver.flush())
+
+        self.assertEqual(self.saver.pending, 2)
+        self.assertEqual(get_checkpoint_stats()["failed_flushes"], failed_before + 1)
+
+    async def test_successful_flush_writes_one_transaction(self):
+        db = MagicMock(execute=AsyncMock(), commit=AsyncMock())
+
+        @asynccontextmanager
+        async def session():
+            yield db
+
+        await self.saver.aput(self.config, make_checkpoint("c1", []), {}, {"messages": "2"})
+        config = {"configurable": {**self.config["configurable"], "checkpoint_id": "c1"}}
+        await self.saver.aput_writes(config, [("messages", "x")], "task-1")
+
+        with patch("app.core.llm.lg_workflow.checkpoint.get_async_session", session):
+            self.assertTrue(await self.saver.flush())
+
+        # Blobs, checkpoints and writes: one INSERT each, one commit
+        self.assertEqual(db.execute.await_count, 3)
+        db.commit.assert_awaited_once()
+        self.assertEqual(self.saver.pending, 0)
+
+    def test_versions_increase(self):
+        first = self.saver.get_next_version(None, None)
+        second = self.saver.get_next_version(first, None)
+
+        self.assertLess(first, second)
+        self.assertEqual(int(second.split(".")[0]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
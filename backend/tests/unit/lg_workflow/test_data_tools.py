@@ -7,11 +7,12 @@ from app.core.llm.lg_workflow.data.manager import DataManager
 from app.core.llm.lg_workflow.tools.data_access import list_datasets_tool, get_dataset_data_tool, semantic_search_tool
 from app.core.llm.lg_workflow.tools.analytics import clustering_tool, tfidf_tool, describe_tool
 from app.core.llm.lg_workflow.tools.ml import trend_analysis_tool, product_gap_detection_tool
+from app.utils.vectors import matrix_row_views
 
 class TestDataTools(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self):
-        # Reset DataManager instances
-        DataManager._instances = {}
+        # Reset DataManager sessions and the shared frame cache
+        DataManager.reset()
         self.dm = DataManager.get_instance("default")
         
     @patch('app.core.llm.lg_workflow.data.manager.get_async_session')
@@ -35,7 +36,7 @@ class TestDataTools(unittest.IsolatedAsyncioTestCase):
         result = await self.dm.list_datasets("user1")
         self.assertIn("test_dataset", result)
         
-        # Test Tool (uses default session)
+        # Test Tool (uses the user's session)
         tool_result = await list_datasets_tool.ainvoke({"user_id": "user1"})
         self.assertIn("test_dataset", tool_result)
 
@@ -84,7 +85,7 @@ class TestDataTools(unittest.IsolatedAsyncioTestCase):
             "value": np.arange(10),  # Perfect linear trend
             "text": ["foo"] * 10
         })
-        mock_service.get_dataset_data = AsyncMock(return_value={"data": df.to_dict(orient="records")})
+        mock_service.get_dataset_frame = AsyncMock(return_value=(df, None))
         
         # Test Trend Analysis
         trend_result = await trend_analysis_tool.ainvoke({
@@ -99,19 +100,20 @@ class TestDataTools(unittest.IsolatedAsyncioTestCase):
         
         # Test Product Gap Detection (requires __embedding__)
         # Create product-like data with embeddings
+        embeddings = np.array([
+            [0.1, 0.2, 0.1], [0.11, 0.21, 0.09], [0.12, 0.19, 0.11],  # Cluster 1
+            [0.8, 0.9, 0.85], [0.81, 0.88, 0.87], [0.79, 0.91, 0.83]  # Cluster 2
+        ], dtype=np.float32)
         product_df = pd.DataFrame({
             "name": ["Product A", "Product B", "Product C", "Product D", "Product E", "Product F"],
             "price": [10, 12, 15, 100, 110, 115],
             "category": ["A", "A", "A", "B", "B", "B"],
-            "__embedding__": [
-                [0.1, 0.2, 0.1], [0.11, 0.21, 0.09], [0.12, 0.19, 0.11],  # Cluster 1
-                [0.8, 0.9, 0.85], [0.81, 0.88, 0.87], [0.79, 0.91, 0.83]  # Cluster 2
-            ]
         })
-        mock_service.get_dataset_data = AsyncMock(return_value={"data": product_df.to_dict(orient="records")})
+        product_df["__embedding__"] = matrix_row_views(embeddings)
+        mock_service.get_dataset_frame = AsyncMock(return_value=(product_df, embeddings))
         
         gap_result = await product_gap_detection_tool.ainvoke({
-            "table_name": "test_table",
+            "table_name": "product_table",
             "user_id": "user1",
             "min_cluster_size": 2,
             "eps": 0.3
@@ -143,7 +145,7 @@ class TestDataTools(unittest.IsolatedAsyncioTestCase):
             "val": [1, 2, 3, 4, 5, 1, 2, 3, 4, 5],
             "text": ["foo", "bar", "baz", "foo", "bar"] * 2
         })
-        mock_service.get_dataset_data = AsyncMock(return_value={"data": df.to_dict(orient="records")})
+        mock_service.get_dataset_frame = AsyncMock(return_value=(df, None))
         
         # Test Describe Tool - need to add table_name to mock dataset
         desc_result = await describe_tool.ainvoke({"table_name": "test_table", "user_id": "user1"})
@@ -151,14 +153,14 @@ class TestDataTools(unittest.IsolatedAsyncioTestCase):
         
         # Test Clustering Tool
         # Mock update_dataset (DataManager method)
-        # Since tools use DataManager.get_instance("default"), and we reset it in setUp,
-        # we are testing against the same instance.
+        # Tools use one DataManager session per user_id, and we reset them in setUp,
+        # so the user's session holds the updated dataset.
         
         cluster_result = await clustering_tool.ainvoke({"table_name": "test_table", "target_column": "val", "user_id": "user1"})
         self.assertIn("updated", cluster_result)
         
-        # Verify it's in local cache of the default instance
-        dm = DataManager.get_instance("default")
+        # Verify it's in local cache of the user's session
+        dm = DataManager.get_instance("user1")
         self.assertIn("test_table", dm._local_cache)
         cached_item = dm._local_cache["test_table"]
         # Extract df from tuple
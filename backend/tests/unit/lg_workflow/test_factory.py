@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import patch
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.core.llm.lg_workflow import graph as graph_module
+from app.core.llm.lg_workflow.agents.base import get_bound_context
+from app.core.llm.lg_workflow.factory import WorkflowFactory
+
+
+class TestWorkflowFactory(unittest.TestCase):
+    def test_graph_is_compiled_once(self):
+        """Binding many users reuses the single compiled graph."""
+        factory = WorkflowFactory(max_bound=8)
+        with patch.object(graph_module, "build_workflow_graph", wraps=graph_module.build_workflow_graph) as build:
+            for i in range(5):
+                factory.bind(f"user-{i}")
+            self.assertEqual(build.call_count, 1)
+        self.assertTrue(factory.get_stats()["compiled"])
+
+    def test_bound_config_carries_user(self):
+        factory = WorkflowFactory(max_bound=8)
+        bound = factory.bind("user-1", "reviews_table")
+        self.assertEqual(
+            bound.config["configurable"],
+            {"user_id": "user-1", "dataset_table_name": "reviews_table"},
+        )
+        self.assertEqual(get_bound_context(bound.config), ("user-1", "reviews_table"))
+
+    def test_lru_hits_and_eviction(self):
+        factory = WorkflowFactory(max_bound=2)
+        first = factory.bind("user-1")
+        self.assertIs(factory.bind("user-1"), first)
+        factory.bind("user-2")
+        factory.bind("user-3")
+
+        stats = factory.get_stats()
+        self.assertEqual(stats["bound_entries"], 2)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 3)
+        self.assertIsNot(factory.bind("user-1"), first)
+
+    def test_checkpointer_bindings_are_not_shared(self):
+        factory = WorkflowFactory(max_bound=8)
+        a = factory.bind("user-1", checkpointer=MemorySaver())
+        b = factory.bind("user-1", checkpointer=MemorySaver())
+
+        self.assertIsNot(a.checkpointer, b.checkpointer)
+        self.assertIsNone(factory.graph.checkpointer)
+        self.assertEqual(factory.get_stats()["bound_entries"], 0)
+
+
+class TestBoundContext(unittest.TestCase):
+    def test_missing_user_raises(self):
+        with self.assertRaises(KeyError):
+            get_bound_context({"configurable": {}})
+
+
+if __name__ == '__main__':
+    unittest.main()
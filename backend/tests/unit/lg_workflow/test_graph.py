@@ -1,5 +1,6 @@
 import unittest
-from app.core.llm.lg_workflow.graph import create_workflow
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from app.core.llm.lg_workflow.graph import create_workflow, summary_cut
 
 class TestGraph(unittest.TestCase):
     def test_create_workflow(self):
@@ -13,5 +14,19 @@ class TestGraph(unittest.TestCase):
         except Exception as e:
             self.fail(f"Failed to create workflow: {e}")
 
+    def test_summary_cut_keeps_recent_turns_within_budget(self):
+        """Only the overflowing prefix is summarized, cut at a user turn."""
+        messages = [
+            HumanMessage(content="first " * 200, id="1"),
+            AIMessage(content="", id="2", tool_calls=[{"name": "t", "args": {}, "id": "call-1"}]),
+            ToolMessage(content="result " * 200, tool_call_id="call-1", id="3"),
+            HumanMessage(content="second question", id="4"),
+            AIMessage(content="second answer", id="5"),
+        ]
+        self.assertEqual(summary_cut(messages, budget=10_000), 0)
+        self.assertEqual(summary_cut(messages, budget=250), 3)
+        # Even if the latest turn alone exceeds the budget it is kept
+        self.assertEqual(summary_cut(messages, budget=1), 3)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,98 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.core.llm.lg_workflow.data.cache import (
+    LOADED,
+    LOCAL,
+    SessionCacheView,
+    SessionDataCache,
+    estimate_dataframe_bytes,
+)
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+def _frame(rows: int = 1000) -> pd.DataFrame:
+    return pd.DataFrame({"value": np.arange(rows, dtype=np.int64), "text": ["review text"] * rows})
+
+
+class TestSessionDataCache(unittest.TestCase):
+    def setUp(self):
+        self.spill_dir = tempfile.mkdtemp()
+        self.frame_bytes = estimate_dataframe_bytes(_frame())
+        # Room for two frames
+        self.cache = SessionDataCache(
+            max_bytes=int(self.frame_bytes * 2.5),
+            ttl_seconds=3600,
+            spill_enabled=True,
+            spill_dir=self.spill_dir,
+        )
+
+    def test_estimate_counts_embedding_payloads(self):
+        df = _frame(10)
+        df["__embedding__"] = [np.zeros(1536, dtype=np.float32) for _ in range(10)]
+        self.assertGreater(estimate_dataframe_bytes(df), 10 * 1536 * 4)
+
+    def test_loaded_entries_are_dropped_over_budget(self):
+        for name in ["a", "b", "c"]:
+            self.cache.put(LOADED, "user1", name, _frame(), extra=(None, name))
+
+        self.assertIsNone(self.cache.get(LOADED, "user1", "a"))
+        self.assertIsNotNone(self.cache.get(LOADED, "user1", "c"))
+        stats = self.cache.get_stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertLessEqual(stats["bytes"], stats["max_bytes"])
+
+    def test_lru_order_follows_access(self):
+        self.cache.put(LOADED, "user1", "a", _frame())
+        self.cache.put(LOADED, "user1", "b", _frame())
+        self.cache.get(LOADED, "user1", "a")
+        self.cache.put(LOADED, "user1", "c", _frame())
+
+        self.assertTrue(self.cache.contains(LOADED, "user1", "a"))
+        self.assertFalse(self.cache.contains(LOADED, "user1", "b"))
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is required for Parquet spill")
+    def test_local_entries_spill_and_reload(self):
+        for name in ["a", "b", "c"]:
+            self.cache.put(LOCAL, "user1", name, _frame(), extra=f"artifact {name}")
+
+        stats = self.cache.get_stats()
+        self.assertEqual(stats["spills"], 1)
+        self.assertEqual(stats["spilled_entries"], 1)
+        self.assertEqual(len(os.listdir(self.spill_dir)), 1)
+
+        df, desc = self.cache.get(LOCAL, "user1", "a")
+        self.assertEqual(desc, "artifact a")
+        pd.testing.assert_frame_equal(df, _frame())
+        self.assertEqual(self.cache.get_stats()["reloads"], 1)
+
+    def test_idle_entries_expire(self):
+        self.cache.put(LOCAL, "user1", "a", _frame())
+        self.cache._entries[(LOCAL, "user1", "a")].last_access -= 7200
+
+        self.assertIsNone(self.cache.get(LOCAL, "user1", "a"))
+        stats = self.cache.get_stats()
+        self.assertEqual(stats["expirations"], 1)
+        self.assertEqual(stats["bytes"], 0)
+
+    def test_sessions_are_isolated(self):
+        user1 = SessionCacheView(self.cache, "user1", LOCAL)
+        user2 = SessionCacheView(self.cache, "user2", LOCAL)
+        user1["artifact"] = (_frame(10), "desc")
+
+        self.assertIn("artifact", user1)
+        self.assertNotIn("artifact", user2)
+        self.assertEqual(user1.summaries(), [("artifact", 10, "desc")])
+
+        self.cache.clear_session("user1")
+        self.assertNotIn("artifact", user1)
+
+
+if __name__ == '__main__':
+    unittest.main()
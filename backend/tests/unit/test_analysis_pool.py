@@ -0,0 +1,209 @@
+"""
+Unit tests for the analysis process pool.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from app.core.analysis_pool import AnalysisPool, SharedArrayRef, _release, run_analysis
+from app.core.analysis_pool import _share_args as share_args
+
+
+# Worker functions must be importable by the worker processes
+
+def summarize(df, matrix, scale=1):
+    return {
+        "pid": os.getpid(),
+        "rows": len(df),
+        "columns": list(df.columns),
+        "total": float(df["value"].sum()) * scale,
+        "matrix_sum": float(matrix.sum()),
+        "shape": matrix.shape,
+    }
+
+
+def pid():
+    return os.getpid()
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def segments_exist(names):
+    found = []
+    for name in names:
+        try:
+            shared_memory.SharedMemory(name=name).close()
+            found.append(name)
+        except FileNotFoundError:
+            pass
+    return found
+
+
+@pytest.fixture
+def pool():
+    pool = AnalysisPool(workers=1)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def settings():
+    with patch("app.core.analysis_pool.get_settings") as get_settings:
+        get_settings.return_value = SimpleNamespace(
+            analysis_pool_workers=0,
+            analysis_task_timeout_seconds=30.0,
+        )
+        yield get_settings.return_value
+
+
+class TestAnalysisPool:
+    """Test shared-memory inputs, timeouts, cancellation and errors."""
+
+    @pytest.mark.asyncio
+    async def test_arrays_and_frames_go_through_shared_memory(self, pool):
+        df = pd.DataFrame({"text": ["a", "b", "c"], "value": [1.0, 2.0, 3.0]}, index=[10, 20, 30])
+        matrix = np.arange(12, dtype=np.float32).reshape(3, 4)
+
+        created = []
+        original = shared_memory.SharedMemory
+
+        def track(*args, **kwargs):
+            segment = original(*args, **kwargs)
+            if kwargs.get("create"):
+                created.append(segment.name)
+            return segment
+
+        with patch("app.core.analysis_pool.shared_memory.SharedMemory", side_effect=track):
+            result = await pool.run(summarize, df, matrix, scale=2)
+
+        assert result["pid"] != os.getpid()
+        assert result["rows"] == 3 and result["columns"] == ["text", "value"]
+        assert result["total"] == 12.0
+        assert result["matrix_sum"] == float(matrix.sum()) and result["shape"] == (3, 4)
+        # Both inputs were shared, and unlinked once the call returned
+        assert len(created) == 2
+        assert segments_exist(created) == []
+
+    @pytest.mark.asyncio
+    async def test_timeout_kills_only_the_running_task(self, pool):
+        worker_pid = await pool.run(pid)
+
+        with pytest.raises(TimeoutError):
+            await pool.run(sleep, 30, timeout=0.5)
+
+        # The worker was replaced and the pool keeps serving
+        assert await pool.run(sleep, 0) != worker_pid
+        assert pool.get_stats()["killed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancellation_kills_the_worker(self, pool):
+        task = asyncio.create_task(pool.run(sleep, 30))
+        await asyncio.sleep(0.5)
+        started = time.perf_counter()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert time.perf_counter() - started < 5
+        assert await pool.run(sleep, 0)
+        stats = pool.get_stats()
+        assert stats["killed"] == 1 and stats["active"] == 0 and stats["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_checkout_returns_its_worker(self, pool):
+        gate = threading.Event()
+        checkout = pool._checkout
+
+        def slow_checkout():
+            gate.wait(5)
+            return checkout()
+
+        with patch.object(pool, "_checkout", side_effect=slow_checkout):
+            task = asyncio.create_task(pool.run(pid))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            gate.set()
+            while pool.get_stats()["idle"] != 1:
+                await asyncio.sleep(0.01)
+
+        # The worker went back to the pool instead of leaking, and no extra one was started
+        assert await pool.run(pid)
+        stats = pool.get_stats()
+        assert stats["started"] == 1 and stats["killed"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_copy_unlinks_its_segments(self, pool):
+        gate = threading.Event()
+        created = []
+
+        def slow_share(*args):
+            gate.wait(5)
+            shared_args, shared_kwargs, segments = share_args(*args)
+            created.extend(segment.name for segment in segments)
+            return shared_args, shared_kwargs, segments
+
+        with patch("app.core.analysis_pool._share_args", side_effect=slow_share):
+            task = asyncio.create_task(pool.run(summarize, pd.DataFrame({"value": [1.0]}), np.ones(4)))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            gate.set()
+            while not created or segments_exist(created):
+                await asyncio.sleep(0.01)
+
+        # The slot was freed too
+        assert await asyncio.wait_for(pool.run(pid), 5)
+
+    def test_arguments_over_the_shared_memory_limit_are_pickled(self):
+        small, large = np.zeros(16, dtype=np.float64), np.zeros(1024, dtype=np.float64)
+
+        shared_args, shared_kwargs, segments = share_args((small,), {"large": large}, 1024)
+        try:
+            assert isinstance(shared_args[0], SharedArrayRef)
+            assert shared_kwargs["large"] is large
+            assert len(segments) == 1
+        finally:
+            _release(segments)
+
+    @pytest.mark.asyncio
+    async def test_exceptions_propagate_and_the_worker_is_reused(self, pool):
+        worker_pid = await pool.run(pid)
+
+        with pytest.raises(ValueError, match="bad input"):
+            await pool.run(fail, "bad input")
+
+        assert await pool.run(pid) == worker_pid
+
+    @pytest.mark.asyncio
+    async def test_tasks_queue_for_free_workers(self, pool):
+        results = await asyncio.gather(*(pool.run(sleep, 0.2) for _ in range(3)))
+
+        assert len(set(results)) == 1
+        assert pool.get_stats()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_without_workers_analyses_run_on_threads(self, settings):
+        assert await run_analysis(pid) == os.getpid()
+
+        settings.analysis_task_timeout_seconds = 0.1
+        with pytest.raises(TimeoutError):
+            await run_analysis(sleep, 1)
@@ -0,0 +1,120 @@
+"""
+Unit tests for token-budgeted conversation history and rolling summaries.
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from app.database.models.chat_message import ChatMessage, MessageRoleEnum
+from app.database.models.chat_session import ChatSession
+from app.services.conversation_history import SUMMARY_KEY, ConversationHistoryManager
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+BASE = datetime(2024, 1, 1)
+
+
+async def seed(db: AsyncSession, contents, extra_metadata=None):
+    """One session with alternating user/assistant messages, 1 second apart."""
+    db.add(ChatSession(id="s1", user_id=None, extra_metadata=extra_metadata or {}, updated_at=BASE))
+    for i, content in enumerate(contents):
+        db.add(ChatMessage(
+            id=f"m{i:02d}",
+            session_id="s1",
+            content=content,
+            role=MessageRoleEnum.USER if i % 2 == 0 else MessageRoleEnum.ASSISTANT,
+            created_at=BASE + timedelta(seconds=i),
+        ))
+    await db.commit()
+
+
+@pytest.fixture
+def session_factory(test_engine):
+    maker = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def get_session():
+        async with maker() as db:
+            yield db
+
+    with patch("app.services.conversation_history.get_async_session", get_session):
+        yield get_session
+
+
+class TestLoad:
+    """Test history assembly within the token budget."""
+
+    @pytest.mark.asyncio
+    async def test_newest_messages_within_budget_in_order(self, test_db_session):
+        await seed(test_db_session, ["word " * 100, "old answer", "second question", "second answer", "latest"])
+        manager = ConversationHistoryManager(token_budget=60)
+
+        history = await manager.load(test_db_session, "s1")
+
+        assert [m["content"] for m in history.messages] == ["old answer", "second question", "second answer", "latest"]
+        assert history.summary == ""
+        assert 0 < history.tokens <= 60
+
+    @pytest.mark.asyncio
+    async def test_step_summaries_and_placeholders(self, test_db_session):
+        await seed(test_db_session, ["question", "answer", "follow-up", ""])
+        result = await test_db_session.execute(select(ChatMessage).where(ChatMessage.id == "m01"))
+        result.scalar_one().extra_metadata = {"step_summary": "Ran clustering on reviews"}
+        await test_db_session.commit()
+
+        history = await ConversationHistoryManager(token_budget=1000).load(test_db_session, "s1")
+
+        # The empty assistant placeholder of the running turn is skipped
+        assert [m["role"] for m in history.messages] == ["user", "assistant", "user"]
+        assert "<Workflow Summary>Ran clustering on reviews</Workflow Summary>" in history.messages[1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_summary_replaces_messages_before_watermark(self, test_db_session):
+        summary = {"text": "User asked about pricing complaints.", "tokens": 8, "through": (BASE + timedelta(seconds=1)).isoformat()}
+        await seed(test_db_session, ["q1", "a1", "q2", "a2"], extra_metadata={SUMMARY_KEY: summary})
+
+        history = await ConversationHistoryManager(token_budget=1000).load(test_db_session, "s1")
+
+        assert history.summary == summary["text"]
+        assert [m["content"] for m in history.messages] == ["q2", "a2"]
+        assert history.as_messages()[0]["role"] == "system"
+
+
+class TestUpdateSummary:
+    """Test incremental summary updates."""
+
+    @pytest.mark.asyncio
+    async def test_overflow_is_folded_into_summary(self, test_db_session, session_factory):
+        await seed(test_db_session, ["long question " * 60, "long answer " * 60, "short question", "short answer"])
+        manager = ConversationHistoryManager(token_budget=150, summary_max_tokens=50, summary_trigger_tokens=10)
+
+        with patch.object(manager, "_summarize", AsyncMock(return_value="Discussed long topics.")) as summarize:
+            assert await manager.update_summary("s1") is True
+
+        previous, rows = summarize.await_args.args
+        assert previous == ""
+        assert [row.id for row in rows] == ["m00", "m01"]
+
+        async with session_factory() as db:
+            session = (await db.execute(select(ChatSession).where(ChatSession.id == "s1"))).scalar_one()
+            assert session.extra_metadata[SUMMARY_KEY]["through"] == (BASE + timedelta(seconds=1)).isoformat()
+            assert session.extra_metadata[SUMMARY_KEY]["messages"] == 2
+            assert session.updated_at == BASE
+            counts = (await db.execute(select(ChatMessage.token_count).order_by(ChatMessage.created_at))).scalars().all()
+            assert all(counts)
+
+            history = await manager.load(db, "s1")
+        assert history.summary == "Discussed long topics."
+        assert [m["content"] for m in history.messages] == ["short question", "short answer"]
+
+    @pytest.mark.asyncio
+    async def test_small_overflow_waits_for_trigger(self, test_db_session, session_factory):
+        await seed(test_db_session, ["a " * 20, "b", "c", "d"])
+        manager = ConversationHistoryManager(token_budget=40, summary_max_tokens=20, summary_trigger_tokens=1000)
+
+        with patch.object(manager, "_summarize", AsyncMock()) as summarize:
+            assert await manager.update_summary("s1") is False
+
+        summarize.assert_not_awaited()
@@ -0,0 +1,35 @@
+"""
+Tests for converting DataFrame columns to binary COPY values.
+"""
+
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from app.utils.dynamic_tables import coerce_column_for_copy
+
+
+class TestCoerceColumnForCopy:
+    """Test per-column conversion to the Python types binary COPY expects."""
+
+    def test_text_nulls_become_none(self):
+        values = coerce_column_for_copy(pd.Series(["x", None, np.nan, ""]), "text")
+
+        assert values == ["x", None, None, ""]
+        assert all(v is None or isinstance(v, str) for v in values)
+
+    def test_text_without_nulls_is_stringified(self):
+        assert coerce_column_for_copy(pd.Series([1, 2]), "character varying") == ["1", "2"]
+
+    def test_integer_and_float_nulls(self):
+        assert coerce_column_for_copy(pd.Series([1, None, 3]), "bigint") == [1, None, 3]
+        assert coerce_column_for_copy(pd.Series([1.5, np.nan]), "double precision") == [1.5, None]
+
+    def test_boolean_nulls(self):
+        assert coerce_column_for_copy(pd.Series([True, None, False]), "boolean") == [True, None, False]
+
+    def test_dates_and_timestamps(self):
+        series = pd.Series(["2024-01-02 03:04:05", None])
+
+        assert coerce_column_for_copy(series, "timestamp without time zone") == [datetime(2024, 1, 2, 3, 4, 5), None]
+        assert coerce_column_for_copy(series, "date") == [date(2024, 1, 2), None]
@@ -0,0 +1,146 @@
+"""
+Unit tests for token-budgeted, concurrent embedding batching.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import openai
+import pytest
+from app.services.embedding_batcher import pack_batches, parse_reset_duration
+from app.services.embedding_service import EmbeddingService
+
+
+class StubEmbeddingsAPI:
+    """Stub of the OpenAI embeddings endpoint with failure injection."""
+
+    def __init__(self, rate_limit_first: int = 0, poison: str | None = None, fail_with: list | None = None):
+        self.rate_limit_first = rate_limit_first
+        self.poison = poison
+        # HTTP status codes of the next requests to fail
+        self.fail_with = list(fail_with or [])
+        self.calls = []
+        self.with_raw_response = self
+
+    async def create(self, model, input, encoding_format):
+        self.calls.append(list(input))
+        if self.rate_limit_first > 0:
+            self.rate_limit_first -= 1
+            response = httpx.Response(
+                429,
+                headers={"retry-after-ms": "1"},
+                request=httpx.Request("POST", "http://stub/v1/embeddings"),
+            )
+            raise openai.RateLimitError("rate limited", response=response, body=None)
+        if self.fail_with:
+            status = self.fail_with.pop(0)
+            response = httpx.Response(status, request=httpx.Request("POST", "http://stub/v1/embeddings"))
+            raise {401: openai.AuthenticationError, 503: openai.InternalServerError}[status](
+                "request failed", response=response, body=None
+            )
+        if self.poison in input:
+            response = httpx.Response(400, request=httpx.Request("POST", "http://stub/v1/embeddings"))
+            raise openai.BadRequestError("invalid input", response=response, body=None)
+
+        data = [SimpleNamespace(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)]
+        return SimpleNamespace(
+            headers={"x-ratelimit-remaining-requests": "100"},
+            parse=lambda: SimpleNamespace(data=data),
+        )
+
+
+def make_service(api: StubEmbeddingsAPI) -> EmbeddingService:
+    """Build an EmbeddingService backed by the stub, without caching."""
+    service = EmbeddingService(client=SimpleNamespace(embeddings=api))
+    service.cache = None
+    return service
+
+
+class TestPackBatches:
+    """Test batch packing by token budget."""
+
+    def test_respects_max_items(self):
+        """Batches never exceed max_items."""
+        items = [(i, "word") for i in range(5)]
+        batches = pack_batches(items, max_tokens=10_000, max_items=2)
+        assert [len(b) for b in batches] == [2, 2, 1]
+
+    def test_respects_token_budget(self):
+        """Large texts are split across batches by estimated tokens."""
+        items = [(i, "x" * 3000) for i in range(4)]
+        batches = pack_batches(items, max_tokens=2500, max_items=100)
+        assert len(batches) > 1
+        assert [i for b in batches for i, _ in b] == [0, 1, 2, 3]
+
+    def test_parse_reset_duration(self):
+        """OpenAI reset headers are parsed to seconds."""
+        assert parse_reset_duration("6m0s") == 360.0
+        assert parse_reset_duration("20ms") == pytest.approx(0.02)
+        assert parse_reset_duration(None) is None
+
+
+class TestGenerateEmbeddingsBatch:
+    """Test the concurrent batch pipeline against a stub API."""
+
+    @pytest.mark.asyncio
+    async def test_results_are_aligned_with_inputs(self):
+        """Embeddings come back in input order, empty texts are None."""
+        service = make_service(StubEmbeddingsAPI())
+        result = await service.generate_embeddings_batch(["a", "", "abc"], batch_size=1)
+        assert result == [[1.0], None, [3.0]]
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_batch_is_retried(self):
+        """A 429 backs off and retries instead of dropping the batch."""
+        api = StubEmbeddingsAPI(rate_limit_first=1)
+        service = make_service(api)
+        result = await service.generate_embeddings_batch(["ab", "abcd"])
+        assert result == [[2.0], [4.0]]
+        assert service._get_limiter().rate_limited_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failing_item_is_isolated_by_bisection(self):
+        """Only the poisoned item is None; the rest of its batch succeeds."""
+        service = make_service(StubEmbeddingsAPI(poison="bad"))
+        result = await service.generate_embeddings_batch(["a", "bad", "abc", "abcd"])
+        assert result == [[1.0], None, [3.0], [4.0]]
+
+    @pytest.mark.asyncio
+    async def test_iterator_yields_per_batch(self):
+        """The async iterator yields (index, embedding) pairs per completed batch."""
+        service = make_service(StubEmbeddingsAPI())
+        seen = {}
+        async for batch in service.iter_embeddings_batches(["a", "ab", "abc"], batch_size=1):
+            seen.update(dict(batch))
+        assert seen == {0: [1.0], 1: [2.0], 2: [3.0]}
+
+    @pytest.mark.asyncio
+    async def test_server_error_is_retried_without_bisecting(self):
+        """A 5xx retries the whole batch with backoff."""
+        api = StubEmbeddingsAPI(fail_with=[503, 503])
+        service = make_service(api)
+        with patch("app.services.embedding_service.asyncio.sleep", AsyncMock()) as sleep:
+            result = await service.generate_embeddings_batch(["ab", "abcd"])
+        assert result == [[2.0], [4.0]]
+        assert api.calls == [["ab", "abcd"]] * 3
+        assert sleep.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_persistent_server_error_fails_the_batch(self):
+        """After the retries a 5xx fails the batch in max_retries + 1 requests."""
+        api = StubEmbeddingsAPI(fail_with=[503] * 100)
+        service = make_service(api)
+        with patch("app.services.embedding_service.asyncio.sleep", AsyncMock()):
+            result = await service.generate_embeddings_batch(["a", "ab", "abc", "abcd"])
+        assert result == [None] * 4
+        assert len(api.calls) == service.settings.embedding_max_retries + 1
+
+    @pytest.mark.asyncio
+    async def test_auth_error_fails_at_once(self):
+        """A bad key is neither retried nor bisected."""
+        api = StubEmbeddingsAPI(fail_with=[401] * 100)
+        service = make_service(api)
+        result = await service.generate_embeddings_batch(["a", "ab", "abc", "abcd"])
+        assert result == [None] * 4
+        assert len(api.calls) == 1
@@ -0,0 +1,101 @@
+"""
+Unit tests for the content-hash embedding cache.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from app.services.embedding_cache import EmbeddingCache, make_cache_key
+
+
+class TestEmbeddingCacheKeys:
+    """Test cache key construction."""
+
+    def test_whitespace_is_normalized(self):
+        """Texts differing only in whitespace share a key."""
+        assert make_cache_key("m", 3, "slow  search\n") == make_cache_key("m", 3, "slow search")
+
+    def test_model_and_dimensions_are_part_of_key(self):
+        """Same text with a different model or dimensions gets a different key."""
+        key = make_cache_key("m", 3, "slow search")
+        assert key != make_cache_key("other", 3, "slow search")
+        assert key != make_cache_key("m", 4, "slow search")
+
+
+class TestEmbeddingCacheMemoryTier:
+    """Test the in-process LRU tier (Valkey disabled)."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.cache = EmbeddingCache(max_entries=2, use_redis=False)
+
+    @pytest.mark.asyncio
+    async def test_get_many_returns_hits_and_misses(self):
+        """Cached texts are returned, others are None."""
+        await self.cache.set("m", 2, "a", [0.5, 0.25])
+
+        results = await self.cache.get_many("m", 2, ["a", "b"])
+
+        assert results == [[0.5, 0.25], None]
+        stats = self.cache.get_stats()
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_none_embeddings_are_not_stored(self):
+        """Failed embeddings (None) are skipped on set."""
+        await self.cache.set_many("m", 2, ["a", "b"], [None, [1.0, 2.0]])
+
+        assert await self.cache.get("m", 2, "a") is None
+        assert await self.cache.get("m", 2, "b") == [1.0, 2.0]
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """Least recently used entries are evicted beyond max_entries."""
+        await self.cache.set("m", 1, "a", [1.0])
+        await self.cache.set("m", 1, "b", [2.0])
+        await self.cache.get("m", 1, "a")  # "b" is now least recently used
+        await self.cache.set("m", 1, "c", [3.0])
+
+        assert await self.cache.get("m", 1, "b") is None
+        assert await self.cache.get("m", 1, "a") == [1.0]
+        assert self.cache.get_stats()["evictions"] == 1
+
+
+class TestEmbeddingCacheValkeyTier:
+    """Test that a Valkey outage only disables the shared tier for a while."""
+
+    @pytest.mark.asyncio
+    async def test_failed_connection_is_retried_after_the_backoff_window(self):
+        client = MagicMock(ping=AsyncMock(side_effect=[ConnectionError("refused"), True]))
+        client.mget = AsyncMock(return_value=[None])
+        cache = EmbeddingCache(redis_url="redis://cache:6379/0", redis_retry_seconds=30)
+
+        with patch("valkey.asyncio.Valkey.from_url", return_value=client) as from_url, \
+                patch("app.services.embedding_cache.time.monotonic", return_value=100.0) as clock:
+            assert await cache.get("m", 1, "a") is None
+            assert cache.get_stats()["redis_available"] is False
+
+            # Inside the window the tier is skipped without reconnecting
+            clock.return_value = 129.0
+            await cache.get("m", 1, "a")
+            assert from_url.call_count == 1
+
+            clock.return_value = 131.0
+            await cache.get("m", 1, "a")
+            assert from_url.call_count == 2
+            assert cache.get_stats()["redis_available"] is True
+            client.mget.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_command_starts_the_backoff_window(self):
+        client = MagicMock(ping=AsyncMock(return_value=True), mget=AsyncMock(side_effect=ConnectionError("reset")))
+        cache = EmbeddingCache(redis_url="redis://cache:6379/0", redis_retry_seconds=30)
+
+        with patch("valkey.asyncio.Valkey.from_url", return_value=client), \
+                patch("app.services.embedding_cache.time.monotonic", return_value=100.0):
+            await cache.get("m", 1, "a")
+            await cache.get("m", 1, "b")
+
+        client.mget.assert_awaited_once()
+        assert cache.get_stats()["redis_available"] is False
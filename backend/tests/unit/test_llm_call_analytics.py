@@ -0,0 +1,169 @@
+"""
+Unit tests for SQL-side LLM call statistics, hourly rollups and archiving.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from app.database.models.llm_call import (
+    LLMCall,
+    LLMCallArchive,
+    LLMCallHourlyRollup,
+    LLMCallStatusEnum,
+    LLMCallTypeEnum,
+)
+from app.database.repositories.llm_call import LLMCallRepository
+from app.database.repositories.llm_call_rollup import LLMCallRollupRepository, ceil_hour, floor_hour
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NOW = floor_hour(datetime.utcnow())
+
+
+async def seed(db: AsyncSession):
+    """Calls spread over the last 30 hours for two users."""
+    for i in range(60):
+        db.add(LLMCall(
+            id=f"call-{i:02d}",
+            call_type=LLMCallTypeEnum.CHAT if i % 3 else LLMCallTypeEnum.SUMMARIZATION,
+            status=LLMCallStatusEnum.ERROR if i % 10 == 0 else LLMCallStatusEnum.SUCCESS,
+            provider="openai",
+            model="gpt-4o" if i % 2 else "gpt-4o-mini",
+            messages=[{"role": "user", "content": "hi"}],
+            prompt_tokens=10,
+            completion_tokens=5,
+            total_tokens=15,
+            estimated_cost=0.01,
+            latency_ms=100 + i * 10,
+            user_id="user-1" if i % 4 else "user-2",
+            created_at=NOW - timedelta(minutes=30 * i) + timedelta(minutes=5),
+        ))
+    await db.commit()
+
+
+class TestHourHelpers:
+    def test_floor_and_ceil(self):
+        value = datetime(2024, 1, 1, 10, 15)
+        assert floor_hour(value) == datetime(2024, 1, 1, 10)
+        assert ceil_hour(value) == datetime(2024, 1, 1, 11)
+        assert ceil_hour(datetime(2024, 1, 1, 10)) == datetime(2024, 1, 1, 10)
+
+
+class TestRollups:
+    """Test rollup refreshes and rollup-backed cost statistics."""
+
+    @pytest.mark.asyncio
+    async def test_first_refresh_backfills_everything(self, test_db_session):
+        await seed(test_db_session)
+
+        result = await LLMCallRollupRepository.refresh_recent(test_db_session, lookback_hours=2)
+        await test_db_session.commit()
+
+        assert result["rows"] > 0
+        total = (await test_db_session.execute(select(func.sum(LLMCallHourlyRollup.call_count)))).scalar_one()
+        assert total == 60
+        assert await LLMCallRollupRepository.latest_hour(test_db_session) == NOW
+
+    @pytest.mark.asyncio
+    async def test_cost_stats_match_raw_aggregation(self, test_db_session):
+        await seed(test_db_session)
+        raw = await LLMCallRepository.get_cost_stats(test_db_session, user_id="user-1", days=1)
+
+        await LLMCallRollupRepository.refresh_recent(test_db_session)
+        await test_db_session.commit()
+        # A call after the refresh is only in the raw tail
+        test_db_session.add(LLMCall(
+            id="late", call_type=LLMCallTypeEnum.CHAT, status=LLMCallStatusEnum.SUCCESS,
+            provider="openai", model="gpt-4o", messages=[], total_tokens=100, estimated_cost=1.0,
+            user_id="user-1", created_at=NOW + timedelta(minutes=20),
+        ))
+        await test_db_session.commit()
+
+        stats = await LLMCallRepository.get_cost_stats(test_db_session, user_id="user-1", days=1)
+
+        assert stats["total_calls"] == raw["total_calls"] + 1
+        assert stats["failed_calls"] == raw["failed_calls"]
+        assert stats["total_tokens"] == raw["total_tokens"] + 100
+        assert stats["total_cost"] == pytest.approx(raw["total_cost"] + 1.0)
+        assert stats["by_model"]["gpt-4o"]["count"] == raw["by_model"]["gpt-4o"]["count"] + 1
+        assert stats["by_call_type"]["summarization"] == raw["by_call_type"]["summarization"]
+
+    @pytest.mark.asyncio
+    async def test_explicit_range_with_partial_hours(self, test_db_session):
+        await seed(test_db_session)
+        await LLMCallRollupRepository.refresh_recent(test_db_session)
+        await test_db_session.commit()
+
+        start = NOW - timedelta(hours=10, minutes=40)
+        end = NOW - timedelta(hours=2, minutes=20)
+        stats = await LLMCallRepository.get_cost_stats(test_db_session, start_date=start, end_date=end)
+
+        expected = (await test_db_session.execute(
+            select(func.count()).select_from(LLMCall).where(LLMCall.created_at >= start, LLMCall.created_at < end)
+        )).scalar_one()
+        assert stats["total_calls"] == expected
+
+    @pytest.mark.asyncio
+    async def test_refresh_picks_up_late_completions(self, test_db_session):
+        await seed(test_db_session)
+        await LLMCallRollupRepository.refresh_recent(test_db_session)
+        await test_db_session.commit()
+
+        call = (await test_db_session.execute(select(LLMCall).where(LLMCall.id == "call-00"))).scalar_one()
+        call.status = LLMCallStatusEnum.SUCCESS
+        await test_db_session.commit()
+        await LLMCallRollupRepository.refresh_recent(test_db_session, lookback_hours=1)
+        await test_db_session.commit()
+
+        stats = await LLMCallRepository.get_cost_stats(test_db_session, days=2)
+        assert stats["failed_calls"] == 5
+
+
+class TestPerformanceStats:
+    @pytest.mark.asyncio
+    async def test_percentiles_and_breakdown(self, test_db_session):
+        await seed(test_db_session)
+
+        stats = await LLMCallRepository.get_performance_stats(test_db_session, days=2)
+
+        latencies = sorted(100 + i * 10 for i in range(60) if i % 10)
+        assert stats["total_calls"] == len(latencies)
+        assert stats["min_latency_ms"] == latencies[0]
+        assert stats["max_latency_ms"] == latencies[-1]
+        assert stats["p50_latency_ms"] == int((latencies[26] + latencies[27]) / 2)
+        assert sum(group["total_calls"] for group in stats["by_group"]) == len(latencies)
+        assert {group["call_type"] for group in stats["by_group"]} == {"chat", "summarization"}
+
+    @pytest.mark.asyncio
+    async def test_empty_window(self, test_db_session):
+        stats = await LLMCallRepository.get_performance_stats(test_db_session, model="none")
+        assert stats["total_calls"] == 0
+        assert stats["by_group"] == []
+
+
+class TestArchive:
+    @pytest.mark.asyncio
+    async def test_old_calls_move_to_archive(self, test_db_session):
+        await seed(test_db_session)
+        cutoff = NOW - timedelta(hours=20)
+        old = (await test_db_session.execute(
+            select(func.count()).select_from(LLMCall).where(LLMCall.created_at < cutoff)
+        )).scalar_one()
+
+        moved = 0
+        while True:
+            batch = await LLMCallRepository.archive_calls(test_db_session, before=cutoff, batch_size=7)
+            await test_db_session.commit()
+            moved += batch
+            if batch < 7:
+                break
+
+        assert moved == old
+        remaining = (await test_db_session.execute(select(func.count()).select_from(LLMCall))).scalar_one()
+        assert remaining == 60 - old
+        archived = (await test_db_session.execute(
+            select(LLMCallArchive).where(LLMCallArchive.id == "call-59")
+        )).scalar_one()
+        assert archived.status == "success"
+        assert archived.payload["call_type"] == "chat"
+        assert archived.payload["latency_ms"] == 690
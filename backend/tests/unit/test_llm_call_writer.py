@@ -0,0 +1,193 @@
+"""
+Unit tests for the batched LLM call log writer.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from app.database.models.llm_call import LLMCall, LLMCallStatusEnum, LLMCallTypeEnum
+from app.database.repositories.llm_call import LLMCallRepository
+from app.services.llm_call_writer import LLMCallWriter, get_llm_call_writer_stats
+from app.services.llm_logger import LLMLogger
+from sqlalchemy import select
+
+
+@pytest.fixture
+def repo(batch_db):
+    with patch("app.services.llm_call_writer.LLMCallRepository") as calls:
+        calls.insert_many = batch_db.insert_many
+        calls.update_many = batch_db.update_many
+        yield batch_db
+
+
+def start(writer: LLMCallWriter, **fields) -> str:
+    return writer.start_call(
+        LLMCallTypeEnum.CHAT, "openai", "gpt-4o", [{"role": "user", "content": "hi"}], **fields
+    )
+
+
+class TestLLMCallWriter:
+    """Test coalescing, flush triggers, overflow and draining."""
+
+    @pytest.mark.asyncio
+    async def test_completion_is_merged_into_queued_insert(self, repo):
+        writer = LLMCallWriter(flush_interval_seconds=0, batch_size=100)
+        call_ids = [start(writer, user_id="user-1") for _ in range(3)]
+        writer.complete_call(call_ids[0], {"role": "assistant", "content": "hello"}, tokens={"total_tokens": 7})
+        writer.fail_call(call_ids[1], "boom", error_code="RuntimeError")
+
+        await writer.close()
+
+        assert repo.commits == 1
+        rows = {row["id"]: row for row in repo.inserted[0]}
+        assert list(rows) == call_ids
+        # Every row has the same keys, as a multi-row INSERT needs
+        assert len({tuple(row) for row in rows.values()}) == 1
+        assert rows[call_ids[0]]["status"] == LLMCallStatusEnum.SUCCESS
+        assert rows[call_ids[0]]["total_tokens"] == 7
+        assert rows[call_ids[0]]["latency_ms"] is not None
+        assert rows[call_ids[1]]["error_code"] == "RuntimeError"
+        assert rows[call_ids[2]]["status"] == LLMCallStatusEnum.PENDING
+        assert repo.updated == [[]]
+
+    @pytest.mark.asyncio
+    async def test_completion_after_flush_becomes_update(self, repo):
+        writer = LLMCallWriter(flush_interval_seconds=0, batch_size=100)
+        call_id = start(writer)
+        await writer.flush()
+
+        writer.complete_call(call_id, {"role": "assistant", "content": "hello"}, latency_ms=42)
+        await writer.close()
+
+        assert len(repo.updated[-1]) == 1
+        update = repo.updated[-1][0]
+        assert update["id"] == call_id
+        assert update["status"] == LLMCallStatusEnum.SUCCESS
+        assert update["latency_ms"] == 42
+
+    @pytest.mark.asyncio
+    async def test_batch_size_and_timer_trigger_flushes(self, repo):
+        writer = LLMCallWriter(flush_interval_seconds=0.01, batch_size=3)
+        for _ in range(3):
+            start(writer)
+        await asyncio.sleep(0)
+        assert [len(rows) for rows in repo.inserted] == [3]
+
+        start(writer)
+        await asyncio.sleep(0.05)
+        assert [len(rows) for rows in repo.inserted] == [3, 1]
+
+        await writer.close()
+        assert repo.commits == 2
+
+    @pytest.mark.asyncio
+    async def test_overflow_policies(self, repo):
+        dropped_before = get_llm_call_writer_stats()["dropped_writes"]
+
+        drop_new = LLMCallWriter(flush_interval_seconds=0, batch_size=100, queue_size=2, overflow="drop_new")
+        kept = [start(drop_new) for _ in range(3)][:2]
+        await drop_new.close()
+        assert [row["id"] for row in repo.inserted[-1]] == kept
+
+        drop_oldest = LLMCallWriter(flush_interval_seconds=0, batch_size=100, queue_size=2, overflow="drop_oldest")
+        kept = [start(drop_oldest) for _ in range(3)][1:]
+        await drop_oldest.close()
+        assert [row["id"] for row in repo.inserted[-1]] == kept
+
+        assert get_llm_call_writer_stats()["dropped_writes"] == dropped_before + 2
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried_on_close(self, repo):
+        repo.fail_commits = 2
+        writer = LLMCallWriter(flush_interval_seconds=0, batch_size=100, max_retries=2)
+        call_id = start(writer)
+
+        assert await writer.flush() is False
+        # A completion queued while the insert is pending again is merged into it
+        writer.complete_call(call_id, {"role": "assistant", "content": "late"})
+        with patch("app.services.batched_writer.asyncio.sleep", AsyncMock()):
+            await writer.close()
+
+        assert repo.commits == 1
+        assert repo.inserted[-1][0]["response_message"] == {"role": "assistant", "content": "late"}
+        assert writer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_invalid_row_is_dropped_after_repeated_failures(self, repo):
+        dropped_before = get_llm_call_writer_stats()["dropped_writes"]
+        writer = LLMCallWriter(flush_interval_seconds=0, batch_size=100, max_retries=1)
+        call_ids = [start(writer) for _ in range(3)]
+        repo.invalid_ids = {call_ids[1]}
+
+        assert await writer.flush() is False
+        assert writer.pending == 3
+        # Second failure in a row: the batch is written row by row
+        assert await writer.flush() is True
+
+        assert [rows[0]["id"] for rows in repo.inserted] == [call_ids[0], call_ids[2]]
+        assert writer.pending == 0
+        assert get_llm_call_writer_stats()["dropped_writes"] == dropped_before + 1
+
+    @pytest.mark.asyncio
+    async def test_row_by_row_write_stops_on_connection_errors(self, repo):
+        writer = LLMCallWriter(flush_interval_seconds=0, batch_size=100, max_retries=0)
+        call_ids = [start(writer) for _ in range(2)]
+        repo.fail_commits = 2
+
+        assert await writer.flush() is False
+        assert writer.pending == 2
+
+        await writer.close()
+        assert [row["id"] for rows in repo.inserted for row in rows][-2:] == call_ids
+
+    @pytest.mark.asyncio
+    async def test_oversized_strings_are_cut_to_column_width(self, repo):
+        writer = LLMCallWriter(flush_interval_seconds=0, batch_size=100)
+        call_id = writer.start_call(LLMCallTypeEnum.CHAT, "openai", "m" * 300, [])
+        writer.fail_call(call_id, "x" * 5000, error_code="E" * 80)
+        await writer.close()
+
+        row = repo.inserted[-1][0]
+        assert row["model"] == "m" * 100
+        assert row["error_code"] == "E" * 50
+        # Text columns are unbounded
+        assert len(row["error_message"]) == 5000
+
+    @pytest.mark.asyncio
+    async def test_logger_does_not_touch_the_database(self, repo):
+        writer = LLMCallWriter(flush_interval_seconds=0, batch_size=100)
+        with patch("app.services.llm_logger.get_llm_call_writer", return_value=writer):
+            log_id = await LLMLogger.start(
+                call_type=LLMCallTypeEnum.CHAT, provider="openai", model="gpt-4o", messages=[], user_id="user-1"
+            )
+            await LLMLogger.fail(log_id, "HTTP 500")
+            assert repo.commits == 0 and writer.pending == 1
+
+            with pytest.raises(TypeError):
+                await LLMLogger.start(
+                    call_type=LLMCallTypeEnum.CHAT, provider="openai", model="gpt-4o", messages=[], bogus=1
+                )
+
+        await writer.close()
+        assert repo.inserted[-1][0]["error_message"] == "HTTP 500"
+
+
+class TestUpdateMany:
+    @pytest.mark.asyncio
+    async def test_missing_ids_are_skipped(self, test_db_session):
+        test_db_session.add(LLMCall(
+            id="known", call_type=LLMCallTypeEnum.CHAT, provider="openai", model="gpt-4o", messages=[]
+        ))
+        await test_db_session.commit()
+
+        await LLMCallRepository.update_many(test_db_session, [
+            {"id": "known", "status": LLMCallStatusEnum.SUCCESS, "latency_ms": 10},
+            {"id": "dropped", "status": LLMCallStatusEnum.SUCCESS, "latency_ms": 20},
+            {"id": "known", "finish_reason": "stop"},
+        ])
+        await test_db_session.commit()
+
+        call = (await test_db_session.execute(select(LLMCall).where(LLMCall.id == "known"))).scalar_one()
+        await test_db_session.refresh(call)
+        assert (call.status, call.latency_ms, call.finish_reason) == (LLMCallStatusEnum.SUCCESS, 10, "stop")
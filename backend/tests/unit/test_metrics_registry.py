@@ -0,0 +1,215 @@
+"""
+Unit tests for the metrics registry, quantile sketch and route-template request metrics.
+"""
+
+import json
+import os
+import random
+import threading
+
+import pytest
+from app.core.metrics_registry import MetricsRegistry, QuantileSketch
+from app.core.monitoring import UNMATCHED_ROUTE, ApplicationMetrics, MetricsMiddleware, app_metrics
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+
+class TestQuantileSketch:
+    """Test sketch accuracy, bounded memory and merging."""
+
+    def test_quantiles_within_relative_error(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(-3, 1.2) for _ in range(20000)]
+        sketch = QuantileSketch(alpha=0.01)
+        for value in values:
+            sketch.add(value)
+
+        values.sort()
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert abs(sketch.quantile(q) - exact) / exact <= 0.011
+
+    def test_bins_are_bounded(self):
+        sketch = QuantileSketch(alpha=0.01, max_bins=64)
+        for i in range(1, 100000, 7):
+            sketch.add(i * 1e-6)
+
+        assert len(sketch.bins) <= 64
+        assert sketch.quantile(0.99) == pytest.approx(0.099, rel=0.02)
+
+    def test_merge_matches_single_sketch(self):
+        a, b, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for i in range(1, 1001):
+            (a if i % 2 else b).add(i / 1000)
+            both.add(i / 1000)
+
+        merged = QuantileSketch.from_dict(json.loads(json.dumps(a.to_dict())))
+        merged.merge(b)
+
+        assert merged.count == 1000
+        assert merged.quantile(0.95) == both.quantile(0.95)
+        assert (merged.min, merged.max) == (0.001, 1.0)
+
+
+class TestRegistry:
+    """Test instruments, thread shards, exposition and multi-process aggregation."""
+
+    def test_histogram_buckets_and_exposition(self):
+        registry = MetricsRegistry(multiproc_dir="")
+        latency = registry.histogram("req_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, ('/items/{id}',))
+
+        text = registry.render_prometheus()
+
+        assert "# TYPE req_seconds histogram" in text
+        assert 'req_seconds_bucket{route="/items/{id}",le="0.1"} 2' in text
+        assert 'req_seconds_bucket{route="/items/{id}",le="1"} 3' in text
+        assert 'req_seconds_bucket{route="/items/{id}",le="+Inf"} 4' in text
+        assert 'req_seconds_count{route="/items/{id}"} 4' in text
+        assert 'req_seconds_quantile{route="/items/{id}",quantile="0.5"}' in text
+
+    def test_thread_shards_are_merged(self):
+        registry = MetricsRegistry(multiproc_dir="")
+        counter = registry.counter("work_total", "Work", ("kind",))
+
+        def work():
+            for _ in range(10000):
+                counter.inc(("a",))
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc(("b",), 2.5)
+
+        assert registry.collect() == {"work_total": {("a",): 40000.0, ("b",): 2.5}}
+
+    def test_conflicting_registration_raises(self):
+        registry = MetricsRegistry(multiproc_dir="")
+        assert registry.counter("x_total", "X", ("a",)) is registry.counter("x_total", "X", ("a",))
+        with pytest.raises(ValueError):
+            registry.histogram("x_total", "X", ("a",))
+
+    def test_aggregates_worker_snapshots(self, tmp_path):
+        registry = MetricsRegistry(multiproc_dir=str(tmp_path))
+        requests = registry.counter("requests_total", "Requests", ("route",))
+        active = registry.gauge("active", "Active")
+        latency = registry.histogram("latency_seconds", "Latency", ("route",))
+        requests.inc(("/a",), 3)
+        active.inc()
+        latency.observe(0.2, ("/a",))
+
+        # Another worker's snapshot (with this registry's layout) and a dead worker's
+        other = MetricsRegistry(multiproc_dir="")
+        other.counter("requests_total", "Requests", ("route",)).inc(("/a",), 2)
+        other.gauge("active", "Active").inc(amount=5)
+        other.histogram("latency_seconds", "Latency", ("route",)).observe(0.4, ("/a",))
+        for pid in (os.getppid(), 2 ** 22 + 1):
+            snapshot = other.snapshot()
+            snapshot["pid"] = pid
+            (tmp_path / f"metrics-{pid}.json").write_text(json.dumps(snapshot))
+
+        collected = registry.collect()
+
+        assert collected["requests_total"] == {("/a",): 7.0}
+        # Gauges only count live processes
+        assert collected["active"] == {(): 6.0}
+        assert collected["latency_seconds"][("/a",)].count == 3
+        assert registry.collect(aggregate=False)["requests_total"] == {("/a",): 3.0}
+
+        assert registry.write_snapshot() == str(tmp_path / f"metrics-{os.getpid()}.json")
+        assert registry.collect()["requests_total"] == {("/a",): 7.0}
+
+
+class TestRequestMetrics:
+    """Test the middleware and the ApplicationMetrics summaries."""
+
+    @pytest.fixture(autouse=True)
+    def reset(self):
+        app_metrics.reset_metrics()
+        yield
+        app_metrics.reset_metrics()
+
+    def test_requests_are_keyed_by_route_template(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: str):
+            return {"id": item_id}
+
+        client = TestClient(app)
+        for item_id in ("a", "b", "c"):
+            assert client.get(f"/items/{item_id}").status_code == 200
+        assert client.get("/missing").status_code == 404
+
+        stats = app_metrics.get_endpoint_stats()
+        assert set(stats) == {"GET /items/{item_id}", f"GET {UNMATCHED_ROUTE}"}
+        assert stats["GET /items/{item_id}"]["count"] == 3
+        assert stats["GET /items/{item_id}"]["errors"] == 0
+        assert stats["GET /items/{item_id}"]["p95_time"] is not None
+        assert stats[f"GET {UNMATCHED_ROUTE}"]["errors"] == 1
+
+    def test_included_routers_keep_their_prefix(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+        chat, experimental, companies = APIRouter(), APIRouter(), APIRouter()
+
+        @chat.post("/stream")
+        async def chat_stream():
+            return {}
+
+        @chat.get("/sessions/{session_id}")
+        async def get_session(session_id: str):
+            return {"id": session_id}
+
+        @experimental.post("/stream")
+        async def experimental_stream():
+            return {}
+
+        @companies.get("/")
+        async def list_companies():
+            return []
+
+        @companies.get("/{company_id}/reviews/{page}")
+        async def get_reviews(company_id: str, page: int):
+            return []
+
+        app.include_router(chat, prefix="/api/v1/chat")
+        app.include_router(experimental, prefix="/api/v1/chat-experimental")
+        app.include_router(companies, prefix="/api/v1/companies")
+
+        client = TestClient(app)
+        assert client.post("/api/v1/chat/stream").status_code == 200
+        assert client.post("/api/v1/chat-experimental/stream").status_code == 200
+        for session_id in ("a", "b"):
+            assert client.get(f"/api/v1/chat/sessions/{session_id}").status_code == 200
+        assert client.get("/api/v1/companies/").status_code == 200
+        assert client.get("/api/v1/companies/reviews/reviews/02").status_code == 200
+
+        stats = app_metrics.get_endpoint_stats()
+        assert set(stats) == {
+            "POST /api/v1/chat/stream",
+            "POST /api/v1/chat-experimental/stream",
+            "GET /api/v1/chat/sessions/{session_id}",
+            "GET /api/v1/companies/",
+            "GET /api/v1/companies/{company_id}/reviews/{page}",
+        }
+        assert stats["GET /api/v1/chat/sessions/{session_id}"]["count"] == 2
+
+    def test_summary(self):
+        metrics = ApplicationMetrics()
+        metrics.record_request("GET", "/a", 200, 0.010)
+        metrics.record_request("GET", "/a", 500, 0.030)
+        metrics.increment_active_requests()
+
+        summary = metrics.get_summary()
+
+        assert summary["total_requests"] == 2
+        assert summary["total_errors"] == 1
+        assert summary["average_response_time_ms"] == 20.0
+        assert summary["p99_response_time_ms"] == pytest.approx(30.0, rel=0.02)
+        assert summary["active_requests"] == 1
+        metrics.decrement_active_requests()
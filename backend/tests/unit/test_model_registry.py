@@ -0,0 +1,115 @@
+"""
+Unit tests for the local model registry's request coalescing.
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from app.services.model_registry import LocalModelRegistry
+
+
+class FakeModel:
+    """SentenceTransformer stand-in: embeds a text as [len(text)]; the first encode waits for a gate."""
+
+    instances = []
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.error = None
+        FakeModel.instances.append(self)
+
+    def encode(self, texts, show_progress_bar=False, **options):
+        self.calls.append(list(texts))
+        self.started.set()
+        self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return np.array([[float(len(text))] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def registry():
+    FakeModel.instances = []
+    with patch.dict("sys.modules", {"sentence_transformers": SimpleNamespace(SentenceTransformer=FakeModel)}):
+        yield LocalModelRegistry(max_batch_texts=100)
+
+
+async def blocked_on_first_batch(registry):
+    """Start one request and wait until the model is busy with it."""
+    first = asyncio.ensure_future(registry.aencode("fake", ["warm"]))
+    model = None
+    while model is None or not model.started.is_set():
+        await asyncio.sleep(0.001)
+        model = FakeModel.instances[0] if FakeModel.instances else None
+    return first, model
+
+
+class TestLocalModelRegistry:
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_model_call(self, registry):
+        first, model = await blocked_on_first_batch(registry)
+
+        # Queued while the model is busy: all three go into the next call
+        waiters = [asyncio.ensure_future(registry.aencode("fake", ["same text", "ab"])) for _ in range(3)]
+        while registry._workers["fake"]._queue.qsize() < 3:
+            await asyncio.sleep(0.001)
+        model.gate.set()
+        results = await asyncio.gather(first, *waiters)
+
+        assert model.calls == [["warm"], ["same text", "ab"] * 3]
+        for result in results[1:]:
+            np.testing.assert_array_equal(result, [[9.0], [2.0]])
+        stats = registry.get_stats()["fake"]
+        assert stats["requests"] == 4 and stats["batches"] == 2
+        assert len(FakeModel.instances) == 1
+
+    @pytest.mark.asyncio
+    async def test_model_error_reaches_every_waiter(self, registry):
+        first, model = await blocked_on_first_batch(registry)
+        model.error = RuntimeError("CUDA out of memory")
+
+        waiters = [asyncio.ensure_future(registry.aencode("fake", [f"text {i}"])) for i in range(3)]
+        while registry._workers["fake"]._queue.qsize() < 3:
+            await asyncio.sleep(0.001)
+        model.gate.set()
+        results = await asyncio.gather(first, *waiters, return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len(model.calls) == 2
+
+        # The inference thread survives the error
+        model.error = None
+        np.testing.assert_array_equal(await registry.aencode("fake", ["ok"]), [[2.0]])
+
+    @pytest.mark.asyncio
+    async def test_cancelled_request_does_not_fail_its_batch(self, registry):
+        first, model = await blocked_on_first_batch(registry)
+
+        waiters = [asyncio.ensure_future(registry.aencode("fake", [f"text {i}"])) for i in range(3)]
+        while registry._workers["fake"]._queue.qsize() < 3:
+            await asyncio.sleep(0.001)
+        # One client disconnects while its request is queued
+        waiters[1].cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiters[1]
+        await asyncio.sleep(0.01)
+        model.gate.set()
+        results = await asyncio.gather(first, waiters[0], waiters[2])
+
+        np.testing.assert_array_equal(results[1], [[6.0]])
+        np.testing.assert_array_equal(results[2], [[6.0]])
+        assert model.calls == [["warm"], ["text 0", "text 2"]]
+
+    def test_blocking_encode_and_empty_input(self, registry):
+        registry.get_model("fake")
+        FakeModel.instances[0].gate.set()
+
+        np.testing.assert_array_equal(registry.encode("fake", ["abc"]), [[3.0]])
+        assert registry.encode("fake", []).shape == (0, 0)
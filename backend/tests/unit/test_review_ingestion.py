@@ -0,0 +1,117 @@
+"""
+Unit tests for bulk review ingestion.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from app.database.models.company import Company
+from app.database.models.review import Review
+from app.database.models.user import User
+from app.database.repositories.review import ReviewRepository
+from app.services.review_ingestion import build_review_rows, embed_reviews, insert_reviews, review_content_hash
+from sqlalchemy import func, select
+
+
+def scraped(content, author=None):
+    return SimpleNamespace(content=content, author=author, url=None, review_date=None, metadata={"rating": 4})
+
+
+class TestBuildRows:
+    def test_hash_ignores_whitespace_and_case_but_not_author(self):
+        assert review_content_hash("Great  product!\n", "Ann") == review_content_hash("great product!", " ann")
+        assert review_content_hash("Great product!", "Ann") != review_content_hash("Great product!", "Bob")
+        assert review_content_hash("Great product!", platform="g2") != review_content_hash("Great product!")
+
+    def test_empty_and_repeated_reviews_are_dropped(self):
+        rows = build_review_rows(
+            [scraped("Nice"), scraped("  nice "), scraped("   "), scraped("Nice", author="Bob")],
+            company_id="company-1", platform="g2", scraping_job_id="job-1"
+        )
+
+        assert [(row["content"], row["author"]) for row in rows] == [("Nice", None), ("Nice", "Bob")]
+        assert len({tuple(row) for row in rows}) == 1
+        assert rows[0]["extra_metadata"] == {"rating": 4}
+
+
+@pytest.fixture
+async def companies(test_db_session):
+    test_db_session.add(User(id="owner-1"))
+    await test_db_session.flush()
+    test_db_session.add_all([
+        Company(id=company_id, name=company_id, created_by="owner-1") for company_id in ("company-1", "company-2")
+    ])
+    await test_db_session.commit()
+
+
+class TestInsertReviews:
+    @pytest.mark.asyncio
+    async def test_duplicates_of_existing_reviews_are_skipped(self, test_db_session, companies):
+        first = build_review_rows([scraped(f"review {i}") for i in range(5)], company_id="company-1", platform="g2")
+        inserted = await insert_reviews(test_db_session, first, chunk_rows=2)
+        await test_db_session.commit()
+        assert sorted(inserted) == sorted((row["id"], row["content"]) for row in first)
+
+        # Re-scrape: three old reviews, two new ones
+        second = build_review_rows(
+            [scraped(f"review {i}") for i in range(3, 8)], company_id="company-1", platform="g2"
+        )
+        inserted = await insert_reviews(test_db_session, second, chunk_rows=2)
+        await test_db_session.commit()
+
+        assert sorted(content for _, content in inserted) == ["review 5", "review 6", "review 7"]
+        total = await test_db_session.scalar(select(func.count()).select_from(Review))
+        assert total == 8
+
+        # The same text for another company is not a duplicate
+        other = build_review_rows([scraped("review 0")], company_id="company-2", platform="g2")
+        assert len(await insert_reviews(test_db_session, other)) == 1
+
+
+class TestEmbedReviews:
+    @pytest.mark.asyncio
+    async def test_only_given_reviews_are_embedded_batch_by_batch(self):
+        async def batches(texts):
+            yield [(0, [0.1]), (2, None)]
+            yield [(1, [0.2])]
+
+        service = MagicMock(iter_embeddings_batches=batches)
+        write = AsyncMock(side_effect=lambda db, pairs: len(pairs))
+        with patch("app.services.review_ingestion.get_embedding_service", return_value=service), \
+                patch("app.services.review_ingestion.ReviewRepository.bulk_update_embeddings", write):
+            embedded = await embed_reviews(MagicMock(), [("a", "first"), ("b", "second"), ("c", "")])
+
+        assert embedded == 2
+        assert [call.args[1] for call in write.await_args_list] == [[("a", [0.1])], [("b", [0.2])]]
+
+
+class TestReviewPool:
+    @pytest.mark.asyncio
+    async def test_pool_matches_normalized_name_platform_and_freshness(self, test_db_session):
+        test_db_session.add_all([User(id="owner-1"), User(id="owner-2")])
+        await test_db_session.flush()
+        test_db_session.add_all([
+            Company(id="mine", name="Acme", created_by="owner-1"),
+            Company(id="theirs", name="  ACME ", created_by="owner-2"),
+            Company(id="other", name="Acme Corp", created_by="owner-2"),
+        ])
+        await test_db_session.flush()
+
+        now = datetime.utcnow()
+        for company_id, platform, age_days in [
+            ("theirs", "g2", 1), ("theirs", "g2", 10), ("theirs", "g2", 60),
+            ("theirs", "trustpilot", 1), ("other", "g2", 1), ("mine", "g2", 1),
+        ]:
+            test_db_session.add(Review(
+                company_id=company_id, platform=platform, content=f"{company_id} {platform} {age_days}",
+                scraped_at=now - timedelta(days=age_days)
+            ))
+        await test_db_session.commit()
+
+        count = await ReviewRepository.count_pool_reviews(
+            test_db_session, "acme", "g2", since=now - timedelta(days=30), exclude_company_id="mine"
+        )
+        assert count == 2
+        assert await ReviewRepository.count_pool_reviews(test_db_session, "Acme", "g2", since=now - timedelta(days=90)) == 4
@@ -0,0 +1,177 @@
+"""
+Unit tests for reusing pooled reviews before scraping.
+
+The copy itself is Postgres SQL (DISTINCT ON, md5, vector columns); its
+tests run when TEST_POSTGRES_URL points at a scratch database with the
+pgvector extension available, e.g.
+postgresql+asyncpg://postgres@localhost:5432/needleai_test
+"""
+
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from app.database.base import Base
+from app.database.models.company import Company
+from app.database.models.review import Review
+from app.database.models.review_source import ReviewSource
+from app.database.models.scraping_job import JobStatusEnum, ScrapingJob
+from app.database.models.user import User
+from app.services.review_ingestion import review_content_hash
+from app.services.user_reviews_service import UserReviewsService
+from app.tasks.scraping_tasks import scrape_reviews_async
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+@pytest.fixture
+async def pg_session():
+    engine = create_async_engine(POSTGRES_URL, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        yield session
+
+    async with engine.begin() as conn:
+        table = UserReviewsService(None).get_user_reviews_table_name("owner-1")
+        await conn.execute(text(f'DROP TABLE IF EXISTS "{table}"'))
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+def review(review_id, company_id, content, age_days, platform="g2", hashed=True):
+    return Review(
+        id=review_id, company_id=company_id, platform=platform, content=content,
+        content_hash=review_content_hash(content, None, platform) if hashed else None,
+        scraped_at=datetime.utcnow() - timedelta(days=age_days)
+    )
+
+
+@pytest.mark.database
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+class TestCopyPoolReviews:
+    @pytest.mark.asyncio
+    async def test_copies_fresh_distinct_reviews_the_user_lacks(self, pg_session):
+        pg_session.add_all([User(id=f"owner-{i}") for i in (1, 2, 3)])
+        await pg_session.flush()
+        pg_session.add_all([
+            Company(id="mine", name="Acme", created_by="owner-1"),
+            Company(id="theirs", name="  ACME ", created_by="owner-2"),
+            Company(id="theirs-too", name="acme", created_by="owner-3"),
+            Company(id="other", name="Acme Corp", created_by="owner-2"),
+        ])
+        await pg_session.flush()
+        pg_session.add_all([
+            # The user's own company: one review ingested before content_hash existed
+            review("m1", "mine", "Great support", 1),
+            review("m2", "mine", "Pricey", 1, hashed=False),
+            review("p1", "theirs", "Fast and reliable", 1),
+            review("p2", "theirs", "Great support", 2, hashed=False),
+            review("p3", "theirs", "Pricey", 3),
+            review("p4", "theirs", "Easy setup", 4),
+            review("p5", "theirs", "Old news", 60),
+            review("p6", "theirs", "Fast", 1, platform="trustpilot"),
+            review("q1", "theirs-too", "Fast and reliable", 5),
+            review("q2", "theirs-too", "Clunky UI", 6, hashed=False),
+            review("r1", "other", "Not the same company", 1),
+        ])
+        await pg_session.commit()
+
+        service = UserReviewsService(pg_session)
+        kwargs = dict(user_id="owner-1", company_id="mine", company_name="Acme", platform="g2",
+                      since=datetime.utcnow() - timedelta(days=30))
+
+        # Newest first, one per content, nothing the own company already has
+        assert await service.copy_pool_reviews(limit=2, **kwargs) == 2
+        await pg_session.commit()
+        table = service.get_user_reviews_table_name("owner-1")
+        copied = (await pg_session.execute(text(f'SELECT id FROM "{table}" ORDER BY id'))).scalars().all()
+        assert copied == ["p1", "p4"]
+
+        # Copying again adds only what the table lacks: q1 repeats p1's text
+        assert await service.copy_pool_reviews(limit=5, **kwargs) == 1
+        await pg_session.commit()
+        copied = (await pg_session.execute(text(f'SELECT id FROM "{table}" ORDER BY id'))).scalars().all()
+        assert copied == ["p1", "p4", "q2"]
+
+
+@pytest.fixture
+async def job(test_db_session):
+    test_db_session.add(User(id="user-1"))
+    await test_db_session.flush()
+    test_db_session.add_all([
+        Company(id="company-1", name="Acme", created_by="user-1"),
+        ReviewSource(id="trustpilot", name="Trustpilot", source_type="trustpilot"),
+    ])
+    await test_db_session.flush()
+    test_db_session.add(ScrapingJob(
+        id="job-1", company_id="company-1", source_id="trustpilot", user_id="user-1",
+        status=JobStatusEnum.PENDING, total_reviews_target=10
+    ))
+    await test_db_session.commit()
+
+
+@pytest.fixture
+def planner(test_db_session, job):
+    """Run scrape_reviews_async on the test database with the pool copy and scraper mocked."""
+    @asynccontextmanager
+    async def get_session():
+        yield test_db_session
+
+    scraper = MagicMock(scrape=AsyncMock(return_value=[]))
+    copy = AsyncMock()
+    with patch("app.tasks.scraping_tasks.get_async_session", get_session), \
+            patch("app.tasks.scraping_tasks.review_reuse_since", return_value=datetime.utcnow()), \
+            patch("app.tasks.scraping_tasks.ReviewRepository.count_pool_reviews", AsyncMock(return_value=50)), \
+            patch("app.services.user_reviews_service.UserReviewsService.copy_pool_reviews", copy), \
+            patch("app.tasks.scraping_tasks.get_scraper_factory") as factory, \
+            patch("app.tasks.scraping_tasks.complete_scraping_job", AsyncMock()) as complete:
+        factory.return_value.get_scraper.return_value = scraper
+
+        async def run():
+            return await scrape_reviews_async(MagicMock(), "job-1", "company-1", "trustpilot", "user-1", 10)
+
+        yield run, copy, scraper, complete
+
+
+class TestReusePlanner:
+    @pytest.mark.asyncio
+    async def test_fully_served_job_skips_the_scraper(self, planner):
+        run, copy, scraper, complete = planner
+        copy.return_value = 10
+
+        result = await run()
+
+        assert copy.await_args.kwargs["limit"] == 10
+        scraper.scrape.assert_not_awaited()
+        complete.assert_awaited_once()
+        assert complete.await_args.args[2:] == (0, 10)
+        assert result["reviews_reused"] == 10
+
+    @pytest.mark.asyncio
+    async def test_partly_served_job_scrapes_the_rest(self, planner):
+        run, copy, scraper, complete = planner
+        copy.return_value = 3
+
+        await run()
+
+        assert scraper.scrape.await_args.kwargs["limit"] == 7
+        assert complete.await_args.args[2:] == (0, 3)
+
+    @pytest.mark.asyncio
+    async def test_failed_lookup_falls_back_to_scraping_everything(self, planner):
+        run, copy, scraper, complete = planner
+        copy.side_effect = RuntimeError("pool query failed")
+
+        result = await run()
+
+        assert scraper.scrape.await_args.kwargs["limit"] == 10
+        assert complete.await_args.args[2:] == (0, 0)
+        assert result["reviews_reused"] == 0
@@ -0,0 +1,291 @@
+"""
+Unit tests for the Apify client and scrape orchestrator, against a local fake Apify server.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+import pytest
+from aiohttp import web
+from app.database.models.company import Company
+from app.database.models.review import Review
+from app.database.models.review_source import ReviewSource
+from app.database.models.scraping_job import JobStatusEnum, ScrapingJob
+from app.database.models.user import User
+from app.exceptions import ExternalServiceError
+from app.services.apify_client import ApifyClient
+from app.services.review_ingestion import build_review_rows, insert_reviews
+from app.services.scrape_orchestrator import (
+    ScrapeRun,
+    advance_scrape_runs,
+    launch_scrape_runs,
+    list_stalled_runs,
+    poll_delay,
+)
+from app.tasks.scraping_tasks import poll_apify_runs_task
+from sqlalchemy import func, select
+
+
+class FakeApify:
+    """In-memory Apify API: actor runs and their datasets."""
+
+    def __init__(self):
+        self.runs = {}
+        self.inputs = {}
+        self.webhooks = {}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v2/acts/{actor_id}/runs", self.start_run)
+        app.router.add_get("/v2/actor-runs/{run_id}", self.get_run)
+        app.router.add_post("/v2/actor-runs/{run_id}/abort", self.abort_run)
+        app.router.add_get("/v2/datasets/{dataset_id}/items", self.dataset_items)
+        return app
+
+    def push(self, run_id, items, status=None):
+        run = self.runs[run_id]
+        run["items"].extend(items)
+        if status:
+            run["status"] = status
+
+    def _run(self, run_id):
+        run = self.runs[run_id]
+        return {"id": run_id, "status": run["status"], "defaultDatasetId": f"ds-{run_id}"}
+
+    async def start_run(self, request):
+        run_id = f"run-{len(self.runs) + 1}"
+        self.runs[run_id] = {"status": "RUNNING", "items": [], "actor": request.match_info["actor_id"]}
+        self.inputs[run_id] = await request.json()
+        if "webhooks" in request.query:
+            self.webhooks[run_id] = json.loads(base64.b64decode(request.query["webhooks"]))
+        return web.json_response({"data": self._run(run_id)}, status=201)
+
+    async def get_run(self, request):
+        run_id = request.match_info["run_id"]
+        if run_id not in self.runs:
+            return web.json_response({"error": "not found"}, status=404)
+        return web.json_response({"data": self._run(run_id)})
+
+    async def abort_run(self, request):
+        run_id = request.match_info["run_id"]
+        self.runs[run_id]["status"] = "ABORTED"
+        return web.json_response({"data": self._run(run_id)})
+
+    async def dataset_items(self, request):
+        run_id = request.match_info["dataset_id"].removeprefix("ds-")
+        offset = int(request.query.get("offset", 0))
+        limit = int(request.query.get("limit", 1000))
+        return web.json_response(self.runs[run_id]["items"][offset:offset + limit])
+
+
+@pytest.fixture
+async def apify():
+    fake = FakeApify()
+    runner = web.AppRunner(fake.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    async with aiohttp.ClientSession() as session:
+        yield fake, ApifyClient(session, "token", base_url=f"http://127.0.0.1:{port}")
+    await runner.cleanup()
+
+
+class FakeScraper:
+    """Apify scraper whose dataset items are {"text": ...}."""
+    ACTOR_ID = "test~reviews"
+    api_token = "token"
+
+    def build_actor_input(self, query, limit, **kwargs):
+        return {"query": query, "maxReviews": limit}
+
+    def parse_items(self, items):
+        return [
+            SimpleNamespace(content=item["text"], author=None, url=None, review_date=None, metadata={})
+            for item in items
+        ]
+
+    async def validate_query(self, query):
+        return bool(query)
+
+
+def items(start, stop):
+    return [{"text": f"review {i}"} for i in range(start, stop)]
+
+
+class TestApifyClient:
+    @pytest.mark.asyncio
+    async def test_start_run_with_webhook_and_page_through_dataset(self, apify):
+        fake, client = apify
+        run = await client.start_run("test~reviews", {"q": 1}, webhook_url="http://api/hook")
+        fake.push(run["id"], items(0, 5))
+
+        pages = [page async for page in client.iter_dataset_pages(run["defaultDatasetId"], page_size=2)]
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert fake.inputs[run["id"]] == {"q": 1}
+        assert fake.webhooks[run["id"]][0]["requestUrl"] == "http://api/hook"
+
+    @pytest.mark.asyncio
+    async def test_wait_for_run(self, apify):
+        fake, client = apify
+        run = await client.start_run("test~reviews", {})
+        fake.push(run["id"], [], status="SUCCEEDED")
+        assert (await client.wait_for_run(run["id"], initial_delay=0.01))["status"] == "SUCCEEDED"
+
+        failed = await client.start_run("test~reviews", {})
+        fake.push(failed["id"], [], status="FAILED")
+        with pytest.raises(ExternalServiceError):
+            await client.wait_for_run(failed["id"], initial_delay=0.01)
+
+        with pytest.raises(ExternalServiceError):
+            await client.get_run("missing")
+
+    def test_poll_delay_backs_off_to_the_cap(self):
+        with patch("app.services.scrape_orchestrator.get_settings") as settings:
+            settings.return_value = SimpleNamespace(apify_poll_initial_seconds=5.0, apify_poll_max_seconds=60.0)
+            assert [poll_delay(attempt) for attempt in range(6)] == [5.0, 10.0, 20.0, 40.0, 60.0, 60.0]
+
+
+@pytest.fixture
+async def jobs(test_db_session):
+    test_db_session.add(User(id="user-1"))
+    await test_db_session.flush()
+    test_db_session.add_all([
+        Company(id="company-1", name="Acme", created_by="user-1"),
+        ReviewSource(id="g2", name="G2", source_type="g2"),
+        ReviewSource(id="trustradius", name="TrustRadius", source_type="trustradius"),
+    ])
+    await test_db_session.flush()
+    test_db_session.add_all([
+        ScrapingJob(id=f"job-{source_id}", company_id="company-1", source_id=source_id, user_id="user-1",
+                    status=JobStatusEnum.RUNNING, total_reviews_target=target)
+        for source_id, target in (("g2", 10), ("trustradius", 3))
+    ])
+    await test_db_session.commit()
+
+
+@pytest.fixture
+def no_embeddings():
+    with patch("app.services.scrape_orchestrator._get_scraper", return_value=FakeScraper()), \
+            patch("app.services.scrape_orchestrator.embed_reviews", AsyncMock(return_value=0)):
+        yield
+
+
+class TestScrapeOrchestrator:
+    @pytest.mark.asyncio
+    async def test_runs_are_launched_streamed_and_finished(self, test_db_session, jobs, apify, no_embeddings):
+        fake, client = apify
+        runs = [
+            ScrapeRun("job-g2", "g2", FakeScraper(), "Acme", 10),
+            ScrapeRun("job-trustradius", "trustradius", FakeScraper(), "Acme", 3),
+        ]
+        launched = await launch_scrape_runs(test_db_session, client, runs)
+        assert launched == ["job-g2", "job-trustradius"]
+        assert len(fake.runs) == 2
+
+        job_ids = ["job-g2", "job-trustradius"]
+        g2_run = (await test_db_session.get(ScrapingJob, "job-g2")).run_state["run_id"]
+        tr_run = (await test_db_session.get(ScrapingJob, "job-trustradius")).run_state["run_id"]
+
+        # Tick 1: pages written so far are ingested while the runs are still going
+        fake.push(g2_run, items(0, 4))
+        fake.push(tr_run, items(0, 2))
+        assert await advance_scrape_runs(test_db_session, client, job_ids) == job_ids
+
+        g2_job = await test_db_session.get(ScrapingJob, "job-g2")
+        assert g2_job.run_state["offset"] == 4 and g2_job.reviews_fetched == 4
+
+        # Tick 2: TrustRadius reaches its target (its run is aborted), G2's run succeeds
+        fake.push(g2_run, items(4, 6), status="SUCCEEDED")
+        fake.push(tr_run, items(2, 5))
+        assert await advance_scrape_runs(test_db_session, client, job_ids) == []
+
+        assert fake.runs[tr_run]["status"] == "ABORTED"
+        for job_id, fetched in (("job-g2", 6), ("job-trustradius", 3)):
+            job = await test_db_session.get(ScrapingJob, job_id)
+            assert job.status == JobStatusEnum.COMPLETED
+            assert job.reviews_fetched == fetched
+        total = await test_db_session.scalar(select(func.count()).select_from(Review))
+        assert total == 9
+
+    @pytest.mark.asyncio
+    async def test_failed_run_fails_its_job_only(self, test_db_session, jobs, apify, no_embeddings):
+        fake, client = apify
+        await launch_scrape_runs(test_db_session, client, [
+            ScrapeRun("job-g2", "g2", FakeScraper(), "Acme", 10),
+            ScrapeRun("job-trustradius", "trustradius", FakeScraper(), "", 3),
+        ])
+
+        # The run with an invalid query was never started
+        failed = await test_db_session.get(ScrapingJob, "job-trustradius")
+        assert failed.status == JobStatusEnum.FAILED and len(fake.runs) == 1
+
+        fake.push("run-1", items(0, 2), status="FAILED")
+        assert await advance_scrape_runs(test_db_session, client, ["job-g2", "job-trustradius"]) == []
+
+        job = await test_db_session.get(ScrapingJob, "job-g2")
+        assert job.status == JobStatusEnum.FAILED
+        assert "FAILED" in job.error_message
+
+    @pytest.mark.asyncio
+    async def test_items_cut_by_duplicates_are_read_again(self, test_db_session, jobs, apify, no_embeddings):
+        fake, client = apify
+        # The company already has "review 1", so the first 3 items only add 2 reviews
+        await insert_reviews(test_db_session, build_review_rows(
+            FakeScraper().parse_items(items(1, 2)), company_id="company-1", platform="trustradius"
+        ))
+        await test_db_session.commit()
+        await launch_scrape_runs(test_db_session, client, [
+            ScrapeRun("job-trustradius", "trustradius", FakeScraper(), "Acme", 3),
+        ])
+
+        fake.push("run-1", items(0, 6), status="SUCCEEDED")
+        assert await advance_scrape_runs(test_db_session, client, ["job-trustradius"]) == []
+
+        job = await test_db_session.get(ScrapingJob, "job-trustradius")
+        assert job.status == JobStatusEnum.COMPLETED
+        assert job.reviews_fetched == 3
+        # Items 0-3 were used; 4 and 5 were never inserted
+        assert job.run_state["offset"] == 4
+
+    @pytest.mark.asyncio
+    async def test_runs_without_a_recent_tick_are_stalled(self, test_db_session, jobs, apify, no_embeddings):
+        fake, client = apify
+        await launch_scrape_runs(test_db_session, client, [
+            ScrapeRun("job-g2", "g2", FakeScraper(), "Acme", 10),
+            ScrapeRun("job-trustradius", "trustradius", FakeScraper(), "Acme", 3),
+        ])
+        assert await list_stalled_runs(test_db_session) == []
+
+        job = await test_db_session.get(ScrapingJob, "job-g2")
+        stale = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+        job.run_state = {**job.run_state, "polled_at": stale}
+        await test_db_session.commit()
+        assert await list_stalled_runs(test_db_session) == ["job-g2"]
+
+        # A tick, even one that ingests nothing, counts as recent
+        await advance_scrape_runs(test_db_session, client, ["job-g2"])
+        assert await list_stalled_runs(test_db_session) == []
+
+
+class TestPollApifyRunsTask:
+    def test_failed_tick_is_rescheduled_with_backoff(self):
+        with patch("app.tasks.scraping_tasks.run_async", side_effect=RuntimeError("database down")), \
+                patch.object(poll_apify_runs_task, "apply_async", MagicMock()) as apply_async, \
+                patch("app.tasks.scraping_tasks.poll_delay", side_effect=lambda attempt: attempt * 10.0):
+            result = poll_apify_runs_task.run(["job-1", "job-2"], attempt=2)
+
+        assert result["pending"] == ["job-1", "job-2"]
+        apply_async.assert_called_once_with(args=[["job-1", "job-2"]], kwargs={"attempt": 3}, countdown=30.0)
+
+    def test_finished_jobs_end_the_chain(self):
+        with patch("app.tasks.scraping_tasks.run_async", return_value=[]), \
+                patch.object(poll_apify_runs_task, "apply_async", MagicMock()) as apply_async:
+            poll_apify_runs_task.run(["job-1"])
+
+        apply_async.assert_not_called()
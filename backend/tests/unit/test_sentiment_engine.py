@@ -0,0 +1,68 @@
+"""
+Tests for the batch sentiment engine's lexicon backend and cache.
+"""
+
+import numpy as np
+import pytest
+
+from app.services.sentiment_engine import SentimentEngine, classify_polarity
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return SentimentEngine(backend="lexicon", cache_max_entries=100, parallel_min_rows=0)
+
+
+class TestLexiconScores:
+    """Scores follow TextBlob's pattern analyzer."""
+
+    @pytest.mark.parametrize("text, polarity, subjectivity", [
+        ("This is good", 0.7, 0.6),
+        ("This is not good", -0.35, 0.6),
+        ("not a good product", -0.35, 0.6),
+        ("Very good support!", 1.0, 0.78),
+        ("The app is really very bad", -0.91, 0.8667),
+        ("Not bad at all, pretty decent actually", 0.1917, 0.6083),
+        ("It works.", 0.0, 0.0),
+    ])
+    def test_matches_textblob(self, engine, text, polarity, subjectivity):
+        scores = engine.score([text])
+
+        assert scores.polarity[0] == pytest.approx(polarity, abs=1e-3)
+        assert scores.subjectivity[0] == pytest.approx(subjectivity, abs=1e-3)
+
+    def test_rules_do_not_cross_documents(self, engine):
+        scores = engine.score(["this is not", "good", "very", "bad"])
+
+        np.testing.assert_allclose(scores.polarity, [0.0, 0.7, 0.2, -0.7], atol=1e-3)
+
+    def test_missing_values_score_zero(self, engine):
+        scores = engine.score([None, float("nan"), "", "great"])
+
+        assert len(scores) == 4
+        assert scores.polarity.tolist()[:3] == [0.0, 0.0, 0.0]
+        assert list(scores.labels()) == ["Neutral", "Neutral", "Neutral", "Positive"]
+
+
+class TestSentimentEngineCache:
+    """Test text-hash caching."""
+
+    def test_repeated_texts_hit_the_cache(self):
+        engine = SentimentEngine(backend="lexicon", cache_max_entries=100, parallel_min_rows=0)
+        first = engine.score(["good", "bad"])
+        second = engine.score(["bad", "good", "awful"])
+
+        assert engine.get_stats()["cache_hits"] == 2
+        np.testing.assert_allclose(second.polarity[:2], first.polarity[::-1])
+
+    def test_cache_is_bounded(self):
+        engine = SentimentEngine(backend="lexicon", cache_max_entries=2, parallel_min_rows=0)
+        engine.score(["good", "bad", "awful"])
+
+        assert engine.get_stats()["cache_entries"] == 2
+
+
+def test_classify_polarity_thresholds():
+    labels = classify_polarity([0.5, 0.1, 0.0, -0.1, -0.5], "pos", "neu", "neg")
+
+    assert list(labels) == ["pos", "neu", "neu", "neu", "neg"]
@@ -0,0 +1,105 @@
+"""
+Unit tests for the batched LLM sentiment task.
+"""
+
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from app.tasks.sentiment_tasks import (
+    ReviewSentiment,
+    SentimentBatch,
+    analyze_sentiment_batch_async,
+    parse_batch_scores,
+)
+
+
+class StubSentimentLLM:
+    """Stub structured-output model scoring every review in a call."""
+
+    def __init__(self, fail_containing: str | None = None):
+        self.fail_containing = fail_containing
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        prompt = messages[-1][1]
+        if self.fail_containing and self.fail_containing in prompt:
+            raise RuntimeError("model error")
+        reviews = prompt.split("\n\n")
+        return SentimentBatch(scores=[ReviewSentiment(index=i, score=2.0) for i in range(len(reviews))])
+
+
+@asynccontextmanager
+async def fake_session():
+    yield MagicMock(commit=AsyncMock())
+
+
+def make_settings(**overrides):
+    settings = MagicMock(
+        sentiment_llm_batch_size=10,
+        sentiment_llm_max_tokens_per_call=100_000,
+        sentiment_llm_max_concurrency=2,
+        sentiment_llm_max_review_chars=500,
+        sentiment_llm_write_batch_size=1000,
+        sentiment_progress_interval_seconds=60.0,
+    )
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    return settings
+
+
+class TestParseBatchScores:
+    """Test mapping structured scores back to reviews."""
+
+    def test_clamps_and_ignores_bad_indices(self):
+        batch = [("a", "good"), ("b", "bad")]
+        result = SentimentBatch(scores=[
+            ReviewSentiment(index=1, score=-3.0),
+            ReviewSentiment(index=5, score=0.5),
+            ReviewSentiment(index=1, score=0.9),
+        ])
+
+        assert parse_batch_scores(batch, result) == [("b", -1.0)]
+
+
+class TestAnalyzeSentimentBatch:
+    """Test the load / score / bulk-write pipeline."""
+
+    async def _run(self, pending, llm, settings):
+        task = MagicMock()
+        with patch("app.tasks.sentiment_tasks.get_settings", return_value=settings), \
+                patch("app.tasks.sentiment_tasks.get_async_session", fake_session), \
+                patch("app.tasks.sentiment_tasks.ReviewRepository") as repo:
+            repo.get_pending_sentiment = AsyncMock(return_value=pending)
+            repo.bulk_update_sentiment = AsyncMock(side_effect=lambda db, scores: len(scores))
+            result = await analyze_sentiment_batch_async(task, [rid for rid, _ in pending] + ["done"], llm=llm)
+        return result, repo, task
+
+    @pytest.mark.asyncio
+    async def test_packs_reviews_into_few_calls_and_one_write(self):
+        pending = [(f"r{i}", f"review {i}") for i in range(25)]
+        llm = StubSentimentLLM()
+
+        result, repo, task = await self._run(pending, llm, make_settings())
+
+        assert llm.calls == 3
+        assert result == {"analyzed": 25, "failed": 0, "total": 26, "llm_calls": 3}
+        repo.get_pending_sentiment.assert_awaited_once()
+        repo.bulk_update_sentiment.assert_awaited_once()
+        written = repo.bulk_update_sentiment.await_args.args[1]
+        assert sorted(written) == sorted((rid, 1.0) for rid, _ in pending)
+        # Throttled: the first batch and the final update, not one per review
+        assert task.update_state.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_calls_leave_reviews_unscored(self):
+        pending = [(f"r{i}", f"review {i}") for i in range(4)]
+        llm = StubSentimentLLM(fail_containing="review 3")
+
+        result, repo, _ = await self._run(pending, llm, make_settings(sentiment_llm_batch_size=2, sentiment_llm_write_batch_size=2))
+
+        assert result["analyzed"] == 2
+        assert result["failed"] == 2
+        written = [pair for call in repo.bulk_update_sentiment.await_args_list for pair in call.args[1]]
+        assert sorted(rid for rid, _ in written) == ["r0", "r1"]
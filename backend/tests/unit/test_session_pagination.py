@@ -0,0 +1,117 @@
+"""
+Query-count regression tests for chat session listing.
+"""
+
+import pytest
+from app.database.repositories.optimized_chat_repository import OptimizedChatRepository
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class TestSessionPageQueryCount:
+    """Regression tests: session listing issues a fixed number of queries."""
+
+    @staticmethod
+    async def _seed(test_db_session: AsyncSession, sessions: int, messages: int, steps: int):
+        from datetime import datetime, timedelta
+
+        from app.database.models.chat_message import ChatMessage, MessageRoleEnum
+        from app.database.models.chat_message_step import ChatMessageStep
+        from app.database.models.chat_session import ChatSession
+        from app.database.models.user import User
+
+        test_db_session.add(User(id="user-1"))
+        await test_db_session.flush()
+
+        base = datetime(2024, 1, 1)
+        for i in range(sessions):
+            # Two sessions share updated_at so the id tie-breaker is exercised
+            session = ChatSession(id=f"s{i:02d}", user_id="user-1", title=f"Session {i}", updated_at=base + timedelta(minutes=i // 2))
+            test_db_session.add(session)
+            for j in range(messages):
+                message = ChatMessage(
+                    id=f"s{i:02d}-m{j:02d}",
+                    session_id=session.id,
+                    content=f"Message {j}",
+                    role=MessageRoleEnum.ASSISTANT,
+                    created_at=base + timedelta(seconds=j)
+                )
+                test_db_session.add(message)
+                for k in range(steps):
+                    test_db_session.add(ChatMessageStep(message_id=message.id, agent_name="agent", step_order=k))
+        await test_db_session.commit()
+
+    @staticmethod
+    def _count_queries(test_engine):
+        from sqlalchemy import event
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        return statements, lambda: event.remove(test_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    @staticmethod
+    def _fresh_session(test_engine) -> AsyncSession:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        return async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("sessions, messages, steps", [(2, 1, 1), (8, 6, 3)])
+    async def test_full_page_query_count_is_constant(self, test_engine, test_db_session, sessions, messages, steps):
+        """Sessions, messages and steps load in 3 queries whatever the volume."""
+        await self._seed(test_db_session, sessions, messages, steps)
+
+        statements, stop = self._count_queries(test_engine)
+        try:
+            async with self._fresh_session(test_engine) as db:
+                page, _ = await OptimizedChatRepository.get_sessions_page(db, "user-1", limit=50)
+                # Touch everything the endpoint serializes
+                loaded_steps = sum(len(m.steps) for s in page for m in s.messages)
+        finally:
+            stop()
+
+        assert len(page) == sessions
+        assert loaded_steps == sessions * messages * steps
+        assert len(statements) == 3
+
+    @pytest.mark.asyncio
+    async def test_summary_page_loads_last_message_in_two_queries(self, test_engine, test_db_session):
+        """Summary mode returns headers plus the last message and count."""
+        await self._seed(test_db_session, 4, 5, 2)
+
+        statements, stop = self._count_queries(test_engine)
+        try:
+            async with self._fresh_session(test_engine) as db:
+                page, _ = await OptimizedChatRepository.get_sessions_page(db, "user-1", limit=50, summary=True)
+        finally:
+            stop()
+
+        assert len(statements) == 2
+        for session in page:
+            assert session._message_count == 5
+            assert session._last_message.id == f"{session.id}-m04"
+
+    @pytest.mark.asyncio
+    async def test_cursor_pages_cover_all_sessions_once(self, test_engine, test_db_session):
+        """Keyset pages are disjoint, ordered and end with no cursor."""
+        await self._seed(test_db_session, 7, 0, 0)
+
+        seen, cursor = [], None
+        async with self._fresh_session(test_engine) as db:
+            while True:
+                page, cursor = await OptimizedChatRepository.get_sessions_page(db, "user-1", limit=3, cursor=cursor, summary=True)
+                seen.extend(s.id for s in page)
+                if cursor is None:
+                    break
+
+        assert seen == ["s06", "s05", "s04", "s03", "s02", "s01", "s00"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor_is_rejected(self, test_db_session):
+        from app.exceptions import ValidationError
+
+        with pytest.raises(ValidationError):
+            await OptimizedChatRepository.get_sessions_page(test_db_session, "user-1", cursor="not-a-cursor")
@@ -0,0 +1,171 @@
+"""
+Unit tests for SSE event encoding and stream coalescing.
+"""
+
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import orjson
+import pandas as pd
+import pytest
+from app.api.sse import HEARTBEAT, SSEStream, coalesce_events, encode_event
+from pydantic import BaseModel
+
+
+class Answer(BaseModel):
+    text: str
+    at: datetime
+
+
+def decode_frames(chunks):
+    """Split written chunks back into decoded events (heartbeats skipped)."""
+    events = []
+    for frame in b"".join(chunks).split(b"\n\n"):
+        if frame.startswith(b"data: "):
+            events.append(orjson.loads(frame[len(b"data: "):]))
+    return events
+
+
+async def from_list(events, delay: float = 0.0):
+    for event in events:
+        if delay:
+            await asyncio.sleep(delay)
+        yield event
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+class TestEncodeEvent:
+    """Test the orjson encoder and its default hook."""
+
+    def test_encodes_rich_values(self):
+        event = {
+            "type": "complete",
+            "data": {
+                "answer": Answer(text="hi", at=datetime(2024, 1, 2, 3, 4, 5)),
+                "when": pd.Timestamp("2024-01-02"),
+                "counts": np.array([1, 2]),
+                "score": np.float32(0.5),
+                "rows": pd.DataFrame({"a": [1, 2]}),
+                "by_date": {datetime(2024, 1, 1): 3},
+            },
+        }
+
+        frame = encode_event(event)
+
+        assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+        data = orjson.loads(frame[len(b"data: "):])["data"]
+        assert data["answer"] == {"text": "hi", "at": "2024-01-02T03:04:05"}
+        assert data["when"] == "2024-01-02T00:00:00"
+        assert data["counts"] == [1, 2]
+        assert data["score"] == 0.5
+        assert data["rows"] == [{"a": 1}, {"a": 2}]
+        assert data["by_date"] == {"2024-01-01T00:00:00": 3}
+
+
+class TestCoalesceEvents:
+    """Test merging of consecutive deltas."""
+
+    def test_merges_runs_and_keeps_order(self):
+        events = [
+            {"type": "content", "data": {"content": "Hel"}},
+            {"type": "content", "data": {"content": "lo"}},
+            {"type": "agent_step_start", "data": {"agent_name": "x"}},
+            {"type": "thinking", "data": {"delta": "a"}},
+            {"type": "thinking", "data": {"delta": "b"}},
+            {"type": "content", "data": {"content": "!"}, "session_id": "s1"},
+            {"type": "content", "data": {"content": "?"}, "session_id": "s2"},
+        ]
+
+        assert coalesce_events(events) == [
+            {"type": "content", "data": {"content": "Hello"}},
+            {"type": "agent_step_start", "data": {"agent_name": "x"}},
+            {"type": "thinking", "data": {"delta": "ab"}},
+            {"type": "content", "data": {"content": "!"}, "session_id": "s1"},
+            {"type": "content", "data": {"content": "?"}, "session_id": "s2"},
+        ]
+
+    def test_drop_thinking(self):
+        events = [
+            {"type": "thinking", "data": {"delta": "a"}},
+            {"type": "content", "data": {"content": "x"}},
+        ]
+
+        assert coalesce_events(events, drop_thinking=True) == [{"type": "content", "data": {"content": "x"}}]
+
+
+class TestSSEStream:
+    """Test framing, heartbeats and back-pressure."""
+
+    @pytest.mark.asyncio
+    async def test_token_burst_is_coalesced(self):
+        tokens = [{"type": "content", "data": {"content": str(i)}} for i in range(200)]
+        stream = SSEStream(from_list(tokens + [{"type": "complete", "data": {}}]), coalesce_ms=50, heartbeat_seconds=0)
+
+        chunks = await collect(stream)
+        events = decode_frames(chunks)
+
+        assert "".join(e["data"]["content"] for e in events if e["type"] == "content") == "".join(map(str, range(200)))
+        assert events[-1]["type"] == "complete"
+        assert stream.frames_out < 10
+        assert stream.events_in == 201
+
+    @pytest.mark.asyncio
+    async def test_idle_source_gets_heartbeats(self):
+        stream = SSEStream(from_list([{"type": "status", "data": {}}], delay=0.05), coalesce_ms=0, heartbeat_seconds=0.01)
+
+        chunks = await collect(stream)
+
+        assert HEARTBEAT in chunks
+        assert decode_frames(chunks) == [{"type": "status", "data": {}}]
+
+    @pytest.mark.asyncio
+    async def test_slow_client_drops_thinking(self):
+        events = [{"type": "thinking", "data": {"delta": "t"}}] * 50 + [{"type": "content", "data": {"content": "x"}}]
+        stream = SSEStream(from_list(events), coalesce_ms=0, heartbeat_seconds=0, backlog_threshold=10)
+
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk)
+            # Simulate a client that reads slower than events are produced
+            await asyncio.sleep(0.01)
+
+        assert {"type": "content", "data": {"content": "x"}} in decode_frames(chunks)
+        assert stream.thinking_dropped > 0
+
+    @pytest.mark.asyncio
+    async def test_stalled_client_makes_the_source_wait(self):
+        produced = 0
+
+        async def source():
+            nonlocal produced
+            for i in range(1000):
+                produced += 1
+                yield {"type": "status", "data": {"i": i}}
+
+        stream = SSEStream(source(), coalesce_ms=0, heartbeat_seconds=0, backlog_threshold=4, queue_size=8)
+        chunks = stream.__aiter__()
+        first = await chunks.__anext__()
+        # The client stalls: past the first write (at most a queue's worth of
+        # events), the source runs ahead only until the queue is full again
+        await asyncio.sleep(0.05)
+        sent = len(decode_frames([first]))
+        assert sent <= 8
+        assert produced <= sent + 8 + 1
+        await chunks.aclose()
+
+    @pytest.mark.asyncio
+    async def test_source_error_is_raised_after_pending_events(self):
+        async def failing():
+            yield {"type": "content", "data": {"content": "partial"}}
+            raise RuntimeError("boom")
+
+        chunks = []
+        with pytest.raises(RuntimeError, match="boom"):
+            async for chunk in SSEStream(failing(), coalesce_ms=0, heartbeat_seconds=0):
+                chunks.append(chunk)
+
+        assert decode_frames(chunks) == [{"type": "content", "data": {"content": "partial"}}]
@@ -0,0 +1,90 @@
+"""
+Unit tests for the per-request workflow step buffer.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from app.services.step_buffer import StepBuffer, get_step_buffer_stats
+
+
+@pytest.fixture
+def repos(batch_db):
+    with patch("app.services.step_buffer.ChatMessageStepRepository") as steps, \
+            patch("app.services.step_buffer.ChatMessageRepository") as messages:
+        steps.insert_many = batch_db.insert_many
+        steps.update_many = batch_db.update_many
+        messages.update_fields = batch_db.update_fields
+        yield batch_db
+
+
+class TestStepBuffer:
+    """Test coalescing, flush triggers and retry on close."""
+
+    @pytest.mark.asyncio
+    async def test_stream_is_written_in_one_transaction(self, repos):
+        buffer = StepBuffer(flush_interval_seconds=0, max_pending=100)
+        step_ids = [
+            buffer.add_step("msg-1", "agent", i, status="pending", tool_call={"tool_name": f"t{i}"})
+            for i in range(5)
+        ]
+        for step_id in step_ids:
+            buffer.update_step(step_id, status="SUCCESS", raw_output="ok", prediction=None)
+        buffer.complete_message("msg-1", "final answer")
+
+        await buffer.close()
+
+        assert repos.commits == 1
+        assert len(repos.inserted) == 1
+        rows = repos.inserted[0]
+        assert [row["id"] for row in rows] == step_ids
+        assert all(row["status"] == "success" and row["raw_output"] == "ok" for row in rows)
+        assert all(row["prediction"] is None for row in rows)
+        assert repos.updated == [[]]
+        assert repos.messages["msg-1"]["content"] == "final answer"
+
+    @pytest.mark.asyncio
+    async def test_updates_after_flush_become_bulk_updates(self, repos):
+        buffer = StepBuffer(flush_interval_seconds=0, max_pending=100)
+        step_id = buffer.add_step("msg-1", "agent", 0, status="pending")
+        await buffer.flush()
+
+        buffer.update_step(step_id, status="error")
+        buffer.update_step(step_id, raw_output="boom")
+        await buffer.close()
+
+        assert repos.updated[-1] == [{"id": step_id, "status": "error", "raw_output": "boom"}]
+
+    @pytest.mark.asyncio
+    async def test_size_threshold_and_timer_trigger_flushes(self, repos):
+        buffer = StepBuffer(flush_interval_seconds=0.01, max_pending=3)
+        for i in range(3):
+            buffer.add_step("msg-1", "agent", i)
+        await asyncio.sleep(0)
+        assert [len(rows) for rows in repos.inserted] == [3]
+
+        buffer.add_step("msg-1", "agent", 3)
+        await asyncio.sleep(0.05)
+        assert [len(rows) for rows in repos.inserted] == [3, 1]
+
+        await buffer.close()
+        assert repos.commits == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried_on_close(self, repos):
+        repos.fail_commits = 2
+        failed_before = get_step_buffer_stats()["failed_flushes"]
+        buffer = StepBuffer(flush_interval_seconds=0, max_pending=100, max_retries=2)
+        step_id = buffer.add_step("msg-1", "agent", 0, status="pending")
+
+        assert await buffer.flush() is False
+        # A transition buffered while the insert is pending again is merged into it
+        buffer.update_step(step_id, status="success")
+        with patch("app.services.batched_writer.asyncio.sleep", AsyncMock()):
+            await buffer.close()
+
+        assert repos.commits == 1
+        assert repos.inserted[-1][0]["status"] == "success"
+        assert buffer.pending == 0
+        assert get_step_buffer_stats()["failed_flushes"] == failed_before + 2
@@ -0,0 +1,194 @@
+"""
+Tests for pgvector index naming and ANN pre-filter SQL generation.
+"""
+
+import re
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from app.database.repositories.review import ReviewRepository
+from app.utils.vector_index import ann_search, build_filter_clause, configure_ann_search, format_vector, hnsw_index_name
+from sqlalchemy.dialects import postgresql
+
+
+class TestHnswIndexName:
+    """Test deterministic HNSW index names."""
+
+    def test_short_name_is_readable(self):
+        assert hnsw_index_name("__user_abc_reviews", "__embedding__") == "idx___user_abc_reviews___embedding___hnsw"
+
+    def test_long_name_fits_postgres_limit(self):
+        table = "__user_" + "x" * 60
+        name = hnsw_index_name(table, "__embedding__")
+
+        assert len(name) <= 63
+        assert name == hnsw_index_name(table, "__embedding__")
+        assert name != hnsw_index_name(table + "y", "__embedding__")
+
+
+class TestBuildFilterClause:
+    """Test translation of pre-filters into bound SQL conditions."""
+
+    def test_scalar_list_and_range_filters(self):
+        params = {}
+        conditions = build_filter_clause(
+            {
+                "company_name": "Acme",
+                "source": ["g2", "trustpilot"],
+                "date": (datetime(2024, 1, 1), None),
+            },
+            params,
+        )
+
+        assert conditions == ['"company_name" = :f0', '"source" = ANY(:f1)', '"date" >= :f2_low']
+        assert params == {"f0": "Acme", "f1": ["g2", "trustpilot"], "f2_low": datetime(2024, 1, 1)}
+
+    def test_none_values_are_skipped(self):
+        params = {}
+
+        assert build_filter_clause({"company_name": None}, params) == []
+        assert params == {}
+
+    def test_column_names_cannot_break_quoting(self):
+        conditions = build_filter_clause({'source" OR 1=1 --': "g2"}, {})
+
+        assert conditions == ['"source OR 1=1 --" = :f0']
+
+
+def test_format_vector():
+    assert format_vector([1, 0.5]) == "[1.0,0.5]"
+
+
+def recording_session():
+    """AsyncSession stand-in that records every executed statement and its parameters."""
+    db = MagicMock()
+    db.statements = []
+
+    async def execute(statement, params=None):
+        db.statements.append((statement, params or {}))
+        return MagicMock(all=MagicMock(return_value=[]))
+
+    db.execute = AsyncMock(side_effect=execute)
+    return db
+
+
+def set_configs(db):
+    """The set_config(name, value) calls made on db, in order."""
+    calls = []
+    for statement, params in db.statements:
+        match = re.search(r"set_config\('([\w.]+)'", str(statement))
+        if match:
+            calls.append((match.group(1), next(iter(params.values()))))
+    return calls
+
+
+def squash(sql):
+    return " ".join(str(sql).split())
+
+
+@pytest.fixture
+def pgvector_version():
+    with patch("app.utils.vector_index._pgvector_version", (0, 8, 0)) as version:
+        yield version
+
+
+class TestConfigureAnnSearch:
+    """Test the transaction-local HNSW settings issued before a search."""
+
+    @pytest.mark.asyncio
+    async def test_unfiltered_search_raises_ef_search_to_the_limit(self, pgvector_version):
+        db = recording_session()
+
+        await configure_ann_search(db, 100)
+
+        assert set_configs(db) == [("hnsw.ef_search", "100")]
+        assert all(", true)" in str(statement) for statement, _ in db.statements)
+
+    @pytest.mark.asyncio
+    async def test_filtered_search_uses_an_iterative_scan(self, pgvector_version):
+        db = recording_session()
+
+        await configure_ann_search(db, 10, filtered=True)
+
+        assert set_configs(db) == [("hnsw.iterative_scan", "relaxed_order"), ("hnsw.ef_search", "40")]
+
+    @pytest.mark.asyncio
+    async def test_filtered_search_on_old_pgvector_widens_ef_search(self):
+        db = recording_session()
+
+        with patch("app.utils.vector_index._pgvector_version", (0, 7, 4)):
+            await configure_ann_search(db, 300, filtered=True)
+            await configure_ann_search(db, 10, filtered=True, ef_search=50)
+
+        assert set_configs(db) == [("hnsw.ef_search", "1000"), ("hnsw.ef_search", "200")]
+
+
+class TestAnnSearch:
+    """Test the shape of the pre-filtered ANN query."""
+
+    @pytest.mark.asyncio
+    async def test_filters_go_inside_and_the_threshold_outside_the_ann_subquery(self, pgvector_version):
+        db = recording_session()
+
+        await ann_search(
+            db, "__user_abc_reviews", [0.1, 0.2], limit=5, similarity_threshold=0.7,
+            filters={"source": ["g2", "trustpilot"]}
+        )
+
+        *_, (query, params) = db.statements
+        assert [name for name, _ in set_configs(db)] == ["hnsw.iterative_scan", "hnsw.ef_search"]
+        sql = squash(query)
+        inner = sql[sql.index("FROM ("):sql.index(") AS ann")]
+        distance = '"__embedding__" <=> CAST(:query_embedding AS vector)'
+        assert 'WHERE "__embedding__" IS NOT NULL AND "source" = ANY(:f0)' in inner
+        # The index can only serve ORDER BY the bare operator with a LIMIT
+        assert f"ORDER BY {distance} LIMIT :limit" in inner
+        assert ":max_distance" not in inner
+        assert "WHERE ann.__distance__ <= :max_distance ORDER BY ann.__distance__" in sql
+        assert params == {
+            "query_embedding": "[0.1,0.2]", "f0": ["g2", "trustpilot"], "limit": 5, "max_distance": pytest.approx(0.3)
+        }
+
+    @pytest.mark.asyncio
+    async def test_unlimited_search_is_exact(self):
+        db = recording_session()
+
+        await ann_search(db, "__user_abc_reviews", [0.1], limit=None)
+
+        [(query, params)] = db.statements
+        assert "LIMIT" not in str(query) and "WHERE ann." not in str(query)
+        assert "limit" not in params
+
+
+class TestReviewSimilaritySearch:
+    """Test the SQL ReviewRepository.similarity_search sends."""
+
+    @pytest.mark.asyncio
+    async def test_prefilters_and_limit_stay_in_the_candidate_query(self, pgvector_version):
+        db = recording_session()
+
+        await ReviewRepository.similarity_search(
+            db, [0.1, 0.2], company_id="company-1", limit=20, similarity_threshold=0.8, platform="g2"
+        )
+
+        *_, (query, _) = db.statements
+        assert set_configs(db) == [("hnsw.iterative_scan", "relaxed_order"), ("hnsw.ef_search", "40")]
+        compiled = query.compile(dialect=postgresql.dialect())
+        sql = re.sub(r"::\w+", "", squash(compiled))
+        inner = sql[sql.index("JOIN (") + len("JOIN ("):sql.index(") AS anon_1")]
+        assert "reviews.company_id = %(company_id_1)s AND reviews.platform = %(platform_1)s" in inner
+        assert inner.endswith("ORDER BY reviews.embedding <=> %(embedding_1)s LIMIT %(param_1)s")
+        # The threshold filters candidates outside, where it cannot defeat the index
+        outer = sql[sql.index(") AS anon_1"):]
+        assert outer.endswith("WHERE anon_1.distance <= %(distance_1)s ORDER BY anon_1.distance")
+        assert compiled.params["param_1"] == 20
+        assert compiled.params["distance_1"] == pytest.approx(0.2)
+
+    @pytest.mark.asyncio
+    async def test_unfiltered_search_skips_the_iterative_scan(self, pgvector_version):
+        db = recording_session()
+
+        await ReviewRepository.similarity_search(db, [0.1, 0.2], limit=50, ef_search=80)
+
+        assert set_configs(db) == [("hnsw.ef_search", "80")]
@@ -0,0 +1,91 @@
+"""
+Tests for pgvector binary decoding and shared embedding matrices.
+"""
+
+import struct
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.vectors import (
+    decode_pgvector_binary,
+    embeddings_to_matrix,
+    matrix_row_views,
+    normalize_rows,
+)
+
+
+def _pgvector_send(values):
+    """Encode a vector the way pgvector's vector_send does."""
+    return struct.pack(f">HH{len(values)}f", len(values), 0, *values)
+
+
+class TestDecodePgvectorBinary:
+    """Test decoding vector_send output into a float32 matrix."""
+
+    def test_decodes_rows_in_order(self):
+        rows = [[0.5, -1.0, 2.0], [3.0, 0.25, -0.125]]
+        out = np.empty((2, 3), dtype=np.float32)
+
+        valid = decode_pgvector_binary([_pgvector_send(r) for r in rows], out)
+
+        assert valid.all()
+        assert out.dtype == np.float32
+        np.testing.assert_array_equal(out, np.array(rows, dtype=np.float32))
+
+    def test_null_rows_become_zero_vectors(self):
+        out = np.full((3, 2), 7.0, dtype=np.float32)
+
+        valid = decode_pgvector_binary(
+            [_pgvector_send([1.0, 2.0]), None, _pgvector_send([3.0, 4.0])], out
+        )
+
+        assert valid.tolist() == [True, False, True]
+        np.testing.assert_array_equal(out[1], [0.0, 0.0])
+        np.testing.assert_array_equal(out[2], [3.0, 4.0])
+
+    def test_dimension_mismatch_raises(self):
+        out = np.empty((2, 2), dtype=np.float32)
+
+        with pytest.raises(ValueError):
+            decode_pgvector_binary([_pgvector_send([1.0, 2.0]), _pgvector_send([1.0])], out)
+
+
+class TestEmbeddingsToMatrix:
+    """Test rebuilding matrices from DataFrame embedding columns."""
+
+    def setup_method(self):
+        self.matrix = np.arange(12, dtype=np.float32).reshape(4, 3)
+        self.df = pd.DataFrame({"id": [1, 2, 3, 4]})
+        self.df["__embedding__"] = matrix_row_views(self.matrix)
+
+    def test_full_column_returns_shared_matrix(self):
+        result = embeddings_to_matrix(self.df["__embedding__"], self.matrix)
+
+        assert result is self.matrix
+
+    def test_copied_frame_still_shares_matrix(self):
+        result = embeddings_to_matrix(self.df.copy()["__embedding__"], self.matrix)
+
+        assert result is self.matrix
+
+    def test_filtered_frame_gathers_rows(self):
+        filtered = self.df[self.df["id"].isin([2, 4])].iloc[::-1]
+
+        result = embeddings_to_matrix(filtered["__embedding__"], self.matrix)
+
+        np.testing.assert_array_equal(result, self.matrix[[3, 1]])
+
+    def test_lists_and_text_are_stacked(self):
+        column = pd.Series([[1.0, 2.0], "[3.0,4.0]", None])
+
+        result = embeddings_to_matrix(column)
+
+        assert result.dtype == np.float32
+        np.testing.assert_array_equal(result, [[1.0, 2.0], [3.0, 4.0], [0.0, 0.0]])
+
+    def test_normalize_rows_keeps_zero_rows(self):
+        result = normalize_rows(np.array([[3.0, 4.0], [0.0, 0.0]], dtype=np.float32))
+
+        np.testing.assert_allclose(result, [[0.6, 0.8], [0.0, 0.0]])
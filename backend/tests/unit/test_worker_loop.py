@@ -0,0 +1,87 @@
+"""
+Unit tests for the persistent Celery worker event loop.
+"""
+
+import asyncio
+import threading
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from app.core import worker_loop
+from app.core.worker_loop import (
+    async_task,
+    get_worker_http_client,
+    run_async,
+    shutdown_worker_loop,
+    start_worker_loop,
+)
+
+
+@pytest.fixture
+def loop_state():
+    with patch("app.database.session.cleanup_database", AsyncMock()) as cleanup:
+        start_worker_loop()
+        yield cleanup
+        shutdown_worker_loop()
+
+
+async def running_loop():
+    return asyncio.get_running_loop()
+
+
+class TestWorkerLoop:
+    """Test loop reuse, shared clients and shutdown."""
+
+    def test_tasks_share_one_loop(self, loop_state):
+        first = run_async(running_loop())
+        second = run_async(running_loop())
+
+        assert first is second is worker_loop._worker_loop.loop
+        assert worker_loop._worker_loop.tasks_run == 2
+
+    def test_async_task_decorator(self, loop_state):
+        @async_task
+        async def add(a, b):
+            """Add two numbers."""
+            await asyncio.sleep(0)
+            return a + b
+
+        assert add(2, 3) == 5
+        assert add.__doc__ == "Add two numbers."
+
+    def test_http_client_is_reused_and_closed_on_shutdown(self, loop_state):
+        async def client():
+            return get_worker_http_client()
+
+        shared = run_async(client())
+        assert shared is not None and run_async(client()) is shared
+        # Not on the worker loop: no shared client
+        assert get_worker_http_client() is None
+
+        loop = worker_loop._worker_loop.loop
+        shutdown_worker_loop()
+
+        assert shared.is_closed
+        assert loop.is_closed()
+        loop_state.assert_awaited_once()
+        assert worker_loop._worker_loop is None
+
+    def test_other_threads_get_a_throwaway_loop(self, loop_state):
+        loops = []
+        thread = threading.Thread(target=lambda: loops.append(run_async(running_loop())))
+        thread.start()
+        thread.join()
+
+        assert loops[0] is not worker_loop._worker_loop.loop
+        assert loops[0].is_closed()
+
+    def test_nested_run_async_is_rejected(self, loop_state):
+        async def nested():
+            coro = running_loop()
+            try:
+                run_async(coro)
+            finally:
+                coro.close()
+
+        with pytest.raises(RuntimeError):
+            run_async(nested())